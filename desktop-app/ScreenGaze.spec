@@ -106,17 +106,33 @@ hiddenimports = [
     'viewmodel.ml_control_viewmodel',
     'db',
     'db.database',
+    'db.migrations',
     'db.session_repository',
     'db.user_repository',
     'db.focus_sample_repository',
+    'db.focus_sample_writer',
+    'db.session_metrics_repository',
     'services',
     'services.focus_tracking_worker',
     'services.distraction_notifier_worker',
     'services.notification_service',
+    'services.frame_pipeline',
+    'services.frame_scheduler',
+    'services.frame_sources',
+    'services.metrics',
+    'services.preview_frames',
+    'services.roi_tracker',
+    'services.firestore_uploader',
+    'services.attention_window',
+    'services.session_metrics',
+    'services.face_tracks',
+    'services.landmark_pool',
+    'services.tracker_host',
     'scripts',
     'scripts.build_reports',
     'ml_runner_scripts',
     'ml_runner_scripts.FocusPredictor',
+    'ml_runner_scripts.tree_ensemble',
 ]
 
 # ── Analysis ─────────────────────────────────────────────────────────
@@ -1,10 +1,74 @@
+import sqlite3
 import time
 import uuid
 from .database import Database
 
+INSERT_SAMPLE_SQL = """
+    INSERT INTO focus_samples (
+        focus_sample_id, session_id, timestamp,
+        face_x, face_y, face_w, face_h,
+        left_eye_x, left_eye_y, left_eye_w, left_eye_h,
+        right_eye_x, right_eye_y, right_eye_w, right_eye_h,
+        left_eye_dx, left_eye_dy, right_eye_dx, right_eye_dy,
+        sym_dx, sym_dy, yaw, pitch, roll, label,
+        left_iris_x, left_iris_y,
+        right_iris_x, right_iris_y,
+        face_z,
+        attention_state, focus_score,
+        track_id, primary_face
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Columns of focus_samples aliased to the keyword names of insert_sample.
+SAMPLE_SELECT_COLUMNS = """
+    session_id, timestamp,
+    left_iris_x AS left_x, left_iris_y AS left_y,
+    right_iris_x AS right_x, right_iris_y AS right_y,
+    face_x, face_y, face_z,
+    attention_state, focus_score,
+    face_w, face_h,
+    left_eye_x, left_eye_y, left_eye_w, left_eye_h,
+    right_eye_x, right_eye_y, right_eye_w, right_eye_h,
+    left_eye_dx, left_eye_dy, right_eye_dx, right_eye_dy,
+    sym_dx, sym_dy, yaw, pitch, roll, label,
+    track_id, primary_face
+"""
+
+
+def sample_row(
+    sample_id, session_id, timestamp,
+    left_x, left_y, right_x, right_y,
+    face_x, face_y, face_z,
+    attention_state, focus_score,
+    face_w=None, face_h=None,
+    left_eye_x=None, left_eye_y=None, left_eye_w=None, left_eye_h=None,
+    right_eye_x=None, right_eye_y=None, right_eye_w=None, right_eye_h=None,
+    left_eye_dx=None, left_eye_dy=None,
+    right_eye_dx=None, right_eye_dy=None,
+    sym_dx=None, sym_dy=None,
+    yaw=None, pitch=None, roll=None,
+    label=None,
+    track_id=None,
+    primary_face=True,
+):
+    """Parameter tuple for INSERT_SAMPLE_SQL; takes the same arguments as insert_sample."""
+    return (
+        sample_id, session_id, timestamp,
+        face_x, face_y, face_w, face_h,
+        left_eye_x, left_eye_y, left_eye_w, left_eye_h,
+        right_eye_x, right_eye_y, right_eye_w, right_eye_h,
+        left_eye_dx, left_eye_dy, right_eye_dx, right_eye_dy,
+        sym_dx, sym_dy, yaw, pitch, roll, label,
+        left_x, left_y, right_x, right_y,
+        face_z,
+        attention_state, focus_score,
+        track_id, int(bool(primary_face)),
+    )
+
+
 class FocusSampleRepository:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db=None):
+        self.db = db or Database()
 
     def insert_sample(
         self, session_id, timestamp,
@@ -19,38 +83,32 @@ class FocusSampleRepository:
         sym_dx=None, sym_dy=None,
         yaw=None, pitch=None, roll=None,
         label=None,
+        track_id=None,
+        primary_face=True,
     ):
+        sample_id = str(uuid.uuid4())
+        row = sample_row(
+            sample_id, session_id, timestamp,
+            left_x, left_y, right_x, right_y,
+            face_x, face_y, face_z,
+            attention_state, focus_score,
+            face_w=face_w, face_h=face_h,
+            left_eye_x=left_eye_x, left_eye_y=left_eye_y,
+            left_eye_w=left_eye_w, left_eye_h=left_eye_h,
+            right_eye_x=right_eye_x, right_eye_y=right_eye_y,
+            right_eye_w=right_eye_w, right_eye_h=right_eye_h,
+            left_eye_dx=left_eye_dx, left_eye_dy=left_eye_dy,
+            right_eye_dx=right_eye_dx, right_eye_dy=right_eye_dy,
+            sym_dx=sym_dx, sym_dy=sym_dy,
+            yaw=yaw, pitch=pitch, roll=roll,
+            label=label,
+            track_id=track_id,
+            primary_face=primary_face,
+        )
+
         conn = self.db.connect()
         try:
-            cur = conn.cursor()
-
-            sample_id = str(uuid.uuid4())
-
-            cur.execute("""
-                INSERT INTO focus_samples (
-                    focus_sample_id, session_id, timestamp,
-                    face_x, face_y, face_w, face_h,
-                    left_eye_x, left_eye_y, left_eye_w, left_eye_h,
-                    right_eye_x, right_eye_y, right_eye_w, right_eye_h,
-                    left_eye_dx, left_eye_dy, right_eye_dx, right_eye_dy,
-                    sym_dx, sym_dy, yaw, pitch, roll, label,
-                    left_iris_x, left_iris_y,
-                    right_iris_x, right_iris_y,
-                    face_z,
-                    attention_state, focus_score
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                sample_id, session_id, timestamp,
-                face_x, face_y, face_w, face_h,
-                left_eye_x, left_eye_y, left_eye_w, left_eye_h,
-                right_eye_x, right_eye_y, right_eye_w, right_eye_h,
-                left_eye_dx, left_eye_dy, right_eye_dx, right_eye_dy,
-                sym_dx, sym_dy, yaw, pitch, roll, label,
-                left_x, left_y, right_x, right_y,
-                face_z,
-                attention_state, focus_score
-            ))
-
+            conn.execute(INSERT_SAMPLE_SQL, row)
             conn.commit()
             return sample_id
         except Exception:
@@ -67,9 +125,38 @@ class FocusSampleRepository:
             cur = conn.cursor()
             cur.execute(
                 "SELECT attention_state FROM focus_samples "
-                "WHERE session_id = ? AND timestamp >= ?",
+                "WHERE session_id = ? AND timestamp >= ? AND primary_face = 1",
                 (session_id, cutoff),
             )
             return [row[0] for row in cur.fetchall()]
         finally:
             conn.close()
+
+    def iter_samples_after(self, session_id, after=None, chunk_size=500):
+        """Yield ``(focus_sample_id, sample)`` for a session in ``(timestamp, focus_sample_id)`` order.
+
+        ``sample`` uses the keyword names of :meth:`insert_sample`. When
+        *after* is a ``(timestamp, focus_sample_id)`` cursor only rows past it
+        are returned, so samples sharing the cursor's timestamp (the faces of
+        one frame) are not skipped.
+        """
+        query = f"SELECT focus_sample_id, {SAMPLE_SELECT_COLUMNS} FROM focus_samples WHERE session_id = ?"
+        params = [session_id]
+        if after is not None:
+            query += " AND (timestamp, focus_sample_id) > (?, ?)"
+            params.extend(after)
+        query += " ORDER BY timestamp, focus_sample_id"
+
+        conn = self.db.connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            cur = conn.execute(query, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    sample = dict(row)
+                    yield sample.pop("focus_sample_id"), sample
+        finally:
+            conn.close()
@@ -0,0 +1,164 @@
+import sqlite3
+import threading
+import time
+import uuid
+
+from services.metrics import registry as metrics
+
+from .database import Database
+from .focus_sample_repository import INSERT_SAMPLE_SQL, sample_row
+
+
+class FocusSampleWriter:
+    """Write-behind sink for focus samples.
+
+    Holds one long-lived WAL-mode connection and buffers submitted samples,
+    writing them with ``executemany`` in a single transaction once
+    ``batch_size`` samples are pending or the oldest has waited
+    ``flush_interval_ms``. ``stop()`` flushes whatever is left. A crash loses
+    at most the samples buffered since the last flush.
+    """
+
+    def __init__(self, db=None, *, batch_size=64, flush_interval_ms=500, on_error=None):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.db = db or Database()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.on_error = on_error
+
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.batches_written = 0
+
+        self._pending = []
+        self._first_pending_at = None
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._conn = None
+        self._thread = None
+        self._stopping = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def start(self):
+        if self._conn is not None:
+            return
+        conn = self.db.connect(check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        # In WAL mode NORMAL only syncs at checkpoints; committed batches
+        # survive an app crash, only a power loss can drop the latest ones.
+        conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn = conn
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="FocusSampleWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, **sample) -> str:
+        """Queue one sample (``insert_sample`` keyword arguments) and return its id."""
+        sample_id = str(uuid.uuid4())
+        row = sample_row(sample_id, **sample)
+        with self._cond:
+            if self._conn is None:
+                raise RuntimeError("FocusSampleWriter is not running")
+            if not self._pending:
+                # Wake the flusher so it starts the interval countdown.
+                self._first_pending_at = time.monotonic()
+                self._cond.notify()
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return sample_id
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write all buffered samples now. Returns the number of rows written."""
+        with self._cond:
+            rows = self._take_pending()
+        return self._write(rows)
+
+    def stop(self):
+        """Flush buffered samples and close the connection."""
+        if self._conn is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._cond:
+            conn, self._conn = self._conn, None
+        conn.close()
+
+    def _take_pending(self):
+        rows, self._pending = self._pending, []
+        self._first_pending_at = None
+        return rows
+
+    def _flush_due(self, now) -> bool:
+        if len(self._pending) >= self.batch_size:
+            return True
+        return bool(self._pending) and now - self._first_pending_at >= self.flush_interval
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping and not self._flush_due(time.monotonic()):
+                    timeout = None
+                    if self._pending:
+                        timeout = max(
+                            0.0, self._first_pending_at + self.flush_interval - time.monotonic())
+                    self._cond.wait(timeout)
+                if self._stopping:
+                    return
+                rows = self._take_pending()
+            self._write(rows)
+
+    def _write(self, rows) -> int:
+        if not rows:
+            return 0
+        with self._write_lock:
+            try:
+                with metrics.histogram("sqlite.batch_write_ms").time(), self._conn:
+                    self._conn.executemany(INSERT_SAMPLE_SQL, rows)
+            except sqlite3.Error:
+                # One bad row (e.g. an unknown session) rolls back the whole
+                # batch; retry row by row so only the offending rows are lost.
+                return self._write_rows_individually(rows)
+            self.rows_written += len(rows)
+            self.batches_written += 1
+            metrics.counter("sqlite.rows_written").inc(len(rows))
+            return len(rows)
+
+    def _write_rows_individually(self, rows) -> int:
+        written = 0
+        for row in rows:
+            try:
+                with self._conn:
+                    self._conn.execute(INSERT_SAMPLE_SQL, row)
+                written += 1
+            except sqlite3.Error as exc:
+                self.rows_failed += 1
+                self._report_error(exc)
+        self.rows_written += written
+        self.batches_written += 1
+        metrics.counter("sqlite.rows_written").inc(written)
+        return written
+
+    def _report_error(self, exc):
+        if self.on_error:
+            self.on_error(exc)
+        else:
+            print(f"[FocusSampleWriter] Failed to write sample: {exc}")
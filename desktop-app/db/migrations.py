@@ -0,0 +1,139 @@
+"""
+Versioned schema migrations for the local SQLite database.
+
+``schema.sql`` creates the tables a fresh install starts from; everything
+added afterwards is a numbered migration here. The number of the last
+applied migration is stored in ``PRAGMA user_version``, so each migration
+runs exactly once per database, inside its own transaction.
+"""
+
+
+def _add_focus_sample_feature_columns(conn):
+    # Databases created before the feature columns were added to schema.sql.
+    existing_cols = {row[1] for row in conn.execute("PRAGMA table_info(focus_samples)")}
+    required_cols = {
+        "face_w": "FLOAT",
+        "face_h": "FLOAT",
+        "left_eye_x": "FLOAT",
+        "left_eye_y": "FLOAT",
+        "left_eye_w": "FLOAT",
+        "left_eye_h": "FLOAT",
+        "right_eye_x": "FLOAT",
+        "right_eye_y": "FLOAT",
+        "right_eye_w": "FLOAT",
+        "right_eye_h": "FLOAT",
+        "left_eye_dx": "FLOAT",
+        "left_eye_dy": "FLOAT",
+        "right_eye_dx": "FLOAT",
+        "right_eye_dy": "FLOAT",
+        "sym_dx": "FLOAT",
+        "sym_dy": "FLOAT",
+        "yaw": "FLOAT",
+        "pitch": "FLOAT",
+        "roll": "FLOAT",
+        "label": "INTEGER",
+    }
+    for col, col_type in required_cols.items():
+        if col not in existing_cols:
+            conn.execute(f"ALTER TABLE focus_samples ADD COLUMN {col} {col_type}")
+
+
+def _add_focus_sample_session_time_index(conn):
+    # Per-session range scans: recent attention states, session reports.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_focus_samples_session_timestamp "
+        "ON focus_samples(session_id, timestamp)"
+    )
+
+
+def _add_focus_sample_time_index(conn):
+    # Incremental sync across sessions (WHERE timestamp > last_sync).
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_focus_samples_timestamp "
+        "ON focus_samples(timestamp)"
+    )
+
+
+def _create_session_metrics(conn):
+    # Running per-session totals kept by SessionMetricsAccumulator, so a
+    # report does not need to scan focus_samples.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS session_metrics (
+            session_id TEXT PRIMARY KEY,
+            sample_count INTEGER NOT NULL,
+            focus_time FLOAT NOT NULL,
+            distraction_time FLOAT NOT NULL,
+            score_sum FLOAT NOT NULL,
+            score_count INTEGER NOT NULL,
+            min_score FLOAT,
+            max_score FLOAT,
+            first_timestamp FLOAT,
+            last_timestamp FLOAT,
+            last_state INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            FOREIGN KEY(session_id) REFERENCES sessions(session_id)
+        )
+        """
+    )
+
+
+def _add_focus_sample_track_id(conn):
+    # Multi-face tracking writes one sample per tracked face and frame;
+    # track_id tells the faces of a session apart (NULL in single-face mode).
+    existing_cols = {row[1] for row in conn.execute("PRAGMA table_info(focus_samples)")}
+    if "track_id" not in existing_cols:
+        conn.execute("ALTER TABLE focus_samples ADD COLUMN track_id INTEGER")
+
+
+def _add_focus_sample_primary_face(conn):
+    # Only the main face of a multi-face frame counts towards the session
+    # report and belongs to the session's user; the other tracks are 0.
+    # Earlier rows all came from single-face tracking.
+    existing_cols = {row[1] for row in conn.execute("PRAGMA table_info(focus_samples)")}
+    if "primary_face" not in existing_cols:
+        conn.execute("ALTER TABLE focus_samples ADD COLUMN primary_face INTEGER NOT NULL DEFAULT 1")
+
+
+# (version, description, apply). Append new migrations; never renumber.
+MIGRATIONS = [
+    (1, "add focus_samples feature columns", _add_focus_sample_feature_columns),
+    (2, "index focus_samples by (session_id, timestamp)", _add_focus_sample_session_time_index),
+    (3, "index focus_samples by timestamp", _add_focus_sample_time_index),
+    (4, "create session_metrics", _create_session_metrics),
+    (5, "add focus_samples track_id", _add_focus_sample_track_id),
+    (6, "add focus_samples primary_face", _add_focus_sample_primary_face),
+]
+
+
+def schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, migrations=MIGRATIONS) -> list[int]:
+    """Apply every migration newer than the database's version. Returns the versions applied."""
+    versions = [version for version, _, _ in migrations]
+    if versions != sorted(set(versions)):
+        raise ValueError("Migration versions must be unique and increasing")
+
+    applied = []
+    for version, description, apply in migrations:
+        if version <= schema_version(conn):
+            continue
+        # IMMEDIATE takes the write lock up front; re-check the version under
+        # it in case another connection migrated in the meantime.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= schema_version(conn):
+                conn.rollback()
+                continue
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"[Database] Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
@@ -0,0 +1,43 @@
+import sqlite3
+
+from .database import Database
+
+
+class SessionMetricsRepository:
+    def __init__(self, db=None):
+        self.db = db or Database()
+
+    def save(self, session_id, metrics):
+        """Upsert the running totals of a SessionMetricsAccumulator for *session_id*."""
+        values = metrics.to_dict()
+        columns = list(values)
+        conn = self.db.connect()
+        try:
+            conn.execute(
+                f"""
+                INSERT INTO session_metrics (session_id, {", ".join(columns)}, updated_at)
+                VALUES (?, {", ".join("?" for _ in columns)}, datetime('now'))
+                ON CONFLICT(session_id) DO UPDATE SET
+                    {", ".join(f"{col} = excluded.{col}" for col in columns)},
+                    updated_at = excluded.updated_at
+                """,
+                (session_id, *values.values()),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def get(self, session_id):
+        """Return the stored totals as a dict, or None if none were saved for the session."""
+        conn = self.db.connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            row = conn.execute(
+                "SELECT * FROM session_metrics WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            return dict(row) if row is not None else None
+        finally:
+            conn.close()
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+CACHE_FORMAT_VERSION = 1
+CSV_CHUNK_ROWS = 250_000
+MANIFEST_NAME = "manifest.json"
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_directory(source_path: Path, cache_dir: Path) -> Path:
+    """Where the cache of *source_path* lives: one directory per source file."""
+    resolved = Path(source_path).resolve()
+    key = hashlib.sha256(str(resolved).encode("utf-8")).hexdigest()[:16]
+    return Path(cache_dir) / f"{resolved.stem}-{key}"
+
+
+def _read_manifest(directory: Path) -> dict | None:
+    try:
+        return json.loads((directory / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(directory: Path, manifest: dict) -> None:
+    tmp_path = directory / f"{MANIFEST_NAME}.tmp"
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp_path, directory / MANIFEST_NAME)
+
+
+def _is_current(manifest: dict | None, source_path: Path) -> bool:
+    """True when *manifest* describes the current contents of *source_path*.
+
+    Size and mtime are checked first; when only the mtime moved (a copy or
+    a touch) the content hash decides, and a match refreshes the manifest.
+    """
+    if not manifest or manifest.get("format_version") != CACHE_FORMAT_VERSION:
+        return False
+    stat = source_path.stat()
+    if manifest["source_size"] != stat.st_size:
+        return False
+    if manifest["source_mtime_ns"] == stat.st_mtime_ns:
+        return True
+    return manifest["source_sha256"] == file_sha256(source_path)
+
+
+def _write_npy(path: Path, raw_path: Path, raw_dtype: np.dtype, dtype: np.dtype, rows: int) -> None:
+    """Turn the raw column at *raw_path* into a ``.npy`` file of *dtype* at *path*."""
+    with open(path, "wb") as out:
+        np.lib.format.write_array_header_1_0(
+            out, {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (rows,)}
+        )
+        if raw_dtype == dtype:
+            with open(raw_path, "rb") as raw:
+                shutil.copyfileobj(raw, out, 1 << 20)
+            return
+        raw_values = np.memmap(raw_path, dtype=raw_dtype, mode="r", shape=(rows,)) if rows else []
+        for start in range(0, rows, CSV_CHUNK_ROWS):
+            out.write(np.asarray(raw_values[start:start + CSV_CHUNK_ROWS]).astype(dtype).tobytes())
+        del raw_values
+
+
+def build_cache(
+    source_path: Path,
+    directory: Path,
+    *,
+    chunk_rows: int = CSV_CHUNK_ROWS,
+) -> dict:
+    """Convert the CSV at *source_path* into one ``.npy`` file per numeric column.
+
+    The CSV is parsed in chunks so building never holds more than
+    *chunk_rows* rows in memory. Integer columns without gaps (labels,
+    subject ids) are stored as int64, integer columns with gaps as float64
+    and every other numeric column as float32. Columns pandas cannot read
+    as numbers are left out. Missing values stay NaN, so each training
+    script applies its own cleaning rules on load.
+    """
+    source_path = Path(source_path)
+    stat = source_path.stat()
+    source_sha256 = file_sha256(source_path)
+
+    work_dir = directory.with_name(f"{directory.name}.building")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    work_dir.mkdir(parents=True)
+
+    # Integer columns are written as float64 (exact to 2**53) until the
+    # whole file has been seen; floating point columns go straight to float32.
+    raw_dtypes: dict[str, np.dtype] = {}
+    integer_columns: set[str] = set()
+    gaps: set[str] = set()
+    raw_files = {}
+    rows = 0
+    try:
+        for chunk in pd.read_csv(source_path, chunksize=chunk_rows, low_memory=False):
+            if not raw_dtypes:
+                for name in chunk.columns:
+                    series = chunk[name]
+                    if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+                        continue
+                    if pd.api.types.is_integer_dtype(series):
+                        integer_columns.add(name)
+                        raw_dtypes[name] = np.dtype(np.float64)
+                    else:
+                        raw_dtypes[name] = np.dtype(np.float32)
+                    raw_files[name] = open(work_dir / f"{name}.raw", "wb")
+            for name, raw_dtype in raw_dtypes.items():
+                values = pd.to_numeric(chunk[name], errors="coerce").to_numpy(dtype=np.float64)
+                if name in integer_columns:
+                    finite = values[~np.isnan(values)]
+                    if len(finite) < len(values):
+                        gaps.add(name)
+                    if not np.array_equal(finite, np.round(finite)):
+                        integer_columns.discard(name)
+                raw_files[name].write(values.astype(raw_dtype).tobytes())
+            rows += len(chunk)
+    finally:
+        for f in raw_files.values():
+            f.close()
+
+    columns = {}
+    for name, raw_dtype in raw_dtypes.items():
+        if name in integer_columns:
+            dtype = np.dtype(np.float64 if name in gaps else np.int64)
+        else:
+            dtype = np.dtype(np.float32)
+        raw_path = work_dir / f"{name}.raw"
+        _write_npy(work_dir / f"{name}.npy", raw_path, raw_dtype, dtype, rows)
+        raw_path.unlink()
+        columns[name] = dtype.str
+
+    manifest = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "source_path": str(source_path.resolve()),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_sha256": source_sha256,
+        "rows": rows,
+        "columns": columns,
+    }
+    _write_manifest(work_dir, manifest)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(work_dir, directory)
+    return manifest
+
+
+class CachedDataset:
+    """Read-only, memory-mapped columns of a cached dataset.
+
+    Pickling keeps only the directory and column names, and unpickling maps
+    the files again, so a process pool shares one copy of the data through
+    the page cache instead of receiving a copy per task.
+    """
+
+    def __init__(self, directory: Path, columns: list[str] | None = None):
+        self.directory = Path(directory)
+        manifest = _read_manifest(self.directory)
+        if manifest is None:
+            raise FileNotFoundError(f"No dataset cache at {self.directory}")
+        self.manifest = manifest
+        available = list(manifest["columns"])
+        if columns is None:
+            columns = available
+        missing = sorted(set(columns) - set(available))
+        if missing:
+            raise ValueError(f"Dataset is missing required columns: {missing}")
+        self.columns = list(columns)
+        self._arrays = {
+            name: np.load(self.directory / f"{name}.npy", mmap_mode="r") for name in self.columns
+        }
+
+    def __len__(self) -> int:
+        return int(self.manifest["rows"])
+
+    def __getstate__(self):
+        return {"directory": self.directory, "columns": self.columns}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"], state["columns"])
+
+    def column(self, name: str) -> np.ndarray:
+        return self._arrays[name]
+
+    def complete_rows(self, columns: list[str]) -> np.ndarray:
+        """Indices of rows with no missing value in any of *columns*."""
+        mask = np.ones(len(self), dtype=bool)
+        for name in columns:
+            values = self._arrays[name]
+            if values.dtype.kind == "f":
+                mask &= ~np.isnan(values)
+        return np.flatnonzero(mask)
+
+    def frame(self, columns: list[str], rows: np.ndarray | None = None) -> pd.DataFrame:
+        """A DataFrame of *columns* for *rows* (all rows when None), indexed by row number."""
+        if rows is None:
+            data = {name: np.asarray(self._arrays[name]) for name in columns}
+            index = pd.RangeIndex(len(self))
+        else:
+            data = {name: self._arrays[name][rows] for name in columns}
+            index = pd.Index(rows)
+        return pd.DataFrame(data, index=index, copy=False)
+
+
+def open_cached_dataset(
+    source_path: Path,
+    cache_dir: Path,
+    columns: list[str] | None = None,
+) -> CachedDataset:
+    """Open the cache of *source_path*, (re)building it first when missing or stale."""
+    source_path = Path(source_path)
+    directory = cache_directory(source_path, cache_dir)
+    manifest = _read_manifest(directory)
+    if not _is_current(manifest, source_path):
+        print(f"[dataset_cache] Caching {source_path} in {directory}", flush=True)
+        build_cache(source_path, directory)
+    elif manifest["source_mtime_ns"] != source_path.stat().st_mtime_ns:
+        manifest["source_mtime_ns"] = source_path.stat().st_mtime_ns
+        _write_manifest(directory, manifest)
+    return CachedDataset(directory, columns)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+
+from dataset_cache import CachedDataset
+
+
+@dataclass
+class Fold:
+    """Row positions (into the planner's arrays) of one leave-one-subject-out fold."""
+
+    test_subject: int
+    train_subjects: list[int]
+    train_rows: np.ndarray
+    test_rows: np.ndarray
+    fit_rows: np.ndarray
+    val_rows: np.ndarray
+
+
+# Folds kept per planner. Pool tasks are queued fold by fold, so a worker
+# mostly sees the same subject several times in a row.
+FOLD_CACHE_SIZE = 2
+
+# Planners rebuilt from a dataset cache in this process, so every pool task
+# of a worker reuses the same arrays (and quantile sketch).
+_PLANNERS: dict[tuple, "FoldPlanner"] = {}
+
+
+class FoldPlanner:
+    """Leave-one-subject-out folds over one feature set, derived by row index.
+
+    The features are copied once into a contiguous float32 matrix and the
+    rows of each subject are found once; every fold is then a set of index
+    arrays instead of a pandas boolean mask and a copy of the training
+    frame. The validation split is the same ``train_test_split`` the
+    training scripts always used, applied to row positions, so folds match
+    the frame-based ones row for row.
+
+    A planner created by :meth:`from_dataset` pickles as a reference to the
+    dataset cache and is rebuilt once per process on unpickling.
+    """
+
+    def __init__(
+        self,
+        frame: pd.DataFrame,
+        feature_columns: list[str],
+        validation_fraction: float,
+        *,
+        target_column: str,
+        subject_column: str,
+        dataset: CachedDataset | None = None,
+    ):
+        self.feature_columns = list(feature_columns)
+        self.validation_fraction = validation_fraction
+        self.target_column = target_column
+        self.subject_column = subject_column
+        self.dataset = dataset
+        self.row_ids = frame.index.to_numpy()
+        self.features = np.ascontiguousarray(frame[self.feature_columns].to_numpy(dtype=np.float32))
+        self.labels = frame[target_column].to_numpy(dtype=np.int64)
+
+        subjects, self._subject_codes = np.unique(
+            frame[subject_column].to_numpy(dtype=np.int64), return_inverse=True
+        )
+        self.subjects = subjects.tolist()
+        order = np.argsort(self._subject_codes, kind="stable")
+        bounds = np.searchsorted(self._subject_codes[order], np.arange(len(self.subjects) + 1))
+        self.subject_rows = {
+            subject: order[bounds[code]:bounds[code + 1]] for code, subject in enumerate(self.subjects)
+        }
+        self._sketch = None
+        self._folds: dict[int, Fold] = {}
+
+    @classmethod
+    def from_dataset(
+        cls,
+        dataset: CachedDataset,
+        feature_columns: list[str],
+        validation_fraction: float,
+        *,
+        target_column: str,
+        subject_column: str,
+    ) -> "FoldPlanner":
+        key = (str(dataset.directory), tuple(feature_columns), validation_fraction, target_column, subject_column)
+        planner = _PLANNERS.get(key)
+        if planner is None:
+            required_columns = list(dict.fromkeys([*feature_columns, target_column, subject_column]))
+            frame = dataset.frame(required_columns, dataset.complete_rows(required_columns))
+            planner = cls(
+                frame,
+                feature_columns,
+                validation_fraction,
+                target_column=target_column,
+                subject_column=subject_column,
+                dataset=dataset,
+            )
+            _PLANNERS[key] = planner
+        return planner
+
+    def __reduce_ex__(self, protocol):
+        if self.dataset is None:
+            return super().__reduce_ex__(protocol)
+        return (
+            _planner_from_dataset,
+            (self.dataset, self.feature_columns, self.validation_fraction,
+             self.target_column, self.subject_column),
+        )
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_sketch"] = None  # QuantileDMatrix cannot be pickled; rebuilt on demand
+        state["_folds"] = {}
+        return state
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def fold(self, test_subject: int) -> Fold:
+        fold = self._folds.get(test_subject)
+        if fold is None:
+            fold = self._plan_fold(test_subject)
+            if len(self._folds) >= FOLD_CACHE_SIZE:
+                self._folds.pop(next(iter(self._folds)))
+            self._folds[test_subject] = fold
+        return fold
+
+    def _plan_fold(self, test_subject: int) -> Fold:
+        code = self.subjects.index(test_subject)
+        train_rows = np.flatnonzero(self._subject_codes != code)
+        fit_rows, val_rows = train_test_split(
+            train_rows,
+            test_size=self.validation_fraction,
+            random_state=42,
+            stratify=self.labels[train_rows],
+        )
+        return Fold(
+            test_subject=test_subject,
+            train_subjects=[subject for subject in self.subjects if subject != test_subject],
+            train_rows=train_rows,
+            test_rows=self.subject_rows[test_subject],
+            fit_rows=fit_rows,
+            val_rows=val_rows,
+        )
+
+    def features_frame(self, rows: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(
+            self.features[rows], columns=self.feature_columns, index=self.row_ids[rows], copy=False
+        )
+
+    def labels_series(self, rows: np.ndarray) -> pd.Series:
+        return pd.Series(self.labels[rows], index=self.row_ids[rows], name=self.target_column)
+
+    def quantile_sketch(self) -> xgb.QuantileDMatrix:
+        """XGBoost histogram cuts over every row, built on first use.
+
+        Fold matrices created with ``ref=`` this sketch are only binned, not
+        re-sketched. The cuts then also reflect the held-out subject's
+        feature distribution (never its labels), so models differ slightly
+        from ones sketched on the fold's own training rows.
+        """
+        if self._sketch is None:
+            self._sketch = xgb.QuantileDMatrix(
+                self.features, label=self.labels, feature_names=self.feature_columns
+            )
+        return self._sketch
+
+
+def _planner_from_dataset(dataset, feature_columns, validation_fraction, target_column, subject_column):
+    return FoldPlanner.from_dataset(
+        dataset,
+        feature_columns,
+        validation_fraction,
+        target_column=target_column,
+        subject_column=subject_column,
+    )
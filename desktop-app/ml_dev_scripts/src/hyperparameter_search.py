@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+
+SEARCH_STRATEGIES = ("grid", "halving")
+
+
+class GridSearch:
+    """Every candidate at its full budget, in a single rung.
+
+    Search strategies hand out rungs of parameter sets to evaluate
+    (:meth:`next_rung`) and are told the scores (:meth:`report`); the caller
+    decides whether a rung runs inline or in a process pool. ``results``
+    holds the full-budget results, in candidate order, once ``done``.
+    """
+
+    def __init__(self, candidates: list[dict]):
+        self.candidates = list(candidates)
+        self.results: list[Any] = []
+        self.done = False
+        self.rung = 0
+        self._pending: list[int] | None = None
+
+    @property
+    def rung_count(self) -> int:
+        return 1
+
+    def describe_rung(self) -> str:
+        return ""
+
+    def next_rung(self) -> list[dict]:
+        """Parameter sets for the next rung; must be followed by :meth:`report`."""
+        if self.done:
+            return []
+        self._pending = list(range(len(self.candidates)))
+        return [self.candidates[i] for i in self._pending]
+
+    def report(self, results: list[Any]) -> None:
+        self._pending = None
+        self.results = list(results)
+        self.done = True
+
+
+class SuccessiveHalving(GridSearch):
+    """Successive halving over a budget parameter such as ``n_estimators``.
+
+    Every candidate first runs with a fraction of its budget; after each
+    rung only the best ``1 / eta`` (by ``score``, ties to the earlier
+    candidate) go on, with ``eta`` times the budget. The last rung uses each
+    survivor's full budget, so its results are exactly what grid search
+    would have produced for those candidates. ``min_resource`` keeps early
+    rungs from going below a useful size (e.g. a few dozen trees).
+    """
+
+    def __init__(
+        self,
+        candidates: list[dict],
+        *,
+        eta: int = 3,
+        budget_param: str = "n_estimators",
+        min_resource: int = 20,
+    ):
+        if eta < 2:
+            raise ValueError(f"eta must be >= 2, got {eta}")
+        super().__init__(candidates)
+        self.eta = eta
+        self.budget_param = budget_param
+        self.min_resource = min_resource
+        self._alive = list(range(len(self.candidates)))
+        self._rung_count = max(1, math.ceil(math.log(max(len(self.candidates), 1), eta) - 1e-9))
+
+    @property
+    def rung_count(self) -> int:
+        return self._rung_count
+
+    @property
+    def budget_fraction(self) -> float:
+        return float(self.eta) ** (self.rung - (self._rung_count - 1))
+
+    def describe_rung(self) -> str:
+        return f"rung {self.rung + 1}/{self._rung_count} budget {self.budget_fraction:.0%}"
+
+    def _scaled(self, params: dict) -> dict:
+        if self.rung == self._rung_count - 1 or self.budget_param not in params:
+            return params
+        full = params[self.budget_param]
+        resource = max(min(self.min_resource, full), round(full * self.budget_fraction))
+        return {**params, self.budget_param: resource}
+
+    def next_rung(self) -> list[dict]:
+        if self.done:
+            return []
+        self._pending = list(self._alive)
+        return [self._scaled(self.candidates[i]) for i in self._pending]
+
+    def report(self, results: list[Any]) -> None:
+        if self.rung == self._rung_count - 1:
+            super().report(results)
+            return
+        keep = max(1, math.ceil(len(self._pending) / self.eta))
+        ranked = sorted(range(len(results)), key=lambda i: (-results[i].score, i))
+        self._alive = sorted(self._pending[i] for i in ranked[:keep])
+        self._pending = None
+        self.rung += 1
+
+
+def build_search(
+    strategy: str,
+    candidates: list[dict],
+    *,
+    eta: int = 3,
+) -> GridSearch:
+    if strategy == "grid":
+        return GridSearch(candidates)
+    if strategy == "halving":
+        return SuccessiveHalving(candidates, eta=eta)
+    raise ValueError(f"Unsupported search strategy: {strategy}")
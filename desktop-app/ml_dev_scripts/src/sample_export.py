@@ -0,0 +1,276 @@
+"""
+Export labelled focus samples from the app's SQLite databases for training.
+
+Rows of ``focus_samples`` are read together with their session's user and
+written as columnar shards, one directory of ``.npy`` column files per
+user and batch, under ``subject_<id>/``. Each app user becomes one
+``subject_id``; the mapping is kept in the export's manifest so re-running
+the export (or adding another database that knows the same user) keeps
+the ids stable. The manifest also stores, per database, the highest
+``rowid`` exported, so later runs only read the rows added since.
+
+The training scripts accept the export directory wherever they accept
+``master_dataset.csv``.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from dataset_cache import CachedDataset, _read_manifest, _write_manifest
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_EXPORT_DIR = BASE_DIR.parent / "RF" / "data" / "focus_sample_export"
+
+EXPORT_FORMAT_VERSION = 1
+EXPORT_BATCH_ROWS = 50_000
+
+TARGET_COLUMN = "label"
+SUBJECT_COLUMN = "subject_id"
+
+FEATURE_COLUMNS = [
+    "face_x",
+    "face_y",
+    "face_w",
+    "face_h",
+    "left_eye_x",
+    "left_eye_y",
+    "left_eye_w",
+    "left_eye_h",
+    "right_eye_x",
+    "right_eye_y",
+    "right_eye_w",
+    "right_eye_h",
+    "left_eye_dx",
+    "left_eye_dy",
+    "right_eye_dx",
+    "right_eye_dy",
+    "sym_dx",
+    "sym_dy",
+    "yaw",
+    "pitch",
+    "roll",
+]
+
+COLUMN_DTYPES = {
+    **{column: np.dtype(np.float32) for column in FEATURE_COLUMNS},
+    TARGET_COLUMN: np.dtype(np.int64),
+    SUBJECT_COLUMN: np.dtype(np.int64),
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Export labelled focus samples from focuscam.sqlite3 files as training shards."
+    )
+    parser.add_argument("databases", type=Path, nargs="+", help="SQLite databases to export.")
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=DEFAULT_EXPORT_DIR,
+        help=f"Export directory; existing exports are extended. Default: {DEFAULT_EXPORT_DIR}",
+    )
+    parser.add_argument(
+        "--batch-rows",
+        type=int,
+        default=EXPORT_BATCH_ROWS,
+        help=f"Rows fetched (and committed to the export) at a time. Default: {EXPORT_BATCH_ROWS}",
+    )
+    return parser.parse_args()
+
+
+def is_sample_export(path: Path) -> bool:
+    path = Path(path)
+    if not path.is_dir():
+        return False
+    manifest = _read_manifest(path)
+    return bool(manifest) and manifest.get("kind") == "focus_sample_export"
+
+
+def _empty_manifest() -> dict:
+    return {
+        "kind": "focus_sample_export",
+        "format_version": EXPORT_FORMAT_VERSION,
+        "rows": 0,
+        "columns": {name: dtype.str for name, dtype in COLUMN_DTYPES.items()},
+        "subjects": {},
+        "sources": {},
+        "shards": [],
+    }
+
+
+def _source_query(conn: sqlite3.Connection) -> str:
+    # Databases from older app versions may lack some feature columns.
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(focus_samples)")}
+    features = ", ".join(
+        f"fs.{column}" if column in existing else f"NULL AS {column}" for column in FEATURE_COLUMNS
+    )
+    # Only the primary face of a session belongs to its owner; the extra
+    # tracks of multi-face mode have no subject of their own yet. Databases
+    # written before primary_face existed can only trust single-face rows.
+    if "primary_face" in existing:
+        face_filter = " AND fs.primary_face = 1"
+    elif "track_id" in existing:
+        face_filter = " AND fs.track_id IS NULL"
+    else:
+        face_filter = ""
+    return f"""
+        SELECT fs.rowid, s.user_id, u.username, {features}, fs.label
+        FROM focus_samples fs
+        JOIN sessions s ON s.session_id = fs.session_id
+        LEFT JOIN users u ON u.user_id = s.user_id
+        WHERE fs.rowid > ? AND fs.label IS NOT NULL{face_filter}
+        ORDER BY fs.rowid
+    """
+
+
+def _subject_id(manifest: dict, user_id: str, username: str | None) -> int:
+    subjects = manifest["subjects"]
+    subject = subjects.get(user_id)
+    if subject is None:
+        next_id = max((s["subject_id"] for s in subjects.values()), default=0) + 1
+        subject = subjects[user_id] = {"subject_id": next_id, "username": username}
+    return subject["subject_id"]
+
+
+def _write_shard(directory: Path, columns: dict[str, np.ndarray]) -> None:
+    work_dir = directory.with_name(f"{directory.name}.building")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    work_dir.mkdir(parents=True)
+    for name, values in columns.items():
+        np.save(work_dir / f"{name}.npy", values)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(work_dir, directory)
+
+
+def export_database(
+    database_path: Path,
+    output_dir: Path,
+    *,
+    batch_rows: int = EXPORT_BATCH_ROWS,
+) -> int:
+    """Append the labelled samples of *database_path* added since the last export.
+
+    Rows are fetched *batch_rows* at a time from a read-only connection;
+    each batch is written as one shard per user and then recorded in the
+    manifest together with the new high-water mark, so an interrupted
+    export resumes after the last completed batch. Returns the number of
+    rows exported.
+    """
+    if batch_rows < 1:
+        raise ValueError(f"batch_rows must be >= 1, got {batch_rows}")
+    database_path = Path(database_path).resolve()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = _read_manifest(output_dir)
+    if manifest is None:
+        manifest = _empty_manifest()
+    elif manifest.get("kind") != "focus_sample_export":
+        raise ValueError(f"{output_dir} is not a focus sample export")
+    elif manifest["format_version"] != EXPORT_FORMAT_VERSION:
+        raise ValueError(
+            f"{output_dir} uses export format {manifest['format_version']}, "
+            f"expected {EXPORT_FORMAT_VERSION}; export into a new directory"
+        )
+
+    source_key = str(database_path)
+    source = manifest["sources"].setdefault(source_key, {"high_water_rowid": 0, "rows": 0})
+    shard_prefix = hashlib.sha256(source_key.encode("utf-8")).hexdigest()[:12]
+
+    conn = sqlite3.connect(f"{database_path.as_uri()}?mode=ro", uri=True)
+    exported = 0
+    try:
+        cur = conn.execute(_source_query(conn), (source["high_water_rowid"],))
+        while True:
+            rows = cur.fetchmany(batch_rows)
+            if not rows:
+                break
+            rowids, user_ids, usernames, *feature_values, labels = zip(*rows)
+            subject_ids = np.array(
+                [_subject_id(manifest, user_id, username) for user_id, username in zip(user_ids, usernames)],
+                dtype=np.int64,
+            )
+            columns = {
+                name: np.array(values, dtype=np.float32)
+                for name, values in zip(FEATURE_COLUMNS, feature_values)
+            }
+            columns[TARGET_COLUMN] = np.array(labels, dtype=np.int64)
+            columns[SUBJECT_COLUMN] = subject_ids
+
+            for subject_id in np.unique(subject_ids):
+                selected = subject_ids == subject_id
+                relative = f"subject_{subject_id}/part-{shard_prefix}-{rowids[0]:012d}"
+                _write_shard(output_dir / relative, {
+                    name: values[selected] for name, values in columns.items()
+                })
+                manifest["shards"].append({
+                    "path": relative,
+                    "subject_id": int(subject_id),
+                    "rows": int(selected.sum()),
+                })
+
+            source["high_water_rowid"] = int(rowids[-1])
+            source["rows"] += len(rows)
+            manifest["rows"] += len(rows)
+            _write_manifest(output_dir, manifest)
+            exported += len(rows)
+    finally:
+        conn.close()
+
+    print(
+        f"[sample_export] {database_path}: exported {exported} rows "
+        f"(high-water rowid {source['high_water_rowid']})",
+        flush=True,
+    )
+    return exported
+
+
+class SampleExport(CachedDataset):
+    """A focus sample export read like a dataset cache.
+
+    :meth:`column` returns the shards of a column concatenated in memory;
+    :meth:`iter_shards` maps one shard at a time for out-of-core readers.
+    """
+
+    def __init__(self, directory: Path, columns: list[str] | None = None):
+        self.directory = Path(directory)
+        manifest = _read_manifest(self.directory)
+        if not manifest or manifest.get("kind") != "focus_sample_export":
+            raise FileNotFoundError(f"No focus sample export at {self.directory}")
+        self.manifest = manifest
+        available = list(manifest["columns"])
+        if columns is None:
+            columns = available
+        missing = sorted(set(columns) - set(available))
+        if missing:
+            raise ValueError(f"Dataset is missing required columns: {missing}")
+        self.columns = list(columns)
+        self._arrays = {}
+        for name in self.columns:
+            dtype = np.dtype(manifest["columns"][name])
+            parts = [shard[name] for shard in self.iter_shards([name])]
+            self._arrays[name] = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    def iter_shards(self, columns: list[str]) -> Iterator[dict[str, np.ndarray]]:
+        for shard in self.manifest["shards"]:
+            directory = self.directory / shard["path"]
+            yield {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in columns}
+
+
+def open_sample_export(directory: Path, columns: list[str] | None = None) -> SampleExport:
+    return SampleExport(directory, columns)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    for database in args.databases:
+        export_database(database, args.output_dir, batch_rows=args.batch_rows)
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterator
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+
+from dataset_cache import open_cached_dataset
+from hyperparameter_search import build_search
+from sample_export import is_sample_export, open_sample_export
+from subject_holdout_training import (
+    DEFAULT_CHUNK_ROWS,
+    SUBJECT_COLUMN,
+    TARGET_COLUMN,
+    GridPointResult,
+    find_best_threshold,
+    get_xgb_param_grid,
+    log_grid_point,
+    production_validation_metrics,
+    rung_label,
+    save_xgb_production_model,
+    select_best_grid_point,
+    threshold_metrics,
+    train_xgb_on_matrices,
+    write_production_metrics,
+)
+
+
+Chunk = tuple[np.ndarray, np.ndarray]
+
+
+def iter_csv_chunks(dataset_path: Path, feature_columns: list[str], chunk_rows: int) -> Iterator[Chunk]:
+    """Cleaned ``(features, labels)`` chunks of the CSV, reading only the needed columns.
+
+    Rows are dropped with the same rule as load_dataset: any missing
+    feature, label or subject value.
+    """
+    required_columns = list(dict.fromkeys([*feature_columns, TARGET_COLUMN, SUBJECT_COLUMN]))
+    header = pd.read_csv(dataset_path, nrows=0).columns
+    missing_columns = sorted(set(required_columns) - set(header))
+    if missing_columns:
+        raise ValueError(f"Dataset is missing required columns: {missing_columns}")
+
+    for chunk in pd.read_csv(
+        dataset_path,
+        usecols=required_columns,
+        chunksize=chunk_rows,
+        dtype={column: np.float32 for column in feature_columns},
+    ):
+        chunk = chunk.dropna(subset=required_columns)
+        if chunk.empty:
+            continue
+        yield (
+            chunk[feature_columns].to_numpy(dtype=np.float32),
+            chunk[TARGET_COLUMN].to_numpy().astype(np.int64),
+        )
+
+
+def iter_cached_chunks(
+    dataset_path: Path,
+    feature_columns: list[str],
+    chunk_rows: int,
+    cache_dir: Path | None,
+) -> Iterator[Chunk]:
+    """Like iter_csv_chunks, but slicing the memory-mapped dataset cache.
+
+    A focus sample export is read shard by shard instead, so its columns
+    are never concatenated in memory.
+    """
+    required_columns = list(dict.fromkeys([*feature_columns, TARGET_COLUMN, SUBJECT_COLUMN]))
+    if is_sample_export(dataset_path):
+        parts = open_sample_export(dataset_path, []).iter_shards(required_columns)
+    else:
+        dataset = open_cached_dataset(dataset_path, cache_dir, required_columns)
+        parts = [{column: dataset.column(column) for column in required_columns}]
+
+    for columns in parts:
+        rows = len(columns[TARGET_COLUMN])
+        for start in range(0, rows, chunk_rows):
+            stop = min(start + chunk_rows, rows)
+            keep = np.ones(stop - start, dtype=bool)
+            for values in columns.values():
+                if values.dtype.kind == "f":
+                    keep &= ~np.isnan(values[start:stop])
+            if not keep.any():
+                continue
+            features = np.empty((int(keep.sum()), len(feature_columns)), dtype=np.float32)
+            for index, column in enumerate(feature_columns):
+                features[:, index] = columns[column][start:stop][keep]
+            yield features, columns[TARGET_COLUMN][start:stop][keep].astype(np.int64)
+
+
+def plan_validation_split(chunks: Callable[[], Iterator[Chunk]], validation_fraction: float) -> np.ndarray:
+    """A boolean mask over the cleaned rows marking the validation split.
+
+    Only the labels are held in memory. The split is the stratified
+    ``train_test_split(..., random_state=42)`` the in-memory production
+    training uses, so both modes validate on the same rows.
+    """
+    labels = np.concatenate([chunk_labels.astype(np.int8) for _, chunk_labels in chunks()])
+    _, val_positions = train_test_split(
+        np.arange(len(labels)),
+        test_size=validation_fraction,
+        random_state=42,
+        stratify=labels,
+    )
+    is_validation = np.zeros(len(labels), dtype=bool)
+    is_validation[val_positions] = True
+    return is_validation
+
+
+class SplitChunkIter(xgb.DataIter):
+    """Feeds one side of the validation split to XGBoost, chunk by chunk.
+
+    XGBoost may iterate several times (sketching, then paging into its
+    cache); every pass re-reads the chunks from *chunks* and selects the
+    same rows through *is_validation*.
+    """
+
+    def __init__(
+        self,
+        chunks: Callable[[], Iterator[Chunk]],
+        is_validation: np.ndarray,
+        *,
+        validation: bool,
+        feature_columns: list[str],
+        cache_prefix: str,
+    ):
+        self._chunks = chunks
+        self._is_validation = is_validation
+        self._validation = validation
+        self._feature_columns = feature_columns
+        self._iterator = None
+        self._offset = 0
+        super().__init__(cache_prefix=cache_prefix, on_host=False)
+
+    def reset(self) -> None:
+        self._iterator = None
+        self._offset = 0
+
+    def next(self, input_data: Callable) -> bool:
+        if self._iterator is None:
+            self._iterator = self._chunks()
+        for features, labels in self._iterator:
+            start = self._offset
+            self._offset += len(labels)
+            selected = self._is_validation[start:self._offset] == self._validation
+            if not selected.any():
+                continue
+            input_data(
+                data=features[selected],
+                label=labels[selected],
+                feature_names=self._feature_columns,
+            )
+            return True
+        return False
+
+
+def train_xgb_production_model_streaming(
+    *,
+    feature_columns: list[str],
+    dataset_path: Path,
+    output_dir: Path,
+    model_name: str,
+    validation_fraction: float,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    cache_dir: Path | None = None,
+    search: str = "grid",
+    halving_eta: int = 3,
+) -> None:
+    """train_xgb_production_model for datasets larger than memory.
+
+    The dataset is read in column-pruned chunks (from the CSV, the dataset
+    cache when *cache_dir* is given, or a focus sample export) into
+    XGBoost external-memory matrices, which page their binned data through
+    a temporary directory. Memory use is bounded by the chunk size,
+    XGBoost's page cache and about 16 bytes per row for the labels, split
+    plan and validation predictions. Writes the same model, ``.metadata.json`` and
+    ``.validation_metrics.json`` files, with the process's peak RSS in the
+    latter.
+    """
+    if cache_dir is None and not is_sample_export(dataset_path):
+        def chunks() -> Iterator[Chunk]:
+            return iter_csv_chunks(dataset_path, feature_columns, chunk_rows)
+    else:
+        def chunks() -> Iterator[Chunk]:
+            return iter_cached_chunks(dataset_path, feature_columns, chunk_rows, cache_dir)
+
+    started = time.perf_counter()
+    is_validation = plan_validation_split(chunks, validation_fraction)
+    y_val = np.concatenate([
+        labels[is_validation[offset:offset + len(labels)]]
+        for offset, labels in _offsets(chunks())
+    ])
+    print(
+        f"[XGB {model_name}] streaming {len(is_validation)} rows "
+        f"({len(y_val)} validation) in chunks of {chunk_rows}",
+        flush=True,
+    )
+
+    with tempfile.TemporaryDirectory(prefix="xgb_extmem_") as cache_root:
+        fit_matrix = xgb.ExtMemQuantileDMatrix(SplitChunkIter(
+            chunks, is_validation, validation=False, feature_columns=feature_columns,
+            cache_prefix=os.path.join(cache_root, "fit"),
+        ))
+        val_matrix = xgb.ExtMemQuantileDMatrix(SplitChunkIter(
+            chunks, is_validation, validation=True, feature_columns=feature_columns,
+            cache_prefix=os.path.join(cache_root, "validation"),
+        ), ref=fit_matrix)
+        print(f"[XGB {model_name}] built external-memory matrices in {time.perf_counter() - started:.2f}s")
+
+        strategy = build_search(search, get_xgb_param_grid(), eta=halving_eta)
+        while not strategy.done:
+            param_sets = strategy.next_rung()
+            label = rung_label(f"XGB {model_name}", strategy)
+            results = []
+            for index, params in enumerate(param_sets, start=1):
+                result = _evaluate_streaming(params, fit_matrix, val_matrix, y_val)
+                log_grid_point(label, index, len(param_sets), result)
+                results.append(result)
+            strategy.report(results)
+
+        best = select_best_grid_point(strategy.results, "xgb")
+        best_threshold, best_params = best.threshold, best.params
+        model = train_xgb_on_matrices(best_params, fit_matrix, val_matrix)
+        val_probabilities = _predict_matrix(model, val_matrix)
+        # Release the page files before the directory holding them goes away.
+        del fit_matrix, val_matrix
+
+    save_xgb_production_model(
+        model=model,
+        output_dir=output_dir,
+        model_name=model_name,
+        feature_columns=feature_columns,
+        threshold=best_threshold,
+        best_params=best_params,
+        dataset_path=dataset_path,
+    )
+    val_predictions = (val_probabilities >= best_threshold).astype(int)
+    metrics = production_validation_metrics(y_val, val_predictions, best_threshold, best_params)
+    metrics["training_mode"] = "streaming"
+    metrics["chunk_rows"] = chunk_rows
+    write_production_metrics(output_dir, model_name, metrics)
+
+
+def _offsets(chunks: Iterator[Chunk]) -> Iterator[tuple[int, np.ndarray]]:
+    offset = 0
+    for _, labels in chunks:
+        yield offset, labels
+        offset += len(labels)
+
+
+def _predict_matrix(model: xgb.XGBClassifier, matrix: xgb.DMatrix) -> np.ndarray:
+    # Trees split on the matrix's histogram cuts, so predicting on the binned
+    # matrix matches predicting on the raw feature values.
+    return model.get_booster().predict(matrix, iteration_range=(0, model.best_iteration + 1))
+
+
+def _evaluate_streaming(
+    params: dict,
+    fit_matrix: xgb.DMatrix,
+    val_matrix: xgb.DMatrix,
+    y_val: np.ndarray,
+) -> GridPointResult:
+    started = time.perf_counter()
+    model = train_xgb_on_matrices(params, fit_matrix, val_matrix)
+    val_probabilities = _predict_matrix(model, val_matrix)
+    threshold = find_best_threshold(y_val, val_probabilities, optimize_metric="f1")
+    score = threshold_metrics(y_val, val_probabilities, np.array([threshold]))["f1"][0]
+    return GridPointResult(
+        params=params,
+        score=float(score),
+        threshold=threshold,
+        seconds=time.perf_counter() - started,
+    )
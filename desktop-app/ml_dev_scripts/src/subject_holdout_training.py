@@ -2,9 +2,14 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import nullcontext
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Callable
+from typing import Any
 
 import joblib
 import matplotlib
@@ -22,14 +27,27 @@ from sklearn.metrics import (
 )
 from sklearn.model_selection import ParameterGrid, train_test_split
 
+from dataset_cache import open_cached_dataset
+from fold_planner import Fold, FoldPlanner
+from hyperparameter_search import SEARCH_STRATEGIES, GridSearch, build_search
+from sample_export import is_sample_export, open_sample_export
+
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
 
 BASE_DIR = Path(__file__).resolve().parents[1]
+DESKTOP_ROOT = BASE_DIR.parent
+if str(DESKTOP_ROOT) not in sys.path:
+    sys.path.insert(0, str(DESKTOP_ROOT))
+
+from ml_runner_scripts.tree_ensemble import compile_model
+
 DEFAULT_DATASET_PATH = BASE_DIR.parent / "RF" / "data" / "master_dataset.csv"
 DEFAULT_OUTPUT_DIR = BASE_DIR / "docs" / "subject_holdout"
 DEFAULT_PRODUCTION_OUTPUT_DIR = BASE_DIR / "docs" / "production_models"
+DEFAULT_CACHE_DIR = BASE_DIR / "cache" / "datasets"
+DEFAULT_CHUNK_ROWS = 250_000
 
 TARGET_COLUMN = "label"
 SUBJECT_COLUMN = "subject_id"
@@ -83,6 +101,16 @@ class FoldMetrics:
     f1_macro: float
 
 
+@dataclass
+class GridPointResult:
+    """Validation outcome of one grid point; the model itself is refit for the winner only."""
+
+    params: dict
+    score: float
+    threshold: float
+    seconds: float
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Train subject holdout models on master_dataset.csv."
@@ -91,7 +119,10 @@ def parse_args() -> argparse.Namespace:
         "--dataset",
         type=Path,
         default=DEFAULT_DATASET_PATH,
-        help=f"Path to the dataset CSV. Default: {DEFAULT_DATASET_PATH}",
+        help=(
+            "Path to the dataset CSV, or to a focus sample export written by sample_export.py. "
+            f"Default: {DEFAULT_DATASET_PATH}"
+        ),
     )
     parser.add_argument(
         "--output-dir",
@@ -105,9 +136,97 @@ def parse_args() -> argparse.Namespace:
         default=0.2,
         help="Validation split fraction taken from the training subjects for XGBoost early stopping.",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "Worker processes for fitting folds and grid points concurrently. "
+            "1 runs everything in this process, 0 uses every CPU. Default: 1"
+        ),
+    )
+    parser.add_argument(
+        "--search",
+        choices=SEARCH_STRATEGIES,
+        default="grid",
+        help=(
+            "Hyperparameter search: 'grid' fits every grid point with its full n_estimators; "
+            "'halving' fits all of them with a fraction of the trees and keeps only the best "
+            "1/eta for the next, larger budget. Default: grid"
+        ),
+    )
+    parser.add_argument(
+        "--halving-eta",
+        type=int,
+        default=3,
+        help="Fraction of candidates kept per successive-halving rung (1/eta). Default: 3",
+    )
+    parser.add_argument(
+        "--shared-sketch",
+        action="store_true",
+        help=(
+            "XGBoost only: compute histogram cuts once over the whole dataset and bin every "
+            "fold with them instead of re-sketching each fold's training rows."
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help=(
+            "Directory for the columnar copy of the dataset, rebuilt whenever the CSV changes. "
+            f"Default: {DEFAULT_CACHE_DIR}"
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="cache_dir",
+        action="store_const",
+        const=None,
+        help="Parse the CSV directly instead of using the dataset cache.",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help=(
+            "Production model only: stream the dataset in chunks into XGBoost external-memory "
+            "matrices instead of loading it into memory."
+        ),
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help=f"Rows per chunk for --streaming. Default: {DEFAULT_CHUNK_ROWS}",
+    )
     return parser.parse_args()
 
 
+def resolve_jobs(jobs: int) -> int:
+    if jobs < 0:
+        raise ValueError(f"jobs must be >= 0, got {jobs}")
+    return jobs or os.cpu_count() or 1
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process in MiB, or None where unsupported (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def create_executor(jobs: int, task_count: int):
+    """A process pool for *jobs* > 1, otherwise a context yielding None (run inline)."""
+    workers = min(resolve_jobs(jobs), task_count)
+    if workers <= 1:
+        return nullcontext(None)
+    return ProcessPoolExecutor(max_workers=workers)
+
+
 def load_dataset(dataset_path: Path, feature_columns: list[str]) -> pd.DataFrame:
     df = pd.read_csv(dataset_path)
     required_columns = set(feature_columns) | {TARGET_COLUMN, SUBJECT_COLUMN}
@@ -121,6 +240,36 @@ def load_dataset(dataset_path: Path, feature_columns: list[str]) -> pd.DataFrame
     return cleaned
 
 
+def load_training_data(
+    dataset_path: Path,
+    feature_columns: list[str],
+    cache_dir: Path | None,
+) -> pd.DataFrame:
+    """The cleaned training rows, read through the dataset cache unless *cache_dir* is None.
+
+    From the cache only the feature, label and subject columns are loaded,
+    with features as float32 (both model types train on float32 anyway).
+    A focus sample export is already columnar and is read directly.
+    """
+    if cache_dir is None and not is_sample_export(dataset_path):
+        return load_dataset(dataset_path, feature_columns)
+
+    required_columns = list(dict.fromkeys([*feature_columns, TARGET_COLUMN, SUBJECT_COLUMN]))
+    dataset = open_training_dataset(dataset_path, cache_dir, required_columns)
+    rows = dataset.complete_rows(required_columns)
+    cleaned = dataset.frame(required_columns, rows)
+    cleaned[TARGET_COLUMN] = cleaned[TARGET_COLUMN].astype(int)
+    cleaned[SUBJECT_COLUMN] = cleaned[SUBJECT_COLUMN].astype(int)
+    return cleaned
+
+
+def open_training_dataset(dataset_path: Path, cache_dir: Path | None, columns: list[str]):
+    """The columnar dataset behind *dataset_path*: a focus sample export, or the CSV's cache."""
+    if is_sample_export(dataset_path):
+        return open_sample_export(dataset_path, columns)
+    return open_cached_dataset(dataset_path, cache_dir, columns)
+
+
 def build_rf_model() -> RandomForestClassifier:
     return RandomForestClassifier(
         n_estimators=200,
@@ -187,44 +336,123 @@ def build_balanced_sample_weights(labels: pd.Series) -> np.ndarray:
     return labels.map(class_weights).astype(float).to_numpy()
 
 
+THRESHOLD_METRICS = (
+    "precision",
+    "recall",
+    "f1",
+    "precision_class_0",
+    "recall_class_0",
+    "f1_class_0",
+    "f1_macro",
+)
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator with 0 where the denominator is 0 (sklearn's zero_division=0)."""
+    result = np.zeros(len(denominator), dtype=np.float64)
+    np.divide(numerator, denominator, out=result, where=denominator > 0)
+    return result
+
+
+def threshold_metrics(
+    y_true: pd.Series | np.ndarray,
+    probabilities: np.ndarray,
+    thresholds: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """Binary classification metrics for ``probabilities >= t`` at every threshold t.
+
+    Probabilities are sorted once per class; a binary search per threshold
+    then gives the number of positives and negatives at or above it, from
+    which every metric follows. The arithmetic matches sklearn's
+    precision/recall/f1 with ``zero_division=0``, so values are identical
+    to calling those per threshold, in O((n + k) log n) instead of O(n * k).
+    """
+    labels = np.asarray(y_true)
+    probabilities = np.asarray(probabilities)
+    thresholds = np.asarray(thresholds)
+    # Compare at the precision ``probabilities >= threshold`` would use.
+    compare_dtype = np.result_type(probabilities, thresholds.dtype.type(0))
+    scores = probabilities.astype(compare_dtype, copy=False)
+    cutoffs = thresholds.astype(compare_dtype, copy=False)
+
+    positive_scores = np.sort(scores[labels == 1])
+    negative_scores = np.sort(scores[labels != 1])
+    positives = len(positive_scores)
+    negatives = len(negative_scores)
+
+    tp = positives - np.searchsorted(positive_scores, cutoffs, side="left")
+    fp = negatives - np.searchsorted(negative_scores, cutoffs, side="left")
+    tn = negatives - fp
+    predicted_positive = tp + fp
+    predicted_negative = (positives + negatives) - predicted_positive
+
+    f1 = _safe_divide(2.0 * tp, float(positives) + predicted_positive)
+    f1_class_0 = _safe_divide(2.0 * tn, float(negatives) + predicted_negative)
+    # Macro averages over the labels present in y_true or the predictions.
+    has_positive = (positives > 0) | (predicted_positive > 0)
+    has_negative = (negatives > 0) | (predicted_negative > 0)
+    label_count = has_positive.astype(int) + has_negative.astype(int)
+    f1_macro = _safe_divide(
+        np.where(has_positive, f1, 0.0) + np.where(has_negative, f1_class_0, 0.0),
+        label_count,
+    )
+
+    return {
+        "precision": _safe_divide(tp, predicted_positive),
+        "recall": _safe_divide(tp, np.full(len(cutoffs), positives)),
+        "f1": f1,
+        "precision_class_0": _safe_divide(tn, predicted_negative),
+        "recall_class_0": _safe_divide(tn, np.full(len(cutoffs), negatives)),
+        "f1_class_0": f1_class_0,
+        "f1_macro": f1_macro,
+    }
+
+
 def find_best_threshold(
     y_true: pd.Series,
     probabilities: np.ndarray,
     *,
     optimize_metric: str = "f1",
-    thresholds: np.ndarray | None = None,
+    thresholds: np.ndarray | str | None = None,
 ) -> float:
-    candidate_thresholds = thresholds if thresholds is not None else np.linspace(0.2, 0.8, 61)
-    best_threshold = 0.5
-    best_score = -1.0
-
-    for threshold in candidate_thresholds:
-        predictions = (probabilities >= threshold).astype(int)
-        if optimize_metric == "f1_macro":
-            score = f1_score(y_true, predictions, average="macro", zero_division=0)
-        elif optimize_metric == "f1_class_0":
-            score = f1_score(y_true, predictions, pos_label=0, zero_division=0)
-        else:
-            score = f1_score(y_true, predictions, zero_division=0)
-        if score > best_score:
-            best_score = score
-            best_threshold = float(threshold)
+    """The candidate threshold maximising *optimize_metric*; ties go to the first candidate.
+
+    *thresholds* defaults to 61 steps over [0.2, 0.8]. Pass ``"unique"`` to
+    try every distinct probability, which costs little more.
+    """
+    if thresholds is None:
+        candidate_thresholds = np.linspace(0.2, 0.8, 61)
+    elif isinstance(thresholds, str):
+        if thresholds != "unique":
+            raise ValueError(f"Unsupported thresholds: {thresholds!r}")
+        candidate_thresholds = np.unique(probabilities)
+    else:
+        candidate_thresholds = np.asarray(thresholds)
+    if len(candidate_thresholds) == 0:
+        return 0.5
 
-    return best_threshold
+    metric = optimize_metric if optimize_metric in ("f1_macro", "f1_class_0") else "f1"
+    scores = threshold_metrics(y_true, probabilities, candidate_thresholds)[metric]
+    return float(candidate_thresholds[int(np.argmax(scores))])
 
 
-def tune_rf_model(
+def fit_grid_point(
+    model_type: str,
+    params: dict,
     X_fit: pd.DataFrame,
     y_fit: pd.Series,
     X_val: pd.DataFrame,
     y_val: pd.Series,
-) -> tuple[RandomForestClassifier, float, dict]:
-    best_model = None
-    best_threshold = 0.5
-    best_params = {}
-    best_score = -1.0
-
-    for params in get_rf_param_grid():
+    *,
+    sketch: xgb.QuantileDMatrix | None = None,
+) -> Any:
+    """The model for one grid point, fit on the fit split.
+
+    Every model uses a fixed random_state and n_jobs=1, so refitting the
+    winning grid point reproduces the model it was scored with. XGBoost
+    models are binned with the histogram cuts of *sketch* when one is given.
+    """
+    if model_type == "rf":
         model = RandomForestClassifier(
             random_state=42,
             class_weight="balanced",
@@ -232,57 +460,278 @@ def tune_rf_model(
             **params,
         )
         model.fit(X_fit, y_fit)
-        val_probabilities = model.predict_proba(X_val)[:, 1]
-        threshold = find_best_threshold(y_val, val_probabilities, optimize_metric="f1")
-        predictions = (val_probabilities >= threshold).astype(int)
-        score = f1_score(y_val, predictions, zero_division=0)
+        return model
+    if model_type == "xgb" and sketch is not None:
+        return fit_xgb_with_sketch(params, X_fit, y_fit, X_val, y_val, sketch)
+    if model_type == "xgb":
+        model = build_xgb_model(**params)
+        model.fit(
+            X_fit,
+            y_fit,
+            eval_set=[(X_val, y_val)],
+            verbose=False,
+        )
+        return model
+    raise ValueError(f"Unsupported model_type: {model_type}")
+
 
-        if score > best_score:
-            best_score = score
-            best_model = model
-            best_threshold = threshold
-            best_params = params
+def evaluate_grid_point(
+    model_type: str,
+    params: dict,
+    X_fit: pd.DataFrame,
+    y_fit: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    *,
+    sketch: xgb.QuantileDMatrix | None = None,
+) -> GridPointResult:
+    """Fit one grid point and score it on the validation split.
+
+    Module-level so a process pool can pickle it. Only the params, score
+    and threshold come back; the fitted model stays in the worker.
+    """
+    started = time.perf_counter()
+    model = fit_grid_point(model_type, params, X_fit, y_fit, X_val, y_val, sketch=sketch)
+    val_probabilities = model.predict_proba(X_val)[:, 1]
+    threshold = find_best_threshold(y_val, val_probabilities, optimize_metric="f1")
+    predictions = (val_probabilities >= threshold).astype(int)
+    score = f1_score(y_val, predictions, zero_division=0)
+    return GridPointResult(
+        params=params,
+        score=float(score),
+        threshold=threshold,
+        seconds=time.perf_counter() - started,
+    )
 
-    if best_model is None:
-        raise RuntimeError("RF hyperparameter tuning failed to produce a model.")
 
-    return best_model, best_threshold, best_params
+def train_xgb_on_matrices(
+    params: dict,
+    fit_matrix: xgb.DMatrix,
+    val_matrix: xgb.DMatrix,
+) -> xgb.XGBClassifier:
+    """Train like ``build_xgb_model(**params).fit(...)`` on prebuilt XGBoost matrices."""
+    model = build_xgb_model(**params)
+    booster = xgb.train(
+        model.get_xgb_params(),
+        fit_matrix,
+        num_boost_round=model.n_estimators,
+        evals=[(val_matrix, "validation_0")],
+        early_stopping_rounds=model.early_stopping_rounds,
+        verbose_eval=False,
+    )
+    model.load_model(bytearray(booster.save_raw("json")))
+    return model
 
 
-def tune_xgb_model(
+def fit_xgb_with_sketch(
+    params: dict,
     X_fit: pd.DataFrame,
     y_fit: pd.Series,
     X_val: pd.DataFrame,
     y_val: pd.Series,
-) -> tuple[xgb.XGBClassifier, float, dict]:
-    best_model = None
-    best_threshold = 0.5
-    best_params = {}
-    best_score = -1.0
+    sketch: xgb.QuantileDMatrix,
+) -> xgb.XGBClassifier:
+    """Train like ``build_xgb_model(**params).fit(...)``, reusing *sketch*'s histogram cuts."""
+    fit_matrix = xgb.QuantileDMatrix(X_fit, y_fit, ref=sketch)
+    val_matrix = xgb.QuantileDMatrix(X_val, y_val, ref=fit_matrix)
+    return train_xgb_on_matrices(params, fit_matrix, val_matrix)
+
+
+def fold_splits(
+    model_type: str,
+    planner: FoldPlanner,
+    test_subject: int,
+    shared_sketch: bool = False,
+) -> tuple[pd.DataFrame, pd.Series, pd.DataFrame, pd.Series, xgb.QuantileDMatrix | None]:
+    """``(X_fit, y_fit, X_val, y_val, sketch)`` for one fold of *planner*."""
+    fold = planner.fold(test_subject)
+    return (
+        planner.features_frame(fold.fit_rows),
+        planner.labels_series(fold.fit_rows),
+        planner.features_frame(fold.val_rows),
+        planner.labels_series(fold.val_rows),
+        planner.quantile_sketch() if shared_sketch and model_type == "xgb" else None,
+    )
 
-    for params in get_xgb_param_grid():
-        model = build_xgb_model(**params)
-        model.fit(
-            X_fit,
-            y_fit,
-            eval_set=[(X_val, y_val)],
-            verbose=False,
-        )
-        val_probabilities = model.predict_proba(X_val)[:, 1]
-        threshold = find_best_threshold(y_val, val_probabilities, optimize_metric="f1")
-        predictions = (val_probabilities >= threshold).astype(int)
-        score = f1_score(y_val, predictions, zero_division=0)
 
-        if score > best_score:
-            best_score = score
-            best_model = model
-            best_threshold = threshold
-            best_params = params
+def evaluate_fold_grid_point(
+    model_type: str,
+    params: dict,
+    planner: FoldPlanner,
+    test_subject: int,
+    shared_sketch: bool = False,
+) -> GridPointResult:
+    """evaluate_grid_point on one fold of *planner*.
+
+    With a cached dataset the planner pickles as a reference, so only the
+    fold's subject crosses the process boundary and each worker builds the
+    planner (and sketch) once.
+    """
+    X_fit, y_fit, X_val, y_val, sketch = fold_splits(model_type, planner, test_subject, shared_sketch)
+    return evaluate_grid_point(model_type, params, X_fit, y_fit, X_val, y_val, sketch=sketch)
+
+
+def get_param_grid(model_type: str) -> list[dict]:
+    if model_type == "rf":
+        return get_rf_param_grid()
+    if model_type == "xgb":
+        return get_xgb_param_grid()
+    raise ValueError(f"Unsupported model_type: {model_type}")
+
+
+def submit_grid_search(
+    executor: ProcessPoolExecutor,
+    model_type: str,
+    param_sets: list[dict],
+    X_fit: pd.DataFrame,
+    y_fit: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+) -> list[Future]:
+    return [
+        executor.submit(evaluate_grid_point, model_type, params, X_fit, y_fit, X_val, y_val)
+        for params in param_sets
+    ]
+
+
+def submit_fold_grid_search(
+    executor: ProcessPoolExecutor,
+    model_type: str,
+    param_sets: list[dict],
+    planner: FoldPlanner,
+    test_subject: int,
+    shared_sketch: bool = False,
+) -> list[Future]:
+    return [
+        executor.submit(evaluate_fold_grid_point, model_type, params, planner, test_subject, shared_sketch)
+        for params in param_sets
+    ]
+
+
+def collect_grid_search(
+    futures: list[Future],
+    *,
+    label: str,
+) -> list[GridPointResult]:
+    """Results in grid order, logging the wall time of each fit."""
+    results = []
+    for index, future in enumerate(futures, start=1):
+        result = future.result()
+        log_grid_point(label, index, len(futures), result)
+        results.append(result)
+    return results
+
+
+def log_grid_point(label: str, index: int, total: int, result: GridPointResult) -> None:
+    print(
+        f"[{label}] grid {index}/{total} f1={result.score:.4f} "
+        f"threshold={result.threshold:.2f} {result.seconds:.2f}s "
+        f"params={json.dumps(result.params, sort_keys=True)}",
+        flush=True,
+    )
+
+
+def rung_label(label: str, search: GridSearch) -> str:
+    description = search.describe_rung()
+    return f"{label} {description}" if description else label
 
-    if best_model is None:
-        raise RuntimeError("XGB hyperparameter tuning failed to produce a model.")
 
-    return best_model, best_threshold, best_params
+def run_search(
+    model_type: str,
+    X_fit: pd.DataFrame,
+    y_fit: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    *,
+    executor: ProcessPoolExecutor | None = None,
+    label: str | None = None,
+    search: str = "grid",
+    halving_eta: int = 3,
+) -> list[GridPointResult]:
+    """Full-budget results of the *search* strategy over the model's grid, in grid order."""
+    label = label or model_type.upper()
+    strategy = build_search(search, get_param_grid(model_type), eta=halving_eta)
+    while not strategy.done:
+        param_sets = strategy.next_rung()
+        current_label = rung_label(label, strategy)
+        if executor is not None:
+            futures = submit_grid_search(executor, model_type, param_sets, X_fit, y_fit, X_val, y_val)
+            results = collect_grid_search(futures, label=current_label)
+        else:
+            results = evaluate_rung_inline(
+                model_type, param_sets, X_fit, y_fit, X_val, y_val, label=current_label
+            )
+        strategy.report(results)
+    return strategy.results
+
+
+def select_best_grid_point(results: list[GridPointResult], model_type: str) -> GridPointResult:
+    """The highest-scoring grid point; ties go to the earliest in grid order."""
+    best = None
+    for result in results:
+        if best is None or result.score > best.score:
+            best = result
+
+    if best is None:
+        raise RuntimeError(f"{model_type.upper()} hyperparameter tuning failed to produce a model.")
+
+    return best
+
+
+def tune_model(
+    model_type: str,
+    X_fit: pd.DataFrame,
+    y_fit: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    *,
+    executor: ProcessPoolExecutor | None = None,
+    label: str | None = None,
+    search: str = "grid",
+    halving_eta: int = 3,
+) -> tuple[Any, float, dict]:
+    """Search the model's grid, then refit the winner: ``(model, threshold, params)``."""
+    results = run_search(
+        model_type, X_fit, y_fit, X_val, y_val,
+        executor=executor, label=label, search=search, halving_eta=halving_eta,
+    )
+    best = select_best_grid_point(results, model_type)
+    model = fit_grid_point(model_type, best.params, X_fit, y_fit, X_val, y_val)
+    return model, best.threshold, best.params
+
+
+def tune_rf_model(
+    X_fit: pd.DataFrame,
+    y_fit: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    *,
+    executor: ProcessPoolExecutor | None = None,
+    label: str | None = None,
+    search: str = "grid",
+    halving_eta: int = 3,
+) -> tuple[RandomForestClassifier, float, dict]:
+    return tune_model(
+        "rf", X_fit, y_fit, X_val, y_val,
+        executor=executor, label=label, search=search, halving_eta=halving_eta,
+    )
+
+
+def tune_xgb_model(
+    X_fit: pd.DataFrame,
+    y_fit: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    *,
+    executor: ProcessPoolExecutor | None = None,
+    label: str | None = None,
+    search: str = "grid",
+    halving_eta: int = 3,
+) -> tuple[xgb.XGBClassifier, float, dict]:
+    return tune_model(
+        "xgb", X_fit, y_fit, X_val, y_val,
+        executor=executor, label=label, search=search, halving_eta=halving_eta,
+    )
 
 
 def build_fold_metrics(
@@ -291,8 +740,8 @@ def build_fold_metrics(
     feature_set_name: str,
     test_subject: int,
     train_subjects: list[int],
-    train_df: pd.DataFrame,
-    test_df: pd.DataFrame,
+    train_rows: int,
+    test_rows: int,
     y_test: pd.Series,
     predictions: pd.Series,
     threshold: float,
@@ -303,8 +752,8 @@ def build_fold_metrics(
         feature_set=feature_set_name,
         test_subject=test_subject,
         train_subjects=",".join(map(str, train_subjects)),
-        train_rows=len(train_df),
-        test_rows=len(test_df),
+        train_rows=train_rows,
+        test_rows=test_rows,
         threshold=threshold,
         best_params=json.dumps(best_params, sort_keys=True),
         accuracy=accuracy_score(y_test, predictions),
@@ -379,6 +828,14 @@ def save_xgb_production_model(
     model_path = output_dir / f"{model_name}.json"
     metadata_path = output_dir / f"{model_name}.metadata.json"
     model.save_model(model_path)
+    # The desktop app scores with the compiled trees and refuses a stale
+    # .trees.npz, so recompile (and verify) with every saved model.
+    ensemble, diff = compile_model(model_path)
+    print(
+        f"[{model_name}] compiled {ensemble.num_trees} trees; "
+        f"max |p_compiled - p_xgboost| {diff:.3g}",
+        flush=True,
+    )
     metadata_path.write_text(
         json.dumps(
             {
@@ -442,50 +899,67 @@ def save_confusion_matrix(
     print(matrix_df.to_string())
 
 
-def train_rf_fold(
-    train_df: pd.DataFrame,
-    test_df: pd.DataFrame,
+def build_fold_planner(
+    dataset_path: Path,
     feature_columns: list[str],
-    output_dir: Path,
-    feature_set_name: str,
-    test_subject: int,
-    train_subjects: list[int],
     validation_fraction: float,
-) -> tuple[pd.Series, FoldMetrics]:
-    X_train = train_df[feature_columns]
-    y_train = train_df[TARGET_COLUMN]
-    X_test = test_df[feature_columns]
-    y_test = test_df[TARGET_COLUMN]
-
-    X_fit, X_val, y_fit, y_val = train_test_split(
-        X_train,
-        y_train,
-        test_size=validation_fraction,
-        random_state=42,
-        stratify=y_train,
+    cache_dir: Path | None,
+) -> FoldPlanner:
+    if cache_dir is None and not is_sample_export(dataset_path):
+        return FoldPlanner(
+            load_dataset(dataset_path, feature_columns),
+            feature_columns,
+            validation_fraction,
+            target_column=TARGET_COLUMN,
+            subject_column=SUBJECT_COLUMN,
+        )
+    required_columns = list(dict.fromkeys([*feature_columns, TARGET_COLUMN, SUBJECT_COLUMN]))
+    return FoldPlanner.from_dataset(
+        open_training_dataset(dataset_path, cache_dir, required_columns),
+        feature_columns,
+        validation_fraction,
+        target_column=TARGET_COLUMN,
+        subject_column=SUBJECT_COLUMN,
     )
 
-    model, best_threshold, best_params = tune_rf_model(X_fit, y_fit, X_val, y_val)
+
+def finish_fold(
+    *,
+    model_type: str,
+    model: Any,
+    best_threshold: float,
+    best_params: dict,
+    planner: FoldPlanner,
+    fold: Fold,
+    output_dir: Path,
+    feature_set_name: str,
+) -> tuple[pd.Series, FoldMetrics]:
+    X_test = planner.features_frame(fold.test_rows)
+    y_test = planner.labels_series(fold.test_rows)
     test_probabilities = model.predict_proba(X_test)[:, 1]
-    predictions = pd.Series((test_probabilities >= best_threshold).astype(int), index=test_df.index)
+    predictions = pd.Series((test_probabilities >= best_threshold).astype(int), index=X_test.index)
 
-    save_rf_model(model, output_dir, feature_columns, feature_set_name, test_subject, train_subjects)
+    feature_columns = planner.feature_columns
+    if model_type == "rf":
+        save_rf_model(model, output_dir, feature_columns, feature_set_name, fold.test_subject, fold.train_subjects)
+    else:
+        save_xgb_model(model, output_dir, feature_columns, feature_set_name, fold.test_subject, fold.train_subjects)
     save_confusion_matrix(
         y_true=y_test,
         y_pred=predictions,
         output_dir=output_dir,
-        model_type="rf",
+        model_type=model_type,
         feature_set_name=feature_set_name,
-        test_subject=test_subject,
+        test_subject=fold.test_subject,
     )
 
     metrics = build_fold_metrics(
-        model_type="rf",
+        model_type=model_type,
         feature_set_name=feature_set_name,
-        test_subject=test_subject,
-        train_subjects=train_subjects,
-        train_df=train_df,
-        test_df=test_df,
+        test_subject=fold.test_subject,
+        train_subjects=fold.train_subjects,
+        train_rows=len(fold.train_rows),
+        test_rows=len(fold.test_rows),
         y_test=y_test,
         predictions=predictions,
         threshold=best_threshold,
@@ -494,56 +968,150 @@ def train_rf_fold(
     return predictions, metrics
 
 
-def train_xgb_fold(
-    train_df: pd.DataFrame,
-    test_df: pd.DataFrame,
-    feature_columns: list[str],
-    output_dir: Path,
+def print_fold_metrics(
+    model_type: str,
     feature_set_name: str,
-    test_subject: int,
-    train_subjects: list[int],
-    validation_fraction: float,
-) -> tuple[pd.Series, FoldMetrics]:
-    X_train = train_df[feature_columns]
-    y_train = train_df[TARGET_COLUMN]
-    X_test = test_df[feature_columns]
-    y_test = test_df[TARGET_COLUMN]
+    metrics: FoldMetrics,
+    *,
+    setup_seconds: float,
+    fit_seconds: float,
+) -> None:
+    print(
+        f"[{model_type.upper()} {feature_set_name}] "
+        f"train={metrics.train_subjects} test={metrics.test_subject} "
+        f"threshold={metrics.threshold:.2f} "
+        f"acc={metrics.accuracy:.4f} f1={metrics.f1:.4f} "
+        f"f1_macro={metrics.f1_macro:.4f} f1_class_0={metrics.f1_class_0:.4f} "
+        f"best_params={metrics.best_params} "
+        f"setup={setup_seconds:.3f}s fit={fit_seconds:.2f}s"
+    , flush=True)
 
-    X_fit, X_val, y_fit, y_val = train_test_split(
-        X_train,
-        y_train,
-        test_size=validation_fraction,
-        random_state=42,
-        stratify=y_train,
-    )
 
-    model, best_threshold, best_params = tune_xgb_model(X_fit, y_fit, X_val, y_val)
-    test_probabilities = model.predict_proba(X_test)[:, 1]
-    predictions = pd.Series((test_probabilities >= best_threshold).astype(int), index=test_df.index)
+def evaluate_rung_inline(
+    model_type: str,
+    param_sets: list[dict],
+    X_fit: pd.DataFrame,
+    y_fit: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    *,
+    label: str,
+    sketch: xgb.QuantileDMatrix | None = None,
+) -> list[GridPointResult]:
+    results = []
+    for index, params in enumerate(param_sets, start=1):
+        result = evaluate_grid_point(model_type, params, X_fit, y_fit, X_val, y_val, sketch=sketch)
+        log_grid_point(label, index, len(param_sets), result)
+        results.append(result)
+    return results
+
+
+def run_folds(
+    *,
+    executor: ProcessPoolExecutor | None,
+    planner: FoldPlanner,
+    model_type: str,
+    feature_set_name: str,
+    output_dir: Path,
+    shared_sketch: bool = False,
+    search: str = "grid",
+    halving_eta: int = 3,
+) -> list[FoldMetrics]:
+    """Train and evaluate every leave-one-subject-out fold, in subject order.
+
+    With an executor the first rung of every fold's search is queued up
+    front, and each fold's next rung as soon as its previous one finishes,
+    so the pool stays busy across fold boundaries. Model selection,
+    prediction and saving happen here, one fold at a time in subject
+    order, so outputs match a sequential run. ``fit`` in the log is the
+    summed fit time of a fold's candidates, which overlap in the pool.
+    """
+    started = time.perf_counter()
+    subjects = planner.subjects
+    grid = get_param_grid(model_type)
+    searches = {subject: build_search(search, grid, eta=halving_eta) for subject in subjects}
+    fit_seconds = dict.fromkeys(subjects, 0.0)
+    fold_metrics: list[FoldMetrics] = []
 
-    save_xgb_model(model, output_dir, feature_columns, feature_set_name, test_subject, train_subjects)
-    save_confusion_matrix(
-        y_true=y_test,
-        y_pred=predictions,
-        output_dir=output_dir,
-        model_type="xgb",
-        feature_set_name=feature_set_name,
-        test_subject=test_subject,
-    )
+    def label_for(subject: int) -> str:
+        return rung_label(f"{model_type.upper()} {feature_set_name} subject {subject}", searches[subject])
+
+    def complete(subject: int, setup_seconds: float) -> None:
+        fold = planner.fold(subject)
+        best = select_best_grid_point(searches[subject].results, model_type)
+        X_fit, y_fit, X_val, y_val, sketch = fold_splits(model_type, planner, subject, shared_sketch)
+        model = fit_grid_point(model_type, best.params, X_fit, y_fit, X_val, y_val, sketch=sketch)
+        _, metrics = finish_fold(
+            model_type=model_type,
+            model=model,
+            best_threshold=best.threshold,
+            best_params=best.params,
+            planner=planner,
+            fold=fold,
+            output_dir=output_dir,
+            feature_set_name=feature_set_name,
+        )
+        fold_metrics.append(metrics)
+        print_fold_metrics(
+            model_type,
+            feature_set_name,
+            metrics,
+            setup_seconds=setup_seconds,
+            fit_seconds=fit_seconds[subject],
+        )
 
-    metrics = build_fold_metrics(
-        model_type="xgb",
-        feature_set_name=feature_set_name,
-        test_subject=test_subject,
-        train_subjects=train_subjects,
-        train_df=train_df,
-        test_df=test_df,
-        y_test=y_test,
-        predictions=predictions,
-        threshold=best_threshold,
-        best_params=best_params,
+    if executor is None:
+        for subject in subjects:
+            setup_started = time.perf_counter()
+            X_fit, y_fit, X_val, y_val, sketch = fold_splits(model_type, planner, subject, shared_sketch)
+            setup_seconds = time.perf_counter() - setup_started
+            strategy = searches[subject]
+            while not strategy.done:
+                results = evaluate_rung_inline(
+                    model_type, strategy.next_rung(), X_fit, y_fit, X_val, y_val,
+                    label=label_for(subject), sketch=sketch,
+                )
+                fit_seconds[subject] += sum(result.seconds for result in results)
+                strategy.report(results)
+            complete(subject, setup_seconds)
+    else:
+        setup_seconds = {}
+        in_flight = {}
+        for subject in subjects:
+            setup_started = time.perf_counter()
+            planner.fold(subject)
+            setup_seconds[subject] = time.perf_counter() - setup_started
+            in_flight[subject] = submit_fold_grid_search(
+                executor, model_type, searches[subject].next_rung(), planner, subject, shared_sketch
+            )
+        next_to_finish = 0
+        while in_flight:
+            wait([future for futures in in_flight.values() for future in futures], return_when=FIRST_COMPLETED)
+            for subject in list(in_flight):
+                futures = in_flight[subject]
+                if not all(future.done() for future in futures):
+                    continue
+                strategy = searches[subject]
+                results = collect_grid_search(futures, label=label_for(subject))
+                fit_seconds[subject] += sum(result.seconds for result in results)
+                strategy.report(results)
+                if strategy.done:
+                    del in_flight[subject]
+                else:
+                    in_flight[subject] = submit_fold_grid_search(
+                        executor, model_type, strategy.next_rung(), planner, subject, shared_sketch
+                    )
+            while next_to_finish < len(subjects) and searches[subjects[next_to_finish]].done:
+                subject = subjects[next_to_finish]
+                complete(subject, setup_seconds[subject])
+                next_to_finish += 1
+
+    print(
+        f"[{model_type.upper()} {feature_set_name}] {len(subjects)} folds finished in "
+        f"{time.perf_counter() - started:.2f}s",
+        flush=True,
     )
-    return predictions, metrics
+    return fold_metrics
 
 
 def run_subject_holdout(
@@ -554,62 +1122,35 @@ def run_subject_holdout(
     dataset_path: Path,
     output_dir: Path,
     validation_fraction: float,
+    jobs: int = 1,
+    cache_dir: Path | None = DEFAULT_CACHE_DIR,
+    shared_sketch: bool = False,
+    search: str = "grid",
+    halving_eta: int = 3,
 ) -> None:
-    df = load_dataset(dataset_path, feature_columns)
-    subjects = sorted(df[SUBJECT_COLUMN].unique().tolist())
+    if model_type not in ("rf", "xgb"):
+        raise ValueError(f"Unsupported model_type: {model_type}")
+
+    planner = build_fold_planner(dataset_path, feature_columns, validation_fraction, cache_dir)
+    subjects = planner.subjects
     if len(subjects) < 2:
         raise ValueError("Need at least two subjects to run subject holdout training.")
 
     variant_output_dir = output_dir / f"{model_type}_{feature_set_name}"
     variant_output_dir.mkdir(parents=True, exist_ok=True)
 
-    trainer: Callable[..., tuple[pd.Series, FoldMetrics]]
-    if model_type == "rf":
-        trainer = train_rf_fold
-    elif model_type == "xgb":
-        trainer = train_xgb_fold
-    else:
-        raise ValueError(f"Unsupported model_type: {model_type}")
-
-    fold_metrics: list[FoldMetrics] = []
-
-    for test_subject in subjects:
-        train_subjects = [subject for subject in subjects if subject != test_subject]
-        train_df = df[df[SUBJECT_COLUMN].isin(train_subjects)]
-        test_df = df[df[SUBJECT_COLUMN] == test_subject]
-
-        if model_type == "xgb":
-            _, metrics = trainer(
-                train_df,
-                test_df,
-                feature_columns,
-                variant_output_dir,
-                feature_set_name,
-                test_subject,
-                train_subjects,
-                validation_fraction,
-            )
-        else:
-            _, metrics = trainer(
-                train_df,
-                test_df,
-                feature_columns,
-                variant_output_dir,
-                feature_set_name,
-                test_subject,
-                train_subjects,
-                validation_fraction,
-            )
-
-        fold_metrics.append(metrics)
-        print(
-            f"[{model_type.upper()} {feature_set_name}] "
-            f"train={metrics.train_subjects} test={metrics.test_subject} "
-            f"threshold={metrics.threshold:.2f} "
-            f"acc={metrics.accuracy:.4f} f1={metrics.f1:.4f} "
-            f"f1_macro={metrics.f1_macro:.4f} f1_class_0={metrics.f1_class_0:.4f} "
-            f"best_params={metrics.best_params}"
-        , flush=True)
+    task_count = len(subjects) * len(get_param_grid(model_type))
+    with create_executor(jobs, task_count) as executor:
+        fold_metrics = run_folds(
+            executor=executor,
+            planner=planner,
+            model_type=model_type,
+            feature_set_name=feature_set_name,
+            output_dir=variant_output_dir,
+            shared_sketch=shared_sketch,
+            search=search,
+            halving_eta=halving_eta,
+        )
 
     metrics_df = pd.DataFrame(asdict(metric) for metric in fold_metrics)
     metrics_df.to_csv(variant_output_dir / "fold_metrics.csv", index=False)
@@ -656,8 +1197,12 @@ def train_xgb_production_model(
     output_dir: Path,
     model_name: str,
     validation_fraction: float,
+    jobs: int = 1,
+    cache_dir: Path | None = DEFAULT_CACHE_DIR,
+    search: str = "grid",
+    halving_eta: int = 3,
 ) -> None:
-    df = load_dataset(dataset_path, feature_columns)
+    df = load_training_data(dataset_path, feature_columns, cache_dir)
     X = df[feature_columns]
     y = df[TARGET_COLUMN]
 
@@ -669,7 +1214,11 @@ def train_xgb_production_model(
         stratify=y,
     )
 
-    model, best_threshold, best_params = tune_xgb_model(X_fit, y_fit, X_val, y_val)
+    with create_executor(jobs, len(get_xgb_param_grid())) as executor:
+        model, best_threshold, best_params = tune_xgb_model(
+            X_fit, y_fit, X_val, y_val,
+            executor=executor, label=f"XGB {model_name}", search=search, halving_eta=halving_eta,
+        )
     val_probabilities = model.predict_proba(X_val)[:, 1]
     val_predictions = pd.Series((val_probabilities >= best_threshold).astype(int), index=y_val.index)
 
@@ -683,9 +1232,19 @@ def train_xgb_production_model(
         dataset_path=dataset_path,
     )
 
-    metrics = {
+    metrics = production_validation_metrics(y_val, val_predictions, best_threshold, best_params)
+    write_production_metrics(output_dir, model_name, metrics)
+
+
+def production_validation_metrics(
+    y_val: pd.Series | np.ndarray,
+    val_predictions: pd.Series | np.ndarray,
+    threshold: float,
+    best_params: dict,
+) -> dict:
+    return {
         "validation_rows": int(len(y_val)),
-        "threshold": float(best_threshold),
+        "threshold": float(threshold),
         "accuracy": float(accuracy_score(y_val, val_predictions)),
         "balanced_accuracy": float(balanced_accuracy_score(y_val, val_predictions)),
         "precision": float(precision_score(y_val, val_predictions, zero_division=0)),
@@ -703,6 +1262,10 @@ def train_xgb_production_model(
         "f1_macro": float(f1_score(y_val, val_predictions, average="macro", zero_division=0)),
         "best_params": best_params,
     }
+
+
+def write_production_metrics(output_dir: Path, model_name: str, metrics: dict) -> None:
+    metrics["peak_rss_mb"] = peak_rss_mb()
     (output_dir / f"{model_name}.validation_metrics.json").write_text(json.dumps(metrics, indent=2))
 
     print(f"Saved production model to {output_dir / f'{model_name}.json'}")
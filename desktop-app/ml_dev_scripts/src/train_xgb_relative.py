@@ -14,4 +14,9 @@ if __name__ == "__main__":
         dataset_path=args.dataset,
         output_dir=output_dir,
         validation_fraction=args.test_size,
+        jobs=args.jobs,
+        cache_dir=args.cache_dir,
+        search=args.search,
+        halving_eta=args.halving_eta,
+        shared_sketch=args.shared_sketch,
     )
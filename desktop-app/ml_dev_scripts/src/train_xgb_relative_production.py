@@ -1,3 +1,4 @@
+from streaming_training import train_xgb_production_model_streaming
 from subject_holdout_training import (
     DEFAULT_PRODUCTION_OUTPUT_DIR,
     RELATIVE_FEATURES,
@@ -8,10 +9,27 @@ from subject_holdout_training import (
 
 if __name__ == "__main__":
     args = parse_args()
-    train_xgb_production_model(
-        feature_columns=RELATIVE_FEATURES,
-        dataset_path=args.dataset,
-        output_dir=DEFAULT_PRODUCTION_OUTPUT_DIR,
-        model_name="xgb_relative_production",
-        validation_fraction=args.test_size,
-    )
+    if args.streaming:
+        train_xgb_production_model_streaming(
+            feature_columns=RELATIVE_FEATURES,
+            dataset_path=args.dataset,
+            output_dir=DEFAULT_PRODUCTION_OUTPUT_DIR,
+            model_name="xgb_relative_production",
+            validation_fraction=args.test_size,
+            chunk_rows=args.chunk_rows,
+            cache_dir=args.cache_dir,
+            search=args.search,
+            halving_eta=args.halving_eta,
+        )
+    else:
+        train_xgb_production_model(
+            feature_columns=RELATIVE_FEATURES,
+            dataset_path=args.dataset,
+            output_dir=DEFAULT_PRODUCTION_OUTPUT_DIR,
+            model_name="xgb_relative_production",
+            validation_fraction=args.test_size,
+            jobs=args.jobs,
+            cache_dir=args.cache_dir,
+            search=args.search,
+            halving_eta=args.halving_eta,
+        )
@@ -2,14 +2,19 @@
 File Name: FocusPredictor.py
 Description: This script is responsible for importing the XGBoost model and for making real-time predictions.
 Uses the same feature extraction as the data collection script to ensure consistency. 
+When a compiled ``.trees.npz`` (see tree_ensemble.py) sits next to the model it is used instead,
+so xgboost is only imported for models that have not been compiled.
 """
 import json
 import os
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
 import cv2
 import mediapipe as mp
-import pandas as pd
-import xgboost as xgb
+import numpy as np
+
+from ml_runner_scripts.tree_ensemble import load_compiled_model
 
 FEATURE_COLS = [
     "face_x",
@@ -35,11 +40,135 @@ FEATURE_COLS = [
     "roll",
 ]
 
+LEFT_EYE_IDX = [33, 133, 159, 145, 153, 154]
+RIGHT_EYE_IDX = [362, 263, 386, 374, 380, 381]
+LEFT_EYE_CORNER_IDX = 33
+RIGHT_EYE_CORNER_IDX = 263
+NOSE_IDX = 1
+CHIN_IDX = 199
+
+_POSE_IDX = np.array(
+    [LEFT_EYE_CORNER_IDX, RIGHT_EYE_CORNER_IDX, NOSE_IDX, CHIN_IDX])
+
+# A serialized NormalizedLandmark holding only x, y and z is a fixed 17-byte
+# record: list tag, length, then three tagged little-endian float32 fields.
+_LANDMARK_RECORD_SIZE = 17
+_LANDMARK_TAG_COLUMNS = np.array([0, 1, 2, 7, 12])
+_LANDMARK_TAG_VALUES = np.array([0x0A, 0x0F, 0x0D, 0x15, 0x1D], dtype=np.uint8)
+_LANDMARK_VALUE_COLUMNS = np.r_[3:7, 8:12, 13:17]
+
+
+@lru_cache(maxsize=None)
+def _bbox_gather(num_landmarks):
+    """Gather indices and group starts for *num_landmarks*-point faces.
+
+    Precomputed so every frame is a handful of NumPy reductions: rows
+    [0, num_landmarks) are the whole face (468 points, or 478 with refined
+    irises), followed by the left and right eye points.
+    """
+    gather_idx = np.concatenate((np.arange(num_landmarks), LEFT_EYE_IDX, RIGHT_EYE_IDX))
+    group_starts = np.array([0, num_landmarks, num_landmarks + len(LEFT_EYE_IDX)])
+    return gather_idx, group_starts
+
+
+def _decode_landmark_list(message):
+    """Decode a NormalizedLandmarkList straight from its wire format.
+
+    The bytes must hold exactly one plain x/y/z record per entry of
+    ``message.landmark``; otherwise (for example when visibility is set)
+    returns None so the caller can fall back to attribute access.
+    """
+    count = len(message.landmark)
+    raw = np.frombuffer(message.SerializeToString(), dtype=np.uint8)
+    if count == 0 or raw.size != count * _LANDMARK_RECORD_SIZE:
+        return None
+    records = raw.reshape(-1, _LANDMARK_RECORD_SIZE)
+    if not (records[:, _LANDMARK_TAG_COLUMNS] == _LANDMARK_TAG_VALUES).all():
+        return None
+    values = np.ascontiguousarray(records[:, _LANDMARK_VALUE_COLUMNS])
+    return values.view("<f4").astype(np.float64)
+
+
+def landmarks_to_array(landmarks) -> np.ndarray:
+    """Convert MediaPipe landmarks to an (N, 3) float64 array of x, y, z.
+
+    Accepts a NormalizedLandmarkList (decoded from its serialized bytes, which
+    avoids ~1.5k protobuf attribute lookups per frame), any sequence of
+    landmark objects, or an existing array.
+    """
+    if isinstance(landmarks, np.ndarray):
+        return landmarks.astype(np.float64, copy=False)
+    if hasattr(landmarks, "SerializeToString"):
+        points = _decode_landmark_list(landmarks)
+        if points is not None:
+            return points
+        landmarks = landmarks.landmark
+    count = len(landmarks)
+    flat = np.fromiter(
+        chain.from_iterable((lm.x, lm.y, lm.z) for lm in landmarks),
+        dtype=np.float64,
+        count=3 * count,
+    )
+    return flat.reshape(count, 3)
+
+
+def compute_feature_vector(points: np.ndarray) -> np.ndarray:
+    """Compute the FEATURE_COLS values, in order, from an (N, 2+) landmark array."""
+    gather_idx, group_starts = _bbox_gather(len(points))
+    grouped = points[gather_idx, :2]
+
+    # Rows are face, left eye, right eye; columns are x, y.
+    mins = np.minimum.reduceat(grouped, group_starts)
+    sizes = np.maximum.reduceat(grouped, group_starts) - mins
+    centers = mins + sizes / 2
+
+    eye_offsets = centers[1:] - centers[0]
+    sym = eye_offsets[0] - eye_offsets[1]
+
+    (lx, ly), (rx, ry), (_, nose_y), (_, chin_y) = points[_POSE_IDX, :2].tolist()
+    yaw = rx - lx
+    pitch = chin_y - nose_y
+    roll = (ry - ly) / ((rx - lx) + 1e-6)
+
+    return np.concatenate((
+        np.hstack((mins, sizes)).ravel(),
+        eye_offsets.ravel(),
+        sym,
+        (yaw, pitch, roll),
+    ))
+
+
+def compute_feature_matrix(points: np.ndarray) -> np.ndarray:
+    """compute_feature_vector for a stack of faces: (F, N, 2+) landmarks to an (F, 21) matrix."""
+    points = np.asarray(points)
+    count = len(points)
+    gather_idx, group_starts = _bbox_gather(points.shape[1])
+    grouped = points[:, gather_idx, :2]
+
+    # Axis 1 is face, left eye, right eye; axis 2 is x, y.
+    mins = np.minimum.reduceat(grouped, group_starts, axis=1)
+    sizes = np.maximum.reduceat(grouped, group_starts, axis=1) - mins
+    centers = mins + sizes / 2
+
+    eye_offsets = centers[:, 1:] - centers[:, :1]
+    sym = eye_offsets[:, 0] - eye_offsets[:, 1]
+
+    pose = points[:, _POSE_IDX, :2]
+    lx, ly, rx, ry = pose[:, 0, 0], pose[:, 0, 1], pose[:, 1, 0], pose[:, 1, 1]
+    yaw = rx - lx
+    pitch = pose[:, 3, 1] - pose[:, 2, 1]
+    roll = (ry - ly) / ((rx - lx) + 1e-6)
+
+    return np.hstack((
+        np.concatenate((mins, sizes), axis=2).reshape(count, -1),
+        eye_offsets.reshape(count, -1),
+        sym,
+        np.column_stack((yaw, pitch, roll)),
+    ))
+
 
 class FocusPredictor:
-    def __init__(self, model_path):
-        self.model = xgb.XGBClassifier()
-        self.model.load_model(model_path)
+    def __init__(self, model_path, use_compiled=True, max_num_faces=1, with_face_mesh=True):
         self.feature_columns = FEATURE_COLS
         self.threshold = 0.5
 
@@ -49,89 +178,93 @@ class FocusPredictor:
             self.feature_columns = metadata.get("feature_columns", FEATURE_COLS)
             self.threshold = float(metadata.get("threshold", 0.5))
 
+        compiled = load_compiled_model(model_path) if use_compiled else None
+        if compiled is not None:
+            self.model = compiled
+            self._score_rows = compiled.predict_positive
+            model_columns = compiled.feature_names or None
+            num_features = compiled.num_features
+        else:
+            import xgboost as xgb
+
+            self.model = xgb.XGBClassifier()
+            self.model.load_model(model_path)
+            booster = self.model.get_booster()
+            try:
+                iteration_range = (0, self.model.best_iteration + 1)
+            except AttributeError:
+                iteration_range = (0, 0)
+
+            def _score_rows(rows):
+                return booster.inplace_predict(rows, iteration_range=iteration_range)
+
+            self._score_rows = _score_rows
+            model_columns = booster.feature_names
+            num_features = booster.num_features()
+
+        self._validate_feature_columns(model_path, model_columns, num_features)
+        # Single-row inference buffer, refilled in feature_columns order on
+        # every predict() call instead of building a DataFrame per frame.
+        self._row = np.empty((1, len(self.feature_columns)), dtype=np.float32)
+        # Positions of feature_columns in FEATURE_COLS, for predict_batch.
+        self._column_order = np.array(
+            [FEATURE_COLS.index(col) for col in self.feature_columns], dtype=np.intp)
+
+        self.max_num_faces = max_num_faces
         self.mp_face_mesh = mp.solutions.face_mesh
+        # Callers that run FaceMesh elsewhere (the landmark pool) only need the model.
         self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
+            max_num_faces=max_num_faces,
             refine_landmarks=True,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
-        )
+        ) if with_face_mesh else None
+
+    def _validate_feature_columns(self, model_path, model_columns, num_features):
+        unknown = [col for col in self.feature_columns if col not in FEATURE_COLS]
+        if unknown:
+            raise ValueError(
+                f"Model {model_path} expects features that extract_features "
+                f"does not produce: {unknown}")
+
+        if model_columns is not None and list(model_columns) != list(self.feature_columns):
+            raise ValueError(
+                f"Feature columns for {model_path} do not match the model: "
+                f"metadata={list(self.feature_columns)}, model={list(model_columns)}")
+        if num_features != len(self.feature_columns):
+            raise ValueError(
+                f"Model {model_path} expects {num_features} features, "
+                f"metadata lists {len(self.feature_columns)}")
 
     def get_eye_bbox(self, landmarks, indices, img_w, img_h):
-        xs = [landmarks[i].x for i in indices]
-        ys = [landmarks[i].y for i in indices]
-        x = min(xs)
-        y = min(ys)
-        w = max(xs) - min(xs)
-        h = max(ys) - min(ys)
-        return x, y, w, h
+        if not isinstance(landmarks, np.ndarray):
+            landmarks = landmarks_to_array([landmarks[i] for i in indices])
+            indices = slice(None)
+        points = landmarks[indices, :2]
+        x, y = points.min(axis=0)
+        w, h = points.max(axis=0) - (x, y)
+        return float(x), float(y), float(w), float(h)
 
     def extract_features(self, landmarks, img_w, img_h):
-        xs = [lm.x for lm in landmarks]
-        ys = [lm.y for lm in landmarks]
-        face_x = min(xs)
-        face_y = min(ys)
-        face_w = max(xs) - min(xs)
-        face_h = max(ys) - min(ys)
-
-        left_eye_idx = [33, 133, 159, 145, 153, 154]
-        right_eye_idx = [362, 263, 386, 374, 380, 381]
-
-        left_eye_x, left_eye_y, left_eye_w, left_eye_h = self.get_eye_bbox(
-            landmarks, left_eye_idx, img_w, img_h)
-        right_eye_x, right_eye_y, right_eye_w, right_eye_h = self.get_eye_bbox(
-            landmarks, right_eye_idx, img_w, img_h)
-
-        face_cx = face_x + face_w / 2
-        face_cy = face_y + face_h / 2
-        left_eye_cx = left_eye_x + left_eye_w / 2
-        left_eye_cy = left_eye_y + left_eye_h / 2
-        right_eye_cx = right_eye_x + right_eye_w / 2
-        right_eye_cy = right_eye_y + right_eye_h / 2
-
-        left_eye_dx = left_eye_cx - face_cx
-        left_eye_dy = left_eye_cy - face_cy
-        right_eye_dx = right_eye_cx - face_cx
-        right_eye_dy = right_eye_cy - face_cy
-        sym_dx = left_eye_dx - right_eye_dx
-        sym_dy = left_eye_dy - right_eye_dy
-
-        left_eye_corner = landmarks[33]
-        right_eye_corner = landmarks[263]
-        nose = landmarks[1]
-        chin = landmarks[199]
-        yaw = right_eye_corner.x - left_eye_corner.x
-        pitch = chin.y - nose.y
-        roll = (right_eye_corner.y - left_eye_corner.y) / (
-            (right_eye_corner.x - left_eye_corner.x) + 1e-6
-        )
-
-        return {
-            "face_x": face_x,
-            "face_y": face_y,
-            "face_w": face_w,
-            "face_h": face_h,
-            "left_eye_x": left_eye_x,
-            "left_eye_y": left_eye_y,
-            "left_eye_w": left_eye_w,
-            "left_eye_h": left_eye_h,
-            "right_eye_x": right_eye_x,
-            "right_eye_y": right_eye_y,
-            "right_eye_w": right_eye_w,
-            "right_eye_h": right_eye_h,
-            "left_eye_dx": left_eye_dx,
-            "left_eye_dy": left_eye_dy,
-            "right_eye_dx": right_eye_dx,
-            "right_eye_dy": right_eye_dy,
-            "sym_dx": sym_dx,
-            "sym_dy": sym_dy,
-            "yaw": yaw,
-            "pitch": pitch,
-            "roll": roll,
-        }
+        points = landmarks_to_array(landmarks)
+        return dict(zip(FEATURE_COLS, compute_feature_vector(points).tolist()))
 
     def predict(self, features):
-        df = pd.DataFrame([features])[self.feature_columns]
-        prob = float(self.model.predict_proba(df)[0][1])
+        row = self._row[0]
+        for i, col in enumerate(self.feature_columns):
+            row[i] = features[col]
+        prob = float(self._score_rows(self._row)[0])
         focused = int(prob >= self.threshold)
         return focused, prob
+
+    def extract_feature_matrix(self, faces) -> np.ndarray:
+        """FEATURE_COLS values for several faces: an (F, N, 3) array or a list of landmarks."""
+        if not isinstance(faces, np.ndarray):
+            faces = np.stack([landmarks_to_array(landmarks) for landmarks in faces])
+        return compute_feature_matrix(faces)
+
+    def predict_batch(self, feature_matrix):
+        """Score an (F, len(FEATURE_COLS)) matrix in one model call; returns (states, probabilities)."""
+        rows = np.asarray(feature_matrix)[:, self._column_order].astype(np.float32)
+        probs = np.asarray(self._score_rows(rows), dtype=np.float64)
+        return (probs >= self.threshold).astype(int), probs
@@ -1,11 +1,16 @@
 import cv2
 import os
+import sys
 import mediapipe as mp
 import numpy as np
-import time
 import xgboost as xgb
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DESKTOP_ROOT = os.path.abspath(os.path.join(BASE_DIR, ".."))
+if DESKTOP_ROOT not in sys.path:
+    sys.path.insert(0, DESKTOP_ROOT)
+
+from services.frame_scheduler import AdaptiveFrameScheduler
 
 MODEL_PATH = os.path.abspath(os.path.join(
     BASE_DIR,
@@ -21,6 +26,7 @@ model = xgb.XGBClassifier()
 model.load_model(MODEL_PATH)
 
 FRAME_RATE = 30
+IDLE_FRAME_RATE = 5
 BUFFER_LEN = 5
 THRESHOLD = 0.45  # Best threshold from training
 
@@ -71,21 +77,26 @@ def compute_head_pose(landmarks):
 
 
 cap = cv2.VideoCapture(0)
-prev_time = 0
+scheduler = AdaptiveFrameScheduler(active_fps=FRAME_RATE, idle_fps=IDLE_FRAME_RATE)
 
 while True:
-    ret, frame = cap.read()
+    # Grab (without decoding) until the next frame slot so the camera buffer
+    # stays drained and the frame retrieved below is current, even at the
+    # idle rate; each grab blocks for about one camera frame.
+    grabbed = cap.grab()
+    while grabbed and scheduler.time_until_next() > 0:
+        grabbed = cap.grab()
+    # Starts the slot, sleeping out what is left of it if a grab failed
+    scheduler.wait()
+    ret, frame = cap.retrieve() if grabbed else (False, None)
     if not ret:
         continue
 
-    if time.time() - prev_time < 1 / FRAME_RATE:
-        continue
-    prev_time = time.time()
-
     rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     results = face_mesh.process(rgb)
 
     prediction_text = "No Face"
+    state = None
 
     if results.multi_face_landmarks:
         landmarks = results.multi_face_landmarks[0].landmark
@@ -171,7 +182,10 @@ while True:
         ]])
 
         prob = model.predict_proba(features)[0, 1]
-        prediction_text = "FOCUSED" if prob > THRESHOLD else "NOT FOCUSED"
+        state = int(prob > THRESHOLD)
+        prediction_text = "FOCUSED" if state else "NOT FOCUSED"
+
+    scheduler.observe(state)
 
     cv2.putText(frame, prediction_text, (30, 50),
                 cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
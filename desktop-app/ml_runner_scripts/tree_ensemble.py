@@ -0,0 +1,290 @@
+"""
+File Name: tree_ensemble.py
+Description: Compiles a saved XGBoost JSON model into flat NumPy arrays and evaluates it without xgboost.
+The compiled ``.trees.npz`` file sits next to the model so the desktop app can score frames
+without importing xgboost at startup.
+"""
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+
+SUPPORTED_OBJECTIVES = {"binary:logistic"}
+# Largest probability difference from xgboost a compiled model may show.
+MAX_COMPILED_DIFFERENCE = 1e-6
+
+
+def compiled_model_path(model_path) -> Path:
+    """Return the ``.trees.npz`` path that belongs to an XGBoost model JSON."""
+    return Path(model_path).with_suffix(".trees.npz")
+
+
+def _file_sha256(path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _parse_base_score(value: str) -> float:
+    # XGBoost 3.x writes vector-valued base scores as e.g. "[7.4737364E-1]".
+    return float(value.strip("[]"))
+
+
+class CompiledTreeEnsemble:
+    """Gradient-boosted trees flattened into node arrays.
+
+    Nodes of every tree share one set of arrays; ``roots`` holds each tree's
+    first node. Leaves point to themselves, so walking ``max_depth`` levels
+    from the roots lands every row on its leaf regardless of tree shape.
+    """
+
+    def __init__(
+        self,
+        *,
+        feature,
+        threshold,
+        left,
+        right,
+        default_left,
+        leaf_value,
+        roots,
+        base_margin,
+        max_depth,
+        num_features,
+        feature_names,
+        source_sha256="",
+    ):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.leaf_value = np.asarray(leaf_value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.base_margin = np.float32(base_margin)
+        self.max_depth = int(max_depth)
+        self.num_features = int(num_features)
+        self.feature_names = [str(name) for name in feature_names]
+        self.source_sha256 = str(source_sha256)
+
+    @property
+    def num_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_xgboost_json(cls, model_path) -> "CompiledTreeEnsemble":
+        """Compile the trees used for prediction (up to ``best_iteration``) from a model JSON."""
+        learner = json.loads(Path(model_path).read_text())["learner"]
+
+        objective = learner["objective"]["name"]
+        if objective not in SUPPORTED_OBJECTIVES:
+            raise ValueError(f"Unsupported objective {objective!r} in {model_path}")
+        booster = learner["gradient_booster"]
+        if booster["name"] != "gbtree":
+            raise ValueError(f"Unsupported booster {booster['name']!r} in {model_path}")
+
+        trees = booster["model"]["trees"]
+        best_iteration = learner.get("attributes", {}).get("best_iteration")
+        if best_iteration is not None:
+            iteration_indptr = booster["model"]["iteration_indptr"]
+            trees = trees[: iteration_indptr[int(best_iteration) + 1]]
+
+        feature, threshold, left, right, default_left, leaf_value, roots = (
+            [], [], [], [], [], [], [])
+        max_depth = 0
+        for tree in trees:
+            if any(tree["split_type"]):
+                raise ValueError(f"Categorical splits are not supported ({model_path})")
+            offset = len(feature)
+            roots.append(offset)
+
+            tree_left = np.asarray(tree["left_children"])
+            tree_right = np.asarray(tree["right_children"])
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            node_ids = np.arange(len(tree_left))
+            is_leaf = tree_left == -1
+
+            feature.extend(np.where(is_leaf, 0, tree["split_indices"]))
+            threshold.extend(np.where(is_leaf, 0.0, conditions))
+            left.extend(np.where(is_leaf, node_ids, tree_left) + offset)
+            right.extend(np.where(is_leaf, node_ids, tree_right) + offset)
+            default_left.extend(np.asarray(tree["default_left"], dtype=bool))
+            leaf_value.extend(np.where(is_leaf, conditions, 0.0))
+            max_depth = max(max_depth, _tree_depth(tree_left, tree_right))
+
+        base_score = np.float32(_parse_base_score(learner["learner_model_param"]["base_score"]))
+        base_margin = -np.log(np.float32(1.0) / base_score - np.float32(1.0))
+
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            left=left,
+            right=right,
+            default_left=default_left,
+            leaf_value=leaf_value,
+            roots=roots,
+            base_margin=base_margin,
+            max_depth=max_depth,
+            num_features=learner["learner_model_param"]["num_feature"],
+            feature_names=learner.get("feature_names") or [],
+            source_sha256=_file_sha256(model_path),
+        )
+
+    def save(self, path) -> None:
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                feature=self.feature,
+                threshold=self.threshold,
+                left=self.left,
+                right=self.right,
+                default_left=self.default_left,
+                leaf_value=self.leaf_value,
+                roots=self.roots,
+                base_margin=self.base_margin,
+                max_depth=np.int32(self.max_depth),
+                num_features=np.int32(self.num_features),
+                feature_names=np.asarray(self.feature_names, dtype=str),
+                source_sha256=np.asarray(self.source_sha256),
+            )
+
+    @classmethod
+    def load(cls, path) -> "CompiledTreeEnsemble":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                feature=data["feature"],
+                threshold=data["threshold"],
+                left=data["left"],
+                right=data["right"],
+                default_left=data["default_left"],
+                leaf_value=data["leaf_value"],
+                roots=data["roots"],
+                base_margin=data["base_margin"],
+                max_depth=data["max_depth"],
+                num_features=data["num_features"],
+                feature_names=data["feature_names"].tolist(),
+                source_sha256=data["source_sha256"].item(),
+            )
+
+    def predict_margin(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, None]
+        has_missing = bool(np.isnan(X).any())
+
+        node = np.broadcast_to(self.roots, (X.shape[0], self.num_trees))
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[node]]
+            go_left = values < self.threshold[node]
+            if has_missing:
+                go_left = np.where(np.isnan(values), self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        # XGBoost starts from the base margin and adds one leaf per tree in
+        # float32; a cumulative sum keeps that order (np.sum would be pairwise).
+        leaves = np.empty((X.shape[0], self.num_trees + 1), dtype=np.float32)
+        leaves[:, 0] = self.base_margin
+        leaves[:, 1:] = self.leaf_value[node]
+        return np.cumsum(leaves, axis=1, dtype=np.float32)[:, -1]
+
+    def predict_positive(self, X) -> np.ndarray:
+        """Probability of class 1 for each row of ``X``."""
+        margin = self.predict_margin(X)
+        # float64 exp rounded to float32 matches the expf() XGBoost applies.
+        exp_neg = np.exp(-margin.astype(np.float64)).astype(np.float32)
+        return np.float32(1.0) / (np.float32(1.0) + exp_neg)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Drop-in for ``XGBClassifier.predict_proba``: columns are P(0), P(1)."""
+        positive = self.predict_positive(X)
+        return np.column_stack((1.0 - positive, positive))
+
+
+def _tree_depth(left, right) -> int:
+    depth = np.zeros(len(left), dtype=np.int32)
+    for node in range(len(left)):
+        if left[node] != -1:
+            depth[left[node]] = depth[node] + 1
+            depth[right[node]] = depth[node] + 1
+    return int(depth.max())
+
+
+def load_compiled_model(model_path):
+    """Load the compiled ensemble for ``model_path`` if one exists.
+
+    Raises RuntimeError when it was compiled from a different model file,
+    so a retrained model without a fresh compile fails loudly instead of
+    silently falling back to xgboost.
+    """
+    path = compiled_model_path(model_path)
+    if not path.exists():
+        return None
+    ensemble = CompiledTreeEnsemble.load(path)
+    if ensemble.source_sha256 != _file_sha256(model_path):
+        raise RuntimeError(f"Compiled model {path} is stale; recompile it from {model_path}.")
+    return ensemble
+
+
+def _max_abs_difference(ensemble, model_path, rows=20000, seed=0) -> float:
+    import xgboost as xgb
+
+    model = xgb.XGBClassifier()
+    model.load_model(model_path)
+    X = np.random.default_rng(seed).normal(0.0, 0.1, size=(rows, ensemble.num_features))
+    X = X.astype(np.float32)
+    expected = model.predict_proba(X)[:, 1]
+    return float(np.max(np.abs(ensemble.predict_positive(X) - expected)))
+
+
+def compile_model(model_path, output=None, verify=True) -> tuple[CompiledTreeEnsemble, float | None]:
+    """Compile ``model_path`` to *output* (default: next to it) and check it against xgboost.
+
+    Returns the ensemble and the largest probability difference found (None
+    without *verify*). Raises RuntimeError when that exceeds
+    MAX_COMPILED_DIFFERENCE.
+    """
+    ensemble = CompiledTreeEnsemble.from_xgboost_json(model_path)
+    ensemble.save(output or compiled_model_path(model_path))
+    if not verify:
+        return ensemble, None
+    diff = _max_abs_difference(ensemble, model_path)
+    if diff > MAX_COMPILED_DIFFERENCE:
+        raise RuntimeError(
+            f"Compiled model disagrees with xgboost by {diff:.3g} (more than {MAX_COMPILED_DIFFERENCE:g}).")
+    return ensemble, diff
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile an XGBoost JSON model into a NumPy tree evaluator (.trees.npz)."
+    )
+    parser.add_argument("model_path", type=Path, help="Path to the XGBoost model JSON.")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Output path. Default: the model path with a .trees.npz suffix.",
+    )
+    parser.add_argument(
+        "--skip-verify",
+        action="store_true",
+        help="Do not compare the compiled evaluator against xgboost after compiling.",
+    )
+    args = parser.parse_args()
+
+    output = args.output or compiled_model_path(args.model_path)
+    try:
+        ensemble, diff = compile_model(args.model_path, output, verify=not args.skip_verify)
+    except RuntimeError as exc:
+        raise SystemExit(str(exc))
+    print(
+        f"Compiled {ensemble.num_trees} trees (max depth {ensemble.max_depth}, "
+        f"{len(ensemble.feature)} nodes) to {output}"
+    )
+    if diff is not None:
+        print(f"Max |p_compiled - p_xgboost| on random rows: {diff:.3g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+DESKTOP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if DESKTOP_ROOT not in sys.path:
+    sys.path.insert(0, DESKTOP_ROOT)
+
+from db.migrations import migrate
+
+# ``{table}`` is replaced with ``focus_samples`` or ``focus_samples NOT INDEXED``
+# so the same query can be timed with and without the time-series indexes.
+QUERIES = {
+    # FocusSampleRepository.get_recent_attention_states
+    "recent_states": (
+        "SELECT attention_state FROM {table} WHERE session_id = ? AND timestamp >= ?",
+        lambda ctx: (ctx["session_id"], ctx["session_end"] - 30.0),
+    ),
+    # build_reports._calculate_session_metrics
+    "session_metrics": (
+        "SELECT timestamp, attention_state, focus_score FROM {table} "
+        "WHERE session_id = ? ORDER BY timestamp ASC",
+        lambda ctx: (ctx["session_id"],),
+    ),
+    # sync_firestore._sync_focus_samples (incremental)
+    "sync_since": (
+        "SELECT focus_sample_id, session_id, timestamp, attention_state, focus_score "
+        "FROM {table} WHERE timestamp > ?",
+        lambda ctx: (ctx["max_timestamp"] - 60.0,),
+    ),
+}
+
+
+def _create_database(db_path):
+    conn = sqlite3.connect(db_path)
+    with open(os.path.join(DESKTOP_ROOT, "db", "schema.sql"), "r") as f:
+        conn.executescript(f.read())
+    conn.commit()
+    migrate(conn)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA foreign_keys = OFF")
+    return conn
+
+
+def _grow(conn, current_rows, target_rows, samples_per_session, sample_rate_hz, rng):
+    """Append synthetic sessions until the table holds *target_rows* rows."""
+    interval = 1.0 / sample_rate_hz
+    chunk = 100_000
+
+    def rows(start, stop):
+        for i in range(start, stop):
+            session_index, offset = divmod(i, samples_per_session)
+            # Sessions follow each other in time, like real recordings.
+            ts = session_index * (samples_per_session * interval + 600.0) + offset * interval
+            yield (
+                f"sample-{i}",
+                f"session-{session_index}",
+                ts,
+                0.5, 0.5, 0.5, 0.5,
+                rng.random() < 0.7,
+                rng.random(),
+            )
+
+    for start in range(current_rows, target_rows, chunk):
+        stop = min(target_rows, start + chunk)
+        conn.executemany(
+            "INSERT INTO focus_samples (focus_sample_id, session_id, timestamp, "
+            "left_iris_x, left_iris_y, right_iris_x, right_iris_y, attention_state, focus_score) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows(start, stop),
+        )
+        conn.commit()
+
+
+def _context(conn, rows, samples_per_session):
+    last_session = (rows - 1) // samples_per_session
+    session_id = f"session-{last_session}"
+    session_end = conn.execute(
+        "SELECT MAX(timestamp) FROM focus_samples WHERE session_id = ?", (session_id,)
+    ).fetchone()[0]
+    return {
+        "session_id": session_id,
+        "session_end": session_end,
+        "max_timestamp": conn.execute("SELECT MAX(timestamp) FROM focus_samples").fetchone()[0],
+    }
+
+
+def _time_query(conn, sql, params, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time focus_samples queries against table size, with and without the time-series indexes."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000, 10_000_000],
+        help="Table sizes (rows) to measure at, in increasing order.",
+    )
+    parser.add_argument("--samples-per-session", type=int, default=3600)
+    parser.add_argument("--sample-rate-hz", type=float, default=10.0)
+    parser.add_argument("--repeats", type=int, default=20, help="Runs per indexed query (median reported).")
+    parser.add_argument("--scan-repeats", type=int, default=3, help="Runs per full-scan query.")
+    parser.add_argument("--skip-scan", action="store_true", help="Only time the indexed queries.")
+    parser.add_argument("--db-path", default=None, help="Database file to build (default: a temp file).")
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    db_path = args.db_path
+    if db_path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp_dir.name, "focus_samples_benchmark.sqlite3")
+
+    conn = _create_database(db_path)
+    rng = random.Random(0)
+    results = []
+    rows = 0
+    try:
+        print(f"{'rows':>10}  {'query':<16} {'indexed ms':>11} {'scan ms':>10}")
+        for size in sorted(args.sizes):
+            grow_start = time.perf_counter()
+            _grow(conn, rows, size, args.samples_per_session, args.sample_rate_hz, rng)
+            grow_seconds = time.perf_counter() - grow_start
+            rows = size
+            ctx = _context(conn, rows, args.samples_per_session)
+            for name, (sql, make_params) in QUERIES.items():
+                params = make_params(ctx)
+                indexed = _time_query(conn, sql.format(table="focus_samples"), params, args.repeats)
+                scan = None
+                if not args.skip_scan:
+                    scan = _time_query(
+                        conn, sql.format(table="focus_samples NOT INDEXED"), params, args.scan_repeats)
+                results.append({
+                    "rows": rows,
+                    "query": name,
+                    "indexed_ms": indexed * 1000.0,
+                    "scan_ms": scan * 1000.0 if scan is not None else None,
+                    "grow_seconds": grow_seconds,
+                })
+                scan_text = f"{scan * 1000.0:10.2f}" if scan is not None else f"{'-':>10}"
+                print(f"{rows:>10}  {name:<16} {indexed * 1000.0:11.3f} {scan_text}")
+    finally:
+        conn.close()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+DESKTOP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if DESKTOP_ROOT not in sys.path:
+    sys.path.insert(0, DESKTOP_ROOT)
+
+from db.database import Database
+from db.focus_sample_repository import INSERT_SAMPLE_SQL, FocusSampleRepository, sample_row
+from ml_runner_scripts.FocusPredictor import FEATURE_COLS, FocusPredictor
+from scripts import build_reports
+
+DEFAULT_MODEL_PATH = os.path.join(
+    DESKTOP_ROOT, "ml_dev_scripts", "docs", "production_models", "xgb_relative_production.json"
+)
+
+# Metric compared against a baseline when checking for regressions.
+REGRESSION_METRIC = "p95_ms"
+
+
+def summarize(durations) -> dict:
+    """Latency percentiles (ms) and throughput for a list of per-call durations in seconds."""
+    values = np.asarray(durations, dtype=np.float64)
+    if values.size == 0:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000.0
+    total = float(values.sum())
+    return {
+        "count": int(values.size),
+        "mean_ms": float(values.mean() * 1000.0),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(values.max() * 1000.0),
+        "throughput_per_s": float(values.size / total) if total > 0 else None,
+    }
+
+
+def _time_calls(fn, args_list, warmup=20):
+    for args in args_list[:warmup]:
+        fn(*args)
+    durations = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def synthetic_landmark_stream(count, seed=0, num_points=478):
+    """A face-shaped landmark template with per-frame head motion and jitter."""
+    rng = np.random.default_rng(seed)
+    template = np.column_stack([
+        rng.uniform(0.35, 0.65, num_points),
+        rng.uniform(0.3, 0.7, num_points),
+        rng.normal(0.0, 0.03, num_points),
+    ])
+    frames = []
+    for i in range(count):
+        offset = np.array([0.05 * np.sin(i / 30.0), 0.03 * np.cos(i / 45.0), 0.0])
+        frames.append(template + offset + rng.normal(0.0, 0.002, template.shape))
+    return frames
+
+
+def _seed_database(db, *, rows, session_samples, sample_rate_hz, seed):
+    """Fill focus_samples with *rows* rows split into sessions of *session_samples*.
+
+    The newest session ends now, so time-windowed queries see it as live.
+    Returns that session's id.
+    """
+    rng = np.random.default_rng(seed)
+    interval = 1.0 / sample_rate_hz
+    sessions = max(1, -(-rows // session_samples))
+    now = time.time()
+    conn = db.connect()
+    try:
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(
+            "INSERT OR IGNORE INTO users (user_id, username) VALUES ('benchmark-user', 'benchmark')")
+        session_ids = []
+        for s in range(sessions):
+            session_ids.append(f"benchmark-session-{s}")
+            conn.execute(
+                "INSERT INTO sessions (session_id, user_id, start_time) VALUES (?, ?, ?)",
+                (session_ids[-1], "benchmark-user", now),
+            )
+
+        def generate():
+            for i in range(rows):
+                s = i // session_samples
+                # Sessions run back to back, ending at *now*.
+                ts = now - (rows - 1 - i) * interval - (sessions - 1 - s) * 600.0
+                state = int(rng.random() < 0.7)
+                yield sample_row(
+                    f"benchmark-{i}", session_ids[s], ts,
+                    0.5, 0.5, 0.5, 0.5, None, None, 0.0,
+                    state, float(rng.random()),
+                )
+
+        conn.executemany(INSERT_SAMPLE_SQL, generate())
+        conn.commit()
+        return session_ids[-1]
+    finally:
+        conn.close()
+
+
+def run_benchmarks(
+    *,
+    model_path=DEFAULT_MODEL_PATH,
+    frames=2000,
+    inserts=500,
+    queries=200,
+    db_rows=100_000,
+    session_samples=3600,
+    sample_rate_hz=10.0,
+    seed=0,
+    db_dir=None,
+) -> dict:
+    """Time each stage of the tracking pipeline and return ``{stage: summary}``."""
+    results = {}
+    predictor = FocusPredictor(model_path)
+    try:
+        stream = synthetic_landmark_stream(frames, seed=seed)
+        # img_w/img_h are part of the call signature but unused by the features.
+        results["extract_features"] = summarize(
+            _time_calls(predictor.extract_features, [(points, 1280, 720) for points in stream]))
+        features = [predictor.extract_features(points, 1280, 720) for points in stream]
+        results["predict"] = summarize(_time_calls(predictor.predict, [(f,) for f in features]))
+    finally:
+        predictor.face_mesh.close()
+
+    tmp_dir = None
+    if db_dir is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_dir = tmp_dir.name
+    try:
+        db = Database(os.path.join(db_dir, "benchmark_pipeline.sqlite3"))
+        session_id = _seed_database(
+            db, rows=db_rows, session_samples=session_samples,
+            sample_rate_hz=sample_rate_hz, seed=seed)
+        repo = FocusSampleRepository(db)
+
+        # Same shape as the samples FocusTrackingWorker persists.
+        sample = {
+            "left_x": 0.5, "left_y": 0.5, "right_x": 0.5, "right_y": 0.5,
+            "face_z": 0.0, "attention_state": 1, "focus_score": 0.9, "label": 1,
+        }
+        sample.update((col, float(features[0][col])) for col in FEATURE_COLS)
+        now = time.time()
+        results["insert_sample"] = summarize(_time_calls(
+            lambda i: repo.insert_sample(session_id=session_id, timestamp=now + i, **sample),
+            [(i,) for i in range(inserts)],
+            warmup=0,
+        ))
+
+        # DistractionNotifierWorker's SQLite fallback query.
+        results["recent_attention_states"] = summarize(_time_calls(
+            lambda: repo.get_recent_attention_states(session_id, seconds_ago=20),
+            [()] * queries,
+        ))
+
+        conn = sqlite3.connect(db.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            results["session_metrics"] = summarize(_time_calls(
+                lambda: build_reports._calculate_session_metrics(conn, session_id, None),
+                [()] * max(1, queries // 10),
+                warmup=2,
+            ))
+        finally:
+            conn.close()
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+    return results
+
+
+def compare_to_baseline(stages: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Stages whose ``REGRESSION_METRIC`` grew by more than *max_regression* (0.2 = 20%)."""
+    regressions = []
+    for name, base in baseline.get("stages", {}).items():
+        current = stages.get(name)
+        if not current or REGRESSION_METRIC not in current or not base.get(REGRESSION_METRIC):
+            continue
+        ratio = current[REGRESSION_METRIC] / base[REGRESSION_METRIC]
+        if ratio > 1.0 + max_regression:
+            regressions.append(
+                f"{name}: {REGRESSION_METRIC} {base[REGRESSION_METRIC]:.3f} -> "
+                f"{current[REGRESSION_METRIC]:.3f} ms ({(ratio - 1.0) * 100:+.0f}%)"
+            )
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=DESKTOP_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def format_table(stages: dict) -> str:
+    lines = [f"{'stage':<24} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per s':>10}"]
+    for name, s in stages.items():
+        lines.append(
+            f"{name:<24} {s['count']:>6} {s['p50_ms']:9.3f} {s['p95_ms']:9.3f} "
+            f"{s['p99_ms']:9.3f} {s['throughput_per_s']:10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Per-stage latency benchmark of the focus tracking pipeline over synthetic data."
+    )
+    parser.add_argument("--model-path", default=DEFAULT_MODEL_PATH, help="Path to the XGBoost model JSON.")
+    parser.add_argument("--frames", type=int, default=2000, help="Synthetic landmark frames to score.")
+    parser.add_argument("--inserts", type=int, default=500, help="insert_sample calls to time.")
+    parser.add_argument("--queries", type=int, default=200, help="Notifier queries to time (reports: a tenth).")
+    parser.add_argument("--db-rows", type=int, default=100_000, help="Rows in the seeded focus_samples table.")
+    parser.add_argument("--session-samples", type=int, default=3600, help="Samples per seeded session.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to this JSON file.")
+    parser.add_argument("--baseline", default=None, help="Earlier --json output to compare against.")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.25,
+        help=f"Fail when a stage's {REGRESSION_METRIC} exceeds the baseline by this fraction.",
+    )
+    args = parser.parse_args(argv)
+
+    stages = run_benchmarks(
+        model_path=args.model_path,
+        frames=args.frames,
+        inserts=args.inserts,
+        queries=args.queries,
+        db_rows=args.db_rows,
+        session_samples=args.session_samples,
+        seed=args.seed,
+    )
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {
+                "frames": args.frames,
+                "inserts": args.inserts,
+                "queries": args.queries,
+                "db_rows": args.db_rows,
+                "session_samples": args.session_samples,
+                "seed": args.seed,
+            },
+        },
+        "stages": stages,
+    }
+    print(format_table(stages))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json_path}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(stages, baseline, args.max_regression)
+        if regressions:
+            print(f"Regressions against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No stage regressed more than {args.max_regression:.0%} against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
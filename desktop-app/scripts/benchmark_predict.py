@@ -0,0 +1,85 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+DESKTOP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if DESKTOP_ROOT not in sys.path:
+    sys.path.insert(0, DESKTOP_ROOT)
+
+from ml_runner_scripts.FocusPredictor import FEATURE_COLS, FocusPredictor
+from ml_runner_scripts.tree_ensemble import CompiledTreeEnsemble
+
+
+def _random_features(rng, count):
+    return [
+        dict(zip(FEATURE_COLS, rng.normal(0.0, 0.1, size=len(FEATURE_COLS)).tolist()))
+        for _ in range(count)
+    ]
+
+
+def _predict_with_dataframe(predictor, features):
+    """The per-frame path FocusPredictor.predict used before the float32 row buffer."""
+    df = pd.DataFrame([features])[predictor.feature_columns]
+    prob = float(predictor.model.predict_proba(df)[0][1])
+    return int(prob >= predictor.threshold), prob
+
+
+def _time_per_call(fn, samples, iterations):
+    for features in samples[:50]:
+        fn(features)
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(samples[i % len(samples)])
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare per-call latency of the DataFrame, buffered xgboost and compiled FocusPredictor.predict paths."
+    )
+    parser.add_argument(
+        "--model-path",
+        default=os.path.join(
+            DESKTOP_ROOT,
+            "ml_dev_scripts",
+            "docs",
+            "production_models",
+            "xgb_relative_production.json",
+        ),
+        help="Path to the XGBoost model JSON.",
+    )
+    parser.add_argument("--iterations", type=int, default=5000, help="Calls timed per path.")
+    args = parser.parse_args()
+
+    xgb_predictor = FocusPredictor(args.model_path, use_compiled=False)
+    predictor = FocusPredictor(args.model_path)
+    compiled = isinstance(predictor.model, CompiledTreeEnsemble)
+    samples = _random_features(np.random.default_rng(0), 256)
+
+    mismatches = sum(
+        _predict_with_dataframe(xgb_predictor, features) != xgb_predictor.predict(features)
+        for features in samples
+    )
+    if mismatches:
+        raise SystemExit(f"{mismatches} of {len(samples)} predictions differ between paths.")
+
+    before = _time_per_call(lambda f: _predict_with_dataframe(xgb_predictor, f), samples, args.iterations)
+    buffered = _time_per_call(xgb_predictor.predict, samples, args.iterations)
+
+    print(f"model: {args.model_path}")
+    print(f"features: {len(predictor.feature_columns)}, iterations: {args.iterations}")
+    print(f"DataFrame + predict_proba: {before * 1e6:9.1f} us/call")
+    print(f"float32 buffer + inplace_predict: {buffered * 1e6:9.1f} us/call ({before / buffered:.1f}x)")
+    if compiled:
+        evaluated = _time_per_call(predictor.predict, samples, args.iterations)
+        print(f"compiled NumPy trees: {evaluated * 1e6:9.1f} us/call ({before / evaluated:.1f}x)")
+    else:
+        print("compiled NumPy trees: not available (run python -m ml_runner_scripts.tree_ensemble)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+DESKTOP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if DESKTOP_ROOT not in sys.path:
+    sys.path.insert(0, DESKTOP_ROOT)
+
+from scripts.benchmark_pipeline import DEFAULT_MODEL_PATH, _git_commit
+from services.frame_sources import frame_source_from_spec
+from services.tracker_host import TrackerHost
+
+
+def _worker_counts(value: str) -> list[int]:
+    counts = [int(part) for part in value.split(",") if part.strip()]
+    if not counts or min(counts) < 1:
+        raise argparse.ArgumentTypeError("expected a comma-separated list of positive worker counts")
+    return counts
+
+
+def run_scaling(*, model_path, sources, streams, worker_counts, max_num_faces=1, max_in_flight=2, spread=False):
+    """Run the same *streams* through a TrackerHost once per landmark worker count.
+
+    *sources* are frame source specs, assigned to the streams round-robin.
+    Each run gets fresh sources, so recorded ones replay from the start.
+    With *spread* every stream uses all workers, which is how a single
+    recording scales.
+    """
+    runs = []
+    for workers in worker_counts:
+        host = TrackerHost(
+            model_path,
+            landmark_workers=workers,
+            max_num_faces=max_num_faces,
+            max_in_flight=max_in_flight,
+        )
+        for index in range(streams):
+            host.add_stream(
+                f"stream-{index}", frame_source_from_spec(sources[index % len(sources)]), spread=spread)
+        runs.append(host.run())
+
+    baseline_fps = runs[0]["fps"] if runs else 0.0
+    for run in runs:
+        run["speedup"] = run["fps"] / baseline_fps if baseline_fps else None
+    return runs
+
+
+def format_table(runs: list[dict]) -> str:
+    lines = [f"{'workers':>7} {'frames':>8} {'seconds':>8} {'fps':>9} {'speedup':>8} {'batch':>6}"]
+    for run in runs:
+        speedup = f"{run['speedup']:8.2f}" if run["speedup"] is not None else f"{'-':>8}"
+        lines.append(
+            f"{run['landmark_workers']:>7} {run['frames_processed']:>8} {run['elapsed_s']:8.2f} "
+            f"{run['fps']:9.1f} {speedup} {run['mean_batch_faces']:6.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Throughput of the headless multi-stream tracker host at several landmark worker counts."
+    )
+    parser.add_argument("--model-path", default=DEFAULT_MODEL_PATH, help="Path to the XGBoost model JSON.")
+    parser.add_argument(
+        "--source",
+        action="append",
+        dest="sources",
+        default=None,
+        help="Frame source spec (video:<path>, images:<dir>, synthetic:<count>); repeat for several. "
+             "Streams cycle through them. Default: synthetic frames.",
+    )
+    parser.add_argument("--streams", type=int, default=4, help="Concurrent streams to track.")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per stream for the default synthetic source.")
+    parser.add_argument(
+        "--workers",
+        type=_worker_counts,
+        default=None,
+        help="Comma-separated landmark worker counts to compare (default: 1 and every core).",
+    )
+    parser.add_argument("--max-faces", type=int, default=1, help="Faces tracked per frame.")
+    parser.add_argument("--max-in-flight", type=int, default=2, help="Frames queued per stream.")
+    parser.add_argument(
+        "--spread", action="store_true", help="Spread each stream over every worker instead of pinning it to one.")
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    sources = args.sources or [f"synthetic:{args.frames}"]
+    worker_counts = args.workers or sorted({1, os.cpu_count() or 1})
+    runs = run_scaling(
+        model_path=args.model_path,
+        sources=sources,
+        streams=args.streams,
+        worker_counts=worker_counts,
+        max_num_faces=args.max_faces,
+        max_in_flight=args.max_in_flight,
+        spread=args.spread,
+    )
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {
+                "sources": sources,
+                "streams": args.streams,
+                "workers": worker_counts,
+                "max_faces": args.max_faces,
+                "max_in_flight": args.max_in_flight,
+                "spread": args.spread,
+            },
+        },
+        "runs": runs,
+    }
+
+    print(format_table(runs))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
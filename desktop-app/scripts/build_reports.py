@@ -2,11 +2,18 @@ import argparse
 import datetime
 import os
 import sqlite3
+import sys
 
 import firebase_admin
 from firebase_admin import credentials
 from firebase_admin import firestore
 
+DESKTOP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if DESKTOP_ROOT not in sys.path:
+    sys.path.insert(0, DESKTOP_ROOT)
+
+from services.session_metrics import SessionMetricsAccumulator
+
 
 def _parse_timestamp(value):
     if value is None:
@@ -41,12 +48,20 @@ def _init_firestore(key_path: str, project_id: str):
         raise RuntimeError(f"Firestore initialization failed: {exc}") from exc
 
 
+def _primary_face_filter(conn):
+    """SQL condition keeping only the main face of multi-face frames, as the tracking worker counts them."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(focus_samples)")}
+    # Databases from before multi-face tracking hold one face per frame.
+    return " AND primary_face = 1" if "primary_face" in columns else ""
+
+
 def _calculate_session_metrics(conn, session_id, duration_seconds):
+    primary_face = _primary_face_filter(conn)
     cur = conn.execute(
-        """
+        f"""
         SELECT timestamp, attention_state, focus_score
         FROM focus_samples
-        WHERE session_id = ?
+        WHERE session_id = ?{primary_face}
         ORDER BY timestamp ASC
         """,
         (session_id,),
@@ -84,10 +99,10 @@ def _calculate_session_metrics(conn, session_id, duration_seconds):
                 distraction_time += remaining
 
     cur = conn.execute(
-        """
+        f"""
         SELECT AVG(focus_score) AS avg_focus_score
         FROM focus_samples
-        WHERE session_id = ? AND focus_score IS NOT NULL
+        WHERE session_id = ? AND focus_score IS NOT NULL{primary_face}
         """,
         (session_id,),
     )
@@ -100,6 +115,28 @@ def _calculate_session_metrics(conn, session_id, duration_seconds):
     }
 
 
+def _stored_session_metrics(conn, session_id, duration_seconds):
+    """Report metrics from the running totals in session_metrics, or None if there are none."""
+    try:
+        row = conn.execute(
+            "SELECT * FROM session_metrics WHERE session_id = ?", (session_id,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # Database created before the session_metrics migration.
+        return None
+    if row is None:
+        return None
+    return SessionMetricsAccumulator.from_dict(dict(row)).report(duration_seconds)
+
+
+def _session_metrics(conn, session_id, duration_seconds):
+    """Use the stored running totals when the tracking worker kept them, else scan the samples."""
+    metrics = _stored_session_metrics(conn, session_id, duration_seconds)
+    if metrics is None:
+        metrics = _calculate_session_metrics(conn, session_id, duration_seconds)
+    return metrics
+
+
 def sync_report_for_session(*, db_path: str, key_path: str, project_id: str, session_id: str) -> bool:
     if not os.path.exists(db_path):
         raise FileNotFoundError(f"SQLite DB not found: {db_path}")
@@ -119,7 +156,7 @@ def sync_report_for_session(*, db_path: str, key_path: str, project_id: str, ses
         if row is None:
             return False
 
-        metrics = _calculate_session_metrics(conn, row["session_id"], row["duration_seconds"])
+        metrics = _session_metrics(conn, row["session_id"], row["duration_seconds"])
         if metrics is None:
             return False
 
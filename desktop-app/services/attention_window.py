@@ -0,0 +1,86 @@
+import threading
+import time
+from typing import Optional
+
+
+class AttentionWindow:
+    """Thread-safe ring buffer of recent ``(timestamp, attention_state)`` samples.
+
+    The tracking worker publishes every scored frame; readers such as
+    :class:`DistractionNotifierWorker` ask for focused/distracted counts over
+    the last ``window_seconds``. Counts are kept as running totals, updated
+    when a sample enters and when it expires, so every call is amortised
+    O(1) no matter how many samples the window holds.
+
+    Timestamps are expected in publish order (``time.time()`` from one
+    producer). When more than ``capacity`` samples fall inside the window the
+    oldest are overwritten, so counts then cover the newest ``capacity``.
+    """
+
+    FOCUSED = 1
+    DISTRACTED = 0
+
+    def __init__(self, window_seconds: float = 20.0, capacity: int = 4096):
+        if window_seconds <= 0:
+            raise ValueError("window_seconds must be positive")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.window_seconds = float(window_seconds)
+        self.capacity = capacity
+        self._timestamps = [0.0] * capacity
+        self._states = [None] * capacity
+        self._head = 0   # index of the oldest sample
+        self._size = 0
+        self._focused = 0
+        self._distracted = 0
+        self._lock = threading.Lock()
+
+    def publish(self, timestamp: float, attention_state: int):
+        with self._lock:
+            if self._size == self.capacity:
+                self._pop_oldest()
+            tail = (self._head + self._size) % self.capacity
+            self._timestamps[tail] = timestamp
+            self._states[tail] = attention_state
+            self._size += 1
+            if attention_state == self.FOCUSED:
+                self._focused += 1
+            elif attention_state == self.DISTRACTED:
+                self._distracted += 1
+
+    def counts(self, now: Optional[float] = None) -> tuple[int, int]:
+        """Return ``(focused, distracted)`` for samples newer than ``now - window_seconds``."""
+        cutoff = (time.time() if now is None else now) - self.window_seconds
+        with self._lock:
+            while self._size and self._timestamps[self._head] < cutoff:
+                self._pop_oldest()
+            return self._focused, self._distracted
+
+    def distracted_fraction(self, now: Optional[float] = None) -> Optional[float]:
+        """Share of distracted samples in the window, or None when it holds none."""
+        focused, distracted = self.counts(now)
+        total = focused + distracted
+        if total == 0:
+            return None
+        return distracted / total
+
+    def clear(self):
+        with self._lock:
+            self._head = 0
+            self._size = 0
+            self._focused = 0
+            self._distracted = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._size
+
+    def _pop_oldest(self):
+        state = self._states[self._head]
+        if state == self.FOCUSED:
+            self._focused -= 1
+        elif state == self.DISTRACTED:
+            self._distracted -= 1
+        self._states[self._head] = None
+        self._head = (self._head + 1) % self.capacity
+        self._size -= 1
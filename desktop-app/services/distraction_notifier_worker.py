@@ -1,15 +1,24 @@
 import time
 from threading import Event
+from typing import Optional
 
 from db.focus_sample_repository import FocusSampleRepository
+from services.attention_window import AttentionWindow
 from services.notification_service import NotificationService
 
 
 class DistractionNotifierWorker:
-    """Background worker that periodically checks focus data and notifies the user when distracted."""
+    """Background worker that periodically checks focus data and notifies the user when distracted.
+
+    With an :class:`AttentionWindow` shared with the tracking worker, each
+    check reads in-memory running counts, so the window can be re-evaluated
+    every ``check_interval`` seconds (sub-second if needed). Without one it
+    falls back to querying SQLite once per evaluation window.
+    """
 
     DEFAULT_EVALUATION_WINDOW = 20   # seconds
     DEFAULT_COOLDOWN = 60            # seconds
+    DEFAULT_CHECK_INTERVAL = 0.5     # seconds between checks of an in-memory window
     DISTRACTION_THRESHOLD = 0.50     # >50 % distracted triggers a notification
 
     def __init__(
@@ -19,26 +28,34 @@ class DistractionNotifierWorker:
         stop_event: Event,
         evaluation_window: int = DEFAULT_EVALUATION_WINDOW,
         cooldown: int = DEFAULT_COOLDOWN,
+        attention_window: Optional[AttentionWindow] = None,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
     ):
         self.session_id = session_id
         self.stop_event = stop_event
         self.evaluation_window = max(evaluation_window, 5)  # floor at 5 s
         self.cooldown = max(cooldown, 0)                    # floor at 0 s
-        self._sample_repo = FocusSampleRepository()
+        self.attention_window = attention_window
+        if attention_window is None:
+            self._sample_repo = FocusSampleRepository()
+            self.check_interval = self.evaluation_window
+        else:
+            self._sample_repo = None
+            self.check_interval = min(max(check_interval, 0.05), self.evaluation_window)
 
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
-    def _interruptible_sleep(self, seconds: int) -> bool:
-        """Sleep in 1-second increments. Returns True if stop_event was set."""
-        for _ in range(seconds):
-            if self.stop_event.is_set():
-                return True
-            time.sleep(1)
-        return self.stop_event.is_set()
+    def _interruptible_sleep(self, seconds: float) -> bool:
+        """Sleep for *seconds*, waking early on stop. Returns True if stop_event was set."""
+        return self.stop_event.wait(seconds)
 
     def _is_distracted(self) -> bool:
-        """Query the local DB and return True when >50 % of recent samples are distracted."""
+        """Return True when >50 % of the samples in the evaluation window are distracted."""
+        if self.attention_window is not None:
+            fraction = self.attention_window.distracted_fraction()
+            return fraction is not None and fraction > self.DISTRACTION_THRESHOLD
+
         states = self._sample_repo.get_recent_attention_states(
             self.session_id, seconds_ago=self.evaluation_window
         )
@@ -52,9 +69,15 @@ class DistractionNotifierWorker:
     # ------------------------------------------------------------------
     def run(self):
         """Entry point – intended to be called in a daemon thread."""
+        # Samples before this point belong to a window that was already
+        # judged (or to the cooldown), so wait for a full fresh window.
+        window_start = time.monotonic()
         while not self.stop_event.is_set():
-            # 1. Wait for the evaluation window to fill up
-            if self._interruptible_sleep(self.evaluation_window):
+            # 1. Wait for the evaluation window to fill up, then re-check it
+            #    every check_interval
+            wait = max(self.check_interval,
+                       window_start + self.evaluation_window - time.monotonic())
+            if self._interruptible_sleep(wait):
                 break
 
             # 2. Evaluate focus
@@ -64,5 +87,5 @@ class DistractionNotifierWorker:
                 if self.cooldown > 0:
                     if self._interruptible_sleep(self.cooldown):
                         break
-            # If not distracted, loop immediately (waits another evaluation window)
+                window_start = time.monotonic()
 
@@ -0,0 +1,128 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+from ml_runner_scripts.FocusPredictor import FEATURE_COLS
+
+LEFT_IRIS_IDX = [469, 470, 471, 472]
+RIGHT_IRIS_IDX = [474, 475, 476, 477]
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (M, 4) and (N, 4) ``x, y, w, h`` boxes as an (M, N) matrix."""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    a0, a1 = a[:, None, :2], a[:, None, :2] + a[:, None, 2:]
+    b0, b1 = b[None, :, :2], b[None, :, :2] + b[None, :, 2:]
+    overlap = np.clip(np.minimum(a1, b1) - np.maximum(a0, b0), 0.0, None).prod(axis=2)
+    union = a[:, None, 2:].prod(axis=2) + b[None, :, 2:].prod(axis=2) - overlap
+    return np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+
+
+class FaceTrackAssigner:
+    """Gives each face of a multi-face stream an id that stays stable across frames.
+
+    Faces are matched to the tracks of earlier frames by the overlap of
+    their bounding boxes, best overlap first; a face that overlaps no track
+    by at least ``min_iou`` starts a new track. A track survives
+    ``max_missed_frames`` frames without a face (someone looking down past
+    the detector, a brief occlusion) before its id is retired. Ids are never
+    reused within a session.
+    """
+
+    def __init__(self, *, min_iou: float = 0.3, max_missed_frames: int = 15):
+        self.min_iou = min_iou
+        self.max_missed_frames = max_missed_frames
+        self._ids: list[int] = []
+        self._boxes = np.empty((0, 4))
+        self._missed: list[int] = []
+        self._next_id = 1
+
+    @property
+    def active_tracks(self) -> list[int]:
+        return list(self._ids)
+
+    def reset(self):
+        self._ids = []
+        self._boxes = np.empty((0, 4))
+        self._missed = []
+
+    def assign(self, boxes: Optional[np.ndarray]) -> list[int]:
+        """Track ids for the (N, 4) ``x, y, w, h`` face boxes of one frame, in order."""
+        boxes = np.empty((0, 4)) if boxes is None else np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        assigned: list[Optional[int]] = [None] * len(boxes)
+        matched_tracks = set()
+
+        if self._ids and len(boxes):
+            iou = box_iou(self._boxes, boxes)
+            # Greedy on the best remaining overlap; a handful of faces makes
+            # this as good as an optimal assignment in practice.
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                track, face = divmod(int(flat), len(boxes))
+                if iou[track, face] < self.min_iou:
+                    break
+                if track in matched_tracks or assigned[face] is not None:
+                    continue
+                matched_tracks.add(track)
+                assigned[face] = self._ids[track]
+                self._boxes[track] = boxes[face]
+                self._missed[track] = 0
+
+        keep = []
+        for track in range(len(self._ids)):
+            if track not in matched_tracks:
+                self._missed[track] += 1
+            if self._missed[track] <= self.max_missed_frames:
+                keep.append(track)
+        self._ids = [self._ids[track] for track in keep]
+        self._missed = [self._missed[track] for track in keep]
+        self._boxes = self._boxes[keep]
+
+        for face, track_id in enumerate(assigned):
+            if track_id is None:
+                track_id = assigned[face] = self._next_id
+                self._next_id += 1
+                self._ids.append(track_id)
+                self._missed.append(0)
+                self._boxes = np.vstack((self._boxes, boxes[face]))
+        return assigned
+
+
+def face_samples(
+    session_id: str,
+    timestamp: float,
+    faces: np.ndarray,
+    features: np.ndarray,
+    states: np.ndarray,
+    scores: np.ndarray,
+    track_ids: Optional[Sequence[Optional[int]]] = None,
+) -> list[dict]:
+    """focus_samples rows for the scored faces of one frame, largest face first.
+
+    *faces* are the (F, N, 3) landmarks, *features* the matching
+    (F, len(FEATURE_COLS)) matrix and *states*/*scores* the model output.
+    """
+    # FEATURE_COLS starts with the face box: face_x, face_y, face_w, face_h.
+    boxes = features[:, :4]
+    left_iris = faces[:, LEFT_IRIS_IDX, :2].mean(axis=1).tolist()
+    right_iris = faces[:, RIGHT_IRIS_IDX, :2].mean(axis=1).tolist()
+    face_z = faces[:, 1, 2].tolist()
+
+    samples = []
+    for i in np.argsort(-(boxes[:, 2] * boxes[:, 3]), kind="stable").tolist():
+        sample = {
+            "session_id": session_id,
+            "timestamp": timestamp,
+            "left_x": left_iris[i][0],
+            "left_y": left_iris[i][1],
+            "right_x": right_iris[i][0],
+            "right_y": right_iris[i][1],
+            "face_z": face_z[i],
+            "attention_state": int(states[i]),
+            "focus_score": float(scores[i]),
+            "label": int(states[i]),
+            "track_id": None if track_ids is None else track_ids[i],
+        }
+        sample.update(zip(FEATURE_COLS, features[i].tolist()))
+        samples.append(sample)
+    return samples
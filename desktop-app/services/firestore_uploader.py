@@ -0,0 +1,393 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from google.api_core import exceptions as gcp_exceptions
+
+from paths import get_data_dir
+from services.metrics import registry as metrics
+
+# Firestore rejects batches with more than 500 writes.
+MAX_BATCH_WRITES = 500
+
+RETRYABLE_ERRORS = (
+    gcp_exceptions.ResourceExhausted,
+    gcp_exceptions.ServiceUnavailable,
+    gcp_exceptions.DeadlineExceeded,
+    gcp_exceptions.RetryError,
+)
+
+
+def default_cursor_path() -> str:
+    return os.path.join(get_data_dir(), "firestore_upload_state.json")
+
+
+def sample_to_firestore_doc(sample: dict, user_id: str) -> dict:
+    """Firestore document for one focus sample given as ``insert_sample`` keyword arguments."""
+    ts = sample["timestamp"]
+    return {
+        # Store as Firestore Timestamp (shows as a formatted date in the console).
+        "timestamp": datetime.fromtimestamp(ts, tz=timezone.utc),
+        # Keep raw epoch seconds for debugging/interop.
+        "timestampEpoch": float(ts),
+        "timestampIso": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+        "leftIrisX": sample["left_x"],
+        "leftIrisY": sample["left_y"],
+        "rightIrisX": sample["right_x"],
+        "rightIrisY": sample["right_y"],
+        "faceX": sample["face_x"],
+        "faceY": sample["face_y"],
+        "faceW": sample.get("face_w"),
+        "faceH": sample.get("face_h"),
+        "leftEyeX": sample.get("left_eye_x"),
+        "leftEyeY": sample.get("left_eye_y"),
+        "leftEyeW": sample.get("left_eye_w"),
+        "leftEyeH": sample.get("left_eye_h"),
+        "rightEyeX": sample.get("right_eye_x"),
+        "rightEyeY": sample.get("right_eye_y"),
+        "rightEyeW": sample.get("right_eye_w"),
+        "rightEyeH": sample.get("right_eye_h"),
+        "leftEyeDx": sample.get("left_eye_dx"),
+        "leftEyeDy": sample.get("left_eye_dy"),
+        "rightEyeDx": sample.get("right_eye_dx"),
+        "rightEyeDy": sample.get("right_eye_dy"),
+        "symDx": sample.get("sym_dx"),
+        "symDy": sample.get("sym_dy"),
+        "yaw": sample.get("yaw"),
+        "pitch": sample.get("pitch"),
+        "roll": sample.get("roll"),
+        "label": int(sample["label"]) if sample.get("label") is not None else None,
+        "faceZ": sample["face_z"],
+        "attentionState": int(sample["attention_state"]),
+        "focusScore": float(sample["focus_score"]),
+        "trackId": sample.get("track_id"),
+        "primaryFace": bool(sample.get("primary_face", True)),
+        "sessionId": sample["session_id"],
+        "userId": user_id,
+    }
+
+
+# Recovery uploaders for earlier sessions share the state file with the
+# live one, so updates are serialised across instances.
+_STATE_LOCK = threading.Lock()
+
+
+def _load_cursor_state(path) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _cursor_from_state(value):
+    """The ``(timestamp, focus_sample_id)`` cursor stored in the state file.
+
+    Older state files stored just a timestamp; an empty id re-reads every
+    sample at that timestamp, which is safe because uploads are idempotent.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return (float(value), "")
+    return tuple(value)
+
+
+def _save_cursor_state(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+class FirestoreSampleUploader:
+    """Uploads focus samples to Firestore from a background thread.
+
+    Samples are coalesced into ``WriteBatch`` commits of up to 500 writes.
+    Quota and availability errors are retried with exponential backoff while
+    new samples keep buffering, up to ``max_pending``; beyond that the oldest
+    are dropped from memory.
+
+    SQLite stays the source of truth. A per-session upload cursor (a
+    ``(timestamp, sample id)`` up to which every sample has been committed)
+    is kept in a JSON state file. Samples dropped from memory, failed batches and
+    sessions cut short by an exit are re-read from SQLite past that cursor
+    by :meth:`backfill` or, on the next start, :meth:`recover_unfinished`.
+    """
+
+    def __init__(
+        self,
+        db,
+        *,
+        user_id,
+        session_id,
+        sample_repo=None,
+        cursor_path=None,
+        max_batch_size=MAX_BATCH_WRITES,
+        flush_interval_ms=2000,
+        max_pending=5000,
+        max_retries=6,
+        base_delay=1.0,
+        max_delay=30.0,
+        on_error=None,
+    ):
+        if not 1 <= max_batch_size <= MAX_BATCH_WRITES:
+            raise ValueError(f"max_batch_size must be between 1 and {MAX_BATCH_WRITES}")
+        self.db = db
+        self.user_id = user_id
+        self.session_id = session_id
+        self.sample_repo = sample_repo
+        self.cursor_path = cursor_path or default_cursor_path()
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_error = on_error
+
+        self.uploaded = 0
+        self.dropped = 0
+        self.batches_committed = 0
+
+        self._pending = deque()
+        self._first_pending_at = None
+        self._cond = threading.Condition()
+        self._commit_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._running = False
+        # Once samples are lost from memory the cursor may not move past
+        # them; it stays put until a backfill from SQLite closes the gap.
+        self._has_gap = False
+        self._cursor = None
+
+    # ── lifecycle ────────────────────────────────────────────────────────
+    def start(self):
+        if self._running:
+            return
+        entry = _load_cursor_state(self.cursor_path).get(self.session_id, {})
+        self._cursor = _cursor_from_state(entry.get("cursor"))
+        self._save_cursor(complete=False)
+        self._stopping = False
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="FirestoreSampleUploader", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Upload what is buffered, backfill gaps from SQLite and record the cursor.
+
+        Backoff is abandoned once stopping, so a quota error at shutdown
+        leaves the session marked unfinished for :meth:`recover_unfinished`
+        instead of holding up the exit.
+        """
+        if not self._running:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+        self._running = False
+        if thread is None or not thread.is_alive():
+            self.flush()
+            if self._gap():
+                self.backfill()
+        self._save_cursor(complete=not self._gap() and not self.pending_count())
+
+    # ── producer side ────────────────────────────────────────────────────
+    def submit(self, sample_id: str, sample: dict):
+        with self._cond:
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+                self._cond.notify()
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+                self._has_gap = True
+            self._pending.append((sample_id, sample))
+            if len(self._pending) >= self.max_batch_size:
+                self._cond.notify()
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Commit everything buffered now. Returns the number of samples uploaded."""
+        uploaded = 0
+        while True:
+            with self._cond:
+                items = self._take_batch()
+            if not items:
+                return uploaded
+            if self._commit(items):
+                uploaded += len(items)
+
+    # ── recovery ─────────────────────────────────────────────────────────
+    def backfill(self) -> int:
+        """Re-upload this session's samples newer than the cursor from SQLite."""
+        if self.sample_repo is None:
+            return 0
+        with self._cond:
+            # Buffered samples are newer than the cursor too; the backfill
+            # covers them, so drop them rather than upload them twice.
+            self._pending.clear()
+            self._first_pending_at = None
+            self._has_gap = False
+        uploaded = 0
+        items = []
+        for item in self.sample_repo.iter_samples_after(self.session_id, after=self._cursor):
+            items.append(item)
+            if len(items) >= self.max_batch_size:
+                if not self._commit(items):
+                    return uploaded
+                uploaded += len(items)
+                items = []
+        if items and self._commit(items):
+            uploaded += len(items)
+        return uploaded
+
+    def recover_unfinished(self) -> int:
+        """Backfill other sessions whose upload did not complete (e.g. after a crash)."""
+        if self.sample_repo is None:
+            return 0
+        recovered = 0
+        state = _load_cursor_state(self.cursor_path)
+        for session_id, entry in state.items():
+            if session_id == self.session_id or entry.get("complete"):
+                continue
+            uploader = FirestoreSampleUploader(
+                self.db,
+                user_id=entry.get("user_id", self.user_id),
+                session_id=session_id,
+                sample_repo=self.sample_repo,
+                cursor_path=self.cursor_path,
+                max_batch_size=self.max_batch_size,
+                max_retries=self.max_retries,
+                base_delay=self.base_delay,
+                max_delay=self.max_delay,
+                on_error=self.on_error,
+            )
+            uploader._cursor = _cursor_from_state(entry.get("cursor"))
+            recovered += uploader.backfill()
+            uploader._save_cursor(complete=not uploader._gap())
+        return recovered
+
+    # ── internals ────────────────────────────────────────────────────────
+    def _gap(self) -> bool:
+        with self._cond:
+            return self._has_gap
+
+    def _take_batch(self):
+        count = min(len(self._pending), self.max_batch_size)
+        items = [self._pending.popleft() for _ in range(count)]
+        self._first_pending_at = time.monotonic() if self._pending else None
+        return items
+
+    def _flush_due(self, now) -> bool:
+        if len(self._pending) >= self.max_batch_size:
+            return True
+        return bool(self._pending) and now - self._first_pending_at >= self.flush_interval
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping and not self._flush_due(time.monotonic()):
+                    timeout = None
+                    if self._pending:
+                        timeout = max(
+                            0.0, self._first_pending_at + self.flush_interval - time.monotonic())
+                    self._cond.wait(timeout)
+                if self._stopping:
+                    return
+                items = self._take_batch()
+            self._commit(items)
+
+    def _commit(self, items) -> bool:
+        with self._commit_lock:
+            session_ref = self.db.collection("sessions").document(self.session_id)
+            samples_ref = session_ref.collection("focusSamples")
+            batch = self.db.batch()
+            for sample_id, sample in items:
+                batch.set(
+                    samples_ref.document(sample_id),
+                    sample_to_firestore_doc(sample, self.user_id),
+                    merge=True,
+                )
+            with metrics.histogram("firestore.batch_commit_ms").time():
+                committed = self._commit_with_backoff(batch, len(items))
+            if not committed:
+                with self._cond:
+                    self._has_gap = True
+                return False
+
+            self.uploaded += len(items)
+            self.batches_committed += 1
+            metrics.counter("firestore.samples_uploaded").inc(len(items))
+            with self._cond:
+                advanced = not self._has_gap
+                if advanced:
+                    # Faces of one frame share a timestamp and may straddle
+                    # batches in any id order, so the cursor stops before
+                    # the newest timestamp; a backfill re-sends its rows.
+                    newest = (max(sample["timestamp"] for _, sample in items), "")
+                    if self._cursor is None or newest > self._cursor:
+                        self._cursor = newest
+            if advanced:
+                self._save_cursor(complete=False)
+            return True
+
+    def _commit_with_backoff(self, batch, size) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                batch.commit()
+                return True
+            except RETRYABLE_ERRORS as exc:
+                if attempt == self.max_retries:
+                    self._report_error(
+                        f"Giving up on Firestore batch of {size} samples after "
+                        f"{attempt + 1} attempts: {exc}")
+                    return False
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                print(
+                    f"[FirestoreSampleUploader] Quota/availability error; retrying batch "
+                    f"of {size} in {delay:.1f}s...")
+                with self._cond:
+                    if self._cond.wait_for(lambda: self._stopping, timeout=delay):
+                        self._report_error(
+                            f"Stopped while retrying Firestore batch of {size} samples: {exc}")
+                        return False
+            except Exception as exc:
+                self._report_error(f"Failed to write samples to Firestore: {exc}")
+                return False
+        return False
+
+    def _save_cursor(self, complete: bool):
+        with _STATE_LOCK:
+            try:
+                state = _load_cursor_state(self.cursor_path)
+                if complete:
+                    state.pop(self.session_id, None)
+                else:
+                    state[self.session_id] = {
+                        "user_id": self.user_id,
+                        "cursor": self._cursor,
+                        "complete": False,
+                    }
+                _save_cursor_state(self.cursor_path, state)
+            except OSError as exc:
+                self._report_error(f"Failed to save Firestore upload cursor: {exc}")
+
+    def _report_error(self, message: str):
+        if self.on_error:
+            self.on_error(message)
+        else:
+            print(f"[FirestoreSampleUploader] {message}")
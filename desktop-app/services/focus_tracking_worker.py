@@ -1,21 +1,66 @@
 import os
-import platform
 import time
 from datetime import datetime, timezone
-from threading import Event
+from queue import Empty
+from threading import Event, Thread
 from typing import Callable, Optional
 
 import cv2
 import firebase_admin
+import numpy as np
 from firebase_admin import credentials
 from firebase_admin import firestore
 
 from db.focus_sample_repository import FocusSampleRepository
-from ml_runner_scripts.FocusPredictor import FocusPredictor
+from db.focus_sample_writer import FocusSampleWriter
+from db.session_metrics_repository import SessionMetricsRepository
+from ml_runner_scripts.FocusPredictor import FEATURE_COLS, FocusPredictor, landmarks_to_array
 from paths import resource_path
+from services.attention_window import AttentionWindow
+from services.face_tracks import LEFT_IRIS_IDX, RIGHT_IRIS_IDX, FaceTrackAssigner, face_samples
+from services.firestore_uploader import FirestoreSampleUploader
+from services.frame_pipeline import DropOldestQueue, PipelineStats
+from services.frame_scheduler import AdaptiveFrameScheduler
+from services.frame_sources import FrameSource, frame_source_from_spec
+from services.landmark_pool import LandmarkPool, LandmarkResult, create_face_mesh
+from services.metrics import registry as metrics
+from services.roi_tracker import FaceRoiTracker
+from services.session_metrics import SessionMetricsAccumulator
 
 
 class FocusTrackingWorker:
+    """Runs the webcam tracking pipeline for one session.
+
+    Capture, inference and persistence run as separate stages connected by
+    drop-oldest queues, so a slow SQLite or Firestore write never holds up
+    frame processing. ``get_pipeline_stats()`` reports per-stage latency and
+    queue depth.
+
+    Frames come from a :class:`FrameSource`, the webcam unless one is passed
+    in or named by ``FOCUS_FRAME_SOURCE``. A recorded source is replayed
+    unpaced with every frame scored, and ``run()`` returns once it ends.
+
+    With ``FOCUS_MAX_FACES`` above 1 (shared screens, kiosks) every detected
+    face is scored: features for all faces go through the model in one
+    batched call and each face is persisted as its own sample with a track
+    id that is stable across frames. The largest face drives the UI,
+    attention window and session metrics.
+
+    ``FOCUS_LANDMARK_WORKERS`` above 0 moves FaceMesh into that many worker
+    processes (see :class:`LandmarkPool`), leaving this process's GIL to
+    feature extraction, SQLite and Firestore. A recorded source is spread
+    over every worker and still scored in order, so replay throughput grows
+    with the core count. A live camera needs FaceMesh's tracking between
+    consecutive frames, so it gets a single worker whatever the setting,
+    with at most ``LANDMARK_FRAMES_PER_WORKER`` frames queued; frames it has
+    no room for are dropped. Extra workers only help recorded replay.
+    """
+
+    FRAME_QUEUE_SIZE = 2
+    SAMPLE_QUEUE_SIZE = 256
+    METRICS_SAVE_INTERVAL = 5.0  # seconds between session_metrics upserts
+    LANDMARK_FRAMES_PER_WORKER = 2  # frames queued per landmark worker process
+
     def __init__(
         self,
         *,
@@ -26,6 +71,9 @@ class FocusTrackingWorker:
         sample_callback: Optional[Callable[[int, float, float], None]] = None,
         error_callback: Optional[Callable[[str], None]] = None,
         frame_callback: Optional[Callable[[object], None]] = None,
+        attention_window: Optional[AttentionWindow] = None,
+        frame_source: Optional[FrameSource] = None,
+        frame_wanted: Optional[Callable[[], bool]] = None,
     ):
         self.user_id = user_id
         self.session_id = session_id
@@ -33,8 +81,18 @@ class FocusTrackingWorker:
         self.sample_callback = sample_callback
         self.error_callback = error_callback
         self.frame_callback = frame_callback
+        # Asked once per processed frame; frame_callback only gets the frames it wants.
+        self.frame_wanted = frame_wanted
+        self.attention_window = attention_window
+        # Defaults to FOCUS_FRAME_SOURCE (see frame_source_from_spec), i.e. the webcam.
+        self.frame_source = frame_source
 
         self._sample_repo = FocusSampleRepository()
+        self._metrics_repo = SessionMetricsRepository(self._sample_repo.db)
+        self.session_metrics = SessionMetricsAccumulator()
+        # Set once run() has written the session's final metrics (or has
+        # none to write); a session report should wait for it.
+        self.metrics_saved = Event()
 
         default_model_path = resource_path(
             os.path.join(
@@ -58,6 +116,134 @@ class FocusTrackingWorker:
         self._show_preview = os.getenv("FOCUS_SHOW_PREVIEW", "0").strip() not in {
             "0", "false", "False"}
 
+        self._sqlite_batch_size = self._env_int("FOCUS_SQLITE_BATCH_SIZE", 32)
+        self._sqlite_flush_ms = self._env_int("FOCUS_SQLITE_FLUSH_MS", 500)
+        self._target_fps = self._env_float("FOCUS_TARGET_FPS", 30.0)
+        self._idle_fps = self._env_float("FOCUS_IDLE_FPS", 5.0)
+        self._stable_seconds = self._env_float("FOCUS_STABLE_SECONDS", 3.0)
+        self._roi_tracking = os.getenv("FOCUS_ROI_TRACKING", "1").strip() not in {
+            "0", "false", "False"}
+        self._roi_size = self._env_int("FOCUS_ROI_SIZE", 320)
+        self._max_faces = max(1, self._env_int("FOCUS_MAX_FACES", 1))
+        self._landmark_workers = max(0, self._env_int("FOCUS_LANDMARK_WORKERS", 0))
+
+        self.pipeline_stats = PipelineStats(metrics)
+        self._pipeline_stop = Event()
+        self._capture_done = Event()
+
+    @staticmethod
+    def _env_int(name: str, default: int) -> int:
+        value = os.getenv(name)
+        try:
+            return int(value) if value is not None else default
+        except ValueError:
+            return default
+
+    @staticmethod
+    def _env_float(name: str, default: float) -> float:
+        value = os.getenv(name)
+        try:
+            return float(value) if value is not None else default
+        except ValueError:
+            return default
+
+    @staticmethod
+    def _detect_face(predictor, frame, roi_tracker: Optional[FaceRoiTracker]):
+        """Run FaceMesh on *frame* and return full-frame landmarks, or None."""
+        if roi_tracker is None:
+            results = predictor.face_mesh.process(
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            if not results.multi_face_landmarks:
+                return None
+            return landmarks_to_array(results.multi_face_landmarks[0])
+
+        rgb, roi = roi_tracker.prepare(frame)
+        results = predictor.face_mesh.process(rgb)
+        if not results.multi_face_landmarks and not roi.is_full_frame:
+            # Lost the face inside the crop; look at the whole frame again.
+            roi_tracker.reset()
+            rgb, roi = roi_tracker.prepare(frame)
+            results = predictor.face_mesh.process(rgb)
+        if not results.multi_face_landmarks:
+            roi_tracker.update(None)
+            return None
+        points = roi_tracker.to_frame_coordinates(
+            landmarks_to_array(results.multi_face_landmarks[0]), roi)
+        roi_tracker.update(points)
+        return points
+
+    @staticmethod
+    def _detect_faces(predictor, frame):
+        """Run FaceMesh on the whole *frame*; (F, N, 3) landmarks of every face, or None."""
+        results = predictor.face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if not results.multi_face_landmarks:
+            return None
+        return np.stack([landmarks_to_array(landmarks) for landmarks in results.multi_face_landmarks])
+
+    def _pooled_landmarks(self, pool, stream_id, frame, frames, in_pool, frames_dropped):
+        """Hand frames to the landmark pool; the oldest finished frame and its LandmarkResult.
+
+        A live *frame* goes to the pool if it has room and is dropped
+        otherwise. Recorded replay passes None and the pool is topped up
+        from *frames* instead, keeping every worker busy. Raises Empty when
+        no frame finished in time.
+        """
+        if frame is not None:
+            sequence = pool.submit(stream_id, frame)
+            if sequence is None:
+                frames_dropped.inc()
+            else:
+                in_pool[sequence] = frame
+        else:
+            while pool.in_flight(stream_id) < pool.max_in_flight:
+                try:
+                    frame = frames.get(timeout=0 if in_pool else 0.1)
+                except Empty:
+                    break
+                in_pool[pool.submit(stream_id, frame)] = frame
+        result = pool.get(timeout=0.1)
+        return in_pool.pop(result.sequence), result
+
+    @staticmethod
+    def _pooled_faces(result: LandmarkResult, facemesh_stats):
+        """The (F, N, 3) landmarks of a pool result, as _detect_faces would return them."""
+        facemesh_stats.record(result.seconds)
+        if result.error is not None:
+            print(f"[FocusTrackingWorker] landmark worker failed: {result.error}", flush=True)
+        if result.faces is None:
+            return None
+        return result.faces.astype(np.float64)
+
+    def _score_faces(self, predictor, faces, track_assigner, features_stats, predict_stats):
+        """One sample per face in *faces*, largest face first, scored in a single model call."""
+        with features_stats.time():
+            features = predictor.extract_feature_matrix(faces)
+        with predict_stats.time():
+            states, scores = predictor.predict_batch(features)
+        # FEATURE_COLS starts with the face box: face_x, face_y, face_w, face_h.
+        track_ids = track_assigner.assign(features[:, :4])
+        return face_samples(
+            self.session_id, time.time(), faces, features, states, scores, track_ids)
+
+    @staticmethod
+    def _draw_tracks(frame, frame_samples):
+        """Box and label every tracked face of a multi-face frame."""
+        img_h, img_w = frame.shape[:2]
+        for sample in frame_samples:
+            x, y = int(sample["face_x"] * img_w), int(sample["face_y"] * img_h)
+            w, h = int(sample["face_w"] * img_w), int(sample["face_h"] * img_h)
+            color = (0, 200, 0) if sample["attention_state"] == 1 else (0, 0, 255)
+            cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+            cv2.putText(
+                frame,
+                f"#{sample['track_id']} {sample['focus_score']:.2f}",
+                (x, max(15, y - 8)),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.55,
+                color,
+                2,
+            )
+
     def _emit_error(self, message: str):
         if self.error_callback:
             self.error_callback(message)
@@ -94,168 +280,111 @@ class FocusTrackingWorker:
         except Exception as exc:
             self._emit_error(f"Failed to write session to Firestore: {exc}")
 
-    def _push_sample_to_firestore(
+    def _iris_center(self, points, indices):
+        x, y = points[indices, :2].mean(axis=0).tolist()
+        return x, y
+
+    def _capture_loop(
         self,
-        db,
-        *,
-        sample_id: str,
-        ts: float,
-        left_x: float,
-        left_y: float,
-        right_x: float,
-        right_y: float,
-        face_x: float,
-        face_y: float,
-        face_z: float,
-        attention_state: int,
-        focus_score: float,
-        face_w: float,
-        face_h: float,
-        left_eye_x: float,
-        left_eye_y: float,
-        left_eye_w: float,
-        left_eye_h: float,
-        right_eye_x: float,
-        right_eye_y: float,
-        right_eye_w: float,
-        right_eye_h: float,
-        left_eye_dx: float,
-        left_eye_dy: float,
-        right_eye_dx: float,
-        right_eye_dy: float,
-        sym_dx: float,
-        sym_dy: float,
-        yaw: float,
-        pitch: float,
-        roll: float,
-        label: int,
+        source: FrameSource,
+        frames: DropOldestQueue,
+        scheduler: Optional[AdaptiveFrameScheduler] = None,
     ):
-        if db is None:
-            return
+        capture_stats = self.pipeline_stats.stage("capture")
+        served_slot = 0
         try:
-            db.collection("sessions").document(self.session_id).collection("focusSamples").document(
-                sample_id
-            ).set(
-                {
-                    # Store as Firestore Timestamp (shows as a formatted date in the console).
-                    "timestamp": datetime.fromtimestamp(ts, tz=timezone.utc),
-                    # Keep raw epoch seconds for debugging/interop.
-                    "timestampEpoch": float(ts),
-                    "timestampIso": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
-                    "leftIrisX": left_x,
-                    "leftIrisY": left_y,
-                    "rightIrisX": right_x,
-                    "rightIrisY": right_y,
-                    "faceX": face_x,
-                    "faceY": face_y,
-                    "faceW": face_w,
-                    "faceH": face_h,
-                    "leftEyeX": left_eye_x,
-                    "leftEyeY": left_eye_y,
-                    "leftEyeW": left_eye_w,
-                    "leftEyeH": left_eye_h,
-                    "rightEyeX": right_eye_x,
-                    "rightEyeY": right_eye_y,
-                    "rightEyeW": right_eye_w,
-                    "rightEyeH": right_eye_h,
-                    "leftEyeDx": left_eye_dx,
-                    "leftEyeDy": left_eye_dy,
-                    "rightEyeDx": right_eye_dx,
-                    "rightEyeDy": right_eye_dy,
-                    "symDx": sym_dx,
-                    "symDy": sym_dy,
-                    "yaw": yaw,
-                    "pitch": pitch,
-                    "roll": roll,
-                    "label": int(label),
-                    "faceZ": face_z,
-                    "attentionState": int(attention_state),
-                    "focusScore": float(focus_score),
-                    "sessionId": self.session_id,
-                    "userId": self.user_id,
-                },
-                merge=True,
-            )
+            while not self._pipeline_stop.is_set():
+                if source.live and scheduler is not None:
+                    # Grab every frame so the camera buffer stays drained, but
+                    # decode only one per inference slot of the scheduler.
+                    with capture_stats.time():
+                        ok = source.grab()
+                        due_slot = scheduler.due_slot()
+                        if ok and due_slot > served_slot:
+                            ok, frame = source.retrieve()
+                            served_slot = due_slot
+                        elif ok:
+                            continue
+                else:
+                    with capture_stats.time():
+                        ok, frame = source.read()
+                if not ok:
+                    if source.exhausted:
+                        break
+                    time.sleep(0.01)
+                    continue
+                if source.live:
+                    frames.put(frame)
+                    continue
+                # Recorded replay: every frame is scored, so wait for room.
+                while not self._pipeline_stop.is_set():
+                    if frames.put_wait(frame, timeout=0.1):
+                        break
         except Exception as exc:
-            self._emit_error(f"Failed to write sample to Firestore: {exc}")
-
-    def _iris_center(self, landmarks, indices):
-        x = sum(landmarks[i].x for i in indices) / len(indices)
-        y = sum(landmarks[i].y for i in indices) / len(indices)
-        return x, y
-
-    def _open_camera(self) -> tuple[Optional[cv2.VideoCapture], list[str]]:
-        attempts: list[str] = []
+            self._emit_error(f"Frame capture failed: {exc}")
+            self._pipeline_stop.set()
+        finally:
+            self._capture_done.set()
 
-        env_index = os.getenv("FOCUS_CAMERA_INDEX")
+    def _persistence_loop(
+        self,
+        samples: DropOldestQueue,
+        writer: FocusSampleWriter,
+        uploader: Optional[FirestoreSampleUploader],
+    ):
+        sqlite_stats = self.pipeline_stats.stage("sqlite")
+        firestore_stats = self.pipeline_stats.stage("firestore")
+        next_metrics_save = time.monotonic() + self.METRICS_SAVE_INTERVAL
+        # Keep draining after stop so samples already scored are not lost.
+        while not self._pipeline_stop.is_set() or samples.qsize():
+            if time.monotonic() >= next_metrics_save:
+                self._save_session_metrics()
+                next_metrics_save = time.monotonic() + self.METRICS_SAVE_INTERVAL
+            try:
+                sample = samples.get(timeout=0.1)
+            except Empty:
+                continue
+            # Only the main face of a multi-face frame counts towards the
+            # session; the flag is stored so report scans can do the same.
+            primary_face = sample.setdefault("primary_face", True)
+            try:
+                with sqlite_stats.time():
+                    sample_id = writer.submit(**sample)
+            except Exception as exc:
+                self._emit_error(f"Failed to queue sample for SQLite: {exc}")
+                continue
+            if primary_face:
+                self.session_metrics.add(
+                    sample["timestamp"], sample["attention_state"], sample["focus_score"])
+            if uploader is not None:
+                with firestore_stats.time():
+                    uploader.submit(sample_id, sample)
+
+    def _save_session_metrics(self):
+        if self.session_metrics.sample_count == 0:
+            return
         try:
-            preferred_index = int(env_index) if env_index is not None else 0
-        except ValueError:
-            preferred_index = 0
-
-        indices = [preferred_index]
-        for extra in (0, 1, 2):
-            if extra not in indices:
-                indices.append(extra)
-
-        backend_name = os.getenv("FOCUS_CAMERA_BACKEND", "").strip().lower()
-
-        cap_dshow = getattr(cv2, "CAP_DSHOW", None)
-        cap_msmf = getattr(cv2, "CAP_MSMF", None)
-        cap_avfoundation = getattr(cv2, "CAP_AVFOUNDATION", None)
-        cap_v4l2 = getattr(cv2, "CAP_V4L2", None)
-
-        backend_map = {
-            "dshow": cap_dshow,
-            "msmf": cap_msmf,
-            "avfoundation": cap_avfoundation,
-            "v4l2": cap_v4l2,
-            "any": None,
-            "": None,
-        }
-        forced_backend = backend_map.get(backend_name, None)
-
-        system = platform.system()
-        default_backends: list[Optional[int]]
-        if backend_name in {"any", ""}:
-            default_backends = [None]
-        elif forced_backend is not None:
-            default_backends = [forced_backend, None]
-        elif system == "Windows":
-            default_backends = [cap_dshow, cap_msmf, None]
-        elif system == "Darwin":
-            default_backends = [cap_avfoundation, None]
-        else:
-            default_backends = [cap_v4l2, None]
-
-        default_backends = [b for b in default_backends if b is None or isinstance(b, int)]
-
-        for index in indices:
-            for backend in default_backends:
-                label = f"index={index}, backend={'default' if backend is None else backend}"
-                attempts.append(label)
-                try:
-                    cap = cv2.VideoCapture(index) if backend is None else cv2.VideoCapture(index, backend)
-                except Exception as exc:
-                    attempts.append(f"{label} -> exception: {exc}")
-                    continue
-                if cap is not None and cap.isOpened():
-                    return cap, attempts
-                try:
-                    if cap is not None:
-                        cap.release()
-                except Exception:
-                    pass
+            self._metrics_repo.save(self.session_id, self.session_metrics)
+        except Exception as exc:
+            self._emit_error(f"Failed to save session metrics: {exc}")
 
-        return None, attempts
+    def get_pipeline_stats(self) -> dict:
+        """Per-stage latency and queue-depth counters for the running pipeline."""
+        return self.pipeline_stats.snapshot()
 
     def run(self):
         if not os.path.exists(self._model_path):
             self._emit_error(f"Model not found at: {self._model_path}")
+            self.metrics_saved.set()
             return
 
         predictor = None
-        cap = None
+        source = None
+        landmark_pool = None
+        capture_thread = None
+        persistence_thread = None
+        sample_writer = None
+        uploader = None
         firestore_db = self._init_firestore()
         db_path = self._sample_repo.db.db_path
         print(f"[FocusTrackingWorker] model_path={self._model_path}")
@@ -268,28 +397,118 @@ class FocusTrackingWorker:
         else:
             print(
                 f"[FocusTrackingWorker] Firestore enabled for project={self._firebase_project_id}")
-        left_iris_indices = [469, 470, 471, 472]
-        right_iris_indices = [474, 475, 476, 477]
         preview_window_name = "Screen Gaze Live"
 
+        self.pipeline_stats = PipelineStats(metrics)
+        self._pipeline_stop = Event()
+        self._capture_done = Event()
+        self.session_metrics = SessionMetricsAccumulator()
+        frames = self.pipeline_stats.queue("frames", self.FRAME_QUEUE_SIZE)
+        samples = self.pipeline_stats.queue("samples", self.SAMPLE_QUEUE_SIZE)
+        inference_stats = self.pipeline_stats.stage("inference")
+        facemesh_stats = self.pipeline_stats.stage("facemesh")
+        features_stats = self.pipeline_stats.stage("features")
+        predict_stats = self.pipeline_stats.stage("predict")
+        preview_stats = self.pipeline_stats.stage("preview")
+        handoff_stats = self.pipeline_stats.stage("ui_handoff")
+        frames_scored = metrics.counter("tracking.frames_scored")
+        frames_no_face = metrics.counter("tracking.frames_no_face")
+        frames_dropped = metrics.counter("tracking.frames_dropped")
+        fps_gauge = metrics.gauge("tracking.target_fps")
+
         try:
-            predictor = FocusPredictor(self._model_path)
-            cap, attempts = self._open_camera()
-            if cap is None:
-                attempted = "; ".join(attempts[:8]) + ("; ..." if len(attempts) > 8 else "")
-                self._emit_error(
-                    "Unable to access webcam. "
-                    "Make sure no other app is using the camera and OS permissions allow it. "
-                    f"Attempts: {attempted}"
-                )
+            predictor = FocusPredictor(
+                self._model_path,
+                max_num_faces=self._max_faces,
+                with_face_mesh=not self._landmark_workers,
+            )
+            source = self.frame_source or frame_source_from_spec(
+                os.getenv("FOCUS_FRAME_SOURCE", ""))
+            if not source.open():
+                self._emit_error(source.error or f"Unable to open {source.describe()}")
+                source = None
                 return
+            print(f"[FocusTrackingWorker] frame_source={source.describe()}")
+
+            if self._landmark_workers:
+                # A live stream is pinned to one worker; more would sit idle.
+                landmark_workers = 1 if source.live else self._landmark_workers
+                landmark_pool = LandmarkPool(
+                    landmark_workers,
+                    max_num_faces=self._max_faces,
+                    max_in_flight=self.LANDMARK_FRAMES_PER_WORKER * landmark_workers,
+                    detector_factory=create_face_mesh,
+                )
+                landmark_pool.start()
+                landmark_stream = landmark_pool.add_stream(spread=not source.live)
+                in_pool = {}
+                print(f"[FocusTrackingWorker] landmark_workers={landmark_workers}")
 
             self._upsert_session_to_firestore(firestore_db)
 
-            while not self.stop_event.is_set():
-                ok, frame = cap.read()
-                if not ok:
-                    time.sleep(0.01)
+            sample_writer = FocusSampleWriter(
+                self._sample_repo.db,
+                batch_size=self._sqlite_batch_size,
+                flush_interval_ms=self._sqlite_flush_ms,
+                on_error=lambda exc: self._emit_error(f"Failed to write sample to SQLite: {exc}"),
+            )
+            sample_writer.start()
+
+            if firestore_db is not None:
+                uploader = FirestoreSampleUploader(
+                    firestore_db,
+                    user_id=self.user_id,
+                    session_id=self.session_id,
+                    sample_repo=self._sample_repo,
+                    on_error=self._emit_error,
+                )
+                uploader.start()
+                Thread(target=uploader.recover_unfinished, daemon=True).start()
+
+            scheduler = AdaptiveFrameScheduler(
+                active_fps=self._target_fps,
+                idle_fps=self._idle_fps,
+                stable_seconds=self._stable_seconds,
+            )
+            capture_thread = Thread(
+                target=self._capture_loop, args=(source, frames, scheduler), daemon=True)
+            persistence_thread = Thread(
+                target=self._persistence_loop, args=(samples, sample_writer, uploader),
+                daemon=True)
+            capture_thread.start()
+            persistence_thread.start()
+
+            multi_face = self._max_faces > 1
+            # The ROI crop follows a single face and needs FaceMesh in this
+            # process, so multi-face and pooled modes always see the full frame.
+            roi_tracker = (
+                FaceRoiTracker(roi_size=self._roi_size)
+                if self._roi_tracking and not multi_face and landmark_pool is None else None
+            )
+            track_assigner = FaceTrackAssigner() if multi_face else None
+            while not self.stop_event.is_set() and not self._pipeline_stop.is_set():
+                landmark_result = None
+                try:
+                    if source.live:
+                        if scheduler.wait(self.stop_event):
+                            break
+                        # Frames captured while waiting are stale; score the newest.
+                        frame = frames.get_latest(timeout=0.1)
+                    elif landmark_pool is None:
+                        # Recorded replay runs unpaced and scores every frame.
+                        frame = frames.get(timeout=0.1)
+                    else:
+                        frame = None
+                    if landmark_pool is not None:
+                        if landmark_pool.error is not None:
+                            self._emit_error(f"Landmark detection stopped: {landmark_pool.error}")
+                            break
+                        frame, landmark_result = self._pooled_landmarks(
+                            landmark_pool, landmark_stream, frame, frames, in_pool, frames_dropped)
+                except Empty:
+                    if (self._capture_done.is_set() and not frames.qsize()
+                            and not (landmark_pool is not None and landmark_pool.in_flight())):
+                        break
                     continue
 
                 # Default to NOT FOCUSED when no face is detected
@@ -298,170 +517,154 @@ class FocusTrackingWorker:
                 state_text = "NO FACE"
                 color = (0, 0, 255)  # Red for NO FACE
 
-                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = predictor.face_mesh.process(rgb)
-
-                if results.multi_face_landmarks:
-                    landmarks = results.multi_face_landmarks[0].landmark
-                    img_h, img_w = frame.shape[:2]
-
-                    features = predictor.extract_features(
-                        landmarks, img_w, img_h)
-                    attention_state, focus_score = predictor.predict(features)
-                    ts = time.time()
-
-                    feat_face_x = features["face_x"]
-                    feat_face_y = features["face_y"]
-                    feat_face_w = features["face_w"]
-                    feat_face_h = features["face_h"]
-                    feat_left_eye_x = features["left_eye_x"]
-                    feat_left_eye_y = features["left_eye_y"]
-                    feat_left_eye_w = features["left_eye_w"]
-                    feat_left_eye_h = features["left_eye_h"]
-                    feat_right_eye_x = features["right_eye_x"]
-                    feat_right_eye_y = features["right_eye_y"]
-                    feat_right_eye_w = features["right_eye_w"]
-                    feat_right_eye_h = features["right_eye_h"]
-                    feat_left_eye_dx = features["left_eye_dx"]
-                    feat_left_eye_dy = features["left_eye_dy"]
-                    feat_right_eye_dx = features["right_eye_dx"]
-                    feat_right_eye_dy = features["right_eye_dy"]
-                    feat_sym_dx = features["sym_dx"]
-                    feat_sym_dy = features["sym_dy"]
-                    feat_yaw = features["yaw"]
-                    feat_pitch = features["pitch"]
-                    feat_roll = features["roll"]
-
-                    left_x, left_y = self._iris_center(
-                        landmarks, left_iris_indices)
-                    right_x, right_y = self._iris_center(
-                        landmarks, right_iris_indices)
-                    nose_z = landmarks[1].z
-
-                    sample_id = self._sample_repo.insert_sample(
-                        session_id=self.session_id,
-                        timestamp=ts,
-                        left_x=left_x,
-                        left_y=left_y,
-                        right_x=right_x,
-                        right_y=right_y,
-                        face_x=float(feat_face_x),
-                        face_y=float(feat_face_y),
-                        face_z=nose_z,
-                        attention_state=int(attention_state),
-                        focus_score=float(focus_score),
-                        face_w=float(feat_face_w),
-                        face_h=float(feat_face_h),
-                        left_eye_x=float(feat_left_eye_x),
-                        left_eye_y=float(feat_left_eye_y),
-                        left_eye_w=float(feat_left_eye_w),
-                        left_eye_h=float(feat_left_eye_h),
-                        right_eye_x=float(feat_right_eye_x),
-                        right_eye_y=float(feat_right_eye_y),
-                        right_eye_w=float(feat_right_eye_w),
-                        right_eye_h=float(feat_right_eye_h),
-                        left_eye_dx=float(feat_left_eye_dx),
-                        left_eye_dy=float(feat_left_eye_dy),
-                        right_eye_dx=float(feat_right_eye_dx),
-                        right_eye_dy=float(feat_right_eye_dy),
-                        sym_dx=float(feat_sym_dx),
-                        sym_dy=float(feat_sym_dy),
-                        yaw=float(feat_yaw),
-                        pitch=float(feat_pitch),
-                        roll=float(feat_roll),
-                        label=int(attention_state),
-                    )
-
-                    self._push_sample_to_firestore(
-                        firestore_db,
-                        sample_id=sample_id,
-                        ts=ts,
-                        left_x=left_x,
-                        left_y=left_y,
-                        right_x=right_x,
-                        right_y=right_y,
-                        face_x=float(feat_face_x),
-                        face_y=float(feat_face_y),
-                        face_z=nose_z,
-                        attention_state=int(attention_state),
-                        focus_score=float(focus_score),
-                        face_w=float(feat_face_w),
-                        face_h=float(feat_face_h),
-                        left_eye_x=float(feat_left_eye_x),
-                        left_eye_y=float(feat_left_eye_y),
-                        left_eye_w=float(feat_left_eye_w),
-                        left_eye_h=float(feat_left_eye_h),
-                        right_eye_x=float(feat_right_eye_x),
-                        right_eye_y=float(feat_right_eye_y),
-                        right_eye_w=float(feat_right_eye_w),
-                        right_eye_h=float(feat_right_eye_h),
-                        left_eye_dx=float(feat_left_eye_dx),
-                        left_eye_dy=float(feat_left_eye_dy),
-                        right_eye_dx=float(feat_right_eye_dx),
-                        right_eye_dy=float(feat_right_eye_dy),
-                        sym_dx=float(feat_sym_dx),
-                        sym_dy=float(feat_sym_dy),
-                        yaw=float(feat_yaw),
-                        pitch=float(feat_pitch),
-                        roll=float(feat_roll),
-                        label=int(attention_state),
-                    )
+                with inference_stats.time():
+                    sample = None
+                    frame_samples = []
+                    if track_assigner is not None:
+                        if landmark_result is not None:
+                            faces = self._pooled_faces(landmark_result, facemesh_stats)
+                        else:
+                            with facemesh_stats.time():
+                                faces = self._detect_faces(predictor, frame)
+                        if faces is None:
+                            track_assigner.assign(None)
+                        else:
+                            frame_samples = self._score_faces(
+                                predictor, faces, track_assigner, features_stats, predict_stats)
+                            sample = frame_samples[0]
+                            attention_state = sample["attention_state"]
+                            focus_score = sample["focus_score"]
+                    else:
+                        if landmark_result is not None:
+                            faces = self._pooled_faces(landmark_result, facemesh_stats)
+                            points = None if faces is None else faces[0]
+                        else:
+                            with facemesh_stats.time():
+                                points = self._detect_face(predictor, frame, roi_tracker)
+
+                        if points is not None:
+                            img_h, img_w = frame.shape[:2]
+
+                            with features_stats.time():
+                                features = predictor.extract_features(
+                                    points, img_w, img_h)
+                            with predict_stats.time():
+                                attention_state, focus_score = predictor.predict(features)
+                            ts = time.time()
+
+                            left_x, left_y = self._iris_center(
+                                points, LEFT_IRIS_IDX)
+                            right_x, right_y = self._iris_center(
+                                points, RIGHT_IRIS_IDX)
+
+                            sample = {
+                                "session_id": self.session_id,
+                                "timestamp": ts,
+                                "left_x": left_x,
+                                "left_y": left_y,
+                                "right_x": right_x,
+                                "right_y": right_y,
+                                "face_z": float(points[1, 2]),
+                                "attention_state": int(attention_state),
+                                "focus_score": float(focus_score),
+                                "label": int(attention_state),
+                            }
+                            for key in FEATURE_COLS:
+                                sample[key] = float(features[key])
+
+                scheduler.observe(
+                    sample["attention_state"] if sample is not None else None)
+                fps_gauge.set(scheduler.fps)
+                (frames_scored if sample is not None else frames_no_face).inc()
+
+                if sample is not None:
+                    if self.attention_window is not None:
+                        self.attention_window.publish(
+                            sample["timestamp"], sample["attention_state"])
+                    samples.put(sample)
+                    for other in frame_samples[1:]:
+                        samples.put({**other, "primary_face": False})
 
                     if self.sample_callback:
                         self.sample_callback(
-                            int(attention_state), float(focus_score), ts)
+                            int(attention_state), float(focus_score), sample["timestamp"])
 
                     state_text = "FOCUSED" if int(
                         attention_state) == 1 else "DISTRACTED"
                     color = (0, 200, 0) if int(
                         attention_state) == 1 else (0, 0, 255)
 
-                if self._show_preview or self.frame_callback:
-                    cv2.putText(
-                        frame,
-                        f"State: {state_text}",
-                        (20, 40),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.9,
-                        color,
-                        2,
-                    )
-                    cv2.putText(
-                        frame,
-                        f"Score: {float(focus_score):.3f}",
-                        (20, 75),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.8,
-                        (255, 255, 255),
-                        2,
-                    )
-                    cv2.putText(
-                        frame,
-                        f"State value: {int(attention_state)}",
-                        (20, 110),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.65,
-                        (255, 255, 0),
-                        2,
-                    )
-
-                    if self.frame_callback:
-                        self.frame_callback(frame)
-
-                    if self._show_preview:
-                        cv2.imshow(preview_window_name, frame)
-                        key = cv2.waitKey(1) & 0xFF
-                        if key == ord("q"):
-                            self._show_preview = False
-                            cv2.destroyWindow(preview_window_name)
-
-                time.sleep(0.03)
+                # Overlays are only drawn when some consumer shows this frame.
+                deliver_frame = self.frame_callback is not None and (
+                    self.frame_wanted is None or self.frame_wanted())
+                if self._show_preview or deliver_frame:
+                    with preview_stats.time():
+                        cv2.putText(
+                            frame,
+                            f"State: {state_text}",
+                            (20, 40),
+                            cv2.FONT_HERSHEY_SIMPLEX,
+                            0.9,
+                            color,
+                            2,
+                        )
+                        cv2.putText(
+                            frame,
+                            f"Score: {float(focus_score):.3f}",
+                            (20, 75),
+                            cv2.FONT_HERSHEY_SIMPLEX,
+                            0.8,
+                            (255, 255, 255),
+                            2,
+                        )
+                        cv2.putText(
+                            frame,
+                            f"State value: {int(attention_state)}",
+                            (20, 110),
+                            cv2.FONT_HERSHEY_SIMPLEX,
+                            0.65,
+                            (255, 255, 0),
+                            2,
+                        )
+                        self._draw_tracks(frame, frame_samples)
+
+                        if deliver_frame:
+                            with handoff_stats.time():
+                                self.frame_callback(frame)
+
+                        if self._show_preview:
+                            cv2.imshow(preview_window_name, frame)
+                            key = cv2.waitKey(1) & 0xFF
+                            if key == ord("q"):
+                                self._show_preview = False
+                                cv2.destroyWindow(preview_window_name)
         except Exception as exc:
             self._emit_error(f"Tracking worker failed: {exc}")
         finally:
-            if cap is not None:
-                cap.release()
+            self._pipeline_stop.set()
+            if capture_thread is not None:
+                capture_thread.join(timeout=2)
+            if persistence_thread is not None:
+                persistence_thread.join(timeout=10)
+            if sample_writer is not None:
+                sample_writer.stop()
+                print(
+                    f"[FocusTrackingWorker] sqlite writer: rows={sample_writer.rows_written} "
+                    f"batches={sample_writer.batches_written} failed={sample_writer.rows_failed}")
+                self._save_session_metrics()
+            self.metrics_saved.set()
+            if uploader is not None:
+                # After the SQLite writer so a backfill sees every sample.
+                uploader.stop(timeout=5)
+                print(
+                    f"[FocusTrackingWorker] firestore uploader: uploaded={uploader.uploaded} "
+                    f"batches={uploader.batches_committed} dropped={uploader.dropped}")
+            if landmark_pool is not None:
+                landmark_pool.stop()
+            if source is not None:
+                source.release()
             if self._show_preview:
                 cv2.destroyAllWindows()
             if predictor is not None and getattr(predictor, "face_mesh", None) is not None:
                 predictor.face_mesh.close()
+            print(f"[FocusTrackingWorker] pipeline stats: {self.pipeline_stats.format_summary()}")
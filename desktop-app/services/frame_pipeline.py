@@ -0,0 +1,176 @@
+import threading
+import time
+from collections import deque
+from queue import Empty
+
+
+class DropOldestQueue:
+    """Bounded FIFO queue that discards its oldest item instead of blocking the producer.
+
+    Used between pipeline stages so a slow consumer (disk, network) only ever
+    costs stale items, never stalls the stage that feeds it.
+    """
+
+    def __init__(self, maxsize: int):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._items = deque()
+        self._changed = threading.Condition()
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, item) -> bool:
+        """Append *item*. Returns True when an older item was dropped to make room."""
+        with self._changed:
+            dropped = False
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+                dropped = True
+            self._items.append(item)
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._changed.notify_all()
+            return dropped
+
+    def put_wait(self, item, timeout: float | None = None) -> bool:
+        """Append *item* once there is room, waiting up to *timeout* seconds.
+
+        For producers that must not lose items (recorded replay). Returns
+        False, without enqueuing, if the queue stayed full.
+        """
+        with self._changed:
+            if not self._changed.wait_for(
+                    lambda: len(self._items) < self.maxsize, timeout=timeout):
+                return False
+            self._items.append(item)
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._changed.notify_all()
+            return True
+
+    def get(self, timeout: float | None = None):
+        """Pop the oldest item, waiting up to *timeout* seconds. Raises queue.Empty on timeout."""
+        with self._changed:
+            if not self._changed.wait_for(lambda: self._items, timeout=timeout):
+                raise Empty
+            item = self._items.popleft()
+            self._changed.notify_all()
+            return item
+
+    def get_latest(self, timeout: float | None = None):
+        """Pop the newest item and discard older ones (counted as dropped)."""
+        with self._changed:
+            if not self._changed.wait_for(lambda: self._items, timeout=timeout):
+                raise Empty
+            item = self._items.pop()
+            self.dropped += len(self._items)
+            self._items.clear()
+            self._changed.notify_all()
+            return item
+
+    def qsize(self) -> int:
+        with self._changed:
+            return len(self._items)
+
+    def snapshot(self) -> dict:
+        with self._changed:
+            return {
+                "depth": len(self._items),
+                "max_depth": self.max_depth,
+                "capacity": self.maxsize,
+                "dropped": self.dropped,
+            }
+
+
+class StageStats:
+    """Latency counters for one pipeline stage, optionally mirrored into a metrics histogram."""
+
+    def __init__(self, name: str, histogram=None):
+        self.name = name
+        self._histogram = histogram
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.last_seconds = seconds
+            if seconds > self.max_seconds:
+                self.max_seconds = seconds
+        if self._histogram is not None:
+            self._histogram.record(seconds * 1000.0)
+
+    def time(self):
+        """Context manager that records the duration of its block."""
+        return _StageTimer(self)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            mean = self.total_seconds / self.count if self.count else 0.0
+            return {
+                "count": self.count,
+                "mean_ms": mean * 1000.0,
+                "max_ms": self.max_seconds * 1000.0,
+                "last_ms": self.last_seconds * 1000.0,
+            }
+
+
+class _StageTimer:
+    __slots__ = ("_stats", "_start")
+
+    def __init__(self, stats: StageStats):
+        self._stats = stats
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stats.record(time.perf_counter() - self._start)
+        return False
+
+
+class PipelineStats:
+    """Per-stage latency and queue-depth counters for a staged worker.
+
+    With a :class:`~services.metrics.MetricsRegistry`, each stage also feeds
+    the ``pipeline.<stage>_ms`` histogram there.
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry
+        self.stages: dict[str, StageStats] = {}
+        self.queues: dict[str, DropOldestQueue] = {}
+
+    def stage(self, name: str) -> StageStats:
+        stats = self.stages.get(name)
+        if stats is None:
+            histogram = self.registry.histogram(f"pipeline.{name}_ms") if self.registry else None
+            stats = self.stages[name] = StageStats(name, histogram)
+        return stats
+
+    def queue(self, name: str, maxsize: int) -> DropOldestQueue:
+        q = self.queues[name] = DropOldestQueue(maxsize)
+        return q
+
+    def snapshot(self) -> dict:
+        return {
+            "stages": {name: stats.snapshot() for name, stats in self.stages.items()},
+            "queues": {name: q.snapshot() for name, q in self.queues.items()},
+        }
+
+    def format_summary(self) -> str:
+        snapshot = self.snapshot()
+        parts = [
+            f"{name}: n={s['count']} mean={s['mean_ms']:.1f}ms max={s['max_ms']:.1f}ms"
+            for name, s in snapshot["stages"].items()
+        ]
+        parts += [
+            f"{name} queue: depth={q['depth']}/{q['capacity']} max={q['max_depth']} dropped={q['dropped']}"
+            for name, q in snapshot["queues"].items()
+        ]
+        return "; ".join(parts)
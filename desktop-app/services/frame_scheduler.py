@@ -0,0 +1,96 @@
+import time
+from threading import Event
+from typing import Callable, Optional
+
+
+class AdaptiveFrameScheduler:
+    """Deadline-based pacing for a per-frame processing loop.
+
+    Each frame is given a slot of ``1 / fps`` seconds measured from the start
+    of the previous slot, so time spent processing is subtracted from the
+    wait rather than added to it. A frame that overruns its slot starts the
+    next one immediately, without trying to catch up on missed slots.
+
+    The loop runs at ``active_fps`` until the observed prediction has stayed
+    the same for ``stable_seconds``, then drops to ``idle_fps``. A state
+    change or a lost face switches straight back to ``active_fps``.
+    """
+
+    def __init__(
+        self,
+        active_fps: float = 30.0,
+        idle_fps: float = 5.0,
+        stable_seconds: float = 3.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if active_fps <= 0 or idle_fps <= 0:
+            raise ValueError("frame rates must be positive")
+        self.active_fps = float(active_fps)
+        self.idle_fps = min(float(idle_fps), self.active_fps)
+        self.stable_seconds = max(0.0, float(stable_seconds))
+        self._clock = clock
+        self._sleep = sleep
+
+        self._slot_start = None
+        self.slots = 0
+        self._last_state = None
+        self._stable_since = None
+        self.idle = False
+
+    @property
+    def fps(self) -> float:
+        return self.idle_fps if self.idle else self.active_fps
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.fps
+
+    def observe(self, state: Optional[int]):
+        """Record the outcome of a frame: the predicted state, or None when no face was found."""
+        now = self._clock()
+        if state is None or state != self._last_state:
+            self._last_state = state
+            self._stable_since = now if state is not None else None
+            self.idle = False
+        elif not self.idle and now - self._stable_since >= self.stable_seconds:
+            self.idle = True
+
+    def time_until_next(self) -> float:
+        if self._slot_start is None:
+            return 0.0
+        return max(0.0, self._slot_start + self.interval - self._clock())
+
+    def due_slot(self) -> int:
+        """Number of the slot the next frame belongs to.
+
+        That is the current slot until its deadline passes and the next one
+        after, so a capture thread can decode one frame per slot while
+        ``wait`` runs in another thread.
+        """
+        return self.slots + (1 if self.time_until_next() <= 0 else 0)
+
+    def wait(self, stop_event: Optional[Event] = None) -> bool:
+        """Block until the next frame slot starts. Returns True if *stop_event* was set.
+
+        Call once at the top of each iteration; the first call returns at once.
+        """
+        if self._slot_start is None:
+            self._slot_start = self._clock()
+            self.slots += 1
+            return stop_event is not None and stop_event.is_set()
+
+        target = self._slot_start + self.interval
+        delay = target - self._clock()
+        if delay > 0:
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    return True
+            else:
+                self._sleep(delay)
+        now = self._clock()
+        # Wake-up jitter keeps the cadence; an overrun of a whole slot
+        # restarts it from now instead of bursting to catch up.
+        self._slot_start = target if now - target < self.interval else now
+        self.slots += 1
+        return stop_event is not None and stop_event.is_set()
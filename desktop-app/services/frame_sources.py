@@ -0,0 +1,352 @@
+import os
+import platform
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from services.frame_scheduler import AdaptiveFrameScheduler
+
+
+class FrameSource:
+    """Where the tracking pipeline gets its BGR frames from.
+
+    ``open()`` returns False and sets ``error`` when the source cannot be
+    used. ``read()`` mirrors ``cv2.VideoCapture.read``: ``(ok, frame)``.
+    A finite source that has run out sets ``exhausted``. ``grab()`` and
+    ``retrieve()`` split a read the way ``cv2.VideoCapture`` does, so a
+    camera can be drained without decoding frames nobody will score; other
+    sources simply read on ``grab()``.
+
+    ``live`` sources deliver frames in real time whether or not anyone keeps
+    up, so the worker paces itself and drops stale frames. Recorded sources
+    (``live = False``) are replayed as fast as the pipeline consumes them,
+    with every frame scored, which is what throughput benchmarks and tests
+    need.
+    """
+
+    live = True
+
+    def __init__(self):
+        self.error: Optional[str] = None
+        self.exhausted = False
+        self._grabbed: tuple[bool, Optional[np.ndarray]] = (False, None)
+
+    def open(self) -> bool:
+        return True
+
+    def read(self) -> tuple[bool, Optional[np.ndarray]]:
+        raise NotImplementedError
+
+    def grab(self) -> bool:
+        self._grabbed = self.read()
+        return self._grabbed[0]
+
+    def retrieve(self) -> tuple[bool, Optional[np.ndarray]]:
+        grabbed, self._grabbed = self._grabbed, (False, None)
+        return grabbed
+
+    def release(self):
+        pass
+
+    def describe(self) -> str:
+        return type(self).__name__
+
+
+class _Pacer:
+    """Spaces reads of a recorded source at its frame rate when replaying in real time."""
+
+    def __init__(self, fps: Optional[float]):
+        self._scheduler = AdaptiveFrameScheduler(fps, fps) if fps else None
+
+    def wait(self):
+        if self._scheduler is not None:
+            self._scheduler.wait()
+
+
+class CameraFrameSource(FrameSource):
+    """Live webcam, probing device indices and capture backends until one opens.
+
+    ``index`` and ``backend`` default to ``FOCUS_CAMERA_INDEX`` and
+    ``FOCUS_CAMERA_BACKEND`` (dshow, msmf, avfoundation, v4l2 or any).
+    """
+
+    def __init__(self, index: Optional[int] = None, backend: Optional[str] = None):
+        super().__init__()
+        if index is None:
+            env_index = os.getenv("FOCUS_CAMERA_INDEX")
+            try:
+                index = int(env_index) if env_index is not None else 0
+            except ValueError:
+                index = 0
+        self.index = index
+        self.backend_name = (
+            backend if backend is not None else os.getenv("FOCUS_CAMERA_BACKEND", "")
+        ).strip().lower()
+        self.attempts: list[str] = []
+        self._cap = None
+
+    def _backends(self) -> list[Optional[int]]:
+        cap_dshow = getattr(cv2, "CAP_DSHOW", None)
+        cap_msmf = getattr(cv2, "CAP_MSMF", None)
+        cap_avfoundation = getattr(cv2, "CAP_AVFOUNDATION", None)
+        cap_v4l2 = getattr(cv2, "CAP_V4L2", None)
+
+        backend_map = {
+            "dshow": cap_dshow,
+            "msmf": cap_msmf,
+            "avfoundation": cap_avfoundation,
+            "v4l2": cap_v4l2,
+            "any": None,
+            "": None,
+        }
+        forced_backend = backend_map.get(self.backend_name, None)
+
+        system = platform.system()
+        default_backends: list[Optional[int]]
+        if self.backend_name in {"any", ""}:
+            default_backends = [None]
+        elif forced_backend is not None:
+            default_backends = [forced_backend, None]
+        elif system == "Windows":
+            default_backends = [cap_dshow, cap_msmf, None]
+        elif system == "Darwin":
+            default_backends = [cap_avfoundation, None]
+        else:
+            default_backends = [cap_v4l2, None]
+
+        return [b for b in default_backends if b is None or isinstance(b, int)]
+
+    def open(self) -> bool:
+        self.attempts = []
+        indices = [self.index]
+        for extra in (0, 1, 2):
+            if extra not in indices:
+                indices.append(extra)
+
+        for index in indices:
+            for backend in self._backends():
+                label = f"index={index}, backend={'default' if backend is None else backend}"
+                self.attempts.append(label)
+                try:
+                    cap = cv2.VideoCapture(index) if backend is None else cv2.VideoCapture(index, backend)
+                except Exception as exc:
+                    self.attempts.append(f"{label} -> exception: {exc}")
+                    continue
+                if cap is not None and cap.isOpened():
+                    self._cap = cap
+                    return True
+                try:
+                    if cap is not None:
+                        cap.release()
+                except Exception:
+                    pass
+
+        attempted = "; ".join(self.attempts[:8]) + ("; ..." if len(self.attempts) > 8 else "")
+        self.error = (
+            "Unable to access webcam. "
+            "Make sure no other app is using the camera and OS permissions allow it. "
+            f"Attempts: {attempted}"
+        )
+        return False
+
+    def read(self):
+        return self._cap.read()
+
+    def grab(self):
+        return self._cap.grab()
+
+    def retrieve(self):
+        return self._cap.retrieve()
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def describe(self) -> str:
+        return f"camera index={self.index} backend={self.backend_name or 'default'}"
+
+
+class VideoFileFrameSource(FrameSource):
+    """Frames decoded from a recorded video file.
+
+    Replays as fast as possible by default; ``realtime=True`` paces reads at
+    the file's frame rate and treats the source as live.
+    """
+
+    def __init__(self, path: str, *, loop: bool = False, realtime: bool = False):
+        super().__init__()
+        self.path = path
+        self.loop = loop
+        self.live = realtime
+        self.fps = None
+        self._cap = None
+        self._pacer = _Pacer(None)
+
+    def open(self) -> bool:
+        if not os.path.isfile(self.path):
+            self.error = f"Video file not found: {self.path}"
+            return False
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            cap.release()
+            self.error = f"Unable to decode video file: {self.path}"
+            return False
+        self._cap = cap
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self._pacer = _Pacer(self.fps if self.live else None)
+        return True
+
+    def read(self):
+        if self.exhausted:
+            return False, None
+        self._pacer.wait()
+        ok, frame = self._cap.read()
+        if not ok and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._cap.read()
+        if not ok:
+            self.exhausted = True
+        return ok, frame
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def describe(self) -> str:
+        return f"video file {self.path}"
+
+
+class ImageDirectoryFrameSource(FrameSource):
+    """Still images from a directory, read in file-name order.
+
+    Files OpenCV cannot decode are skipped. ``fps`` paces reads and makes the
+    source live; by default images are replayed as fast as possible.
+    """
+
+    EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+    def __init__(self, directory: str, *, loop: bool = False, fps: Optional[float] = None):
+        super().__init__()
+        self.directory = directory
+        self.loop = loop
+        self.live = fps is not None
+        self.skipped = 0
+        self._paths: list[str] = []
+        self._position = 0
+        self._pacer = _Pacer(fps)
+
+    def open(self) -> bool:
+        if not os.path.isdir(self.directory):
+            self.error = f"Image directory not found: {self.directory}"
+            return False
+        self._paths = sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.lower().endswith(self.EXTENSIONS)
+        )
+        if not self._paths:
+            self.error = f"No images found in: {self.directory}"
+            return False
+        self._position = 0
+        return True
+
+    def read(self):
+        self._pacer.wait()
+        # Bounded so a directory of unreadable files cannot loop forever.
+        for _ in range(len(self._paths)):
+            if self._position >= len(self._paths):
+                if not self.loop:
+                    break
+                self._position = 0
+            path = self._paths[self._position]
+            self._position += 1
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is not None:
+                return True, frame
+            self.skipped += 1
+        self.exhausted = True
+        return False, None
+
+    def describe(self) -> str:
+        return f"image directory {self.directory}"
+
+
+class SyntheticFrameSource(FrameSource):
+    """Generated frames for exercising the pipeline without any media.
+
+    Produces ``count`` frames (unbounded when None) of noise with a moving
+    bright ellipse, cycling through a small precomputed set so generation
+    itself costs little. ``fps`` paces reads and makes the source live.
+    """
+
+    def __init__(
+        self,
+        width: int = 640,
+        height: int = 480,
+        *,
+        count: Optional[int] = None,
+        fps: Optional[float] = None,
+        seed: int = 0,
+        variants: int = 8,
+    ):
+        super().__init__()
+        self.width = width
+        self.height = height
+        self.count = count
+        self.live = fps is not None
+        self.seed = seed
+        self.variants = max(1, variants)
+        self.frames_read = 0
+        self._frames: list[np.ndarray] = []
+        self._pacer = _Pacer(fps)
+
+    def open(self) -> bool:
+        rng = np.random.default_rng(self.seed)
+        self._frames = []
+        for i in range(self.variants):
+            frame = rng.integers(0, 64, size=(self.height, self.width, 3), dtype=np.uint8)
+            angle = 2.0 * np.pi * i / self.variants
+            center = (
+                int(self.width / 2 + self.width / 8 * np.cos(angle)),
+                int(self.height / 2 + self.height / 8 * np.sin(angle)),
+            )
+            axes = (max(1, self.width // 8), max(1, self.height // 5))
+            cv2.ellipse(frame, center, axes, 0, 0, 360, (180, 200, 220), -1)
+            self._frames.append(frame)
+        self.frames_read = 0
+        return True
+
+    def read(self):
+        if self.count is not None and self.frames_read >= self.count:
+            self.exhausted = True
+            return False, None
+        self._pacer.wait()
+        # Consumers draw on frames, so hand out copies.
+        frame = self._frames[self.frames_read % len(self._frames)].copy()
+        self.frames_read += 1
+        return True, frame
+
+    def describe(self) -> str:
+        return f"synthetic {self.width}x{self.height}"
+
+
+def frame_source_from_spec(spec: str) -> FrameSource:
+    """Build a source from a ``FOCUS_FRAME_SOURCE`` style spec.
+
+    ``camera`` (default) or ``camera:<index>``, ``video:<path>``,
+    ``images:<directory>``, ``synthetic`` or ``synthetic:<frame count>``.
+    """
+    kind, _, arg = (spec or "").strip().partition(":")
+    kind = kind.strip().lower()
+    if kind in {"", "camera"}:
+        return CameraFrameSource(int(arg) if arg.strip() else None)
+    if kind == "video":
+        return VideoFileFrameSource(arg)
+    if kind == "images":
+        return ImageDirectoryFrameSource(arg)
+    if kind == "synthetic":
+        return SyntheticFrameSource(count=int(arg) if arg.strip() else None)
+    raise ValueError(f"Unknown frame source: {spec!r}")
@@ -0,0 +1,381 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from multiprocessing import resource_tracker, shared_memory
+from queue import Empty
+from typing import Callable, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+from ml_runner_scripts.FocusPredictor import landmarks_to_array
+
+
+class LandmarkResult(NamedTuple):
+    """FaceMesh output for one submitted frame."""
+
+    stream_id: int
+    sequence: int
+    # (F, N, 3) float32 landmarks of every detected face, or None without a face.
+    faces: Optional[np.ndarray]
+    seconds: float
+    error: Optional[str] = None
+    # Wall-clock time the frame was captured, as passed to submit().
+    timestamp: float = 0.0
+
+
+def create_face_mesh(max_num_faces: int = 1):
+    import mediapipe as mp
+
+    return mp.solutions.face_mesh.FaceMesh(
+        max_num_faces=max_num_faces,
+        refine_landmarks=True,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+    )
+
+
+def detect_landmarks(detector, frame_bgr: np.ndarray) -> Optional[np.ndarray]:
+    """Run *detector* (a FaceMesh) on a BGR frame; (F, N, 3) float32 landmarks or None."""
+    results = detector.process(cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB))
+    if not results.multi_face_landmarks:
+        return None
+    return np.stack(
+        [landmarks_to_array(landmarks) for landmarks in results.multi_face_landmarks]
+    ).astype(np.float32)
+
+
+def _frame_view(buffers, payload):
+    """The frame a task refers to: a view into a shared-memory slot, or the pickled array itself."""
+    if isinstance(payload, np.ndarray):
+        return payload
+    name, offset, shape, dtype = payload
+    buffer = buffers.get(name)
+    if buffer is None:
+        buffer = buffers[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=dtype, buffer=buffer.buf, offset=offset)
+
+
+def _worker_main(tasks, results, detector_factory, max_num_faces):
+    # One FaceMesh per stream: its tracking state must only ever see that stream's frames.
+    detectors = {}
+    buffers = {}
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            kind, stream_id, sequence, payload = task
+            if kind == "close":
+                detector = detectors.pop(stream_id, None)
+                if detector is not None:
+                    detector.close()
+                continue
+            start = time.perf_counter()
+            try:
+                detector = detectors.get(stream_id)
+                if detector is None:
+                    detector = detectors[stream_id] = detector_factory(max_num_faces)
+                frame = _frame_view(buffers, payload)
+                try:
+                    faces = detect_landmarks(detector, frame)
+                finally:
+                    # The slot is reused once the result is out; drop the view first.
+                    del frame
+                results.put(LandmarkResult(stream_id, sequence, faces, time.perf_counter() - start))
+            except Exception as exc:
+                results.put(LandmarkResult(
+                    stream_id, sequence, None, time.perf_counter() - start, f"{type(exc).__name__}: {exc}"))
+    finally:
+        for detector in detectors.values():
+            detector.close()
+        for buffer in buffers.values():
+            buffer.close()
+
+
+class _FrameSlots:
+    """``count`` frame-sized buffers of one stream in a single shared-memory block."""
+
+    def __init__(self, count: int, frame: np.ndarray):
+        self.slot_bytes = frame.nbytes
+        self.memory = shared_memory.SharedMemory(create=True, size=max(1, count * frame.nbytes))
+
+    def write(self, slot: int, frame: np.ndarray):
+        """Copy *frame* into *slot*; returns the task payload a worker reads it back from."""
+        offset = slot * self.slot_bytes
+        view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self.memory.buf, offset=offset)
+        view[...] = frame
+        del view
+        return self.memory.name, offset, frame.shape, frame.dtype.str
+
+    def release(self):
+        self.memory.close()
+        self.memory.unlink()
+
+
+class LandmarkPool:
+    """FaceMesh landmark detection in worker processes, shared by several frame streams.
+
+    MediaPipe holds the GIL for much of ``FaceMesh.process``, so one Python
+    process tops out at about one core of landmark detection. The pool runs
+    ``workers`` processes instead. A stream is normally pinned to one
+    worker, which keeps a FaceMesh per stream so FaceMesh's tracking
+    between frames keeps working. A ``spread`` stream hands its frames to
+    the workers in turn instead, so a single recording can use every core;
+    each worker's FaceMesh then sees every ``workers``-th frame.
+
+    Frames reach the workers through per-stream shared-memory slots rather
+    than being pickled, and landmarks come back as float32 arrays. Each
+    stream's results are delivered in the order its frames were submitted
+    (results of different streams interleave). At most ``max_in_flight``
+    frames per stream are queued or being processed; :meth:`submit` either
+    refuses further frames (live sources drop them) or waits for room
+    (recorded replay).
+
+    A worker process that dies (a crash inside MediaPipe) fails the pool:
+    the frames it still held come back as results with ``error`` set,
+    :attr:`error` describes the failure and :meth:`submit` raises from
+    then on.
+    """
+
+    LIVENESS_INTERVAL = 0.5  # seconds a blocking get() waits before checking the workers
+
+    def __init__(
+        self,
+        workers: int = 0,
+        *,
+        max_num_faces: int = 1,
+        max_in_flight: int = 2,
+        detector_factory: Callable = create_face_mesh,
+        mp_context=None,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.workers = workers or os.cpu_count() or 1
+        self.max_num_faces = max_num_faces
+        self.max_in_flight = max_in_flight
+        self._detector_factory = detector_factory
+        # Spawned, not forked: a fork copies whatever MediaPipe, Qt or I/O
+        # threads the parent runs, and FaceMesh can abort in such a child.
+        self._context = mp_context or multiprocessing.get_context("spawn")
+        self._processes = []
+        self._tasks = []
+        self._results = None
+        self._in_flight: list[int] = []
+        self._sequences: list[int] = []
+        self._spread: list[bool] = []
+        self._slots: list[Optional[_FrameSlots]] = []
+        self._room = threading.Condition()
+        # Consumer side: results waiting for an earlier frame of their stream.
+        self._next_sequence: list[int] = []
+        self._early: list[dict] = []
+        self._ready = deque()
+        # (stream_id, sequence) of every frame sent to a worker and not yet
+        # received, to its worker and capture timestamp.
+        self._outstanding: dict[tuple[int, int], tuple[int, float]] = {}
+        self._dead: set[int] = set()
+        self.error: Optional[str] = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._processes)
+
+    def start(self):
+        if self._processes:
+            return
+        if os.name == "posix":
+            # Workers must share this process's resource tracker; one of their
+            # own would unlink the frame slots when the worker exits.
+            resource_tracker.ensure_running()
+        self._results = self._context.Queue()
+        for index in range(self.workers):
+            tasks = self._context.Queue()
+            process = self._context.Process(
+                target=_worker_main,
+                args=(tasks, self._results, self._detector_factory, self.max_num_faces),
+                name=f"LandmarkWorker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._tasks.append(tasks)
+            self._processes.append(process)
+
+    def stop(self, timeout: float = 5.0):
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=1.0)
+        for tasks in self._tasks:
+            tasks.close()
+        if self._results is not None:
+            self._results.close()
+        for index, slots in enumerate(self._slots):
+            if slots is not None:
+                slots.release()
+                self._slots[index] = None
+        self._processes = []
+        self._tasks = []
+        self._results = None
+        self._outstanding.clear()
+        self._dead.clear()
+
+    def add_stream(self, *, spread: bool = False) -> int:
+        """Register a frame stream; returns the id to submit its frames under.
+
+        A *spread* stream's frames go to every worker in turn.
+        """
+        with self._room:
+            self._in_flight.append(0)
+            self._sequences.append(0)
+            self._spread.append(spread)
+            self._slots.append(None)
+            self._next_sequence.append(0)
+            self._early.append({})
+            return len(self._in_flight) - 1
+
+    def close_stream(self, stream_id: int):
+        """Release the stream's FaceMesh in its workers."""
+        workers = range(len(self._tasks)) if self._spread[stream_id] else [self._worker_for(stream_id, 0)]
+        for worker in workers:
+            self._tasks[worker].put(("close", stream_id, None, None))
+
+    def _worker_for(self, stream_id: int, sequence: int) -> int:
+        return (sequence if self._spread[stream_id] else stream_id) % len(self._tasks)
+
+    def _frame_payload(self, stream_id: int, sequence: int, frame_bgr: np.ndarray):
+        # Sequences of a stream in flight are consecutive and fewer than
+        # max_in_flight, so ``sequence % max_in_flight`` is a free slot.
+        slots = self._slots[stream_id]
+        if slots is None or frame_bgr.nbytes > slots.slot_bytes:
+            if slots is not None and self.in_flight(stream_id) > 1:
+                # Frames grew mid-stream while the old slots are still in use.
+                return frame_bgr
+            if slots is not None:
+                slots.release()
+            slots = self._slots[stream_id] = _FrameSlots(self.max_in_flight, frame_bgr)
+        return slots.write(sequence % self.max_in_flight, np.ascontiguousarray(frame_bgr))
+
+    def in_flight(self, stream_id: Optional[int] = None) -> int:
+        with self._room:
+            return sum(self._in_flight) if stream_id is None else self._in_flight[stream_id]
+
+    def submit(
+        self,
+        stream_id: int,
+        frame_bgr: np.ndarray,
+        *,
+        block: bool = False,
+        timeout: Optional[float] = None,
+        timestamp: Optional[float] = None,
+    ) -> Optional[int]:
+        """Queue a frame for landmark detection; returns its sequence number.
+
+        *timestamp* (default: now) is when the frame was captured; its
+        result carries it back.
+
+        Returns None when the stream already has ``max_in_flight`` frames
+        pending, immediately or (with *block*) once *timeout* has passed.
+        Raises RuntimeError once a worker has died.
+        """
+        with self._room:
+            if not self._room.wait_for(
+                    lambda: self.error is not None or self._in_flight[stream_id] < self.max_in_flight,
+                    timeout=timeout if block else 0):
+                return None
+            if self.error is not None:
+                raise RuntimeError(self.error)
+            self._in_flight[stream_id] += 1
+            sequence = self._sequences[stream_id]
+            self._sequences[stream_id] += 1
+            worker = self._worker_for(stream_id, sequence)
+            self._outstanding[(stream_id, sequence)] = (
+                worker, time.time() if timestamp is None else timestamp)
+        payload = self._frame_payload(stream_id, sequence, frame_bgr)
+        self._tasks[worker].put(("frame", stream_id, sequence, payload))
+        return sequence
+
+    def get(self, timeout: Optional[float] = None) -> LandmarkResult:
+        """The next result of any stream, in submission order per stream. Raises queue.Empty on timeout.
+
+        Call from one consumer thread.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._ready:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            wait = self.LIVENESS_INTERVAL if remaining is None else min(remaining, self.LIVENESS_INTERVAL)
+            try:
+                self._receive(self._results.get(timeout=wait))
+            except Empty:
+                if self._reap_dead_workers():
+                    continue
+                if remaining is not None and remaining <= wait:
+                    raise
+        result = self._ready.popleft()
+        with self._room:
+            self._in_flight[result.stream_id] -= 1
+            self._room.notify_all()
+        return result
+
+    def _reap_dead_workers(self) -> bool:
+        """Fail the frames held by workers that exited; True when there were any."""
+        dead = [
+            index for index, process in enumerate(self._processes)
+            if index not in self._dead and not process.is_alive()
+        ]
+        if not dead:
+            return False
+        # Results a worker sent before it exited still count.
+        while True:
+            try:
+                self._receive(self._results.get_nowait())
+            except Empty:
+                break
+        with self._room:
+            for index in dead:
+                self._dead.add(index)
+                process = self._processes[index]
+                if self.error is None:
+                    self.error = f"Landmark worker {process.name} exited with code {process.exitcode}"
+            lost = sorted(key for key, (worker, _) in self._outstanding.items() if worker in self._dead)
+            self._room.notify_all()
+        print(f"[LandmarkPool] {self.error}; failing {len(lost)} pending frame(s)", flush=True)
+        for stream_id, sequence in lost:
+            self._receive(LandmarkResult(stream_id, sequence, None, 0.0, self.error))
+        return True
+
+    def _receive(self, result: LandmarkResult):
+        with self._room:
+            outstanding = self._outstanding.pop((result.stream_id, result.sequence), None)
+        if outstanding is None:
+            # Already failed when its worker died.
+            return
+        result = result._replace(timestamp=outstanding[1])
+        stream_id = result.stream_id
+        early = self._early[stream_id]
+        early[result.sequence] = result
+        while self._next_sequence[stream_id] in early:
+            self._ready.append(early.pop(self._next_sequence[stream_id]))
+            self._next_sequence[stream_id] += 1
+
+    def get_ready(self, limit: Optional[int] = None) -> list[LandmarkResult]:
+        """Every result that is already finished, without waiting (at most *limit*)."""
+        ready = []
+        while limit is None or len(ready) < limit:
+            try:
+                ready.append(self.get(timeout=0))
+            except Empty:
+                break
+        return ready
@@ -0,0 +1,248 @@
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+
+class Counter:
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    def __init__(self, name: str):
+        self.name = name
+        self.value = None
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Histogram:
+    """Log-linear bucketed histogram in the style of HdrHistogram.
+
+    Values are recorded as integers of ``1 / scale`` units (microseconds for
+    the default millisecond histograms with ``scale=1000``). Values below
+    ``2 ** significant_bits`` get exact buckets; above that, each power of
+    two is split into ``2 ** (significant_bits - 1)`` buckets, so quantiles
+    are within ~``2 ** -(significant_bits - 1)`` relative error while memory
+    stays fixed and recording is O(1).
+    """
+
+    def __init__(self, name: str, *, scale: float = 1000.0, significant_bits: int = 6, max_bits: int = 40):
+        self.name = name
+        self.scale = scale
+        self._bits = significant_bits
+        self._half = 1 << (significant_bits - 1)
+        self._max_value = (1 << max_bits) - 1
+        self._counts = [0] * (self._index(self._max_value) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _index(self, value: int) -> int:
+        length = value.bit_length()
+        if length <= self._bits:
+            return value
+        shift = length - self._bits
+        return shift * self._half + (value >> shift)
+
+    def _bucket_range(self, index: int) -> tuple[int, int]:
+        if index < 2 * self._half:
+            return index, index
+        shift = index // self._half - 1
+        mantissa = index - shift * self._half
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value: float):
+        scaled = min(self._max_value, max(0, int(value * self.scale)))
+        index = self._index(scaled)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def time(self):
+        """Context manager recording the duration of its block in milliseconds."""
+        return _HistogramTimer(self)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if self.count == 0:
+                return None
+            rank = max(1, int(q * self.count + 0.5))
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank:
+                    if index == len(self._counts) - 1:
+                        return self.max  # overflow bucket
+                    low, high = self._bucket_range(index)
+                    value = (low + high) / 2.0 / self.scale
+                    return min(max(value, self.min), self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count, total, low, high = self.count, self.total, self.min, self.max
+        if count == 0:
+            return {"count": 0}
+        return {
+            "count": count,
+            "mean": total / count,
+            "min": low,
+            "p50": self.quantile(0.50),
+            "p90": self.quantile(0.90),
+            "p99": self.quantile(0.99),
+            "max": high,
+        }
+
+
+class _HistogramTimer:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.record((time.perf_counter() - self._start) * 1000.0)
+        return False
+
+
+class _NullMetric:
+    """Stands in for every metric type when the registry is disabled."""
+
+    value = None
+    count = 0
+
+    def __init__(self, name: str = ""):
+        self.name = name
+
+    def inc(self, amount: int = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+    def record(self, value: float):
+        pass
+
+    def time(self):
+        return _NULL_METRIC
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_METRIC = _NullMetric()
+
+
+class MetricsRegistry:
+    """Named counters, gauges and latency histograms for the running app.
+
+    Metrics are created on first use and shared by name. When disabled every
+    lookup returns a shared no-op, so instrumented code costs one method
+    call. Histogram names end in ``_ms`` by convention.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: dict[str, Counter] = {}
+        self._gauges: dict[str, Gauge] = {}
+        self._histograms: dict[str, Histogram] = {}
+
+    def _get(self, table: dict, cls, name: str):
+        if not self.enabled:
+            return _NULL_METRIC
+        metric = table.get(name)
+        if metric is None:
+            with self._lock:
+                metric = table.setdefault(name, cls(name))
+        return metric
+
+    def counter(self, name: str) -> Counter:
+        return self._get(self._counters, Counter, name)
+
+    def gauge(self, name: str) -> Gauge:
+        return self._get(self._gauges, Gauge, name)
+
+    def histogram(self, name: str) -> Histogram:
+        return self._get(self._histograms, Histogram, name)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = dict(self._histograms)
+        return {
+            "enabled": self.enabled,
+            "counters": {name: c.value for name, c in sorted(counters.items())},
+            "gauges": {name: g.value for name, g in sorted(gauges.items())},
+            "histograms": {name: h.snapshot() for name, h in sorted(histograms.items())},
+        }
+
+    def format_summary(self) -> str:
+        """Plain-text table of the snapshot, for logs and the debug panel."""
+        snap = self.snapshot()
+        if not snap["enabled"]:
+            return "Metrics are disabled (FOCUS_METRICS=0)."
+        lines = [f"{'histogram':<28} {'count':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"]
+        for name, h in snap["histograms"].items():
+            if not h["count"]:
+                continue
+            lines.append(
+                f"{name:<28} {h['count']:>7} {h['p50']:8.2f} {h['p90']:8.2f} "
+                f"{h['p99']:8.2f} {h['max']:8.2f}"
+            )
+        if snap["counters"]:
+            lines.append("")
+            lines.extend(f"{name:<28} {value:>7}" for name, value in snap["counters"].items())
+        if snap["gauges"]:
+            lines.append("")
+            lines.extend(
+                f"{name:<28} {value if value is not None else '-':>7}"
+                for name, value in snap["gauges"].items()
+            )
+        return "\n".join(lines)
+
+    def dump(self, path: str) -> str:
+        """Write the snapshot as JSON to *path* (atomically) and return the path."""
+        snap = self.snapshot()
+        snap["created_at"] = time.time()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snap, f, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+
+# Process-wide registry. FOCUS_METRICS=0 turns instrumentation into no-ops.
+registry = MetricsRegistry(
+    enabled=os.getenv("FOCUS_METRICS", "1").strip() not in {"0", "false", "False"})
@@ -0,0 +1,102 @@
+import threading
+import time
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+
+class PreviewFrameSink:
+    """Turns processed camera frames into display-ready previews for the UI.
+
+    The view reports the size and visibility of its preview area with
+    :meth:`set_target`. Frames are accepted only while the preview is
+    visible, at most ``max_fps`` times a second, and only once the UI has
+    released the previous one (:meth:`release`). An accepted frame is
+    downscaled to fit the target and converted to RGB in a single
+    preallocated buffer, which is handed to *deliver* without copying.
+
+    ``deliver`` typically emits a queued Qt signal, so the buffer crosses
+    threads; it is not written again until :meth:`release` is called, or
+    ``stale_after`` seconds pass without one.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[np.ndarray], None],
+        max_fps: float = 60.0,
+        stale_after: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._deliver = deliver
+        self._clock = clock
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._interval = 1.0 / max_fps
+        self._width = 0
+        self._height = 0
+        self._visible = False
+        self._next_due = 0.0
+        self._in_flight_since: Optional[float] = None
+        self._buffer: Optional[np.ndarray] = None
+        self.delivered = 0
+
+    def set_target(self, width: int, height: int, visible: bool):
+        with self._lock:
+            self._width = max(0, int(width))
+            self._height = max(0, int(height))
+            self._visible = bool(visible)
+
+    def set_max_fps(self, fps: float):
+        if fps > 0:
+            with self._lock:
+                self._interval = 1.0 / fps
+
+    def release(self):
+        """Called by the UI once it has drawn the last delivered frame."""
+        with self._lock:
+            self._in_flight_since = None
+
+    def reset(self):
+        with self._lock:
+            self._in_flight_since = None
+            self._next_due = 0.0
+
+    def wants_frame(self) -> bool:
+        with self._lock:
+            return self._wants_frame(self._clock())
+
+    def _wants_frame(self, now: float) -> bool:
+        if not self._visible or self._width < 1 or self._height < 1:
+            return False
+        if self._in_flight_since is not None and now - self._in_flight_since < self.stale_after:
+            return False
+        return now >= self._next_due
+
+    def submit(self, frame_bgr: np.ndarray) -> bool:
+        """Deliver a preview of *frame_bgr* if one is wanted now. Returns True if delivered."""
+        with self._lock:
+            now = self._clock()
+            if not self._wants_frame(now):
+                return False
+            frame_h, frame_w = frame_bgr.shape[:2]
+            scale = min(self._width / frame_w, self._height / frame_h, 1.0)
+            size = (max(1, round(frame_w * scale)), max(1, round(frame_h * scale)))
+            buffer = self._buffer
+            if buffer is None or buffer.shape[1::-1] != size:
+                buffer = self._buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            if size == (frame_w, frame_h):
+                cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB, dst=buffer)
+            else:
+                cv2.resize(frame_bgr, size, dst=buffer, interpolation=cv2.INTER_LINEAR)
+                cv2.cvtColor(buffer, cv2.COLOR_BGR2RGB, dst=buffer)
+            self._in_flight_since = now
+            # Spaced from the previous slot so a steady source keeps its
+            # cadence; after a gap, restart the spacing from now.
+            if now - self._next_due < self._interval:
+                self._next_due += self._interval
+            else:
+                self._next_due = now + self._interval
+            self.delivered += 1
+        self._deliver(buffer)
+        return True
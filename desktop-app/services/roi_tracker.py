@@ -0,0 +1,128 @@
+from typing import NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+
+class Roi(NamedTuple):
+    """Pixel rectangle of the full frame that was fed to FaceMesh."""
+
+    x: int
+    y: int
+    w: int
+    h: int
+    frame_w: int
+    frame_h: int
+
+    @property
+    def is_full_frame(self) -> bool:
+        return self.x == 0 and self.y == 0 and self.w == self.frame_w and self.h == self.frame_h
+
+
+class FaceRoiTracker:
+    """Crops each frame to a padded box around the last known face before FaceMesh.
+
+    Only the crop is resized (to at most ``roi_size`` pixels per side) and
+    colour-converted, which on a 1080p frame is a small fraction of the full
+    frame's cost. Landmarks come back normalised to the crop and are mapped
+    to full-frame coordinates by :meth:`to_frame_coordinates`, so features are
+    unchanged.
+
+    The crop stays put while the face remains comfortably inside it, which
+    keeps the image FaceMesh tracks across frames stable; it is re-centred
+    when the face nears an edge or changes size. With no face known (start,
+    or tracking lost) the whole frame is used, downscaled to
+    ``full_frame_max_side``.
+    """
+
+    def __init__(
+        self,
+        padding: float = 0.5,
+        roi_size: int = 320,
+        full_frame_max_side: int = 640,
+        edge_margin: float = 0.1,
+        min_face_fraction: float = 0.35,
+    ):
+        self.padding = padding
+        self.roi_size = roi_size
+        self.full_frame_max_side = full_frame_max_side
+        self.edge_margin = edge_margin
+        self.min_face_fraction = min_face_fraction
+        self._roi: Optional[Roi] = None
+        self._frame_shape = None
+
+    @property
+    def tracking(self) -> bool:
+        return self._roi is not None
+
+    def reset(self):
+        self._roi = None
+
+    def prepare(self, frame_bgr: np.ndarray) -> tuple[np.ndarray, Roi]:
+        """Return the RGB image to run FaceMesh on and the region it covers."""
+        frame_h, frame_w = frame_bgr.shape[:2]
+        if self._frame_shape != (frame_h, frame_w):
+            self._frame_shape = (frame_h, frame_w)
+            self._roi = None
+
+        roi = self._roi or Roi(0, 0, frame_w, frame_h, frame_w, frame_h)
+        max_side = self.full_frame_max_side if roi.is_full_frame else self.roi_size
+        crop = frame_bgr[roi.y:roi.y + roi.h, roi.x:roi.x + roi.w]
+        scale = max_side / max(roi.w, roi.h)
+        if scale < 1.0:
+            size = (max(1, round(roi.w * scale)), max(1, round(roi.h * scale)))
+            crop = cv2.resize(crop, size, interpolation=cv2.INTER_LINEAR)
+        return cv2.cvtColor(crop, cv2.COLOR_BGR2RGB), roi
+
+    @staticmethod
+    def to_frame_coordinates(points: np.ndarray, roi: Roi) -> np.ndarray:
+        """Map (N, 3) landmarks normalised to *roi* onto full-frame normalised coordinates."""
+        if roi.is_full_frame:
+            return points
+        mapped = np.empty_like(points, dtype=np.float64)
+        mapped[:, 0] = (roi.x + points[:, 0] * roi.w) / roi.frame_w
+        mapped[:, 1] = (roi.y + points[:, 1] * roi.h) / roi.frame_h
+        # MediaPipe scales z like x, i.e. by the input image width.
+        mapped[:, 2] = points[:, 2] * (roi.w / roi.frame_w)
+        return mapped
+
+    def update(self, points: Optional[np.ndarray]):
+        """Feed back full-frame landmarks of the detected face, or None if none was found."""
+        if points is None or self._frame_shape is None:
+            self._roi = None
+            return
+        frame_h, frame_w = self._frame_shape
+        xs, ys = points[:, 0] * frame_w, points[:, 1] * frame_h
+        face = (float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max()))
+        if self._roi is None or not self._face_fits(face, self._roi):
+            self._roi = self._roi_around(face, frame_w, frame_h)
+
+    def _face_fits(self, face, roi: Roi) -> bool:
+        x0, y0, x1, y1 = face
+        margin_x, margin_y = roi.w * self.edge_margin, roi.h * self.edge_margin
+        inside = (
+            x0 >= roi.x + margin_x or roi.x == 0
+        ) and (
+            y0 >= roi.y + margin_y or roi.y == 0
+        ) and (
+            x1 <= roi.x + roi.w - margin_x or roi.x + roi.w == roi.frame_w
+        ) and (
+            y1 <= roi.y + roi.h - margin_y or roi.y + roi.h == roi.frame_h
+        )
+        big_enough = max(x1 - x0, y1 - y0) >= self.min_face_fraction * max(roi.w, roi.h)
+        return inside and big_enough
+
+    def _roi_around(self, face, frame_w: int, frame_h: int) -> Optional[Roi]:
+        x0, y0, x1, y1 = face
+        side = max(x1 - x0, y1 - y0) * (1.0 + 2.0 * self.padding)
+        if side <= 0:
+            return None
+        cx, cy = (x0 + x1) / 2.0, (y0 + y1) / 2.0
+        w, h = min(frame_w, round(side)), min(frame_h, round(side))
+        x = int(min(max(0, round(cx - w / 2.0)), frame_w - w))
+        y = int(min(max(0, round(cy - h / 2.0)), frame_h - h))
+        roi = Roi(x, y, int(w), int(h), frame_w, frame_h)
+        if roi.w * roi.h >= 0.8 * frame_w * frame_h:
+            # A crop this large saves little; stay on the full frame.
+            return None
+        return roi
@@ -0,0 +1,95 @@
+from typing import Optional
+
+
+class SessionMetricsAccumulator:
+    """Running focus/distraction totals for one session, updated per sample.
+
+    Produces the same figures as ``build_reports._calculate_session_metrics``
+    without rereading the session's samples: each interval between two
+    consecutive samples is credited to the earlier sample's state, and at
+    report time the gap between the last sample and the session duration is
+    credited to the last state. Samples must be added in timestamp order,
+    which is how the tracking loop produces them.
+    """
+
+    FIELDS = (
+        "sample_count",
+        "focus_time",
+        "distraction_time",
+        "score_sum",
+        "score_count",
+        "min_score",
+        "max_score",
+        "first_timestamp",
+        "last_timestamp",
+        "last_state",
+    )
+
+    def __init__(self):
+        self.sample_count = 0
+        self.focus_time = 0.0
+        self.distraction_time = 0.0
+        self.score_sum = 0.0
+        self.score_count = 0
+        self.min_score = None
+        self.max_score = None
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.last_state = None
+
+    def add(self, timestamp: float, attention_state: int, focus_score: Optional[float]):
+        timestamp = float(timestamp)
+        if self.last_timestamp is None:
+            self.first_timestamp = timestamp
+        else:
+            delta = max(0.0, timestamp - self.last_timestamp)
+            if self.last_state == 1:
+                self.focus_time += delta
+            elif self.last_state == 0:
+                self.distraction_time += delta
+        self.last_timestamp = timestamp
+        self.last_state = attention_state
+        self.sample_count += 1
+
+        if focus_score is not None:
+            focus_score = float(focus_score)
+            self.score_sum += focus_score
+            self.score_count += 1
+            if self.min_score is None or focus_score < self.min_score:
+                self.min_score = focus_score
+            if self.max_score is None or focus_score > self.max_score:
+                self.max_score = focus_score
+
+    def report(self, duration_seconds: Optional[float] = None) -> Optional[dict]:
+        """Session metrics in the shape of ``_calculate_session_metrics``, plus min/max score."""
+        if self.sample_count == 0:
+            return None
+
+        focus_time = self.focus_time
+        distraction_time = self.distraction_time
+        if duration_seconds:
+            observed = self.last_timestamp - self.first_timestamp
+            remaining = max(0.0, float(duration_seconds) - observed)
+            if remaining > 0:
+                if self.last_state == 1:
+                    focus_time += remaining
+                elif self.last_state == 0:
+                    distraction_time += remaining
+
+        return {
+            "avg_focus_score": self.score_sum / self.score_count if self.score_count else None,
+            "total_focus_time": float(focus_time),
+            "total_distraction_time": float(distraction_time),
+            "min_focus_score": self.min_score,
+            "max_focus_score": self.max_score,
+        }
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, values) -> "SessionMetricsAccumulator":
+        accumulator = cls()
+        for field in cls.FIELDS:
+            setattr(accumulator, field, values[field])
+        return accumulator
@@ -0,0 +1,233 @@
+import threading
+import time
+from queue import Empty
+from typing import Callable, Optional
+
+import numpy as np
+
+from ml_runner_scripts.FocusPredictor import FocusPredictor, compute_feature_matrix
+from services.face_tracks import FaceTrackAssigner, face_samples
+from services.frame_sources import FrameSource
+from services.landmark_pool import LandmarkPool, LandmarkResult, create_face_mesh
+
+
+class TrackedStream:
+    """One frame source served by a :class:`TrackerHost`, with its counters."""
+
+    def __init__(self, name: str, source: FrameSource, stream_id: int, session_id: str, multi_face: bool):
+        self.name = name
+        self.source = source
+        self.stream_id = stream_id
+        self.session_id = session_id
+        self.track_assigner = FaceTrackAssigner() if multi_face else None
+        self.capture_done = threading.Event()
+        self.opened = False
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.frames_scored = 0
+        self.frames_no_face = 0
+        self.frames_failed = 0
+        self.faces_scored = 0
+        self.last_error: Optional[str] = None
+
+    def snapshot(self, elapsed: float) -> dict:
+        processed = self.frames_scored + self.frames_no_face
+        return {
+            "source": self.source.describe(),
+            "frames_read": self.frames_read,
+            "frames_dropped": self.frames_dropped,
+            "frames_scored": self.frames_scored,
+            "frames_no_face": self.frames_no_face,
+            "frames_failed": self.frames_failed,
+            "faces_scored": self.faces_scored,
+            "fps": processed / elapsed if elapsed > 0 else 0.0,
+            "error": self.last_error,
+        }
+
+
+class TrackerHost:
+    """Headless tracking of several cameras or recordings in one process.
+
+    Every stream gets a capture thread; landmark detection for all of them
+    runs in a shared :class:`LandmarkPool` of worker processes, so adding
+    cores adds throughput. One model is loaded for the whole host and the
+    faces of every frame that finished since the last pass, across all
+    streams, are scored in a single ``predict_batch`` call.
+
+    Live sources drop frames while their stream has ``max_in_flight``
+    frames pending; recorded sources wait, so every frame is scored.
+    Samples go to ``on_samples(stream_name, samples)`` with the same fields
+    the desktop worker persists, largest face first.
+    """
+
+    COLLECT_TIMEOUT = 0.1  # seconds the collector waits for a result before re-checking for stop
+
+    def __init__(
+        self,
+        model_path: str,
+        *,
+        landmark_workers: int = 0,
+        max_num_faces: int = 1,
+        max_in_flight: int = 2,
+        on_samples: Optional[Callable[[str, list], None]] = None,
+        detector_factory: Callable = create_face_mesh,
+        predictor: Optional[FocusPredictor] = None,
+    ):
+        self.predictor = predictor or FocusPredictor(
+            model_path, max_num_faces=max_num_faces, with_face_mesh=False)
+        self.max_num_faces = max_num_faces
+        self.on_samples = on_samples
+        self.pool = LandmarkPool(
+            landmark_workers,
+            max_num_faces=max_num_faces,
+            max_in_flight=max_in_flight,
+            detector_factory=detector_factory,
+        )
+        self.streams: list[TrackedStream] = []
+        self.batches = 0
+        self.batched_faces = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+
+    def add_stream(
+        self, name: str, source: FrameSource, *, session_id: Optional[str] = None, spread: bool = False,
+    ) -> TrackedStream:
+        """Track *source* as *name*; a *spread* stream uses every landmark worker (see LandmarkPool)."""
+        if any(stream.name == name for stream in self.streams):
+            raise ValueError(f"Duplicate stream name: {name}")
+        stream = TrackedStream(
+            name, source, self.pool.add_stream(spread=spread), session_id or name, self.max_num_faces > 1)
+        self.streams.append(stream)
+        return stream
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, stop_event: Optional[threading.Event] = None, duration: Optional[float] = None) -> dict:
+        """Track every stream until all recorded sources end, *stop_event* is set or *duration* passes.
+
+        Returns :meth:`snapshot`.
+        """
+        stop_event = stop_event or self._stop
+        deadline = time.monotonic() + duration if duration is not None else None
+        capture_stop = threading.Event()
+        threads = []
+        start = time.perf_counter()
+        self.pool.start()
+        try:
+            for stream in self.streams:
+                thread = threading.Thread(
+                    target=self._capture_loop, args=(stream, capture_stop),
+                    name=f"TrackerCapture-{stream.name}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+            while not stop_event.is_set():
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                try:
+                    first = self.pool.get(timeout=self.COLLECT_TIMEOUT)
+                except Empty:
+                    if all(s.capture_done.is_set() for s in self.streams) and not self.pool.in_flight():
+                        break
+                    continue
+                self._score([first, *self.pool.get_ready()])
+        finally:
+            capture_stop.set()
+            for thread in threads:
+                thread.join(timeout=2.0)
+            # Frames already handed to the pool still count toward the results.
+            while self.pool.in_flight():
+                try:
+                    self._score([self.pool.get(timeout=2.0), *self.pool.get_ready()])
+                except Empty:
+                    break
+            self.pool.stop()
+            self.elapsed = time.perf_counter() - start
+        return self.snapshot()
+
+    def _capture_loop(self, stream: TrackedStream, stop_event: threading.Event):
+        source = stream.source
+        try:
+            if not source.open():
+                stream.last_error = source.error or f"Unable to open {source.describe()}"
+                return
+            stream.opened = True
+            while not stop_event.is_set():
+                ok, frame = source.read()
+                if not ok:
+                    if source.exhausted:
+                        break
+                    time.sleep(0.01)
+                    continue
+                captured = time.time()
+                stream.frames_read += 1
+                if source.live:
+                    if self.pool.submit(stream.stream_id, frame, timestamp=captured) is None:
+                        stream.frames_dropped += 1
+                    continue
+                # Recorded replay: every frame is scored, so wait for room.
+                while not stop_event.is_set():
+                    if self.pool.submit(
+                            stream.stream_id, frame, block=True, timeout=0.1, timestamp=captured) is not None:
+                        break
+        except Exception as exc:
+            stream.last_error = f"Frame capture failed: {exc}"
+            print(f"[TrackerHost] {stream.name}: {stream.last_error}", flush=True)
+        finally:
+            source.release()
+            stream.capture_done.set()
+
+    def _score(self, results: list[LandmarkResult]):
+        """Score the faces of *results*, from any mix of streams, in one model call.
+
+        Results are handled in the order given, which is frame order within
+        each stream, so face tracks see the frames as they happened.
+        """
+        faces = [result.faces for result in results if result.error is None and result.faces is not None]
+        if faces:
+            faces = np.concatenate(faces)
+            features = compute_feature_matrix(faces)
+            states, scores = self.predictor.predict_batch(features)
+            self.batches += 1
+            self.batched_faces += len(faces)
+
+        start = 0
+        for result in results:
+            stream = self.streams[result.stream_id]
+            if result.error is not None:
+                stream.frames_failed += 1
+                stream.last_error = result.error
+                continue
+            if result.faces is None:
+                stream.frames_no_face += 1
+                if stream.track_assigner is not None:
+                    stream.track_assigner.assign(None)
+                continue
+            stop = start + len(result.faces)
+            frame_features = features[start:stop]
+            track_ids = None
+            if stream.track_assigner is not None:
+                # FEATURE_COLS starts with the face box: face_x, face_y, face_w, face_h.
+                track_ids = stream.track_assigner.assign(frame_features[:, :4])
+            samples = face_samples(
+                stream.session_id, result.timestamp, result.faces, frame_features,
+                states[start:stop], scores[start:stop], track_ids)
+            stream.frames_scored += 1
+            stream.faces_scored += len(samples)
+            if self.on_samples is not None:
+                self.on_samples(stream.name, samples)
+            start = stop
+
+    def snapshot(self) -> dict:
+        processed = sum(s.frames_scored + s.frames_no_face for s in self.streams)
+        return {
+            "landmark_workers": self.pool.workers,
+            "elapsed_s": self.elapsed,
+            "frames_processed": processed,
+            "fps": processed / self.elapsed if self.elapsed > 0 else 0.0,
+            "model_batches": self.batches,
+            "mean_batch_faces": self.batched_faces / self.batches if self.batches else 0.0,
+            "error": self.pool.error,
+            "streams": {s.name: s.snapshot(self.elapsed) for s in self.streams},
+        }
@@ -4,6 +4,7 @@ import time
 import pytest
 
 from db.focus_sample_repository import FocusSampleRepository
+from db.focus_sample_writer import FocusSampleWriter
 from db.session_repository import SessionRepository
 
 
@@ -282,3 +283,187 @@ def test_get_recent_attention_states_respects_time_cutoff(isolated_database, see
     states = repo.get_recent_attention_states(session_id, seconds_ago=10)
 
     assert states == [0]
+
+
+def _sample_kwargs(session_id, timestamp, attention_state=1):
+    return {
+        "session_id": session_id,
+        "timestamp": timestamp,
+        "left_x": 0.1,
+        "left_y": 0.2,
+        "right_x": 0.3,
+        "right_y": 0.4,
+        "face_x": 1.0,
+        "face_y": 2.0,
+        "face_z": 3.0,
+        "attention_state": attention_state,
+        "focus_score": 0.8,
+        "yaw": 5.0,
+        "label": attention_state,
+    }
+
+
+def _count_samples(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM focus_samples").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_writer_rows_match_insert_sample(isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    repo = FocusSampleRepository()
+    timestamp = time.time()
+    direct_id = repo.insert_sample(**_sample_kwargs(session_id, timestamp))
+
+    with FocusSampleWriter(repo.db, batch_size=10, flush_interval_ms=60_000) as writer:
+        buffered_id = writer.submit(**_sample_kwargs(session_id, timestamp))
+
+    conn = sqlite3.connect(repo.db.db_path)
+    conn.row_factory = sqlite3.Row
+    rows = {
+        row["focus_sample_id"]: dict(row)
+        for row in conn.execute("SELECT * FROM focus_samples").fetchall()
+    }
+    conn.close()
+
+    direct = rows.pop(direct_id)
+    buffered = rows.pop(buffered_id)
+    direct.pop("focus_sample_id")
+    buffered.pop("focus_sample_id")
+    assert buffered == direct
+
+
+def test_writer_buffers_until_flush(isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    repo = FocusSampleRepository()
+    writer = FocusSampleWriter(repo.db, batch_size=100, flush_interval_ms=60_000)
+    writer.start()
+    try:
+        for i in range(5):
+            writer.submit(**_sample_kwargs(session_id, time.time() + i))
+
+        assert writer.pending_count() == 5
+        assert _count_samples(repo.db.db_path) == 0
+
+        assert writer.flush() == 5
+        assert _count_samples(repo.db.db_path) == 5
+        assert writer.batches_written == 1
+    finally:
+        writer.stop()
+
+
+def test_writer_flushes_when_batch_is_full(isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    repo = FocusSampleRepository()
+
+    with FocusSampleWriter(repo.db, batch_size=3, flush_interval_ms=60_000) as writer:
+        for i in range(3):
+            writer.submit(**_sample_kwargs(session_id, time.time() + i))
+
+        assert _wait_for(lambda: _count_samples(repo.db.db_path) == 3)
+
+
+def test_writer_flushes_after_interval(isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    repo = FocusSampleRepository()
+
+    with FocusSampleWriter(repo.db, batch_size=1000, flush_interval_ms=50) as writer:
+        writer.submit(**_sample_kwargs(session_id, time.time()))
+
+        assert _wait_for(lambda: _count_samples(repo.db.db_path) == 1)
+
+
+def test_writer_stop_flushes_and_uses_wal(isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    repo = FocusSampleRepository()
+    writer = FocusSampleWriter(repo.db, batch_size=1000, flush_interval_ms=60_000)
+    writer.start()
+    for i in range(7):
+        writer.submit(**_sample_kwargs(session_id, time.time() + i))
+    writer.stop()
+
+    assert _count_samples(repo.db.db_path) == 7
+    conn = sqlite3.connect(repo.db.db_path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+    with pytest.raises(RuntimeError):
+        writer.submit(**_sample_kwargs(session_id, time.time()))
+
+
+def test_writer_reports_bad_rows_and_keeps_the_rest(isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    repo = FocusSampleRepository()
+    errors = []
+
+    with FocusSampleWriter(
+        repo.db, batch_size=1000, flush_interval_ms=60_000, on_error=errors.append
+    ) as writer:
+        writer.submit(**_sample_kwargs(session_id, time.time()))
+        writer.submit(**_sample_kwargs("missing-session", time.time()))
+        writer.submit(**_sample_kwargs(session_id, time.time()))
+
+    assert _count_samples(repo.db.db_path) == 2
+    assert writer.rows_failed == 1
+    assert len(errors) == 1
+    assert isinstance(errors[0], sqlite3.IntegrityError)
+    assert repo.get_recent_attention_states(session_id, seconds_ago=10) == [1, 1]
+
+
+def test_iter_samples_after_returns_insert_sample_fields_in_order(isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    other_session_id = _create_session(seeded_user)
+    repo = FocusSampleRepository()
+    current_time = time.time()
+
+    later_id = repo.insert_sample(**_sample_kwargs(session_id, current_time + 2, attention_state=0))
+    earlier_id = repo.insert_sample(**_sample_kwargs(session_id, current_time + 1))
+    repo.insert_sample(**_sample_kwargs(session_id, current_time - 5))
+    repo.insert_sample(**_sample_kwargs(other_session_id, current_time + 3))
+
+    rows = list(repo.iter_samples_after(session_id, (current_time, ""), chunk_size=1))
+
+    assert [sample_id for sample_id, _ in rows] == [earlier_id, later_id]
+    sample = rows[0][1]
+    expected = _sample_kwargs(session_id, current_time + 1)
+    assert {key: sample[key] for key in expected} == expected
+    assert sample["pitch"] is None
+    assert len(list(repo.iter_samples_after(session_id))) == 3
+
+
+def test_iter_samples_after_resumes_within_a_shared_timestamp(isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    repo = FocusSampleRepository()
+    current_time = time.time()
+    # The faces of one frame share its timestamp.
+    ids = sorted(repo.insert_sample(**_sample_kwargs(session_id, current_time)) for _ in range(3))
+    later_id = repo.insert_sample(**_sample_kwargs(session_id, current_time + 1))
+
+    rows = list(repo.iter_samples_after(session_id, (current_time, ids[0])))
+
+    assert [sample_id for sample_id, _ in rows] == [ids[1], ids[2], later_id]
+
+
+def test_track_id_round_trips_through_writer_and_iter_samples_after(isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    repo = FocusSampleRepository()
+    current_time = time.time()
+
+    single_face_id = repo.insert_sample(**_sample_kwargs(session_id, current_time))
+    with FocusSampleWriter(repo.db, batch_size=10, flush_interval_ms=60_000) as writer:
+        tracked_id = writer.submit(**_sample_kwargs(session_id, current_time + 1), track_id=3)
+
+    rows = dict(repo.iter_samples_after(session_id))
+
+    assert rows[single_face_id]["track_id"] is None
+    assert rows[tracked_id]["track_id"] == 3
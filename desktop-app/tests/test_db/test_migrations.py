@@ -0,0 +1,111 @@
+import sqlite3
+
+import pytest
+
+from db.database import Database
+from db.migrations import MIGRATIONS, migrate, schema_version
+
+
+def _index_names(conn):
+    return {
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'focus_samples'"
+        )
+    }
+
+
+def test_fresh_database_is_at_latest_version_with_time_indexes(db_connection):
+    assert schema_version(db_connection) == MIGRATIONS[-1][0]
+    assert {
+        "idx_focus_samples_session_timestamp",
+        "idx_focus_samples_timestamp",
+    } <= _index_names(db_connection)
+
+
+def test_migrate_is_a_no_op_once_applied(db_connection):
+    assert migrate(db_connection) == []
+    Database()
+    assert schema_version(db_connection) == MIGRATIONS[-1][0]
+
+
+def test_legacy_database_gains_feature_columns_and_keeps_rows(tmp_path):
+    conn = sqlite3.connect(tmp_path / "legacy.sqlite3")
+    conn.executescript(
+        """
+        CREATE TABLE focus_samples (
+            focus_sample_id TEXT PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            timestamp TIMESTAMP NOT NULL,
+            attention_state INTEGER,
+            focus_score FLOAT
+        );
+        INSERT INTO focus_samples VALUES ('s-1', 'session-1', 10.0, 1, 0.9);
+        """
+    )
+
+    assert migrate(conn) == [version for version, _, _ in MIGRATIONS]
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(focus_samples)")}
+    assert {"face_w", "yaw", "label", "track_id", "primary_face"} <= columns
+    assert conn.execute("SELECT primary_face FROM focus_samples").fetchall() == [(1,)]
+    assert conn.execute("SELECT focus_sample_id, focus_score FROM focus_samples").fetchall() == [
+        ("s-1", 0.9)
+    ]
+    conn.close()
+
+
+def test_failed_migration_rolls_back_and_keeps_version(tmp_path):
+    conn = sqlite3.connect(tmp_path / "failing.sqlite3")
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+
+    def add_column_then_fail(c):
+        c.execute("ALTER TABLE t ADD COLUMN y INTEGER")
+        raise RuntimeError("boom")
+
+    migrations = [
+        (1, "index t", lambda c: c.execute("CREATE INDEX idx_t_x ON t(x)")),
+        (2, "broken", add_column_then_fail),
+    ]
+
+    with pytest.raises(RuntimeError):
+        migrate(conn, migrations)
+
+    assert schema_version(conn) == 1
+    assert [row[1] for row in conn.execute("PRAGMA table_info(t)")] == ["x"]
+    conn.close()
+
+
+def test_migrate_rejects_out_of_order_versions(tmp_path):
+    conn = sqlite3.connect(tmp_path / "order.sqlite3")
+    with pytest.raises(ValueError):
+        migrate(conn, [(2, "b", lambda c: None), (1, "a", lambda c: None)])
+    conn.close()
+
+
+@pytest.mark.parametrize(
+    "query, params, index",
+    [
+        (
+            "SELECT attention_state FROM focus_samples WHERE session_id = ? AND timestamp >= ?",
+            ("session-1", 0.0),
+            "idx_focus_samples_session_timestamp",
+        ),
+        (
+            "SELECT timestamp, attention_state, focus_score FROM focus_samples "
+            "WHERE session_id = ? ORDER BY timestamp ASC",
+            ("session-1",),
+            "idx_focus_samples_session_timestamp",
+        ),
+        (
+            "SELECT focus_sample_id FROM focus_samples WHERE timestamp > ?",
+            (0.0,),
+            "idx_focus_samples_timestamp",
+        ),
+    ],
+)
+def test_time_series_queries_use_indexes(db_connection, query, params, index):
+    plan = " ".join(row[-1] for row in db_connection.execute(f"EXPLAIN QUERY PLAN {query}", params))
+
+    assert index in plan
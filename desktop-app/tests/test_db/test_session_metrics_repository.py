@@ -0,0 +1,171 @@
+import random
+import sqlite3
+
+import pytest
+
+from db.focus_sample_repository import FocusSampleRepository
+from db.session_metrics_repository import SessionMetricsRepository
+from db.session_repository import SessionRepository
+from scripts import build_reports
+from services.session_metrics import SessionMetricsAccumulator
+
+
+def _create_session(user_id):
+    return SessionRepository().start_session(user_id=user_id, screen_width=1920, screen_height=1080)
+
+
+def _record_samples(session_id, rng, count, other_faces=0):
+    """Insert *count* samples and feed the same stream to an accumulator, as the worker does.
+
+    With *other_faces*, every frame also stores that many secondary faces,
+    which the accumulator does not see.
+    """
+    repo = FocusSampleRepository()
+    accumulator = SessionMetricsAccumulator()
+    ts = 1_700_000_000.0
+    for _ in range(count):
+        ts += rng.uniform(0.02, 0.5)
+        faces = [(rng.choice([0, 1]), None if rng.random() < 0.05 else rng.random())
+                 for _ in range(1 + other_faces)]
+        for index, (state, score) in enumerate(faces):
+            repo.insert_sample(
+                session_id=session_id,
+                timestamp=ts,
+                left_x=0.1,
+                left_y=0.2,
+                right_x=0.3,
+                right_y=0.4,
+                face_x=1.0,
+                face_y=2.0,
+                face_z=3.0,
+                attention_state=state,
+                focus_score=score,
+                track_id=index + 1 if other_faces else None,
+                primary_face=index == 0,
+            )
+        accumulator.add(ts, *faces[0])
+    return accumulator
+
+
+def _scan(db_path, session_id, duration_seconds):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return build_reports._calculate_session_metrics(conn, session_id, duration_seconds)
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("seed, count, duration_seconds", [
+    (0, 1, None),
+    (1, 2, 0),
+    (2, 300, None),
+    (3, 300, 10_000.0),
+])
+def test_accumulator_matches_report_scan(isolated_database, seeded_user, seed, count, duration_seconds):
+    session_id = _create_session(seeded_user)
+    accumulator = _record_samples(session_id, random.Random(seed), count)
+
+    expected = _scan(str(isolated_database), session_id, duration_seconds)
+    report = accumulator.report(duration_seconds)
+
+    assert report["total_focus_time"] == expected["total_focus_time"]
+    assert report["total_distraction_time"] == expected["total_distraction_time"]
+    assert report["avg_focus_score"] == pytest.approx(expected["avg_focus_score"], rel=1e-12)
+
+
+def test_stored_metrics_drive_the_report_without_a_scan(isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    accumulator = _record_samples(session_id, random.Random(4), 200)
+    repo = SessionMetricsRepository()
+    repo.save(session_id, accumulator)
+
+    expected = _scan(str(isolated_database), session_id, 500.0)
+    conn = sqlite3.connect(str(isolated_database))
+    conn.row_factory = sqlite3.Row
+    try:
+        stored = build_reports._stored_session_metrics(conn, session_id, 500.0)
+        # Remove the samples: the report must now come from session_metrics alone.
+        conn.execute("DELETE FROM focus_samples WHERE session_id = ?", (session_id,))
+        conn.commit()
+        metrics = build_reports._session_metrics(conn, session_id, 500.0)
+    finally:
+        conn.close()
+
+    assert metrics == stored == accumulator.report(500.0)
+    assert metrics["total_focus_time"] == expected["total_focus_time"]
+    assert metrics["total_distraction_time"] == expected["total_distraction_time"]
+    assert metrics["avg_focus_score"] == pytest.approx(expected["avg_focus_score"], rel=1e-12)
+
+
+def test_multi_face_sessions_report_the_same_totals_with_or_without_stored_metrics(
+        isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    accumulator = _record_samples(session_id, random.Random(6), 200, other_faces=2)
+
+    scanned = _scan(str(isolated_database), session_id, 500.0)
+    SessionMetricsRepository().save(session_id, accumulator)
+    conn = sqlite3.connect(str(isolated_database))
+    conn.row_factory = sqlite3.Row
+    try:
+        stored = build_reports._session_metrics(conn, session_id, 500.0)
+    finally:
+        conn.close()
+
+    assert stored["total_focus_time"] == scanned["total_focus_time"]
+    assert stored["total_distraction_time"] == scanned["total_distraction_time"]
+    assert stored["avg_focus_score"] == pytest.approx(scanned["avg_focus_score"], rel=1e-12)
+
+
+def test_report_falls_back_to_scan_without_stored_metrics(isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    _record_samples(session_id, random.Random(5), 50)
+
+    conn = sqlite3.connect(str(isolated_database))
+    conn.row_factory = sqlite3.Row
+    try:
+        assert build_reports._stored_session_metrics(conn, session_id, None) is None
+        metrics = build_reports._session_metrics(conn, session_id, None)
+    finally:
+        conn.close()
+
+    assert metrics == _scan(str(isolated_database), session_id, None)
+
+
+def test_report_falls_back_on_databases_without_the_table(tmp_path):
+    conn = sqlite3.connect(tmp_path / "old.sqlite3")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(
+        """
+        CREATE TABLE focus_samples (
+            session_id TEXT, timestamp FLOAT, attention_state INTEGER, focus_score FLOAT
+        );
+        INSERT INTO focus_samples VALUES ('s', 0.0, 1, 0.5), ('s', 2.0, 0, 0.1);
+        """
+    )
+    try:
+        metrics = build_reports._session_metrics(conn, "s", None)
+    finally:
+        conn.close()
+
+    assert metrics["total_focus_time"] == 2.0
+    assert metrics["avg_focus_score"] == pytest.approx(0.3)
+
+
+def test_save_upserts_and_round_trips(isolated_database, seeded_user):
+    session_id = _create_session(seeded_user)
+    repo = SessionMetricsRepository()
+    accumulator = SessionMetricsAccumulator()
+    accumulator.add(10.0, 1, 0.9)
+    repo.save(session_id, accumulator)
+    accumulator.add(12.5, 0, 0.2)
+    repo.save(session_id, accumulator)
+
+    stored = repo.get(session_id)
+    restored = SessionMetricsAccumulator.from_dict(stored)
+
+    assert restored.to_dict() == accumulator.to_dict()
+    assert stored["focus_time"] == 2.5
+    assert stored["min_score"] == 0.2
+    assert stored["max_score"] == 0.9
+    assert repo.get("missing-session") is None
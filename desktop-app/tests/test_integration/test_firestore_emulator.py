@@ -12,6 +12,7 @@ from firebase_admin import delete_app, firestore
 
 from db.database import Database
 from scripts import build_reports
+from services.firestore_uploader import FirestoreSampleUploader
 from services.focus_tracking_worker import FocusTrackingWorker
 
 
@@ -117,20 +118,27 @@ def test_upsert_session_to_firestore_writes_document(worker, firestore_emulator_
     session_ref.delete()
 
 
-def test_push_sample_to_firestore_writes_nested_document(worker, firestore_emulator_client):
+def test_uploader_writes_every_sample_field_to_nested_document(tmp_path, firestore_emulator_client):
+    session_id = f"session-{uuid.uuid4()}"
+    user_id = "user-firestore-test"
     sample_id = f"sample-{uuid.uuid4()}"
     sample_ref = (
         firestore_emulator_client.collection("sessions")
-        .document(worker.session_id)
+        .document(session_id)
         .collection("focusSamples")
         .document(sample_id)
     )
     sample_ref.delete()
-
-    worker._push_sample_to_firestore(
+    uploader = FirestoreSampleUploader(
         firestore_emulator_client,
-        sample_id=sample_id,
-        ts=1710000000.5,
+        user_id=user_id,
+        session_id=session_id,
+        cursor_path=os.fspath(tmp_path / "upload_state.json"),
+    )
+
+    uploader.submit(sample_id, dict(
+        session_id=session_id,
+        timestamp=1710000000.5,
         left_x=0.11,
         left_y=0.22,
         right_x=0.33,
@@ -160,7 +168,8 @@ def test_push_sample_to_firestore_writes_nested_document(worker, firestore_emula
         pitch=3.0,
         roll=4.0,
         label=1,
-    )
+    ))
+    assert uploader.flush() == 1
 
     snapshot = sample_ref.get()
     assert snapshot.exists
@@ -199,12 +208,62 @@ def test_push_sample_to_firestore_writes_nested_document(worker, firestore_emula
         "faceZ": 30.0,
         "attentionState": 1,
         "focusScore": 0.87,
-        "sessionId": worker.session_id,
-        "userId": worker.user_id,
+        "trackId": None,
+        "primaryFace": True,
+        "sessionId": session_id,
+        "userId": user_id,
     }
 
     sample_ref.delete()
-    firestore_emulator_client.collection("sessions").document(worker.session_id).delete()
+    firestore_emulator_client.collection("sessions").document(session_id).delete()
+
+
+def test_uploader_batches_samples_into_nested_documents(tmp_path, firestore_emulator_client):
+    session_id = f"session-{uuid.uuid4()}"
+    samples_ref = (
+        firestore_emulator_client.collection("sessions")
+        .document(session_id)
+        .collection("focusSamples")
+    )
+    uploader = FirestoreSampleUploader(
+        firestore_emulator_client,
+        user_id="user-firestore-test",
+        session_id=session_id,
+        cursor_path=os.fspath(tmp_path / "upload_state.json"),
+        max_batch_size=4,
+    )
+    sample_ids = [f"sample-{i}" for i in range(10)]
+
+    uploader.start()
+    for i, sample_id in enumerate(sample_ids):
+        uploader.submit(
+            sample_id,
+            {
+                "session_id": session_id,
+                "timestamp": 1710000000.0 + i,
+                "left_x": 0.1,
+                "left_y": 0.2,
+                "right_x": 0.3,
+                "right_y": 0.4,
+                "face_x": 1.0,
+                "face_y": 2.0,
+                "face_z": 3.0,
+                "attention_state": i % 2,
+                "focus_score": 0.5,
+                "label": i % 2,
+            },
+        )
+    uploader.stop()
+
+    docs = {snapshot.id: snapshot.to_dict() for snapshot in samples_ref.stream()}
+    assert set(docs) == set(sample_ids)
+    assert docs["sample-3"]["attentionState"] == 1
+    assert docs["sample-3"]["timestampEpoch"] == 1710000003.0
+    assert docs["sample-3"]["userId"] == "user-firestore-test"
+    assert uploader.batches_committed == 3
+
+    for sample_id in sample_ids:
+        samples_ref.document(sample_id).delete()
 
 
 def test_sync_report_for_session_writes_report_document(
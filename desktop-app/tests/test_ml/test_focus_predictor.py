@@ -0,0 +1,266 @@
+import json
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from mediapipe.framework.formats import landmark_pb2
+
+from ml_runner_scripts.FocusPredictor import (
+    FEATURE_COLS,
+    FocusPredictor,
+    compute_feature_matrix,
+    compute_feature_vector,
+    landmarks_to_array,
+)
+from ml_runner_scripts.tree_ensemble import CompiledTreeEnsemble
+
+NUM_LANDMARKS = 478
+
+
+def _make_landmarks(seed, count=NUM_LANDMARKS):
+    rng = np.random.default_rng(seed)
+    # MediaPipe stores coordinates as float32; mimic that rounding.
+    coords = rng.uniform(0.1, 0.9, size=(count, 3)).astype(np.float32)
+    return [SimpleNamespace(x=float(x), y=float(y), z=float(z)) for x, y, z in coords]
+
+
+def _make_landmark_list(landmarks, **extra):
+    message = landmark_pb2.NormalizedLandmarkList()
+    for lm in landmarks:
+        message.landmark.add(x=lm.x, y=lm.y, z=lm.z, **extra)
+    return message
+
+
+def _legacy_extract_features(landmarks):
+    """Reference copy of the list-based feature extraction the predictor used to ship."""
+
+    def eye_bbox(indices):
+        xs = [landmarks[i].x for i in indices]
+        ys = [landmarks[i].y for i in indices]
+        return min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+
+    xs = [lm.x for lm in landmarks]
+    ys = [lm.y for lm in landmarks]
+    face_x = min(xs)
+    face_y = min(ys)
+    face_w = max(xs) - min(xs)
+    face_h = max(ys) - min(ys)
+
+    left_eye_x, left_eye_y, left_eye_w, left_eye_h = eye_bbox([33, 133, 159, 145, 153, 154])
+    right_eye_x, right_eye_y, right_eye_w, right_eye_h = eye_bbox([362, 263, 386, 374, 380, 381])
+
+    face_cx = face_x + face_w / 2
+    face_cy = face_y + face_h / 2
+    left_eye_dx = left_eye_x + left_eye_w / 2 - face_cx
+    left_eye_dy = left_eye_y + left_eye_h / 2 - face_cy
+    right_eye_dx = right_eye_x + right_eye_w / 2 - face_cx
+    right_eye_dy = right_eye_y + right_eye_h / 2 - face_cy
+
+    left_eye_corner = landmarks[33]
+    right_eye_corner = landmarks[263]
+    nose = landmarks[1]
+    chin = landmarks[199]
+
+    return {
+        "face_x": face_x,
+        "face_y": face_y,
+        "face_w": face_w,
+        "face_h": face_h,
+        "left_eye_x": left_eye_x,
+        "left_eye_y": left_eye_y,
+        "left_eye_w": left_eye_w,
+        "left_eye_h": left_eye_h,
+        "right_eye_x": right_eye_x,
+        "right_eye_y": right_eye_y,
+        "right_eye_w": right_eye_w,
+        "right_eye_h": right_eye_h,
+        "left_eye_dx": left_eye_dx,
+        "left_eye_dy": left_eye_dy,
+        "right_eye_dx": right_eye_dx,
+        "right_eye_dy": right_eye_dy,
+        "sym_dx": left_eye_dx - right_eye_dx,
+        "sym_dy": left_eye_dy - right_eye_dy,
+        "yaw": right_eye_corner.x - left_eye_corner.x,
+        "pitch": chin.y - nose.y,
+        "roll": (right_eye_corner.y - left_eye_corner.y) / (
+            (right_eye_corner.x - left_eye_corner.x) + 1e-6
+        ),
+    }
+
+
+@pytest.fixture
+def predictor():
+    # Feature extraction does not touch the model or FaceMesh, so skip __init__.
+    return object.__new__(FocusPredictor)
+
+
+def test_landmarks_to_array_preserves_coordinates():
+    landmarks = _make_landmarks(seed=0)
+
+    points = landmarks_to_array(landmarks)
+
+    assert points.shape == (NUM_LANDMARKS, 3)
+    assert points.dtype == np.float64
+    assert points[199].tolist() == [landmarks[199].x, landmarks[199].y, landmarks[199].z]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_extract_features_matches_legacy_implementation_exactly(predictor, seed):
+    landmarks = _make_landmarks(seed)
+
+    features = predictor.extract_features(landmarks, 640, 480)
+
+    expected = _legacy_extract_features(landmarks)
+    assert list(features) == FEATURE_COLS
+    assert features == expected
+    assert all(type(value) is float for value in features.values())
+
+
+def test_landmarks_to_array_decodes_landmark_list_wire_format():
+    landmarks = _make_landmarks(seed=3)
+    message = _make_landmark_list(landmarks)
+
+    points = landmarks_to_array(message)
+
+    assert np.array_equal(points, landmarks_to_array(landmarks))
+    assert np.array_equal(points, landmarks_to_array(message.landmark))
+
+
+def test_landmarks_to_array_falls_back_when_records_carry_extra_fields():
+    landmarks = _make_landmarks(seed=4)
+    message = _make_landmark_list(landmarks, visibility=0.5)
+
+    points = landmarks_to_array(message)
+
+    assert np.array_equal(points, landmarks_to_array(landmarks))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_extract_features_from_landmark_list_matches_legacy(predictor, seed):
+    message = _make_landmark_list(_make_landmarks(seed))
+
+    features = predictor.extract_features(message, 640, 480)
+
+    assert features == _legacy_extract_features(message.landmark)
+
+
+def test_faces_without_refined_irises_decode_and_match_legacy(predictor):
+    # FaceMesh(refine_landmarks=False) reports 468 points instead of 478.
+    landmarks = _make_landmarks(seed=8, count=468)
+    message = _make_landmark_list(landmarks)
+
+    points = landmarks_to_array(message)
+
+    assert points.shape == (468, 3)
+    assert np.array_equal(points, landmarks_to_array(landmarks))
+    assert predictor.extract_features(message, 640, 480) == _legacy_extract_features(landmarks)
+    assert np.array_equal(
+        compute_feature_matrix(points[None]), compute_feature_vector(points)[None])
+
+
+def test_extract_features_accepts_precomputed_array(predictor):
+    landmarks = _make_landmarks(seed=42)
+
+    from_landmarks = predictor.extract_features(landmarks, 640, 480)
+    from_array = predictor.extract_features(landmarks_to_array(landmarks), 640, 480)
+
+    assert from_array == from_landmarks
+
+
+def test_get_eye_bbox_matches_feature_vector(predictor):
+    landmarks = _make_landmarks(seed=7)
+    vector = compute_feature_vector(landmarks_to_array(landmarks))
+
+    bbox = predictor.get_eye_bbox(landmarks, [362, 263, 386, 374, 380, 381], 640, 480)
+
+    assert bbox == tuple(vector[8:12].tolist())
+
+
+def test_feature_matrix_matches_per_face_vectors(predictor):
+    faces = [_make_landmarks(seed) for seed in range(4)]
+    points = np.stack([landmarks_to_array(landmarks) for landmarks in faces])
+
+    matrix = compute_feature_matrix(points)
+
+    assert matrix.shape == (4, len(FEATURE_COLS))
+    assert np.array_equal(matrix, np.stack([compute_feature_vector(p) for p in points]))
+    assert np.array_equal(predictor.extract_feature_matrix(faces), matrix)
+
+
+PRODUCTION_MODEL_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "ml_dev_scripts"
+    / "docs"
+    / "production_models"
+    / "xgb_relative_production.json"
+)
+
+
+@pytest.fixture(scope="module")
+def xgb_classifier():
+    model = xgb.XGBClassifier()
+    model.load_model(PRODUCTION_MODEL_PATH)
+    return model
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["xgboost", "compiled"])
+def production_predictor(request):
+    loaded = FocusPredictor(str(PRODUCTION_MODEL_PATH), use_compiled=request.param)
+    yield loaded
+    loaded.face_mesh.close()
+
+
+def test_production_model_uses_compiled_trees_when_available():
+    loaded = FocusPredictor(str(PRODUCTION_MODEL_PATH))
+    loaded.face_mesh.close()
+
+    assert isinstance(loaded.model, CompiledTreeEnsemble)
+
+
+def test_predict_matches_dataframe_predict_proba(production_predictor, xgb_classifier):
+    rng = np.random.default_rng(0)
+
+    for _ in range(50):
+        features = dict(zip(FEATURE_COLS, rng.normal(0.0, 0.1, size=len(FEATURE_COLS)).tolist()))
+        df = pd.DataFrame([features])[production_predictor.feature_columns]
+        expected = float(xgb_classifier.predict_proba(df)[0][1])
+
+        focused, prob = production_predictor.predict(features)
+
+        assert prob == pytest.approx(expected, abs=1e-6)
+        assert focused == int(prob >= production_predictor.threshold)
+
+
+def test_predict_batch_matches_predict_per_face(production_predictor):
+    matrix = np.random.default_rng(1).normal(0.0, 0.1, size=(6, len(FEATURE_COLS)))
+
+    states, probs = production_predictor.predict_batch(matrix)
+
+    for row, state, prob in zip(matrix, states, probs):
+        expected_state, expected_prob = production_predictor.predict(dict(zip(FEATURE_COLS, row)))
+        assert prob == pytest.approx(expected_prob, abs=1e-6)
+        assert state == expected_state
+
+
+def test_predictor_without_face_mesh_still_scores(production_predictor):
+    model_only = FocusPredictor(str(PRODUCTION_MODEL_PATH), with_face_mesh=False)
+    matrix = np.random.default_rng(2).normal(0.0, 0.1, size=(4, len(FEATURE_COLS)))
+
+    assert model_only.face_mesh is None
+    np.testing.assert_allclose(
+        model_only.predict_batch(matrix)[1], production_predictor.predict_batch(matrix)[1], atol=1e-6)
+
+
+def test_predictor_rejects_metadata_that_does_not_match_model(tmp_path):
+    model_path = tmp_path / "model.json"
+    shutil.copy(PRODUCTION_MODEL_PATH, model_path)
+    metadata = json.loads(PRODUCTION_MODEL_PATH.with_suffix(".metadata.json").read_text())
+    metadata["feature_columns"] = list(reversed(metadata["feature_columns"]))
+    model_path.with_suffix(".metadata.json").write_text(json.dumps(metadata))
+
+    with pytest.raises(ValueError, match="do not match"):
+        FocusPredictor(str(model_path))
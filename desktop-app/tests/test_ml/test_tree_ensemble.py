@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from ml_runner_scripts.tree_ensemble import (
+    CompiledTreeEnsemble,
+    compiled_model_path,
+    load_compiled_model,
+)
+
+PRODUCTION_MODEL_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "ml_dev_scripts"
+    / "docs"
+    / "production_models"
+    / "xgb_relative_production.json"
+)
+
+
+def _random_rows(num_features, rows=5000, seed=0, missing_fraction=0.0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(0.0, 0.1, size=(rows, num_features)).astype(np.float32)
+    if missing_fraction:
+        X[rng.random(X.shape) < missing_fraction] = np.nan
+    return X
+
+
+@pytest.fixture(scope="module")
+def xgb_classifier():
+    model = xgb.XGBClassifier()
+    model.load_model(PRODUCTION_MODEL_PATH)
+    return model
+
+
+@pytest.fixture(scope="module")
+def ensemble():
+    return CompiledTreeEnsemble.from_xgboost_json(PRODUCTION_MODEL_PATH)
+
+
+@pytest.mark.parametrize("missing_fraction", [0.0, 0.1])
+def test_compiled_production_model_matches_xgboost(ensemble, xgb_classifier, missing_fraction):
+    X = _random_rows(ensemble.num_features, missing_fraction=missing_fraction)
+
+    expected = xgb_classifier.predict_proba(X)
+    actual = ensemble.predict_proba(X)
+
+    assert actual.shape == expected.shape
+    assert np.max(np.abs(actual - expected)) <= 1e-6
+
+
+def test_compiled_margin_matches_xgboost_exactly(ensemble, xgb_classifier):
+    X = _random_rows(ensemble.num_features, seed=1)
+
+    expected = xgb_classifier.get_booster().inplace_predict(
+        X, predict_type="margin", iteration_range=(0, xgb_classifier.best_iteration + 1)
+    )
+
+    assert np.array_equal(ensemble.predict_margin(X), expected)
+
+
+def test_compiled_model_respects_best_iteration(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 3)).astype(np.float32)
+    y = (X[:, 0] + 0.5 * rng.normal(size=400) > 0).astype(int)
+    model = xgb.XGBClassifier(n_estimators=60, max_depth=3, early_stopping_rounds=3)
+    model.fit(X[:300], y[:300], eval_set=[(X[300:], y[300:])], verbose=False)
+    model_path = tmp_path / "small.json"
+    model.save_model(model_path)
+
+    compiled = CompiledTreeEnsemble.from_xgboost_json(model_path)
+
+    assert compiled.num_trees == model.best_iteration + 1
+    assert np.max(np.abs(compiled.predict_proba(X) - model.predict_proba(X))) <= 1e-6
+
+
+def test_save_and_load_round_trip(ensemble, tmp_path):
+    path = tmp_path / "model.trees.npz"
+    ensemble.save(path)
+
+    loaded = CompiledTreeEnsemble.load(path)
+    X = _random_rows(ensemble.num_features, rows=200, seed=2)
+
+    assert loaded.feature_names == ensemble.feature_names
+    assert loaded.num_features == ensemble.num_features
+    assert np.array_equal(loaded.predict_margin(X), ensemble.predict_margin(X))
+
+
+def test_shipped_compiled_model_is_up_to_date():
+    assert load_compiled_model(PRODUCTION_MODEL_PATH) is not None
+
+
+def test_load_compiled_model_rejects_stale_artifact(ensemble, tmp_path):
+    model_path = tmp_path / "model.json"
+    model_path.write_text(PRODUCTION_MODEL_PATH.read_text() + "\n")
+    ensemble.save(compiled_model_path(model_path))
+
+    with pytest.raises(RuntimeError, match="stale"):
+        load_compiled_model(model_path)
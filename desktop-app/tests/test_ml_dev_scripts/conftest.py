@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The training scripts import each other as top-level modules, the way
+# they run from ml_dev_scripts/src.
+ML_DEV_SRC = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "ml_dev_scripts", "src")
+)
+if ML_DEV_SRC not in sys.path:
+    sys.path.insert(0, ML_DEV_SRC)
@@ -0,0 +1,102 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset_cache
+from dataset_cache import CachedDataset, build_cache, cache_directory, open_cached_dataset
+
+
+def _write_csv(path, rows=50):
+    frame = pd.DataFrame({
+        "subject_id": np.arange(rows) % 3 + 1,
+        "label": np.arange(rows) % 2,
+        "yaw": np.linspace(-1.0, 1.0, rows),
+        "pitch": np.linspace(0.0, 0.5, rows),
+        "note": ["x"] * rows,
+    })
+    frame.loc[7, "pitch"] = np.nan
+    frame.to_csv(path, index=False)
+    return frame
+
+
+def test_builds_typed_columns_in_chunks(tmp_path):
+    source = tmp_path / "master_dataset.csv"
+    frame = _write_csv(source)
+
+    manifest = build_cache(source, tmp_path / "cache", chunk_rows=8)
+
+    assert manifest["rows"] == 50
+    # Text columns are left out of the cache.
+    assert set(manifest["columns"]) == {"subject_id", "label", "yaw", "pitch"}
+    dataset = CachedDataset(tmp_path / "cache")
+    assert dataset.column("subject_id").dtype == np.int64
+    assert dataset.column("yaw").dtype == np.float32
+    np.testing.assert_array_equal(dataset.column("label"), frame["label"].to_numpy())
+    np.testing.assert_array_equal(dataset.column("yaw"), frame["yaw"].to_numpy(dtype=np.float32))
+    assert 7 not in dataset.complete_rows(["yaw", "pitch"])
+    assert len(dataset.complete_rows(["yaw", "pitch"])) == 49
+
+
+def test_integer_column_with_gaps_in_a_later_chunk_is_stored_as_float(tmp_path):
+    source = tmp_path / "data.csv"
+    source.write_text("subject_id,yaw\n1,0.5\n2,0.5\n3,0.5\n,0.5\n5,0.5\n6,0.5\n")
+
+    build_cache(source, tmp_path / "cache", chunk_rows=3)
+
+    values = CachedDataset(tmp_path / "cache").column("subject_id")
+    assert values.dtype == np.float64
+    np.testing.assert_array_equal(values, [1, 2, 3, np.nan, 5, 6])
+
+
+def test_reuses_cache_until_the_source_changes(tmp_path, monkeypatch):
+    source = tmp_path / "master_dataset.csv"
+    _write_csv(source)
+    cache_dir = tmp_path / "cache"
+    builds = []
+    real_build = dataset_cache.build_cache
+    monkeypatch.setattr(
+        dataset_cache, "build_cache", lambda *a, **kw: builds.append(a) or real_build(*a, **kw))
+
+    open_cached_dataset(source, cache_dir)
+    open_cached_dataset(source, cache_dir)
+    assert len(builds) == 1
+
+    # A touch alone is settled by the content hash.
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+    open_cached_dataset(source, cache_dir)
+    assert len(builds) == 1
+
+    _write_csv(source, rows=60)
+    dataset = open_cached_dataset(source, cache_dir, ["yaw"])
+    assert len(builds) == 2
+    assert len(dataset) == 60
+    assert dataset.directory == cache_directory(source, cache_dir)
+
+
+def test_pickles_as_a_reference_to_the_mapped_files(tmp_path):
+    source = tmp_path / "master_dataset.csv"
+    _write_csv(source, rows=2000)
+    dataset = open_cached_dataset(source, tmp_path / "cache", ["yaw", "label"])
+
+    payload = pickle.dumps(dataset)
+    restored = pickle.loads(payload)
+
+    assert len(payload) < 1000
+    assert isinstance(restored.column("yaw"), np.memmap)
+    assert not restored.column("yaw").flags.writeable
+    pd.testing.assert_frame_equal(
+        restored.frame(["yaw", "label"], np.array([3, 10])),
+        dataset.frame(["yaw", "label"], np.array([3, 10])),
+    )
+
+
+def test_missing_columns_are_reported(tmp_path):
+    source = tmp_path / "master_dataset.csv"
+    _write_csv(source)
+
+    with pytest.raises(ValueError, match="roll"):
+        open_cached_dataset(source, tmp_path / "cache", ["yaw", "roll"])
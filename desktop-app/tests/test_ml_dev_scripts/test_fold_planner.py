@@ -0,0 +1,89 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+
+import subject_holdout_training as sht
+from dataset_cache import open_cached_dataset
+from fold_planner import FoldPlanner
+
+
+def _frame(rows=300, subjects=4, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(rng.normal(size=(rows, 3)), columns=["yaw", "pitch", "roll"])
+    # Subjects interleaved, so folds are not contiguous slices.
+    frame[sht.SUBJECT_COLUMN] = rng.integers(1, subjects + 1, rows)
+    frame[sht.TARGET_COLUMN] = rng.integers(0, 2, rows)
+    frame.index = frame.index * 2 + 10
+    return frame
+
+
+def _planner(frame, **kwargs):
+    return FoldPlanner(
+        frame, ["yaw", "pitch", "roll"], 0.2,
+        target_column=sht.TARGET_COLUMN, subject_column=sht.SUBJECT_COLUMN, **kwargs,
+    )
+
+
+def test_folds_match_frame_masking_and_split():
+    frame = _frame()
+    planner = _planner(frame)
+
+    assert planner.subjects == [1, 2, 3, 4]
+    for subject in planner.subjects:
+        fold = planner.fold(subject)
+        train_df = frame[frame[sht.SUBJECT_COLUMN] != subject]
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            train_df[["yaw", "pitch", "roll"]], train_df[sht.TARGET_COLUMN],
+            test_size=0.2, random_state=42, stratify=train_df[sht.TARGET_COLUMN],
+        )
+
+        assert fold.train_subjects == [s for s in planner.subjects if s != subject]
+        assert planner.row_ids[fold.train_rows].tolist() == train_df.index.tolist()
+        assert planner.row_ids[fold.test_rows].tolist() == (
+            frame.index[frame[sht.SUBJECT_COLUMN] == subject].tolist())
+        pd.testing.assert_frame_equal(
+            planner.features_frame(fold.fit_rows), X_fit.astype(np.float32))
+        pd.testing.assert_series_equal(planner.labels_series(fold.val_rows), y_val)
+
+
+def test_cached_planner_pickles_as_a_reference(tmp_path):
+    source = tmp_path / "master_dataset.csv"
+    _frame(rows=5000).to_csv(source, index=False)
+    columns = ["yaw", "pitch", "roll", sht.TARGET_COLUMN, sht.SUBJECT_COLUMN]
+    dataset = open_cached_dataset(source, tmp_path / "cache", columns)
+    planner = FoldPlanner.from_dataset(
+        dataset, ["yaw", "pitch", "roll"], 0.2,
+        target_column=sht.TARGET_COLUMN, subject_column=sht.SUBJECT_COLUMN,
+    )
+
+    payload = pickle.dumps(planner)
+
+    assert len(payload) < 2000
+    # In the same process the planner is reused rather than rebuilt.
+    assert pickle.loads(payload) is planner
+    in_memory = _planner(pd.read_csv(source))
+    np.testing.assert_array_equal(in_memory.features, planner.features)
+    assert in_memory.subjects == planner.subjects
+
+
+def test_quantile_sketch_is_built_once_and_shared_by_folds():
+    planner = _planner(_frame())
+
+    sketch = planner.quantile_sketch()
+    fold = planner.fold(2)
+    model = sht.fit_xgb_with_sketch(
+        {"n_estimators": 20, "max_depth": 3},
+        planner.features_frame(fold.fit_rows), planner.labels_series(fold.fit_rows),
+        planner.features_frame(fold.val_rows), planner.labels_series(fold.val_rows),
+        sketch,
+    )
+
+    assert planner.quantile_sketch() is sketch
+    assert isinstance(model, xgb.XGBClassifier)
+    probabilities = model.predict_proba(planner.features_frame(fold.test_rows))[:, 1]
+    assert probabilities.shape == (len(fold.test_rows),)
+    # Pickling drops the sketch; it is rebuilt on demand.
+    assert pickle.loads(pickle.dumps(planner))._sketch is None
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+
+from hyperparameter_search import GridSearch, SuccessiveHalving, build_search
+
+
+def _candidates(count):
+    return [{"n_estimators": 300, "max_depth": i} for i in range(count)]
+
+
+def _drive(search, score):
+    """Run *search* to completion, scoring each parameter set with *score*."""
+    rungs = []
+    while not search.done:
+        param_sets = search.next_rung()
+        rungs.append(param_sets)
+        search.report([SimpleNamespace(params=p, score=score(p)) for p in param_sets])
+    return rungs
+
+
+def test_grid_search_is_one_full_budget_rung():
+    search = GridSearch(_candidates(4))
+
+    rungs = _drive(search, lambda p: p["max_depth"])
+
+    assert rungs == [_candidates(4)]
+    assert [r.params for r in search.results] == _candidates(4)
+
+
+def test_successive_halving_prunes_to_full_budget_survivors():
+    search = SuccessiveHalving(_candidates(9), eta=3)
+
+    # Depth 4 is best; scores do not depend on the budget.
+    rungs = _drive(search, lambda p: -abs(p["max_depth"] - 4))
+
+    assert search.rung_count == 2
+    assert [p["n_estimators"] for p in rungs[0]] == [100] * 9
+    # The top third go on, in candidate order, at the full budget.
+    assert rungs[1] == [{"n_estimators": 300, "max_depth": d} for d in (3, 4, 5)]
+    assert [r.params for r in search.results] == rungs[1]
+
+
+def test_successive_halving_breaks_ties_by_candidate_order():
+    search = SuccessiveHalving(_candidates(6), eta=3)
+
+    rungs = _drive(search, lambda p: 1.0)
+
+    assert [p["max_depth"] for p in rungs[-1]] == [0, 1]
+
+
+def test_early_rungs_keep_a_minimum_budget():
+    candidates = [{"n_estimators": 60, "max_depth": i} for i in range(27)]
+    search = SuccessiveHalving(candidates, eta=3, min_resource=20)
+
+    rungs = _drive(search, lambda p: p["max_depth"])
+
+    assert [len(r) for r in rungs] == [27, 9, 3]
+    assert [r[0]["n_estimators"] for r in rungs] == [20, 20, 60]
+    assert [r.params["max_depth"] for r in search.results] == [24, 25, 26]
+
+
+def test_build_search():
+    assert type(build_search("grid", _candidates(2))) is GridSearch
+    assert build_search("halving", _candidates(2), eta=4).eta == 4
+    with pytest.raises(ValueError):
+        build_search("hyperband", _candidates(2))
+    with pytest.raises(ValueError):
+        SuccessiveHalving(_candidates(2), eta=1)
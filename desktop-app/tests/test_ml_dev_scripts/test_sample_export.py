@@ -0,0 +1,177 @@
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import sample_export as se
+import streaming_training as st
+import subject_holdout_training as sht
+from db.migrations import migrate
+
+SCHEMA_PATH = Path(__file__).resolve().parents[2] / "db" / "schema.sql"
+
+
+def _create_database(path, users):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA_PATH.read_text())
+    for user_id in users:
+        conn.execute("INSERT INTO users (user_id, username) VALUES (?, ?)", (user_id, f"name-{user_id}"))
+        conn.execute(
+            "INSERT INTO sessions (session_id, user_id, start_time) VALUES (?, ?, 0)",
+            (f"session-{user_id}", user_id),
+        )
+    conn.commit()
+    return conn
+
+
+def _insert_samples(conn, user_id, count, seed=0, label=True):
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, 2, count)
+    columns = ["focus_sample_id", "session_id", "timestamp", *se.FEATURE_COLUMNS, "label"]
+    rows = []
+    for i in range(count):
+        features = rng.normal(labels[i] * 0.8, 1.0, len(se.FEATURE_COLUMNS)).tolist()
+        rows.append((
+            f"{user_id}-{seed}-{i}", f"session-{user_id}", float(i),
+            *features, int(labels[i]) if label else None,
+        ))
+    conn.executemany(
+        f"INSERT INTO focus_samples ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        rows,
+    )
+    conn.commit()
+    return pd.DataFrame([row[3:] for row in rows], columns=[*se.FEATURE_COLUMNS, "label"])
+
+
+def test_export_maps_users_to_subjects_and_resumes_from_high_water_mark(tmp_path):
+    first = _create_database(tmp_path / "a.sqlite3", ["alice", "bob"])
+    _insert_samples(first, "alice", 30, seed=1)
+    _insert_samples(first, "bob", 20, seed=2)
+    _insert_samples(first, "bob", 5, seed=3, label=False)
+    second = _create_database(tmp_path / "b.sqlite3", ["bob", "carol"])
+    _insert_samples(second, "carol", 10, seed=4)
+    _insert_samples(second, "bob", 10, seed=5)
+    export_dir = tmp_path / "export"
+
+    assert se.export_database(tmp_path / "a.sqlite3", export_dir, batch_rows=16) == 50
+    assert se.export_database(tmp_path / "b.sqlite3", export_dir, batch_rows=16) == 20
+    assert se.export_database(tmp_path / "a.sqlite3", export_dir, batch_rows=16) == 0
+
+    added = _insert_samples(first, "alice", 7, seed=6)
+    assert se.export_database(tmp_path / "a.sqlite3", export_dir, batch_rows=16) == 7
+
+    dataset = se.open_sample_export(export_dir)
+    manifest = dataset.manifest
+    assert {user: s["subject_id"] for user, s in manifest["subjects"].items()} == {
+        "alice": 1, "bob": 2, "carol": 3,
+    }
+    assert manifest["subjects"]["carol"]["username"] == "name-carol"
+    assert len(dataset) == 77
+    counts = pd.Series(dataset.column(se.SUBJECT_COLUMN)).value_counts().to_dict()
+    assert counts == {1: 37, 2: 30, 3: 10}
+    assert all((export_dir / shard["path"]).is_dir() for shard in manifest["shards"])
+
+    frame = dataset.frame(se.FEATURE_COLUMNS + ["label"])
+    np.testing.assert_allclose(
+        frame.tail(7).to_numpy(), added.to_numpy(dtype=np.float32), rtol=1e-6
+    )
+    first.close()
+    second.close()
+
+
+def test_export_reads_databases_missing_feature_columns(tmp_path):
+    conn = sqlite3.connect(tmp_path / "legacy.sqlite3")
+    conn.executescript(
+        """
+        CREATE TABLE users (user_id TEXT PRIMARY KEY, username TEXT);
+        CREATE TABLE sessions (session_id TEXT PRIMARY KEY, user_id TEXT NOT NULL);
+        CREATE TABLE focus_samples (
+            focus_sample_id TEXT PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            timestamp TIMESTAMP NOT NULL,
+            yaw FLOAT,
+            label INTEGER
+        );
+        INSERT INTO sessions VALUES ('session-1', 'user-1');
+        INSERT INTO focus_samples VALUES ('s-1', 'session-1', 1.0, 0.5, 1);
+        """
+    )
+    conn.close()
+
+    se.export_database(tmp_path / "legacy.sqlite3", tmp_path / "export")
+
+    dataset = se.open_sample_export(tmp_path / "export")
+    assert dataset.column("yaw").tolist() == [0.5]
+    assert np.isnan(dataset.column("pitch")).all()
+    assert dataset.manifest["subjects"] == {"user-1": {"subject_id": 1, "username": None}}
+
+
+def test_export_keeps_only_the_primary_face_of_multi_track_sessions(tmp_path):
+    conn = _create_database(tmp_path / "faces.sqlite3", ["alice"])
+    migrate(conn)
+    primary = _insert_samples(conn, "alice", 12, seed=1)
+    conn.execute("UPDATE focus_samples SET track_id = 1")
+    _insert_samples(conn, "alice", 8, seed=2)
+    conn.execute("UPDATE focus_samples SET track_id = 2, primary_face = 0 WHERE track_id IS NULL")
+    conn.commit()
+    conn.close()
+
+    assert se.export_database(tmp_path / "faces.sqlite3", tmp_path / "export") == 12
+
+    dataset = se.open_sample_export(tmp_path / "export")
+    assert dataset.column(se.SUBJECT_COLUMN).tolist() == [1] * 12
+    np.testing.assert_allclose(
+        dataset.frame(se.FEATURE_COLUMNS + ["label"]).to_numpy(),
+        primary.to_numpy(dtype=np.float32),
+        rtol=1e-6,
+    )
+
+
+def test_export_without_primary_face_column_keeps_single_face_rows(tmp_path):
+    conn = _create_database(tmp_path / "tracks.sqlite3", ["alice"])
+    conn.execute("ALTER TABLE focus_samples ADD COLUMN track_id INTEGER")
+    _insert_samples(conn, "alice", 6, seed=1)
+    _insert_samples(conn, "alice", 4, seed=2)
+    conn.execute("UPDATE focus_samples SET track_id = 3 WHERE focus_sample_id LIKE 'alice-2-%'")
+    conn.commit()
+    conn.close()
+
+    assert se.export_database(tmp_path / "tracks.sqlite3", tmp_path / "export") == 6
+
+
+def test_training_reads_an_export_like_the_equivalent_csv(tmp_path):
+    conn = _create_database(tmp_path / "focuscam.sqlite3", ["u1", "u2", "u3"])
+    frames = []
+    for subject_id, user_id in enumerate(["u1", "u2", "u3"], start=1):
+        frame = _insert_samples(conn, user_id, 120, seed=subject_id)
+        frame[sht.SUBJECT_COLUMN] = subject_id
+        frames.append(frame)
+    conn.close()
+    csv_path = tmp_path / "master_dataset.csv"
+    pd.concat(frames, ignore_index=True).to_csv(csv_path, index=False)
+    export_dir = tmp_path / "export"
+    se.export_database(tmp_path / "focuscam.sqlite3", export_dir)
+
+    from_export = sht.load_training_data(export_dir, sht.RELATIVE_FEATURES, cache_dir=None)
+    from_csv = sht.load_training_data(csv_path, sht.RELATIVE_FEATURES, tmp_path / "cache")
+    pd.testing.assert_frame_equal(
+        from_export[from_csv.columns].reset_index(drop=True), from_csv.reset_index(drop=True)
+    )
+
+    results = {}
+    for name, dataset in (("export", export_dir), ("csv", csv_path)):
+        sht.run_subject_holdout(
+            model_type="xgb",
+            feature_set_name="relative",
+            feature_columns=sht.RELATIVE_FEATURES,
+            dataset_path=dataset,
+            output_dir=tmp_path / name,
+            validation_fraction=0.2,
+            cache_dir=tmp_path / "cache",
+        )
+        results[name] = pd.read_csv(tmp_path / name / "xgb_relative" / "fold_metrics.csv")
+    pd.testing.assert_frame_equal(results["export"], results["csv"])
+
+    chunks = list(st.iter_cached_chunks(export_dir, sht.RELATIVE_FEATURES, 50, cache_dir=None))
+    assert sum(len(labels) for _, labels in chunks) == 360
@@ -0,0 +1,107 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+
+import streaming_training as st
+import subject_holdout_training as sht
+from ml_runner_scripts.tree_ensemble import load_compiled_model
+from test_subject_holdout_training import _write_dataset
+
+
+def _write_dataset_with_gaps(path):
+    _write_dataset(path, subjects=3, rows_per_subject=150)
+    frame = pd.read_csv(path)
+    frame.loc[[3, 40, 41, 200], sht.RELATIVE_FEATURES[0]] = np.nan
+    frame.loc[[7, 310], sht.TARGET_COLUMN] = np.nan
+    frame["unused"] = "text"
+    frame.to_csv(path, index=False)
+    return path
+
+
+def _chunks(dataset, chunk_rows, cache_dir=None):
+    if cache_dir is None:
+        return lambda: st.iter_csv_chunks(dataset, sht.RELATIVE_FEATURES, chunk_rows)
+    return lambda: st.iter_cached_chunks(dataset, sht.RELATIVE_FEATURES, chunk_rows, cache_dir)
+
+
+def test_chunks_apply_the_in_memory_cleaning(tmp_path):
+    dataset = _write_dataset_with_gaps(tmp_path / "master_dataset.csv")
+    df = sht.load_dataset(dataset, sht.RELATIVE_FEATURES)
+
+    for chunks in (_chunks(dataset, 64), _chunks(dataset, 64, tmp_path / "cache")):
+        features, labels = zip(*chunks())
+        np.testing.assert_array_equal(
+            np.concatenate(features), df[sht.RELATIVE_FEATURES].to_numpy(dtype=np.float32)
+        )
+        np.testing.assert_array_equal(np.concatenate(labels), df[sht.TARGET_COLUMN].to_numpy())
+
+
+def test_validation_split_matches_in_memory_split(tmp_path):
+    dataset = _write_dataset_with_gaps(tmp_path / "master_dataset.csv")
+    df = sht.load_dataset(dataset, sht.RELATIVE_FEATURES)
+    _, expected = train_test_split(
+        np.arange(len(df)), test_size=0.2, random_state=42, stratify=df[sht.TARGET_COLUMN]
+    )
+
+    is_validation = st.plan_validation_split(_chunks(dataset, 50), 0.2)
+
+    np.testing.assert_array_equal(np.flatnonzero(is_validation), np.sort(expected))
+
+
+def test_external_memory_predictions_match_raw_features(tmp_path):
+    dataset = _write_dataset(tmp_path / "master_dataset.csv", subjects=2)
+    chunks = _chunks(dataset, 70)
+    is_validation = st.plan_validation_split(chunks, 0.2)
+    df = sht.load_dataset(dataset, sht.RELATIVE_FEATURES)
+    X_val = df[sht.RELATIVE_FEATURES][is_validation]
+
+    fit_matrix = xgb.ExtMemQuantileDMatrix(st.SplitChunkIter(
+        chunks, is_validation, validation=False, feature_columns=sht.RELATIVE_FEATURES,
+        cache_prefix=os.path.join(tmp_path, "fit"),
+    ))
+    val_matrix = xgb.ExtMemQuantileDMatrix(st.SplitChunkIter(
+        chunks, is_validation, validation=True, feature_columns=sht.RELATIVE_FEATURES,
+        cache_prefix=os.path.join(tmp_path, "validation"),
+    ), ref=fit_matrix)
+    model = sht.train_xgb_on_matrices(sht.get_xgb_param_grid()[0], fit_matrix, val_matrix)
+
+    assert val_matrix.num_row() == len(X_val)
+    np.testing.assert_allclose(
+        st._predict_matrix(model, val_matrix), model.predict_proba(X_val)[:, 1], rtol=1e-6
+    )
+
+
+def test_streaming_production_model_matches_in_memory_training(tmp_path):
+    dataset = _write_dataset(tmp_path / "master_dataset.csv", subjects=3, rows_per_subject=200)
+    common = dict(
+        feature_columns=sht.RELATIVE_FEATURES,
+        dataset_path=dataset,
+        model_name="xgb_relative_production",
+        validation_fraction=0.2,
+        search="halving",
+    )
+
+    sht.train_xgb_production_model(output_dir=tmp_path / "in_memory", cache_dir=None, **common)
+    st.train_xgb_production_model_streaming(
+        output_dir=tmp_path / "streaming", chunk_rows=128, cache_dir=tmp_path / "cache", **common
+    )
+
+    in_memory = json.loads((tmp_path / "in_memory" / "xgb_relative_production.validation_metrics.json").read_text())
+    streaming = json.loads((tmp_path / "streaming" / "xgb_relative_production.validation_metrics.json").read_text())
+    metadata = json.loads((tmp_path / "streaming" / "xgb_relative_production.metadata.json").read_text())
+    assert streaming["validation_rows"] == in_memory["validation_rows"]
+    assert abs(streaming["f1"] - in_memory["f1"]) < 0.05
+    assert streaming["training_mode"] == "streaming"
+    assert streaming["peak_rss_mb"] > 0
+    assert metadata["feature_columns"] == sht.RELATIVE_FEATURES
+
+    model = xgb.XGBClassifier()
+    model.load_model(tmp_path / "streaming" / "xgb_relative_production.json")
+    assert model.predict_proba(pd.read_csv(dataset)[sht.RELATIVE_FEATURES]).shape == (600, 2)
+    # Both trainers leave an up-to-date compiled model next to the JSON.
+    for output in ("in_memory", "streaming"):
+        assert load_compiled_model(tmp_path / output / "xgb_relative_production.json") is not None
@@ -0,0 +1,200 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import f1_score, precision_score, recall_score
+
+import subject_holdout_training as sht
+
+
+def _write_dataset(path, subjects=3, rows_per_subject=120, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for subject in range(1, subjects + 1):
+        labels = rng.integers(0, 2, rows_per_subject)
+        data = {
+            column: rng.normal(labels * 0.8 + subject * 0.1, 1.0)
+            for column in sht.RELATIVE_FEATURES
+        }
+        data[sht.TARGET_COLUMN] = labels
+        data[sht.SUBJECT_COLUMN] = subject
+        frames.append(pd.DataFrame(data))
+    pd.concat(frames, ignore_index=True).to_csv(path, index=False)
+    return path
+
+
+def _run(tmp_path, dataset, jobs, cache=True, shared_sketch=False, search="grid"):
+    output_dir = tmp_path / f"jobs_{jobs}_cache_{cache}_sketch_{shared_sketch}_{search}"
+    sht.run_subject_holdout(
+        model_type="xgb",
+        feature_set_name="relative",
+        feature_columns=sht.RELATIVE_FEATURES,
+        dataset_path=dataset,
+        output_dir=output_dir,
+        validation_fraction=0.2,
+        jobs=jobs,
+        cache_dir=tmp_path / "cache" if cache else None,
+        shared_sketch=shared_sketch,
+        search=search,
+    )
+    return output_dir / "xgb_relative"
+
+
+def test_process_pool_matches_sequential_run(tmp_path):
+    dataset = _write_dataset(tmp_path / "master_dataset.csv")
+
+    sequential = _run(tmp_path, dataset, jobs=1, cache=False)
+    parallel = _run(tmp_path, dataset, jobs=2)
+
+    sequential_metrics = pd.read_csv(sequential / "fold_metrics.csv")
+    parallel_metrics = pd.read_csv(parallel / "fold_metrics.csv")
+    assert parallel_metrics["test_subject"].tolist() == [1, 2, 3]
+    pd.testing.assert_frame_equal(sequential_metrics, parallel_metrics)
+
+    summary = json.loads((parallel / "summary.json").read_text())
+    assert summary["fold_count"] == 3
+    assert (parallel / "xgb_relative_subject_2.json").exists()
+
+
+def test_shared_sketch_runs_match_across_pool_sizes(tmp_path):
+    dataset = _write_dataset(tmp_path / "master_dataset.csv", subjects=2)
+
+    sequential = _run(tmp_path, dataset, jobs=1, shared_sketch=True)
+    parallel = _run(tmp_path, dataset, jobs=2, shared_sketch=True)
+
+    pd.testing.assert_frame_equal(
+        pd.read_csv(sequential / "fold_metrics.csv"),
+        pd.read_csv(parallel / "fold_metrics.csv"),
+    )
+    assert (parallel / "xgb_relative_subject_1.json").exists()
+
+
+def test_halving_search_picks_a_full_budget_grid_point(tmp_path):
+    dataset = _write_dataset(tmp_path / "master_dataset.csv", subjects=2)
+
+    grid = pd.read_csv(_run(tmp_path, dataset, jobs=1) / "fold_metrics.csv")
+    sequential = pd.read_csv(_run(tmp_path, dataset, jobs=1, search="halving") / "fold_metrics.csv")
+    parallel = pd.read_csv(_run(tmp_path, dataset, jobs=2, search="halving") / "fold_metrics.csv")
+
+    pd.testing.assert_frame_equal(sequential, parallel)
+    grid_points = [json.dumps(p, sort_keys=True) for p in sht.get_xgb_param_grid()]
+    assert all(params in grid_points for params in sequential["best_params"])
+    assert (sequential["f1"] - grid["f1"]).abs().max() < 0.1
+
+
+def test_cached_dataset_loads_cleaned_float32_features(tmp_path):
+    dataset = _write_dataset(tmp_path / "master_dataset.csv", rows_per_subject=10)
+    raw = pd.read_csv(dataset)
+    raw.loc[3, "yaw"] = np.nan
+    raw.loc[5, sht.TARGET_COLUMN] = np.nan
+    raw.to_csv(dataset, index=False)
+
+    expected = sht.load_dataset(dataset, sht.RELATIVE_FEATURES)
+    cleaned = sht.load_training_data(dataset, sht.RELATIVE_FEATURES, tmp_path / "cache")
+
+    assert cleaned.index.tolist() == expected.index.tolist()
+    assert cleaned["yaw"].dtype == np.float32
+    assert cleaned[sht.TARGET_COLUMN].tolist() == expected[sht.TARGET_COLUMN].tolist()
+    assert cleaned[sht.SUBJECT_COLUMN].tolist() == expected[sht.SUBJECT_COLUMN].tolist()
+    np.testing.assert_array_equal(
+        cleaned[sht.RELATIVE_FEATURES].to_numpy(),
+        expected[sht.RELATIVE_FEATURES].to_numpy(dtype=np.float32),
+    )
+
+
+def test_ties_go_to_the_earliest_grid_point():
+    results = [
+        sht.GridPointResult(params={"i": i}, score=score, threshold=0.5, seconds=0.0)
+        for i, score in enumerate([0.5, 0.8, 0.8, 0.7])
+    ]
+
+    assert sht.select_best_grid_point(results, "rf") is results[1]
+
+
+def test_tuning_refits_the_winner_to_the_model_it_scored(tmp_path):
+    data = pd.read_csv(_write_dataset(tmp_path / "master_dataset.csv", subjects=1, rows_per_subject=200))
+    X, y = data[sht.RELATIVE_FEATURES], data[sht.TARGET_COLUMN]
+    X_fit, y_fit, X_val, y_val = X[:150], y[:150], X[150:], y[150:]
+
+    results = sht.run_search("rf", X_fit, y_fit, X_val, y_val)
+    best = sht.select_best_grid_point(results, "rf")
+    model, threshold, params = sht.tune_rf_model(X_fit, y_fit, X_val, y_val)
+
+    assert all(not hasattr(result, "model") for result in results)
+    assert (threshold, params) == (best.threshold, best.params)
+    predictions = (model.predict_proba(X_val)[:, 1] >= threshold).astype(int)
+    assert f1_score(y_val, predictions, zero_division=0) == best.score
+
+
+def test_resolve_jobs():
+    assert sht.resolve_jobs(3) == 3
+    assert sht.resolve_jobs(0) >= 1
+    with pytest.raises(ValueError):
+        sht.resolve_jobs(-1)
+
+
+def _sklearn_metrics(y_true, predictions):
+    return {
+        "precision": precision_score(y_true, predictions, zero_division=0),
+        "recall": recall_score(y_true, predictions, zero_division=0),
+        "f1": f1_score(y_true, predictions, zero_division=0),
+        "precision_class_0": precision_score(y_true, predictions, pos_label=0, zero_division=0),
+        "recall_class_0": recall_score(y_true, predictions, pos_label=0, zero_division=0),
+        "f1_class_0": f1_score(y_true, predictions, pos_label=0, zero_division=0),
+        "f1_macro": f1_score(y_true, predictions, average="macro", zero_division=0),
+    }
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_threshold_metrics_match_sklearn(dtype):
+    rng = np.random.default_rng(7)
+    y_true = pd.Series(rng.integers(0, 2, 500))
+    # Rounded so many probabilities sit exactly on a candidate threshold.
+    probabilities = np.round(rng.random(500), 2).astype(dtype)
+    thresholds = np.concatenate([[0.0, 1.0, 1.5], np.linspace(0.2, 0.8, 61)])
+
+    metrics = sht.threshold_metrics(y_true, probabilities, thresholds)
+
+    for i, threshold in enumerate(thresholds):
+        expected = _sklearn_metrics(y_true, (probabilities >= threshold).astype(int))
+        for name in sht.THRESHOLD_METRICS:
+            assert metrics[name][i] == expected[name], (name, threshold)
+
+
+def test_threshold_metrics_with_a_single_class():
+    y_true = np.ones(20, dtype=int)
+    probabilities = np.linspace(0.0, 1.0, 20)
+    thresholds = np.array([0.0, 0.5, 2.0])
+
+    metrics = sht.threshold_metrics(y_true, probabilities, thresholds)
+
+    for i, threshold in enumerate(thresholds):
+        expected = _sklearn_metrics(y_true, (probabilities >= threshold).astype(int))
+        for name in sht.THRESHOLD_METRICS:
+            assert metrics[name][i] == expected[name], (name, threshold)
+
+
+@pytest.mark.parametrize("optimize_metric", ["f1", "f1_macro", "f1_class_0"])
+def test_find_best_threshold_matches_per_threshold_search(optimize_metric):
+    rng = np.random.default_rng(3)
+    y_true = pd.Series(rng.integers(0, 2, 300))
+    probabilities = np.clip(y_true * 0.3 + rng.random(300) * 0.7, 0, 1).astype(np.float32)
+
+    best_threshold, best_score = 0.5, -1.0
+    for threshold in np.linspace(0.2, 0.8, 61):
+        score = _sklearn_metrics(y_true, (probabilities >= threshold).astype(int))[optimize_metric]
+        if score > best_score:
+            best_threshold, best_score = float(threshold), score
+
+    assert sht.find_best_threshold(
+        y_true, probabilities, optimize_metric=optimize_metric) == best_threshold
+
+
+def test_find_best_threshold_over_unique_probabilities():
+    y_true = pd.Series([0, 0, 1, 0, 1, 1])
+    probabilities = np.array([0.1, 0.35, 0.4, 0.45, 0.7, 0.9])
+
+    assert sht.find_best_threshold(y_true, probabilities, thresholds="unique") == 0.4
+    with pytest.raises(ValueError):
+        sht.find_best_threshold(y_true, probabilities, thresholds="all")
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from scripts import benchmark_pipeline
+
+STAGES = {"extract_features", "predict", "insert_sample", "recent_attention_states", "session_metrics"}
+
+
+def test_summarize_reports_percentiles_and_throughput():
+    summary = benchmark_pipeline.summarize([0.001] * 98 + [0.010, 0.020])
+
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == pytest.approx(1.0)
+    assert summary["p99_ms"] > summary["p95_ms"] >= summary["p50_ms"]
+    assert summary["max_ms"] == pytest.approx(20.0)
+    assert summary["throughput_per_s"] == pytest.approx(100 / 0.128)
+
+
+def test_compare_to_baseline_flags_only_stages_over_the_threshold():
+    baseline = {"stages": {
+        "predict": {"p95_ms": 1.0},
+        "insert_sample": {"p95_ms": 1.0},
+        "removed_stage": {"p95_ms": 1.0},
+    }}
+    stages = {"predict": {"p95_ms": 1.2}, "insert_sample": {"p95_ms": 1.5}}
+
+    regressions = benchmark_pipeline.compare_to_baseline(stages, baseline, max_regression=0.25)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("insert_sample:")
+
+
+def test_cli_writes_json_and_fails_on_regression(tmp_path, capsys):
+    small = ["--frames", "30", "--inserts", "10", "--queries", "10",
+             "--db-rows", "500", "--session-samples", "100"]
+    results_path = tmp_path / "results.json"
+
+    assert benchmark_pipeline.main(small + ["--json", str(results_path)]) == 0
+
+    report = json.loads(results_path.read_text())
+    assert set(report["stages"]) == STAGES
+    assert report["stages"]["predict"]["count"] == 30
+    assert report["meta"]["params"]["db_rows"] == 500
+
+    # A baseline nobody could beat makes the run fail.
+    for stage in report["stages"].values():
+        stage["p95_ms"] = 1e-9
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(report))
+
+    assert benchmark_pipeline.main(small + ["--baseline", str(baseline_path)]) == 1
+    assert "Regressions against" in capsys.readouterr().out
@@ -0,0 +1,17 @@
+import json
+
+from scripts import benchmark_tracker_host
+
+
+def test_cli_reports_one_run_per_worker_count(tmp_path):
+    results_path = tmp_path / "results.json"
+
+    assert benchmark_tracker_host.main([
+        "--streams", "2", "--frames", "6", "--workers", "1,2", "--spread", "--json", str(results_path),
+    ]) == 0
+
+    report = json.loads(results_path.read_text())
+    assert [run["landmark_workers"] for run in report["runs"]] == [1, 2]
+    assert all(run["frames_processed"] == 12 for run in report["runs"])
+    assert report["runs"][0]["speedup"] == 1.0
+    assert report["meta"]["params"]["spread"] is True
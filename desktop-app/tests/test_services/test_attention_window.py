@@ -0,0 +1,82 @@
+import random
+import threading
+
+import pytest
+
+from services.attention_window import AttentionWindow
+
+
+def test_counts_cover_only_the_window():
+    window = AttentionWindow(window_seconds=10)
+    window.publish(100.0, 1)
+    window.publish(105.0, 0)
+    window.publish(109.0, 0)
+
+    assert window.counts(now=110.0) == (1, 2)
+    assert window.counts(now=115.0) == (0, 2)
+    assert window.distracted_fraction(now=115.0) == 1.0
+    assert window.counts(now=120.0) == (0, 0)
+    assert window.distracted_fraction(now=120.0) is None
+    assert len(window) == 0
+
+
+def test_sample_exactly_at_cutoff_is_counted():
+    # Same boundary as get_recent_attention_states (timestamp >= cutoff).
+    window = AttentionWindow(window_seconds=10)
+    window.publish(100.0, 0)
+
+    assert window.counts(now=110.0) == (0, 1)
+
+
+def test_capacity_overwrites_oldest_samples():
+    window = AttentionWindow(window_seconds=60, capacity=3)
+    for ts, state in [(1.0, 0), (2.0, 0), (3.0, 1), (4.0, 1)]:
+        window.publish(ts, state)
+
+    assert len(window) == 3
+    assert window.counts(now=5.0) == (2, 1)
+
+
+def test_running_counts_match_a_rescan():
+    rng = random.Random(0)
+    window = AttentionWindow(window_seconds=2.0, capacity=64)
+    history = []
+    ts = 0.0
+    for _ in range(2000):
+        ts += rng.uniform(0.0, 0.1)
+        state = rng.choice([0, 1])
+        window.publish(ts, state)
+        history.append((ts, state))
+
+        recent = [s for t, s in history[-64:] if t >= ts - 2.0]
+        assert window.counts(now=ts) == (recent.count(1), recent.count(0))
+
+
+def test_concurrent_publishers_are_all_counted():
+    window = AttentionWindow(window_seconds=1000, capacity=10_000)
+
+    def publish(state):
+        for i in range(1000):
+            window.publish(float(i), state)
+
+    threads = [threading.Thread(target=publish, args=(i % 2,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert window.counts(now=999.0) == (2000, 2000)
+
+
+def test_clear_resets_counts():
+    window = AttentionWindow(window_seconds=10)
+    window.publish(1.0, 0)
+    window.clear()
+
+    assert window.counts(now=2.0) == (0, 0)
+
+
+@pytest.mark.parametrize("kwargs", [{"window_seconds": 0}, {"capacity": 0}])
+def test_rejects_invalid_configuration(kwargs):
+    with pytest.raises(ValueError):
+        AttentionWindow(**kwargs)
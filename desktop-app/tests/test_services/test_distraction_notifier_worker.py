@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from services import distraction_notifier_worker as notifier_module
+from services.attention_window import AttentionWindow
+from services.distraction_notifier_worker import DistractionNotifierWorker
+
+
+@pytest.fixture
+def notifications(monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        notifier_module.NotificationService,
+        "send_notification",
+        staticmethod(lambda title, message: sent.append((title, message))),
+    )
+    return sent
+
+
+@pytest.fixture
+def no_database(monkeypatch):
+    def fail():
+        raise AssertionError("notifier must not touch SQLite when given an AttentionWindow")
+
+    monkeypatch.setattr(notifier_module, "FocusSampleRepository", fail)
+
+
+def _publish(window, states, now=None):
+    now = time.time() if now is None else now
+    for i, state in enumerate(states):
+        window.publish(now - len(states) + i, state)
+
+
+def test_is_distracted_reads_the_shared_window(no_database):
+    window = AttentionWindow(window_seconds=20)
+    notifier = DistractionNotifierWorker(
+        session_id="session-1", stop_event=threading.Event(), attention_window=window)
+
+    assert notifier._is_distracted() is False
+
+    _publish(window, [1, 0, 0])
+    assert notifier._is_distracted() is True
+
+    _publish(window, [1, 1, 1])
+    assert notifier._is_distracted() is False
+
+
+def test_check_interval_can_be_sub_second(no_database):
+    notifier = DistractionNotifierWorker(
+        session_id="session-1",
+        stop_event=threading.Event(),
+        attention_window=AttentionWindow(),
+        check_interval=0.25,
+    )
+
+    assert notifier.check_interval == 0.25
+
+
+def test_run_notifies_once_window_fills_and_respects_cooldown(no_database, notifications):
+    window = AttentionWindow(window_seconds=5)
+    stop_event = threading.Event()
+    notifier = DistractionNotifierWorker(
+        session_id="session-1",
+        stop_event=stop_event,
+        cooldown=60,
+        attention_window=window,
+        check_interval=0.05,
+    )
+    # Bypass the 5 s floor to keep the test fast.
+    notifier.evaluation_window = 0.2
+    _publish(window, [0, 0, 0, 1])
+
+    thread = threading.Thread(target=notifier.run)
+    thread.start()
+    deadline = time.monotonic() + 3
+    while not notifications and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stop_event.set()
+    thread.join(timeout=2)
+
+    assert not thread.is_alive()
+    assert notifications == [("Screen Gaze", "User is Distracted")]
+
+
+def test_run_without_window_falls_back_to_sqlite(monkeypatch, notifications):
+    calls = []
+
+    class FakeRepository:
+        def get_recent_attention_states(self, session_id, seconds_ago=30):
+            calls.append((session_id, seconds_ago))
+            return [0, 0, 1]
+
+    monkeypatch.setattr(notifier_module, "FocusSampleRepository", FakeRepository)
+    notifier = DistractionNotifierWorker(session_id="session-1", stop_event=threading.Event())
+
+    assert notifier.check_interval == notifier.evaluation_window
+    assert notifier._is_distracted() is True
+    assert calls == [("session-1", 20)]
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from services.face_tracks import FaceTrackAssigner, box_iou
+
+
+def test_box_iou_of_overlapping_disjoint_and_empty_boxes():
+    iou = box_iou(
+        [[0.0, 0.0, 0.2, 0.2]],
+        [[0.1, 0.0, 0.2, 0.2], [0.5, 0.5, 0.1, 0.1], [0.0, 0.0, 0.0, 0.0]],
+    )
+
+    assert iou.shape == (1, 3)
+    assert iou[0, 0] == pytest.approx(1 / 3)
+    assert iou[0, 1] == 0.0
+    assert iou[0, 2] == 0.0
+
+
+def test_ids_follow_faces_as_they_move_and_swap_detection_order():
+    tracks = FaceTrackAssigner()
+    left = np.array([0.10, 0.20, 0.20, 0.30])
+    right = np.array([0.60, 0.20, 0.20, 0.30])
+
+    assert tracks.assign(np.stack([left, right])) == [1, 2]
+    for step in range(1, 6):
+        shift = np.array([0.01 * step, 0.0, 0.0, 0.0])
+        # FaceMesh does not promise a detection order between frames.
+        assert tracks.assign(np.stack([right + shift, left + shift])) == [2, 1]
+
+    assert tracks.active_tracks == [1, 2]
+
+
+def test_tracks_survive_short_gaps_and_retire_after_max_missed_frames():
+    tracks = FaceTrackAssigner(max_missed_frames=2)
+    face = np.array([[0.3, 0.3, 0.2, 0.2]])
+
+    assert tracks.assign(face) == [1]
+    tracks.assign(None)
+    tracks.assign(np.empty((0, 4)))
+    assert tracks.assign(face) == [1]
+
+    for _ in range(3):
+        tracks.assign(None)
+    assert tracks.active_tracks == []
+    # Retired ids are not handed out again.
+    assert tracks.assign(face) == [2]
+
+
+def test_a_new_face_next_to_a_tracked_one_gets_its_own_id():
+    tracks = FaceTrackAssigner()
+    tracks.assign(np.array([[0.1, 0.1, 0.2, 0.2]]))
+
+    ids = tracks.assign(np.array([[0.1, 0.1, 0.2, 0.2], [0.4, 0.1, 0.2, 0.2]]))
+
+    assert ids == [1, 2]
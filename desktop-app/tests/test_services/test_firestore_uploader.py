@@ -0,0 +1,284 @@
+import json
+import time
+
+import pytest
+from google.api_core import exceptions as gcp_exceptions
+
+from services.firestore_uploader import FirestoreSampleUploader, sample_to_firestore_doc
+
+
+class FakeDocument:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+
+    def collection(self, name):
+        return FakeCollection(self._client, f"{self.path}/{name}")
+
+
+class FakeCollection:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+
+    def document(self, doc_id):
+        return FakeDocument(self._client, f"{self.path}/{doc_id}")
+
+
+class FakeBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def set(self, ref, doc, merge=False):
+        self._writes.append((ref.path, doc))
+
+    def commit(self):
+        if self._client.failures:
+            raise self._client.failures.pop(0)
+        self._client.commits.append(len(self._writes))
+        for path, doc in self._writes:
+            self._client.docs[path] = doc
+
+
+class FakeFirestore:
+    """Just enough of firestore.Client for batched sample writes."""
+
+    def __init__(self, failures=()):
+        self.docs = {}
+        self.commits = []
+        self.failures = list(failures)
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+class FakeSampleRepository:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def iter_samples_after(self, session_id, after=None, chunk_size=500):
+        rows = sorted(self.rows, key=lambda row: (row[1]["timestamp"], row[0]))
+        for sample_id, sample in rows:
+            if sample["session_id"] != session_id:
+                continue
+            if after is None or (sample["timestamp"], sample_id) > tuple(after):
+                yield sample_id, sample
+
+
+def _sample(session_id, timestamp):
+    return {
+        "session_id": session_id,
+        "timestamp": timestamp,
+        "left_x": 0.1,
+        "left_y": 0.2,
+        "right_x": 0.3,
+        "right_y": 0.4,
+        "face_x": 1.0,
+        "face_y": 2.0,
+        "face_z": 3.0,
+        "attention_state": 1,
+        "focus_score": 0.75,
+        "label": 1,
+    }
+
+
+def _rows(session_id, count, start=1000.0):
+    return [(f"{session_id}-{i}", _sample(session_id, start + i)) for i in range(count)]
+
+
+def _doc_path(session_id, sample_id):
+    return f"sessions/{session_id}/focusSamples/{sample_id}"
+
+
+def _make_uploader(client, tmp_path, **kwargs):
+    kwargs.setdefault("flush_interval_ms", 60_000)
+    kwargs.setdefault("base_delay", 0.001)
+    return FirestoreSampleUploader(
+        client,
+        user_id="user-1",
+        session_id=kwargs.pop("session_id", "session-1"),
+        cursor_path=str(tmp_path / "upload_state.json"),
+        **kwargs,
+    )
+
+
+def _state(tmp_path):
+    with open(tmp_path / "upload_state.json") as f:
+        return json.load(f)
+
+
+def test_uploads_in_batches_of_at_most_500(tmp_path):
+    client = FakeFirestore()
+    uploader = _make_uploader(client, tmp_path)
+    rows = _rows("session-1", 1200)
+
+    uploader.start()
+    for sample_id, sample in rows:
+        uploader.submit(sample_id, sample)
+    uploader.stop()
+
+    assert sum(client.commits) == 1200
+    assert max(client.commits) <= 500
+    assert len(client.docs) == 1200
+    sample_id, sample = rows[7]
+    assert client.docs[_doc_path("session-1", sample_id)] == sample_to_firestore_doc(sample, "user-1")
+    # A clean stop forgets the session's cursor.
+    assert _state(tmp_path) == {}
+
+
+def test_commits_after_flush_interval(tmp_path):
+    client = FakeFirestore()
+    uploader = _make_uploader(client, tmp_path, flush_interval_ms=20)
+
+    uploader.start()
+    try:
+        uploader.submit("s-1", _sample("session-1", 1.0))
+        # The cursor is saved just after the commit returns.
+        for _ in range(200):
+            if client.commits and _state(tmp_path)["session-1"]["cursor"] is not None:
+                break
+            time.sleep(0.01)
+        assert client.commits == [1]
+        assert _state(tmp_path)["session-1"]["cursor"] == [1.0, ""]
+    finally:
+        uploader.stop()
+
+
+def test_retries_resource_exhausted_with_backoff(tmp_path):
+    client = FakeFirestore(failures=[
+        gcp_exceptions.ResourceExhausted("quota"),
+        gcp_exceptions.ResourceExhausted("quota"),
+    ])
+    errors = []
+    uploader = _make_uploader(client, tmp_path, on_error=errors.append)
+
+    uploader.start()
+    for sample_id, sample in _rows("session-1", 10):
+        uploader.submit(sample_id, sample)
+    uploader.flush()
+    uploader.stop()
+
+    assert client.commits == [10]
+    assert errors == []
+
+
+def test_memory_is_bounded_and_dropped_samples_are_backfilled_from_sqlite(tmp_path):
+    client = FakeFirestore()
+    rows = _rows("session-1", 25)
+    uploader = _make_uploader(
+        client, tmp_path, max_pending=10, sample_repo=FakeSampleRepository(rows))
+
+    for sample_id, sample in rows:
+        uploader.submit(sample_id, sample)
+
+    assert uploader.pending_count() == 10
+    assert uploader.dropped == 15
+
+    uploader.start()
+    uploader.stop()
+
+    assert set(client.docs) == {_doc_path("session-1", sample_id) for sample_id, _ in rows}
+    assert _state(tmp_path) == {}
+
+
+def test_failed_upload_keeps_cursor_for_recovery(tmp_path):
+    rows = _rows("session-1", 8)
+    failing = FakeFirestore(failures=[gcp_exceptions.ResourceExhausted("quota")] * 50)
+    errors = []
+    uploader = _make_uploader(
+        failing, tmp_path, max_retries=1, sample_repo=FakeSampleRepository(rows),
+        on_error=errors.append)
+
+    uploader.start()
+    for sample_id, sample in rows[:3]:
+        uploader.submit(sample_id, sample)
+    uploader.stop()
+
+    assert failing.docs == {}
+    assert errors
+    assert _state(tmp_path) == {
+        "session-1": {"user_id": "user-1", "cursor": None, "complete": False}
+    }
+
+    # Next launch: a new session's uploader recovers the unfinished one.
+    client = FakeFirestore()
+    next_uploader = _make_uploader(
+        client, tmp_path, session_id="session-2", sample_repo=FakeSampleRepository(rows))
+
+    assert next_uploader.recover_unfinished() == 8
+    assert len(client.docs) == 8
+    assert _state(tmp_path) == {}
+
+
+def test_recovery_resumes_after_persisted_cursor(tmp_path):
+    rows = _rows("session-old", 10)
+    with open(tmp_path / "upload_state.json", "w") as f:
+        json.dump({"session-old": {"user_id": "user-0", "cursor": [rows[5][1]["timestamp"], rows[5][0]],
+                                   "complete": False}}, f)
+    client = FakeFirestore()
+    uploader = _make_uploader(client, tmp_path, sample_repo=FakeSampleRepository(rows))
+
+    assert uploader.recover_unfinished() == 4
+    assert set(client.docs) == {_doc_path("session-old", sample_id) for sample_id, _ in rows[6:]}
+    assert all(doc["userId"] == "user-0" for doc in client.docs.values())
+    assert _state(tmp_path) == {}
+
+
+def test_backfill_covers_samples_that_share_the_cursor_timestamp(tmp_path):
+    # Two faces of one frame: same timestamp, submitted out of id order.
+    rows = [("face-b", _sample("session-1", 5.0)), ("face-a", _sample("session-1", 5.0))]
+    client = FakeFirestore()
+    uploader = _make_uploader(
+        client, tmp_path, max_batch_size=1, max_retries=0, sample_repo=FakeSampleRepository(rows),
+        on_error=lambda message: None)
+
+    uploader.submit(*rows[0])
+    uploader.flush()
+    client.failures.append(gcp_exceptions.ResourceExhausted("quota"))
+    uploader.submit(*rows[1])
+    uploader.flush()
+
+    assert set(client.docs) == {_doc_path("session-1", "face-b")}
+    assert uploader.backfill() == 2
+    assert set(client.docs) == {_doc_path("session-1", sample_id) for sample_id, _ in rows}
+
+
+def test_crash_between_batches_of_one_frame_loses_no_face(tmp_path):
+    rows = [
+        ("face-b", _sample("session-1", 5.0)),
+        ("face-a", _sample("session-1", 5.0)),
+        ("later", _sample("session-1", 6.0)),
+    ]
+    client = FakeFirestore()
+    uploader = _make_uploader(client, tmp_path, max_batch_size=1)
+    uploader.submit(*rows[0])
+    uploader.flush()
+    # The process dies here: face-a was never committed and stop() never runs.
+    del uploader
+
+    client = FakeFirestore()
+    next_uploader = _make_uploader(
+        client, tmp_path, session_id="session-2", sample_repo=FakeSampleRepository(rows))
+
+    assert next_uploader.recover_unfinished() == 3
+    assert set(client.docs) == {_doc_path("session-1", sample_id) for sample_id, _ in rows}
+
+
+def test_legacy_timestamp_cursor_re_reads_its_own_timestamp(tmp_path):
+    rows = _rows("session-old", 4)
+    with open(tmp_path / "upload_state.json", "w") as f:
+        json.dump({"session-old": {"user_id": "user-0", "cursor": rows[1][1]["timestamp"],
+                                   "complete": False}}, f)
+    client = FakeFirestore()
+    uploader = _make_uploader(client, tmp_path, sample_repo=FakeSampleRepository(rows))
+
+    assert uploader.recover_unfinished() == 3
+
+
+def test_rejects_batches_larger_than_firestore_allows(tmp_path):
+    with pytest.raises(ValueError):
+        _make_uploader(FakeFirestore(), tmp_path, max_batch_size=501)
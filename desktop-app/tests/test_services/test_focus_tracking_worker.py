@@ -0,0 +1,444 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from ml_runner_scripts.FocusPredictor import FEATURE_COLS, compute_feature_matrix, compute_feature_vector
+from services import focus_tracking_worker as worker_module
+from services.attention_window import AttentionWindow
+from services.focus_tracking_worker import FocusTrackingWorker
+from services.frame_sources import FrameSource, SyntheticFrameSource
+
+
+class FakeCamera(FrameSource):
+    def __init__(self):
+        super().__init__()
+        self.released = False
+
+    def read(self):
+        time.sleep(0.005)
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+class GrabCountingCamera(FakeCamera):
+    """Counts grabs against the frames actually decoded."""
+
+    def __init__(self):
+        super().__init__()
+        self.grabs = self.retrieves = 0
+
+    def grab(self):
+        time.sleep(0.005)
+        self.grabs += 1
+        return True
+
+    def retrieve(self):
+        self.retrieves += 1
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+class FakePredictor:
+    def __init__(self, model_path, max_num_faces=1, with_face_mesh=True):
+        points = np.random.default_rng(0).uniform(0.2, 0.8, size=(478, 3))
+        self.face_mesh = SimpleNamespace(
+            process=lambda rgb: SimpleNamespace(multi_face_landmarks=[points]),
+            close=lambda: None,
+        )
+
+    def extract_features(self, landmarks, img_w, img_h):
+        return {col: 0.1 for col in FEATURE_COLS}
+
+    def predict(self, features):
+        return 1, 0.9
+
+
+def _face_points(x0, size):
+    """Landmarks of a square face with its top-left corner at (x0, 0.2)."""
+    points = np.random.default_rng(0).uniform(0.0, 1.0, size=(478, 3))
+    points[:, 0] = x0 + points[:, 0] * size
+    points[:, 1] = 0.2 + points[:, 1] * size
+    return points
+
+
+class MultiFacePredictor(FakePredictor):
+    """Two faces per frame, the larger one on the right; FaceMesh reports it second."""
+
+    def __init__(self, model_path, max_num_faces=1, with_face_mesh=True):
+        self.max_num_faces = max_num_faces
+        faces = [_face_points(0.05, 0.2), _face_points(0.5, 0.3)]
+        self.batch_sizes = []
+        self.face_mesh = SimpleNamespace(
+            process=lambda rgb: SimpleNamespace(multi_face_landmarks=faces[:max_num_faces]),
+            close=lambda: None,
+        )
+
+    def extract_feature_matrix(self, faces):
+        return compute_feature_matrix(faces)
+
+    def predict_batch(self, feature_matrix):
+        self.batch_sizes.append(len(feature_matrix))
+        # Focused exactly when the face is on the right half.
+        states = (feature_matrix[:, 0] > 0.4).astype(int)
+        return states, np.where(states == 1, 0.9, 0.2)
+
+
+class FrameMeanFaceMesh:
+    """Stands in for FaceMesh in landmark workers: the face moves with the frame's brightness."""
+
+    def __init__(self, max_num_faces):
+        pass
+
+    def process(self, rgb):
+        return SimpleNamespace(multi_face_landmarks=[_face_points(float(rgb.mean()) / 255.0, 0.2)])
+
+    def close(self):
+        pass
+
+
+class CrashingFaceMesh(FrameMeanFaceMesh):
+    """Kills its landmark worker process on the third frame."""
+
+    def __init__(self, max_num_faces):
+        self.calls = 0
+
+    def process(self, rgb):
+        self.calls += 1
+        if self.calls == 3:
+            os._exit(1)
+        return super().process(rgb)
+
+
+class PooledPredictor(FakePredictor):
+    def __init__(self, model_path, max_num_faces=1, with_face_mesh=True):
+        self.with_face_mesh = with_face_mesh
+        self.face_mesh = None
+
+    def extract_features(self, landmarks, img_w, img_h):
+        return dict(zip(FEATURE_COLS, compute_feature_vector(landmarks).tolist()))
+
+
+class SlowSampleWriter:
+    """Stands in for FocusSampleWriter; every submit blocks for *delay* seconds."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.samples = []
+        self.stopped = False
+        self.rows_written = self.batches_written = self.rows_failed = 0
+
+    def start(self):
+        pass
+
+    def submit(self, **sample):
+        time.sleep(self.delay)
+        self.samples.append(sample)
+        return f"sample-{len(self.samples)}"
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeMetricsRepository:
+    def __init__(self, db=None):
+        self.saved = []
+
+    def save(self, session_id, metrics):
+        self.saved.append((session_id, metrics.to_dict()))
+
+
+@pytest.fixture
+def make_worker(monkeypatch, tmp_path):
+    monkeypatch.setenv("FIREBASE_KEY_PATH", str(tmp_path / "missing-key.json"))
+    monkeypatch.setattr(worker_module, "FocusPredictor", FakePredictor)
+
+    def _make(writer, camera):
+        monkeypatch.setattr(
+            worker_module,
+            "FocusSampleRepository",
+            lambda: SimpleNamespace(db=SimpleNamespace(db_path=":memory:")),
+        )
+        monkeypatch.setattr(worker_module, "FocusSampleWriter", lambda db, **kwargs: writer)
+        monkeypatch.setattr(worker_module, "SessionMetricsRepository", FakeMetricsRepository)
+        errors = []
+        scored = []
+        worker = FocusTrackingWorker(
+            user_id="user-1",
+            session_id="session-1",
+            stop_event=threading.Event(),
+            model_path=__file__,
+            error_callback=errors.append,
+            sample_callback=lambda state, score, ts: scored.append(ts),
+            frame_source=camera,
+        )
+        return worker, errors, scored
+
+    return _make
+
+
+def test_slow_persistence_does_not_stall_inference(make_worker):
+    writer = SlowSampleWriter(delay=0.1)
+    camera = FakeCamera()
+    worker, errors, scored = make_worker(writer, camera)
+
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    time.sleep(0.6)
+    scored_while_running = len(scored)
+    persisted_while_running = len(writer.samples)
+    worker.stop_event.set()
+    thread.join(timeout=15)
+
+    assert not thread.is_alive()
+    assert errors == []
+    # Inference keeps its own pace while SQLite writes lag behind ...
+    assert scored_while_running >= 8
+    assert persisted_while_running < scored_while_running
+    # ... and queued samples are drained once the session stops.
+    assert len(writer.samples) == len(scored)
+    assert camera.released
+    assert writer.stopped
+
+    stats = worker.get_pipeline_stats()
+    assert stats["stages"]["inference"]["count"] >= scored_while_running
+    assert stats["stages"]["sqlite"]["count"] == len(scored)
+    assert stats["queues"]["samples"]["depth"] == 0
+    assert stats["queues"]["frames"]["capacity"] == FocusTrackingWorker.FRAME_QUEUE_SIZE
+
+
+def test_live_camera_is_drained_but_decoded_only_once_per_frame_slot(make_worker, monkeypatch):
+    monkeypatch.setenv("FOCUS_TARGET_FPS", "10")
+    camera = GrabCountingCamera()
+    worker, errors, scored = make_worker(SlowSampleWriter(delay=0), camera)
+
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    time.sleep(1.0)
+    worker.stop_event.set()
+    thread.join(timeout=15)
+
+    assert not thread.is_alive()
+    assert errors == []
+    assert len(scored) >= 5
+    # Every camera frame is grabbed, but only the one each slot scores is decoded.
+    assert camera.retrieves <= len(scored) + 2
+    assert camera.grabs >= 5 * camera.retrieves
+
+
+def test_persisted_samples_carry_features_and_prediction(make_worker):
+    writer = SlowSampleWriter(delay=0)
+    worker, errors, scored = make_worker(writer, FakeCamera())
+    worker.attention_window = AttentionWindow(window_seconds=60)
+
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    time.sleep(0.2)
+    assert not worker.metrics_saved.is_set()
+    worker.stop_event.set()
+    assert worker.metrics_saved.wait(timeout=5)
+    thread.join(timeout=5)
+
+    assert errors == []
+    sample = writer.samples[0]
+    assert sample["session_id"] == "session-1"
+    assert sample["attention_state"] == 1
+    assert sample["label"] == 1
+    assert sample["focus_score"] == 0.9
+    assert all(sample[col] == 0.1 for col in FEATURE_COLS)
+    # Every scored frame is published to the shared window as well ...
+    assert worker.attention_window.counts() == (len(scored), 0)
+    # ... and folded into the session's running metrics, saved on exit.
+    session_id, saved = worker._metrics_repo.saved[-1]
+    assert session_id == "session-1"
+    assert saved["sample_count"] == len(scored)
+    assert saved["last_state"] == 1
+
+
+def test_detect_face_retries_full_frame_when_the_roi_misses():
+    from services.roi_tracker import FaceRoiTracker
+
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    points = np.full((478, 3), 0.5)
+    points[0, :2], points[1, :2] = (0.45, 0.4), (0.55, 0.6)
+    seen = []
+
+    def process(rgb):
+        seen.append(rgb.shape[:2])
+        found = len(seen) != 2  # miss only the first cropped frame
+        return SimpleNamespace(multi_face_landmarks=[points] if found else None)
+
+    predictor = SimpleNamespace(face_mesh=SimpleNamespace(process=process))
+    tracker = FaceRoiTracker(roi_size=256, full_frame_max_side=640)
+
+    assert FocusTrackingWorker._detect_face(predictor, frame, tracker) is not None
+    assert tracker.tracking
+    assert FocusTrackingWorker._detect_face(predictor, frame, tracker) is not None
+
+    assert seen == [(360, 640), (256, 256), (360, 640)]
+
+
+def test_recorded_source_is_replayed_unpaced_until_it_ends(make_worker, monkeypatch):
+    monkeypatch.setenv("FOCUS_TARGET_FPS", "2")
+    writer = SlowSampleWriter(delay=0)
+    source = SyntheticFrameSource(64, 48, count=25)
+    worker, errors, scored = make_worker(writer, source)
+
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    thread.join(timeout=10)
+
+    # Returns on its own, well under the 12 s that 2 fps pacing would take.
+    assert not thread.is_alive()
+    assert errors == []
+    assert len(scored) == 25
+    assert len(writer.samples) == 25
+    assert worker.get_pipeline_stats()["queues"]["frames"]["dropped"] == 0
+
+
+def test_frame_source_that_fails_to_open_reports_its_error(make_worker):
+    class MissingSource(FrameSource):
+        def open(self):
+            self.error = "no such device"
+            return False
+
+    worker, errors, scored = make_worker(SlowSampleWriter(delay=0), MissingSource())
+
+    worker.run()
+
+    assert errors == ["no such device"]
+    assert scored == []
+
+
+def test_preview_work_is_skipped_when_no_frame_is_wanted(make_worker):
+    writer = SlowSampleWriter(delay=0)
+    worker, errors, scored = make_worker(writer, SyntheticFrameSource(64, 48, count=10))
+    delivered = []
+    asked = []
+    worker.frame_callback = delivered.append
+    worker.frame_wanted = lambda: asked.append(True) or len(asked) % 2 == 0
+
+    worker.run()
+
+    assert errors == []
+    assert len(asked) == 10
+    assert len(delivered) == 5
+    assert worker.get_pipeline_stats()["stages"]["preview"]["count"] == 5
+
+
+def test_multi_face_mode_scores_every_face_in_one_batch_with_stable_tracks(
+        make_worker, monkeypatch):
+    monkeypatch.setenv("FOCUS_MAX_FACES", "4")
+    predictors = []
+
+    def make_predictor(model_path, max_num_faces=1, with_face_mesh=True):
+        predictors.append(MultiFacePredictor(model_path, max_num_faces=max_num_faces))
+        return predictors[-1]
+
+    monkeypatch.setattr(worker_module, "FocusPredictor", make_predictor)
+    writer = SlowSampleWriter(delay=0)
+    worker, errors, scored = make_worker(writer, SyntheticFrameSource(64, 48, count=10))
+    worker.attention_window = AttentionWindow(window_seconds=60)
+
+    worker.run()
+
+    assert errors == []
+    assert predictors[0].max_num_faces == 4
+    assert predictors[0].batch_sizes == [2] * 10
+    assert len(writer.samples) == 20
+    by_track = {}
+    for sample in writer.samples:
+        by_track.setdefault(sample["track_id"], []).append(sample)
+    assert sorted(by_track) == [1, 2]
+    # FaceMesh listed the left face first, so it got track 1 on every frame.
+    assert {sample["attention_state"] for sample in by_track[1]} == {0}
+    assert {sample["attention_state"] for sample in by_track[2]} == {1}
+    assert all(sample["face_x"] >= 0.5 for sample in by_track[2])
+    # Only the larger face is stored as the primary one.
+    assert {sample["primary_face"] for sample in by_track[1]} == {False}
+    assert {sample["primary_face"] for sample in by_track[2]} == {True}
+    # The larger face drives the UI, the attention window and the session totals.
+    assert len(scored) == 10
+    assert worker.attention_window.counts() == (10, 0)
+    session_id, saved = worker._metrics_repo.saved[-1]
+    assert saved["sample_count"] == 10
+    assert saved["last_state"] == 1
+
+
+def test_landmark_workers_score_a_recording_in_frame_order(make_worker, monkeypatch):
+    monkeypatch.setenv("FOCUS_LANDMARK_WORKERS", "2")
+    monkeypatch.setattr(worker_module, "create_face_mesh", FrameMeanFaceMesh)
+    predictors = []
+
+    def make_predictor(model_path, max_num_faces=1, with_face_mesh=True):
+        predictors.append(PooledPredictor(model_path, max_num_faces, with_face_mesh))
+        return predictors[-1]
+
+    monkeypatch.setattr(worker_module, "FocusPredictor", make_predictor)
+    writer = SlowSampleWriter(delay=0)
+    worker, errors, scored = make_worker(writer, SyntheticFrameSource(64, 48, count=24))
+
+    worker.run()
+
+    assert errors == []
+    assert predictors[0].with_face_mesh is False
+    reference = SyntheticFrameSource(64, 48, count=24)
+    reference.open()
+    mesh = FrameMeanFaceMesh(1)
+    expected = [
+        mesh.process(cv2.cvtColor(reference.read()[1], cv2.COLOR_BGR2RGB)).multi_face_landmarks[0][:, 0].min()
+        for _ in range(24)
+    ]
+    assert len(scored) == 24
+    assert [sample["face_x"] for sample in writer.samples] == pytest.approx(expected, abs=1e-6)
+    assert worker.get_pipeline_stats()["stages"]["facemesh"]["count"] == 24
+
+
+def test_dead_landmark_worker_stops_the_session_with_an_error(make_worker, monkeypatch):
+    monkeypatch.setenv("FOCUS_LANDMARK_WORKERS", "1")
+    monkeypatch.setattr(worker_module, "create_face_mesh", CrashingFaceMesh)
+    monkeypatch.setattr(worker_module, "FocusPredictor", PooledPredictor)
+    writer = SlowSampleWriter(delay=0)
+    worker, errors, scored = make_worker(writer, SyntheticFrameSource(64, 48, count=50))
+
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    thread.join(timeout=30.0)
+
+    assert not thread.is_alive()
+    assert len(scored) <= 2
+    assert len(errors) == 1
+    assert errors[0].startswith("Landmark detection stopped: Landmark worker")
+
+
+def test_live_camera_uses_one_landmark_worker_with_a_short_queue(make_worker, monkeypatch):
+    monkeypatch.setenv("FOCUS_LANDMARK_WORKERS", "3")
+    monkeypatch.setattr(worker_module, "create_face_mesh", FrameMeanFaceMesh)
+    monkeypatch.setattr(worker_module, "FocusPredictor", PooledPredictor)
+    pools = []
+    real_pool = worker_module.LandmarkPool
+
+    def make_pool(*args, **kwargs):
+        pools.append(real_pool(*args, **kwargs))
+        return pools[-1]
+
+    monkeypatch.setattr(worker_module, "LandmarkPool", make_pool)
+    worker, errors, scored = make_worker(SlowSampleWriter(delay=0), FakeCamera())
+
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    deadline = time.monotonic() + 20.0
+    while not scored and time.monotonic() < deadline:
+        time.sleep(0.05)
+    worker.stop_event.set()
+    thread.join(timeout=15)
+
+    assert errors == []
+    assert scored
+    assert pools[0].workers == 1
+    assert pools[0].max_in_flight == FocusTrackingWorker.LANDMARK_FRAMES_PER_WORKER
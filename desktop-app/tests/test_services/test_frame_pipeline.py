@@ -0,0 +1,83 @@
+from queue import Empty
+import threading
+
+import pytest
+
+from services.frame_pipeline import DropOldestQueue, PipelineStats
+
+
+def test_drop_oldest_queue_discards_oldest_item_when_full():
+    q = DropOldestQueue(maxsize=2)
+
+    assert q.put(1) is False
+    assert q.put(2) is False
+    assert q.put(3) is True
+
+    assert q.get(timeout=0) == 2
+    assert q.get(timeout=0) == 3
+    assert q.snapshot() == {"depth": 0, "max_depth": 2, "capacity": 2, "dropped": 1}
+
+
+def test_drop_oldest_queue_get_times_out_when_empty():
+    q = DropOldestQueue(maxsize=1)
+
+    with pytest.raises(Empty):
+        q.get(timeout=0.01)
+
+
+def test_put_wait_blocks_until_a_consumer_makes_room():
+    q = DropOldestQueue(maxsize=1)
+    q.put("first")
+
+    assert q.put_wait("skipped", timeout=0.01) is False
+
+    threading.Timer(0.05, q.get).start()
+    assert q.put_wait("second", timeout=2) is True
+    assert q.get(timeout=0) == "second"
+    assert q.dropped == 0
+
+
+def test_drop_oldest_queue_wakes_blocked_consumer():
+    q = DropOldestQueue(maxsize=1)
+    received = []
+
+    consumer = threading.Thread(target=lambda: received.append(q.get(timeout=2)))
+    consumer.start()
+    q.put("frame")
+    consumer.join(timeout=2)
+
+    assert received == ["frame"]
+
+
+def test_get_latest_skips_stale_frames():
+    q = DropOldestQueue(maxsize=3)
+    for frame in ("a", "b", "c"):
+        q.put(frame)
+
+    assert q.get_latest(timeout=0) == "c"
+    assert q.snapshot()["dropped"] == 2
+    assert q.qsize() == 0
+
+
+def test_drop_oldest_queue_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        DropOldestQueue(maxsize=0)
+
+
+def test_pipeline_stats_snapshot_reports_stage_latency_and_queue_depth():
+    stats = PipelineStats()
+    frames = stats.queue("frames", 4)
+    frames.put("a")
+    inference = stats.stage("inference")
+    inference.record(0.010)
+    inference.record(0.030)
+
+    snapshot = stats.snapshot()
+
+    assert snapshot["stages"]["inference"]["count"] == 2
+    assert snapshot["stages"]["inference"]["mean_ms"] == pytest.approx(20.0)
+    assert snapshot["stages"]["inference"]["max_ms"] == pytest.approx(30.0)
+    assert snapshot["stages"]["inference"]["last_ms"] == pytest.approx(30.0)
+    assert snapshot["queues"]["frames"]["depth"] == 1
+    assert stats.stage("inference") is inference
+    assert "inference: n=2" in stats.format_summary()
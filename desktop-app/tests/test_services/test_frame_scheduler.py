@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+
+from services.frame_scheduler import AdaptiveFrameScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _scheduler(clock, **kwargs):
+    kwargs.setdefault("active_fps", 10.0)
+    kwargs.setdefault("idle_fps", 2.0)
+    kwargs.setdefault("stable_seconds", 1.0)
+    return AdaptiveFrameScheduler(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_wait_subtracts_processing_time_from_the_slot():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+
+    scheduler.wait()
+    clock.now += 0.03  # processing
+    scheduler.wait()
+
+    assert clock.sleeps == [pytest.approx(0.07)]
+    assert clock.now == pytest.approx(0.1)
+
+
+def test_overrun_starts_next_slot_immediately_without_bursting():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+
+    scheduler.wait()
+    clock.now += 0.35  # three slots late
+    scheduler.wait()
+    assert clock.sleeps == []
+
+    scheduler.wait()
+    assert clock.sleeps == [pytest.approx(0.1)]
+
+
+def test_stable_prediction_drops_to_idle_rate_and_changes_ramp_up():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+
+    for _ in range(12):
+        scheduler.wait()
+        scheduler.observe(1)
+    assert scheduler.idle
+    assert scheduler.interval == pytest.approx(0.5)
+
+    scheduler.wait()
+    scheduler.observe(0)  # state transition
+    assert not scheduler.idle
+    assert scheduler.interval == pytest.approx(0.1)
+
+
+def test_face_loss_ramps_up_and_resets_stability():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+    for _ in range(12):
+        scheduler.wait()
+        scheduler.observe(1)
+    assert scheduler.idle
+
+    scheduler.observe(None)
+    assert not scheduler.idle
+
+    scheduler.wait()
+    scheduler.observe(1)
+    assert not scheduler.idle
+
+
+def test_idle_rate_cuts_frames_over_a_long_stable_stretch():
+    clock = FakeClock()
+    scheduler = _scheduler(clock, active_fps=30.0, idle_fps=5.0, stable_seconds=3.0)
+    frames = 0
+    while clock.now < 60.0:
+        scheduler.wait()
+        scheduler.observe(1)
+        frames += 1
+
+    # 3 s at 30 fps, then 57 s at 5 fps.
+    assert frames == pytest.approx(3 * 30 + 57 * 5, abs=3)
+
+
+def test_due_slot_moves_to_the_next_slot_once_its_deadline_passes():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+
+    assert scheduler.due_slot() == 1
+    scheduler.wait()
+    assert scheduler.due_slot() == 1
+    clock.now += 0.05
+    assert scheduler.due_slot() == 1
+    clock.now += 0.05
+    assert scheduler.due_slot() == 2
+    scheduler.wait()
+    assert scheduler.slots == 2
+    assert scheduler.due_slot() == 2
+
+
+def test_wait_returns_early_when_stopped():
+    scheduler = AdaptiveFrameScheduler(active_fps=0.5, idle_fps=0.5)
+    stop_event = threading.Event()
+    scheduler.wait(stop_event)
+    threading.Timer(0.05, stop_event.set).start()
+
+    assert scheduler.wait(stop_event) is True
+
+
+def test_rejects_non_positive_rates():
+    with pytest.raises(ValueError):
+        AdaptiveFrameScheduler(active_fps=0)
+
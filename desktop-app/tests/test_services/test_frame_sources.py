@@ -0,0 +1,168 @@
+import cv2
+import numpy as np
+import pytest
+
+from services import frame_sources
+from services.frame_sources import (
+    CameraFrameSource,
+    ImageDirectoryFrameSource,
+    SyntheticFrameSource,
+    VideoFileFrameSource,
+    frame_source_from_spec,
+)
+
+
+def _read_all(source, limit=100):
+    frames = []
+    for _ in range(limit):
+        ok, frame = source.read()
+        if not ok:
+            break
+        frames.append(frame)
+    return frames
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    path = str(tmp_path / "session.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 15, (64, 48))
+    if not writer.isOpened():
+        pytest.skip("MJPG encoder not available")
+    for i in range(5):
+        writer.write(np.full((48, 64, 3), i * 50, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def test_synthetic_source_yields_count_frames_then_ends():
+    source = SyntheticFrameSource(64, 48, count=10)
+
+    assert source.open()
+    frames = _read_all(source)
+
+    assert len(frames) == 10
+    assert frames[0].shape == (48, 64, 3)
+    assert source.exhausted
+    assert not source.live
+
+
+def test_synthetic_frames_are_independent_copies():
+    source = SyntheticFrameSource(64, 48, variants=1)
+    source.open()
+
+    _, first = source.read()
+    first[:] = 0
+    _, second = source.read()
+
+    assert second.any()
+
+
+def test_synthetic_source_with_fps_is_live_and_paced():
+    source = SyntheticFrameSource(32, 24, count=3, fps=1000)
+
+    source.open()
+
+    assert source.live
+    assert len(_read_all(source)) == 3
+
+
+def test_video_file_source_replays_every_frame(video_path):
+    source = VideoFileFrameSource(video_path)
+
+    assert source.open()
+    frames = _read_all(source)
+    source.release()
+
+    assert len(frames) == 5
+    assert source.fps == pytest.approx(15.0)
+    assert source.exhausted
+    assert not source.live
+
+
+def test_video_file_source_can_loop(video_path):
+    source = VideoFileFrameSource(video_path, loop=True)
+    source.open()
+
+    frames = _read_all(source, limit=12)
+
+    assert len(frames) == 12
+    assert not source.exhausted
+
+
+def test_video_file_source_reports_missing_file(tmp_path):
+    source = VideoFileFrameSource(str(tmp_path / "missing.mp4"))
+
+    assert not source.open()
+    assert "missing.mp4" in source.error
+
+
+def test_image_directory_source_reads_images_in_name_order(tmp_path):
+    for i, name in enumerate(["b.png", "a.png", "c.jpg"]):
+        cv2.imwrite(str(tmp_path / name), np.full((8, 8, 3), i * 100, dtype=np.uint8))
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    (tmp_path / "notes.txt").write_text("ignored")
+    source = ImageDirectoryFrameSource(str(tmp_path))
+
+    assert source.open()
+    frames = _read_all(source)
+
+    assert [int(f[0, 0, 0]) for f in frames[:2]] == [100, 0]
+    assert len(frames) == 3
+    assert source.skipped == 1
+    assert source.exhausted
+
+
+def test_image_directory_source_requires_images(tmp_path):
+    source = ImageDirectoryFrameSource(str(tmp_path))
+
+    assert not source.open()
+    assert "No images" in source.error
+
+
+def test_camera_source_reports_every_attempt_when_no_device_opens(monkeypatch):
+    class ClosedCapture:
+        def __init__(self, *args):
+            self.released = False
+
+        def isOpened(self):
+            return False
+
+        def release(self):
+            self.released = True
+
+    monkeypatch.setattr(frame_sources.cv2, "VideoCapture", ClosedCapture)
+    source = CameraFrameSource(index=1, backend="any")
+
+    assert not source.open()
+    assert source.attempts == [
+        "index=1, backend=default",
+        "index=0, backend=default",
+        "index=2, backend=default",
+    ]
+    assert source.error.startswith("Unable to access webcam.")
+    assert source.live
+
+
+@pytest.mark.parametrize(
+    "spec, expected_type, attribute, value",
+    [
+        ("", CameraFrameSource, "index", 0),
+        ("camera:2", CameraFrameSource, "index", 2),
+        ("video:/tmp/a.mp4", VideoFileFrameSource, "path", "/tmp/a.mp4"),
+        ("images:/tmp/frames", ImageDirectoryFrameSource, "directory", "/tmp/frames"),
+        ("synthetic:50", SyntheticFrameSource, "count", 50),
+        ("synthetic", SyntheticFrameSource, "count", None),
+    ],
+)
+def test_frame_source_from_spec(monkeypatch, spec, expected_type, attribute, value):
+    monkeypatch.delenv("FOCUS_CAMERA_INDEX", raising=False)
+
+    source = frame_source_from_spec(spec)
+
+    assert isinstance(source, expected_type)
+    assert getattr(source, attribute) == value
+
+
+def test_frame_source_from_spec_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        frame_source_from_spec("rtsp://camera")
@@ -0,0 +1,161 @@
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services.landmark_pool import LandmarkPool
+
+
+class CountingFaceMesh:
+    """Stands in for FaceMesh: one face whose landmarks all equal the frame's first pixel."""
+
+    def __init__(self, max_num_faces):
+        self.max_num_faces = max_num_faces
+
+    def process(self, rgb):
+        value = float(rgb[0, 0, 0])
+        if value == 255:
+            raise RuntimeError("bad frame")
+        if value == 0:
+            return SimpleNamespace(multi_face_landmarks=None)
+        return SimpleNamespace(multi_face_landmarks=[np.full((478, 3), value)] * self.max_num_faces)
+
+    def close(self):
+        pass
+
+
+class UnevenFaceMesh(CountingFaceMesh):
+    """Odd frames take longer, so a stream spread over two workers finishes out of order."""
+
+    def process(self, rgb):
+        if int(rgb[0, 0, 0]) % 2:
+            time.sleep(0.05)
+        return super().process(rgb)
+
+
+class CrashingFaceMesh(CountingFaceMesh):
+    """Kills its worker process on frame value 3, the way a native crash would."""
+
+    def process(self, rgb):
+        if int(rgb[0, 0, 0]) == 3:
+            os._exit(1)
+        return super().process(rgb)
+
+
+def _frame(value, size=8):
+    return np.full((size, size, 3), value, dtype=np.uint8)
+
+
+def test_results_of_each_stream_come_back_in_submission_order():
+    with LandmarkPool(2, max_num_faces=2, max_in_flight=10, detector_factory=CountingFaceMesh) as pool:
+        streams = [pool.add_stream() for _ in range(3)]
+        expected = {stream: [] for stream in streams}
+        received = {stream: [] for stream in streams}
+        for value in range(1, 31):
+            stream = streams[value % 3]
+            assert pool.submit(stream, _frame(value)) == len(expected[stream])
+            expected[stream].append(value)
+        for _ in range(30):
+            result = pool.get(timeout=5.0)
+            received[result.stream_id].append(result)
+        assert pool.in_flight() == 0
+
+    for stream in streams:
+        results = received[stream]
+        assert [r.sequence for r in results] == list(range(len(expected[stream])))
+        assert [int(r.faces[0, 0, 0]) for r in results] == expected[stream]
+        assert all(r.faces.shape == (2, 478, 3) and r.faces.dtype == np.float32 for r in results)
+
+
+def test_spread_stream_uses_every_worker_and_still_delivers_in_order():
+    with LandmarkPool(2, max_in_flight=4, detector_factory=UnevenFaceMesh) as pool:
+        stream = pool.add_stream(spread=True)
+        values = []
+        for value in range(1, 21):
+            while pool.submit(stream, _frame(value)) is None:
+                values.append(int(pool.get(timeout=5.0).faces[0, 0, 0]))
+        while pool.in_flight():
+            values.append(int(pool.get(timeout=5.0).faces[0, 0, 0]))
+
+    assert values == list(range(1, 21))
+
+
+def test_frames_that_grow_mid_stream_are_still_delivered():
+    with LandmarkPool(1, max_in_flight=2, detector_factory=CountingFaceMesh) as pool:
+        stream = pool.add_stream()
+        pool.submit(stream, _frame(1, size=4))
+        # Larger than the slots while the first frame is still in flight.
+        pool.submit(stream, _frame(2, size=16))
+        results = [pool.get(timeout=5.0), pool.get(timeout=5.0)]
+        pool.submit(stream, _frame(3, size=16))
+        results.append(pool.get(timeout=5.0))
+
+    assert [int(r.faces[0, 0, 0]) for r in results] == [1, 2, 3]
+
+
+def test_results_carry_the_timestamp_their_frame_was_submitted_with():
+    with LandmarkPool(1, detector_factory=CountingFaceMesh) as pool:
+        stream = pool.add_stream()
+        pool.submit(stream, _frame(1), timestamp=100.0)
+        before = time.time()
+        pool.submit(stream, _frame(2))
+        results = [pool.get(timeout=5.0), pool.get(timeout=5.0)]
+
+    assert results[0].timestamp == 100.0
+    assert before <= results[1].timestamp <= time.time()
+
+
+def test_a_dead_worker_fails_its_frames_instead_of_hanging():
+    with LandmarkPool(2, max_in_flight=4, detector_factory=CrashingFaceMesh) as pool:
+        stream = pool.add_stream(spread=True)
+        for value in range(1, 5):
+            pool.submit(stream, _frame(value))
+        results = [pool.get(timeout=10.0) for _ in range(4)]
+
+        assert [r.sequence for r in results] == [0, 1, 2, 3]
+        # Frame 0 shared the dead worker; its result may not have left the process.
+        assert results[1].error is None and results[3].error is None
+        assert "exited with code 1" in results[2].error
+        assert pool.error == results[2].error
+        assert pool.in_flight() == 0
+        with pytest.raises(RuntimeError, match="exited with code 1"):
+            pool.submit(stream, _frame(5))
+
+
+def test_submit_refuses_frames_beyond_the_in_flight_limit():
+    with LandmarkPool(1, max_in_flight=1, detector_factory=CountingFaceMesh) as pool:
+        stream = pool.add_stream()
+        other = pool.add_stream()
+
+        assert pool.submit(stream, _frame(1)) == 0
+        assert pool.submit(stream, _frame(2)) is None
+        start = time.monotonic()
+        assert pool.submit(stream, _frame(2), block=True, timeout=0.2) is None
+        assert time.monotonic() - start >= 0.15
+        # The limit is per stream.
+        assert pool.submit(other, _frame(3)) == 0
+
+        results = [pool.get(timeout=5.0), pool.get(timeout=5.0)]
+        assert pool.in_flight() == 0
+        assert pool.submit(stream, _frame(4)) == 1
+        assert sorted(r.stream_id for r in results) == [stream, other]
+        pool.get(timeout=5.0)
+
+
+def test_frames_without_faces_and_detector_failures_are_reported():
+    with LandmarkPool(1, detector_factory=CountingFaceMesh) as pool:
+        stream = pool.add_stream()
+        pool.submit(stream, _frame(0))
+        pool.submit(stream, _frame(255))
+        no_face, failed = pool.get(timeout=5.0), pool.get(timeout=5.0)
+
+    assert no_face.faces is None and no_face.error is None
+    assert failed.faces is None
+    assert failed.error == "RuntimeError: bad frame"
+
+
+def test_max_in_flight_must_be_positive():
+    with pytest.raises(ValueError):
+        LandmarkPool(1, max_in_flight=0)
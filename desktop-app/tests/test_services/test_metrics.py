@@ -0,0 +1,99 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from services.frame_pipeline import PipelineStats
+from services.metrics import Histogram, MetricsRegistry
+
+
+def test_histogram_quantiles_are_within_bucket_precision():
+    values = np.random.default_rng(0).lognormal(mean=2.0, sigma=1.0, size=20_000)
+    histogram = Histogram("latency_ms")
+    for value in values:
+        histogram.record(value)
+
+    for q in (0.5, 0.9, 0.99):
+        assert histogram.quantile(q) == pytest.approx(np.quantile(values, q), rel=0.04)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == len(values)
+    assert snapshot["mean"] == pytest.approx(values.mean())
+    assert snapshot["min"] == pytest.approx(values.min())
+    assert snapshot["max"] == pytest.approx(values.max())
+
+
+def test_histogram_small_values_are_exact_and_huge_values_are_clamped():
+    histogram = Histogram("latency_ms")
+    histogram.record(0.005)  # 5 us
+    histogram.record(1e12)
+
+    assert histogram.quantile(0.0) == pytest.approx(0.005)
+    assert histogram.quantile(1.0) == 1e12  # reported within the observed max
+    assert Histogram("empty").quantile(0.5) is None
+
+
+def test_registry_shares_metrics_by_name_across_threads():
+    registry = MetricsRegistry()
+
+    def work():
+        for _ in range(1000):
+            registry.counter("frames").inc()
+            registry.histogram("stage_ms").record(1.0)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.gauge("fps").set(30.0)
+
+    snapshot = registry.snapshot()
+    assert snapshot["counters"] == {"frames": 4000}
+    assert snapshot["gauges"] == {"fps": 30.0}
+    assert snapshot["histograms"]["stage_ms"]["count"] == 4000
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+
+    registry.counter("frames").inc()
+    registry.gauge("fps").set(30.0)
+    with registry.histogram("stage_ms").time():
+        pass
+
+    assert registry.snapshot() == {"enabled": False, "counters": {}, "gauges": {}, "histograms": {}}
+    assert "disabled" in registry.format_summary()
+
+
+def test_histogram_timer_records_milliseconds():
+    registry = MetricsRegistry()
+    with registry.histogram("sleep_ms").time():
+        threading.Event().wait(0.02)
+
+    assert registry.histogram("sleep_ms").snapshot()["min"] >= 19.0
+
+
+def test_dump_writes_snapshot_as_json(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("frames").inc(3)
+    registry.histogram("stage_ms").record(2.5)
+
+    path = registry.dump(str(tmp_path / "metrics.json"))
+
+    data = json.loads((tmp_path / "metrics.json").read_text())
+    assert path.endswith("metrics.json")
+    assert data["counters"] == {"frames": 3}
+    assert data["histograms"]["stage_ms"]["p50"] == pytest.approx(2.5, rel=0.02)
+    assert "stage_ms" in registry.format_summary()
+
+
+def test_pipeline_stages_feed_registry_histograms():
+    registry = MetricsRegistry()
+    stats = PipelineStats(registry)
+
+    stats.stage("inference").record(0.004)
+
+    histogram = registry.snapshot()["histograms"]["pipeline.inference_ms"]
+    assert histogram["count"] == 1
+    assert histogram["max"] == pytest.approx(4.0)
@@ -0,0 +1,98 @@
+import numpy as np
+
+from services.preview_frames import PreviewFrameSink
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _frame(w=1280, h=720):
+    frame = np.zeros((h, w, 3), dtype=np.uint8)
+    frame[..., 0] = 255  # blue in BGR
+    return frame
+
+
+def _sink(**kwargs):
+    delivered = []
+    clock = FakeClock()
+    sink = PreviewFrameSink(delivered.append, clock=clock, **kwargs)
+    sink.set_target(640, 480, visible=True)
+    return sink, delivered, clock
+
+
+def test_frames_are_downscaled_to_fit_and_converted_to_rgb():
+    sink, delivered, _ = _sink()
+
+    assert sink.submit(_frame())
+
+    preview = delivered[0]
+    assert preview.shape == (360, 640, 3)
+    assert (preview[0, 0] == (0, 0, 255)).all()
+
+
+def test_small_frames_are_not_upscaled():
+    sink, delivered, _ = _sink()
+
+    sink.submit(_frame(320, 240))
+
+    assert delivered[0].shape == (240, 320, 3)
+
+
+def test_nothing_is_produced_while_hidden_or_sizeless():
+    sink, delivered, _ = _sink()
+
+    sink.set_target(640, 480, visible=False)
+    assert not sink.wants_frame()
+    assert not sink.submit(_frame())
+    sink.set_target(0, 0, visible=True)
+    assert not sink.submit(_frame())
+
+    assert delivered == []
+
+
+def test_next_frame_waits_for_release_and_rate_limit():
+    sink, delivered, clock = _sink(max_fps=50)
+    sink.submit(_frame())
+
+    clock.now += 0.05
+    assert not sink.submit(_frame())  # previous frame still being drawn
+    sink.release()
+    assert sink.submit(_frame())
+
+    sink.release()
+    clock.now += 0.005
+    assert not sink.submit(_frame())  # faster than 50 fps
+    clock.now += 0.02
+    assert sink.submit(_frame())
+    assert len(delivered) == 3
+
+
+def test_buffer_is_reused_until_the_target_size_changes():
+    sink, delivered, clock = _sink(max_fps=1000)
+    sink.submit(_frame())
+    sink.release()
+    clock.now += 1
+    sink.submit(_frame())
+    sink.release()
+    clock.now += 1
+    sink.set_target(320, 320, visible=True)
+    sink.submit(_frame())
+
+    assert delivered[0] is delivered[1]
+    assert delivered[2] is not delivered[0]
+    assert delivered[2].shape == (180, 320, 3)
+
+
+def test_unreleased_frame_goes_stale():
+    sink, delivered, clock = _sink(stale_after=1.0)
+    sink.submit(_frame())
+
+    clock.now += 1.5
+
+    assert sink.submit(_frame())
+    assert len(delivered) == 2
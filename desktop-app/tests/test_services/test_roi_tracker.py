@@ -0,0 +1,155 @@
+import numpy as np
+import pytest
+
+from services.roi_tracker import FaceRoiTracker, Roi
+
+
+def _face_points(x0, y0, x1, y1, frame_w, frame_h, n=478):
+    """Landmarks (normalised to the full frame) spread over a pixel box."""
+    rng = np.random.default_rng(0)
+    points = np.empty((n, 3))
+    points[:, 0] = rng.uniform(x0, x1, n) / frame_w
+    points[:, 1] = rng.uniform(y0, y1, n) / frame_h
+    points[:, 2] = rng.uniform(-0.05, 0.05, n)
+    points[0, :2] = (x0 / frame_w, y0 / frame_h)
+    points[1, :2] = (x1 / frame_w, y1 / frame_h)
+    return points
+
+
+def _frame(w=1920, h=1080):
+    return np.zeros((h, w, 3), dtype=np.uint8)
+
+
+def test_without_a_face_the_whole_frame_is_downscaled():
+    tracker = FaceRoiTracker(full_frame_max_side=640)
+
+    rgb, roi = tracker.prepare(_frame())
+
+    assert roi.is_full_frame
+    assert rgb.shape == (360, 640, 3)
+    assert not tracker.tracking
+
+
+def test_tracked_face_crops_a_padded_square_around_it():
+    tracker = FaceRoiTracker(padding=0.5, roi_size=256)
+    tracker.prepare(_frame())
+
+    tracker.update(_face_points(900, 400, 1100, 600, 1920, 1080))
+    rgb, roi = tracker.prepare(_frame())
+
+    assert tracker.tracking
+    assert (roi.w, roi.h) == (400, 400)
+    assert roi.x <= 900 and roi.x + roi.w >= 1100
+    assert roi.y <= 400 and roi.y + roi.h >= 600
+    assert rgb.shape == (256, 256, 3)
+
+
+def test_crop_is_taken_from_the_right_part_of_the_frame():
+    frame = _frame(640, 480)
+    frame[100:200, 300:400] = (255, 0, 0)  # blue in BGR
+    tracker = FaceRoiTracker(padding=0.0, roi_size=1000)
+    tracker.prepare(frame)
+
+    tracker.update(_face_points(300, 100, 400, 200, 640, 480))
+    rgb, roi = tracker.prepare(frame)
+
+    assert (roi.x, roi.y, roi.w, roi.h) == (300, 100, 100, 100)
+    assert (rgb == (0, 0, 255)).all()  # converted to RGB
+
+
+def test_landmarks_map_back_to_full_frame_coordinates():
+    roi = Roi(x=800, y=300, w=400, h=400, frame_w=1920, frame_h=1080)
+    expected = _face_points(900, 400, 1100, 600, 1920, 1080)
+    # What FaceMesh would report for the crop: normalised to the ROI.
+    in_roi = expected.copy()
+    in_roi[:, 0] = (expected[:, 0] * 1920 - roi.x) / roi.w
+    in_roi[:, 1] = (expected[:, 1] * 1080 - roi.y) / roi.h
+    in_roi[:, 2] = expected[:, 2] * 1920 / roi.w
+
+    mapped = FaceRoiTracker.to_frame_coordinates(in_roi, roi)
+
+    np.testing.assert_allclose(mapped, expected)
+
+
+def test_full_frame_landmarks_are_returned_unchanged():
+    points = _face_points(10, 10, 50, 50, 64, 48)
+    roi = Roi(0, 0, 64, 48, 64, 48)
+
+    assert FaceRoiTracker.to_frame_coordinates(points, roi) is points
+
+
+def test_small_movements_keep_the_same_roi():
+    tracker = FaceRoiTracker(padding=0.5)
+    tracker.prepare(_frame())
+    tracker.update(_face_points(900, 400, 1100, 600, 1920, 1080))
+    _, first = tracker.prepare(_frame())
+
+    tracker.update(_face_points(920, 410, 1120, 610, 1920, 1080))
+    _, second = tracker.prepare(_frame())
+
+    assert second == first
+
+
+def test_face_near_the_edge_recenters_the_roi():
+    tracker = FaceRoiTracker(padding=0.5, edge_margin=0.1)
+    tracker.prepare(_frame())
+    tracker.update(_face_points(900, 400, 1100, 600, 1920, 1080))
+    _, first = tracker.prepare(_frame())
+
+    tracker.update(_face_points(1000, 400, 1200, 600, 1920, 1080))
+    _, second = tracker.prepare(_frame())
+
+    assert second != first
+    assert second.x <= 1000 and second.x + second.w >= 1200
+
+
+def test_shrinking_face_tightens_the_roi():
+    tracker = FaceRoiTracker(padding=0.5, min_face_fraction=0.35)
+    tracker.prepare(_frame())
+    tracker.update(_face_points(800, 300, 1200, 700, 1920, 1080))
+    _, first = tracker.prepare(_frame())
+
+    tracker.update(_face_points(950, 450, 1050, 550, 1920, 1080))
+    _, second = tracker.prepare(_frame())
+
+    assert second.w < first.w
+
+
+def test_roi_is_clamped_to_the_frame():
+    tracker = FaceRoiTracker(padding=0.5)
+    tracker.prepare(_frame())
+
+    tracker.update(_face_points(0, 0, 200, 200, 1920, 1080))
+    _, roi = tracker.prepare(_frame())
+
+    assert (roi.x, roi.y) == (0, 0)
+    assert roi.x + roi.w <= 1920 and roi.y + roi.h <= 1080
+
+
+def test_face_filling_the_frame_stays_on_full_frame():
+    tracker = FaceRoiTracker(padding=0.5)
+    tracker.prepare(_frame(640, 480))
+
+    tracker.update(_face_points(100, 50, 540, 430, 640, 480))
+
+    assert not tracker.tracking
+
+
+@pytest.mark.parametrize("lost", ["update_none", "reset", "resolution_change"])
+def test_losing_the_face_falls_back_to_full_frame(lost):
+    tracker = FaceRoiTracker()
+    tracker.prepare(_frame())
+    tracker.update(_face_points(900, 400, 1100, 600, 1920, 1080))
+    assert tracker.tracking
+
+    frame = _frame()
+    if lost == "update_none":
+        tracker.update(None)
+    elif lost == "reset":
+        tracker.reset()
+    else:
+        frame = _frame(1280, 720)
+    _, roi = tracker.prepare(frame)
+
+    assert roi.is_full_frame
+    assert not tracker.tracking
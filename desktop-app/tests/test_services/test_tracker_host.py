@@ -0,0 +1,191 @@
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from services.frame_sources import FrameSource, SyntheticFrameSource
+from services.tracker_host import TrackerHost
+
+
+def _face_points(x0, size):
+    points = np.random.default_rng(0).uniform(0.0, 1.0, size=(478, 3))
+    points[:, 0] = x0 + points[:, 0] * size
+    points[:, 1] = 0.2 + points[:, 1] * size
+    return points
+
+
+class TwoFaceMesh:
+    """Stands in for FaceMesh: a small face on the left and a larger one on the right."""
+
+    def __init__(self, max_num_faces):
+        self.faces = [_face_points(0.05, 0.2), _face_points(0.5, 0.3)][:max_num_faces]
+
+    def process(self, rgb):
+        return SimpleNamespace(multi_face_landmarks=self.faces)
+
+    def close(self):
+        pass
+
+
+class SlowFaceMesh(TwoFaceMesh):
+    def process(self, rgb):
+        time.sleep(0.02)
+        return super().process(rgb)
+
+
+class CrashingFaceMesh(TwoFaceMesh):
+    """Kills its worker process on the third frame."""
+
+    def __init__(self, max_num_faces):
+        super().__init__(max_num_faces)
+        self.calls = 0
+
+    def process(self, rgb):
+        self.calls += 1
+        if self.calls == 3:
+            os._exit(1)
+        return super().process(rgb)
+
+
+class BlinkingFaceMesh(TwoFaceMesh):
+    """Finds the faces on odd frames only."""
+
+    def __init__(self, max_num_faces):
+        super().__init__(max_num_faces)
+        self.calls = 0
+
+    def process(self, rgb):
+        self.calls += 1
+        if self.calls % 2 == 0:
+            return SimpleNamespace(multi_face_landmarks=None)
+        return super().process(rgb)
+
+
+class RecordingAssigner:
+    def __init__(self):
+        self.frames = []
+
+    def assign(self, boxes):
+        self.frames.append("none" if boxes is None else "faces")
+        return list(range(len(boxes))) if boxes is not None else []
+
+
+class BatchPredictor:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_batch(self, feature_matrix):
+        self.batch_sizes.append(len(feature_matrix))
+        states = (feature_matrix[:, 0] > 0.4).astype(int)
+        return states, np.where(states == 1, 0.9, 0.2)
+
+
+class FloodCamera(FrameSource):
+    """A live source that always has a new frame."""
+
+    def read(self):
+        time.sleep(0.001)
+        return True, np.zeros((8, 8, 3), dtype=np.uint8)
+
+
+def test_host_scores_every_recorded_frame_of_every_stream_in_shared_batches():
+    predictor = BatchPredictor()
+    received = {}
+    host = TrackerHost(
+        "unused",
+        landmark_workers=2,
+        max_num_faces=2,
+        on_samples=lambda name, samples: received.setdefault(name, []).append(samples),
+        detector_factory=TwoFaceMesh,
+        predictor=predictor,
+    )
+    for index in range(3):
+        host.add_stream(f"desk-{index}", SyntheticFrameSource(32, 24, count=20, seed=index))
+
+    report = host.run()
+
+    assert report["frames_processed"] == 60
+    assert sum(predictor.batch_sizes) == 120
+    assert report["model_batches"] == len(predictor.batch_sizes)
+    for index in range(3):
+        stats = report["streams"][f"desk-{index}"]
+        assert stats["frames_scored"] == 20 and stats["faces_scored"] == 40
+        assert stats["frames_dropped"] == 0
+        frames = received[f"desk-{index}"]
+        assert len(frames) == 20
+        # Largest face first, focused, with the same track ids in every frame.
+        assert [(s["attention_state"], s["session_id"]) for s in frames[0]] == [
+            (1, f"desk-{index}"), (0, f"desk-{index}")]
+        assert {tuple(s["track_id"] for s in samples) for samples in frames} == {(2, 1)}
+
+
+def test_live_streams_drop_frames_the_pool_cannot_keep_up_with():
+    host = TrackerHost(
+        "unused",
+        landmark_workers=1,
+        max_in_flight=1,
+        detector_factory=SlowFaceMesh,
+        predictor=BatchPredictor(),
+    )
+    host.add_stream("kiosk", FloodCamera())
+
+    report = host.run(duration=0.5)
+
+    stats = report["streams"]["kiosk"]
+    assert stats["frames_scored"] > 0
+    assert stats["frames_dropped"] > 0
+    assert stats["frames_read"] == stats["frames_dropped"] + stats["frames_scored"]
+    # Single-face hosts do not track ids.
+    assert report["mean_batch_faces"] == 1.0
+
+
+def test_unopenable_stream_reports_its_error_and_the_rest_still_run():
+    host = TrackerHost("unused", landmark_workers=1, detector_factory=TwoFaceMesh, predictor=BatchPredictor())
+    missing = host.add_stream("missing", FrameSource())
+    missing.source.open = lambda: False
+    missing.source.error = "Video file not found: nowhere.mp4"
+    host.add_stream("ok", SyntheticFrameSource(16, 16, count=5))
+
+    report = host.run()
+
+    assert report["streams"]["missing"]["error"] == "Video file not found: nowhere.mp4"
+    assert report["streams"]["ok"]["frames_scored"] == 5
+
+
+def test_host_stops_and_reports_a_dead_landmark_worker():
+    host = TrackerHost("unused", landmark_workers=1, detector_factory=CrashingFaceMesh, predictor=BatchPredictor())
+    host.add_stream("desk", SyntheticFrameSource(16, 16, count=50))
+
+    report = host.run(duration=30.0)
+
+    assert report["elapsed_s"] < 20.0
+    assert "exited with code 1" in report["error"]
+    stats = report["streams"]["desk"]
+    assert stats["frames_scored"] <= 2
+    assert stats["frames_failed"] >= 1
+
+
+def test_frames_reach_the_tracks_in_order_with_their_own_timestamps():
+    received = []
+    host = TrackerHost(
+        "unused",
+        landmark_workers=1,
+        max_num_faces=2,
+        max_in_flight=8,
+        on_samples=lambda name, samples: received.append(samples),
+        detector_factory=BlinkingFaceMesh,
+        predictor=BatchPredictor(),
+    )
+    stream = host.add_stream("desk", SyntheticFrameSource(16, 16, count=20))
+    stream.track_assigner = RecordingAssigner()
+    before = time.time()
+
+    report = host.run()
+
+    assert report["streams"]["desk"]["frames_scored"] == 10
+    assert stream.track_assigner.frames == ["faces", "none"] * 10
+    timestamps = [samples[0]["timestamp"] for samples in received]
+    assert all(len({s["timestamp"] for s in samples}) == 1 for samples in received)
+    assert timestamps == sorted(timestamps) and len(set(timestamps)) == 10
+    assert before <= timestamps[0]
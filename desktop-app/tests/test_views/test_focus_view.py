@@ -0,0 +1,46 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from view.focus_view import FocusView
+from viewmodel.focus_viewmodel import FocusViewModel
+
+
+@pytest.fixture
+def view_and_viewmodel(qtbot):
+    vm = MagicMock(spec=FocusViewModel)
+    vm._mode = "focus"
+    # Signals are only connected to on init.
+    for signal in ("timer_update", "session_started", "session_stopped", "break_started",
+                   "focus_resumed", "frame_ready", "error_occurred"):
+        setattr(vm, signal, MagicMock())
+    view = FocusView(vm, None)
+    qtbot.addWidget(view)
+    return view, vm
+
+
+def test_preview_target_follows_feed_visibility(view_and_viewmodel):
+    view, vm = view_and_viewmodel
+    view.show()
+    # The setup page is showing, not the camera feed.
+    assert vm.set_preview_target.call_args.args[2] is False
+
+    view.on_session_started()
+    width, height, visible = vm.set_preview_target.call_args.args
+    assert visible is True
+    assert width > 0 and height > 0
+
+    view.hide()
+    assert vm.set_preview_target.call_args.args[2] is False
+
+
+@pytest.mark.parametrize("mode", ["focus", "break"])
+def test_preview_frame_is_always_released(view_and_viewmodel, mode):
+    view, vm = view_and_viewmodel
+    vm._mode = mode
+
+    view.update_camera_feed(np.zeros((36, 64, 3), dtype=np.uint8))
+
+    vm.preview_frame_consumed.assert_called_once()
+    assert (view.camera_feed_label.pixmap().isNull()) == (mode != "focus")
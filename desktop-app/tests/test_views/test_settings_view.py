@@ -0,0 +1,33 @@
+import json
+
+from services.metrics import MetricsRegistry
+from view import settings_view as settings_view_module
+from view.settings_view import SettingsView
+
+
+def test_diagnostics_panel_shows_and_saves_metrics(qtbot, monkeypatch, tmp_path):
+    registry = MetricsRegistry()
+    registry.histogram("pipeline.inference_ms").record(12.5)
+    monkeypatch.setattr(settings_view_module, "metrics", registry)
+    monkeypatch.setattr(settings_view_module, "get_data_dir", lambda: str(tmp_path))
+    view = SettingsView()
+    qtbot.addWidget(view)
+
+    view.refresh_metrics()
+    assert "pipeline.inference_ms" in view.metrics_text.toPlainText()
+
+    view.save_metrics_btn.click()
+    saved = list(tmp_path.glob("metrics_*.json"))
+    assert len(saved) == 1
+    assert json.loads(saved[0].read_text())["histograms"]["pipeline.inference_ms"]["count"] == 1
+    assert str(saved[0]) in view.metrics_status_label.text()
+
+
+def test_metrics_refresh_only_while_visible(qtbot):
+    view = SettingsView()
+    qtbot.addWidget(view)
+
+    view.show()
+    assert view.metrics_timer.isActive()
+    view.hide()
+    assert not view.metrics_timer.isActive()
@@ -3,11 +3,11 @@ from PySide6.QtWidgets import (
     QLineEdit, QStackedWidget, QFrame, QDialog, QScrollArea, QMessageBox,
     QGraphicsDropShadowEffect, QSpacerItem, QSizePolicy
 )
-from PySide6.QtCore import Qt, QSize, Signal, QUrl
+from PySide6.QtCore import Qt, QSize, Signal, QUrl, QEvent
 from PySide6.QtGui import QIcon, QColor, QFont, QImage, QPixmap, QDesktopServices
 from PySide6.QtCore import Qt, QSize, Signal
 from PySide6.QtGui import QIcon, QColor, QFont, QImage, QPixmap
-import cv2
+from services.metrics import registry as metrics
 from view.components.circular_progress import CircularProgressWidget
 
 
@@ -387,6 +387,10 @@ class FocusView(QWidget):
         self.viewmodel.frame_ready.connect(self.update_camera_feed)
         self.viewmodel.error_occurred.connect(self.on_error)
 
+        # Preview frames are only produced while the feed label is on screen.
+        self.camera_feed_label.installEventFilter(self)
+        self._watched_window = None
+
     def on_start_clicked(self):
         try:
             minutes = int(self.duration_input.input_field.text())
@@ -430,24 +434,54 @@ class FocusView(QWidget):
         self.circular_progress.set_text(time_str)
         self.circular_progress.set_progress(progress)
 
-    def update_camera_feed(self, frame):
-        if self.viewmodel._mode != "focus":
-            return
+    def showEvent(self, event):
+        super().showEvent(event)
+        window = self.window()
+        if window is not self._watched_window:
+            window.installEventFilter(self)
+            self._watched_window = window
+        screen = self.screen()
+        if screen is not None and screen.refreshRate() > 0:
+            self.viewmodel.set_preview_max_fps(screen.refreshRate())
+        self._update_preview_target()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._update_preview_target()
+
+    def eventFilter(self, obj, event):
+        if obj is self.camera_feed_label and event.type() in (
+                QEvent.Resize, QEvent.Show, QEvent.Hide):
+            self._update_preview_target()
+        elif obj is self._watched_window and event.type() == QEvent.WindowStateChange:
+            self._update_preview_target()
+        return super().eventFilter(obj, event)
+
+    def _update_preview_target(self):
+        label = self.camera_feed_label
+        window = self.window()
+        visible = label.isVisible() and not (window is not None and window.isMinimized())
+        # Physical pixels, so HiDPI screens still get a sharp preview.
+        ratio = label.devicePixelRatioF()
+        self.viewmodel.set_preview_target(
+            int(label.width() * ratio), int(label.height() * ratio), visible)
 
-        # Frame is BGR numpy array from opencv
-        rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_image.shape
-        bytes_per_line = ch * w
-        q_img = QImage(rgb_image.data, w, h,
-                       bytes_per_line, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(q_img)
-        # Scale pixmap to fit the label while keeping aspect ratio
-        scaled_pixmap = pixmap.scaled(
-            self.camera_feed_label.size(),
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
-        )
-        self.camera_feed_label.setPixmap(scaled_pixmap)
+    def update_camera_feed(self, frame):
+        # Frame is an RGB array already sized for the label; it is reused for
+        # the next frame once released.
+        try:
+            if self.viewmodel._mode != "focus":
+                return
+
+            with metrics.histogram("ui.frame_render_ms").time():
+                h, w, ch = frame.shape
+                q_img = QImage(frame.data, w, h, ch * w, QImage.Format_RGB888)
+                # fromImage copies the pixels, so the buffer can be released.
+                pixmap = QPixmap.fromImage(q_img)
+                pixmap.setDevicePixelRatio(self.camera_feed_label.devicePixelRatioF())
+                self.camera_feed_label.setPixmap(pixmap)
+        finally:
+            self.viewmodel.preview_frame_consumed()
 
     def on_error(self, message):
         QMessageBox.critical(self, "Error", message)
@@ -1,10 +1,15 @@
+import os
+import time
+
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-    QFrame, QSpacerItem, QSizePolicy, QLineEdit
+    QFrame, QSpacerItem, QSizePolicy, QLineEdit, QPlainTextEdit
 )
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QIcon, QColor, QFont, QCursor
+from PySide6.QtCore import Qt, Signal, QTimer
+from PySide6.QtGui import QIcon, QColor, QFont, QCursor, QFontDatabase
 
+from paths import get_data_dir
+from services.metrics import registry as metrics
 from services.notification_service import NotificationService
 
 class SettingsView(QWidget):
@@ -259,6 +264,80 @@ class SettingsView(QWidget):
         notif_card_layout.addWidget(self.notif_freq_input)
 
         content_layout.addWidget(notifications_card)
+
+        # --- Diagnostics Card ---
+        diagnostics_card = QFrame()
+        diagnostics_card.setStyleSheet("""
+            .QFrame {
+                background-color: #1A1B23; 
+                border-radius: 16px; 
+                border: 1px solid #2A2B35;
+            }
+        """)
+        diag_card_layout = QVBoxLayout(diagnostics_card)
+        diag_card_layout.setContentsMargins(24, 24, 24, 24)
+        diag_card_layout.setSpacing(8)
+
+        diag_title = QLabel("Diagnostics")
+        diag_title.setStyleSheet("color: #E0E1E6; font-size: 18px; font-weight: 600;")
+        diag_card_layout.addWidget(diag_title)
+
+        diag_hint = QLabel("Pipeline timings in milliseconds, refreshed every second.")
+        diag_hint.setStyleSheet("color: #8A8DA0; font-size: 14px; font-weight: 500;")
+        diag_card_layout.addWidget(diag_hint)
+
+        self.metrics_text = QPlainTextEdit()
+        self.metrics_text.setReadOnly(True)
+        self.metrics_text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.metrics_text.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.metrics_text.setFixedHeight(180)
+        self.metrics_text.setStyleSheet("""
+            QPlainTextEdit {
+                background-color: #12131A;
+                color: #E0E1E6;
+                font-size: 12px;
+                border: 1px solid #2A2B35;
+                border-radius: 8px;
+                padding: 8px;
+            }
+        """)
+        diag_card_layout.addWidget(self.metrics_text)
+
+        self.save_metrics_btn = QPushButton("Save as JSON")
+        self.save_metrics_btn.setCursor(Qt.PointingHandCursor)
+        self.save_metrics_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #3B82F6; 
+                color: #FFFFFF; 
+                font-size: 14px;
+                font-weight: 600;
+                border-radius: 8px; 
+                padding: 10px 16px;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #2563EB;
+            }
+            QPushButton:pressed {
+                background-color: #1D4ED8;
+            }
+        """)
+        self.save_metrics_btn.clicked.connect(self._handle_save_metrics)
+
+        self.metrics_status_label = QLabel("")
+        self.metrics_status_label.setStyleSheet("color: #8A8DA0; font-size: 13px;")
+
+        diag_btn_layout = QHBoxLayout()
+        diag_btn_layout.addWidget(self.save_metrics_btn)
+        diag_btn_layout.addWidget(self.metrics_status_label, 1)
+        diag_card_layout.addLayout(diag_btn_layout)
+
+        content_layout.addWidget(diagnostics_card)
+
+        # Only refresh while the page is on screen.
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(1000)
+        self.metrics_timer.timeout.connect(self.refresh_metrics)
         
         content_layout.addStretch()
         
@@ -285,6 +364,28 @@ class SettingsView(QWidget):
     def _handle_test_notification(self):
         NotificationService.send_notification("Screen Gaze", "User Distracted")
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh_metrics()
+        self.metrics_timer.start()
+
+    def hideEvent(self, event):
+        self.metrics_timer.stop()
+        super().hideEvent(event)
+
+    def refresh_metrics(self):
+        """Show the current metrics registry snapshot in the diagnostics card."""
+        self.metrics_text.setPlainText(metrics.format_summary())
+
+    def _handle_save_metrics(self):
+        path = os.path.join(get_data_dir(), f"metrics_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        try:
+            metrics.dump(path)
+        except OSError as exc:
+            self.metrics_status_label.setText(f"Could not save metrics: {exc}")
+            return
+        self.metrics_status_label.setText(f"Saved to {path}")
+
     # ------------------------------------------------------------------
     # Public accessors for distraction notifier settings
     # ------------------------------------------------------------------
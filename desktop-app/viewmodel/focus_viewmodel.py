@@ -12,14 +12,19 @@ from firebase_admin import firestore
 
 from db.session_repository import SessionRepository
 from db.user_repository import UserRepository
+from services.attention_window import AttentionWindow
 from services.distraction_notifier_worker import DistractionNotifierWorker
 from services.focus_tracking_worker import FocusTrackingWorker
 from services.notification_service import NotificationService
+from services.preview_frames import PreviewFrameSink
 from scripts import build_reports
 from paths import resource_path
 
 
 class FocusViewModel(QObject):
+    # Seconds the report sync waits for the tracking worker's final metrics.
+    FINAL_METRICS_TIMEOUT = 60.0
+
     # Signal emited with (time_string, progress_value_0_to_100)
     timer_update = Signal(str, float)
     session_started = Signal()
@@ -28,7 +33,8 @@ class FocusViewModel(QObject):
     break_started = Signal(str)
     focus_resumed = Signal()  # New signal when break ends and focus resumes
     error_occurred = Signal(str)
-    # Signal emitted with numpy.ndarray containing the frame
+    # Signal emitted with an RGB numpy.ndarray already sized for the preview.
+    # The array is reused; call preview_frame_consumed() once it is drawn.
     frame_ready = Signal(object)
 
     def __init__(self, auth_viewmodel=None):
@@ -36,6 +42,7 @@ class FocusViewModel(QObject):
         self._auth_viewmodel = auth_viewmodel
         self._is_running = False
         self._stop_event = None
+        self._worker = None
         self._worker_thread = None
         self._notifier_thread = None
         self._session_id = None
@@ -58,6 +65,8 @@ class FocusViewModel(QObject):
 
         self._settings_view = None
 
+        self._preview = PreviewFrameSink(self.frame_ready.emit)
+
     @property
     def is_running(self):
         return self._is_running
@@ -66,6 +75,17 @@ class FocusViewModel(QObject):
         """Provide a reference to the SettingsView so we can read user preferences."""
         self._settings_view = view
 
+    def set_preview_target(self, width, height, visible):
+        """Size of the camera preview area and whether it is currently on screen."""
+        self._preview.set_target(width, height, visible)
+
+    def set_preview_max_fps(self, fps):
+        self._preview.set_max_fps(fps)
+
+    def preview_frame_consumed(self):
+        """The last frame_ready array has been drawn and may be overwritten."""
+        self._preview.release()
+
     def _resolve_model_path(self) -> str:
         default_model_path = resource_path(
             os.path.join(
@@ -123,7 +143,18 @@ class FocusViewModel(QObject):
             )
             self._session_start_ts = time.time()
 
+            # Distraction notifier settings
+            eval_window = 20
+            cooldown = 60
+            if self._settings_view is not None:
+                eval_window = self._settings_view.get_distracted_time_seconds()
+                cooldown = self._settings_view.get_notif_frequency_seconds()
+
+            # Shared with the notifier so it can judge focus without SQLite reads
+            attention_window = AttentionWindow(window_seconds=max(eval_window, 5))
+
             self._stop_event = threading.Event()
+            self._preview.reset()
             worker = FocusTrackingWorker(
                 user_id=user.uid,
                 session_id=self._session_id,
@@ -131,23 +162,21 @@ class FocusViewModel(QObject):
                 model_path=model_path,
                 error_callback=self.error_occurred.emit,
                 frame_callback=self._on_frame_received,
+                frame_wanted=self._on_frame_processed,
+                attention_window=attention_window,
             )
+            self._worker = worker
             self._worker_thread = threading.Thread(
                 target=worker.run, daemon=True)
             self._worker_thread.start()
 
             # Start the distraction notifier alongside the ML worker
-            eval_window = 20
-            cooldown = 60
-            if self._settings_view is not None:
-                eval_window = self._settings_view.get_distracted_time_seconds()
-                cooldown = self._settings_view.get_notif_frequency_seconds()
-
             notifier = DistractionNotifierWorker(
                 session_id=self._session_id,
                 stop_event=self._stop_event,
                 evaluation_window=eval_window,
                 cooldown=cooldown,
+                attention_window=attention_window,
             )
             self._notifier_thread = threading.Thread(
                 target=notifier.run, daemon=True)
@@ -198,9 +227,12 @@ class FocusViewModel(QObject):
 
             self._sync_session_end_to_firestore_async(
                 session_id, duration_seconds)
-            self._sync_report_to_firestore_async(session_id)
+            worker = self._worker
+            self._sync_report_to_firestore_async(
+                session_id, worker.metrics_saved if worker is not None else None)
 
         self._stop_event = None
+        self._worker = None
         self._worker_thread = None
         self._notifier_thread = None
         self._session_id = None
@@ -298,9 +330,20 @@ class FocusViewModel(QObject):
 
         threading.Thread(target=_run, daemon=True).start()
 
-    def _sync_report_to_firestore_async(self, session_id: str):
+    def _sync_report_to_firestore_async(self, session_id: str, metrics_saved=None):
+        """Build and upload the session report once *metrics_saved* is set.
+
+        Worker teardown can outlast the join in _stop_ml_process; the
+        report waits here, off the UI thread, so it reads the final
+        session_metrics row rather than a stale one.
+        """
         def _run():
             try:
+                if metrics_saved is not None and not metrics_saved.wait(self.FINAL_METRICS_TIMEOUT):
+                    print(
+                        f"[FocusViewModel] Tracking worker did not save final metrics within "
+                        f"{self.FINAL_METRICS_TIMEOUT:.0f}s; reporting the last saved ones.",
+                        flush=True)
                 db_path = self._session_repo.db.db_path
                 key_path = os.getenv(
                     "FIREBASE_KEY_PATH",
@@ -444,7 +487,12 @@ class FocusViewModel(QObject):
         size = screen.size()
         return int(size.width()), int(size.height())
 
-    def _on_frame_received(self, frame):
+    def _on_frame_processed(self):
+        # Called from the worker thread for every processed frame, so it also
+        # marks the camera as started even when the preview is hidden.
         if self._mode == "focus" and not getattr(self, "_camera_ready", False):
             self._camera_ready = True
-        self.frame_ready.emit(frame)
+        return self._preview.wants_frame()
+
+    def _on_frame_received(self, frame):
+        self._preview.submit(frame)